@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+备份任务服务
+
+功能：把JJWXCBackupTool包装为HTTP服务，提交、查看和取消备份任务，按章节推送备份进度
+
+使用方法：
+python app/main.py                                 # 监听127.0.0.1:8000，备份根目录backup/
+python app/main.py --port 8080 --jobs 2 --global-rps 4
+
+接口：
+POST /api/jobs                  提交任务（JSON，见JobManager.submit），返回任务信息（201）
+GET  /api/jobs                  任务列表（按提交顺序）
+GET  /api/jobs/{id}             任务详情（含各作品的备份结果）
+POST /api/jobs/{id}/cancel      取消任务：排队中的直接取消，运行中的在章节之间停止
+GET  /api/jobs/{id}/events      进度事件流（Server-Sent Events），先补发已有事件，任务结束后关闭；
+                                断线重连时按Last-Event-ID只补发之后的事件
+GET  /api/health                服务状态
+
+说明：
+- 基于aiohttp.web（异步引擎已使用aiohttp），备份在任务线程池中运行，不占用处理请求的事件循环
+- 每个任务一个JJWXCBackupTool，输出到 output_root/<账号名>/YYYYMMDD_HHMMSS/；
+  同一账号的任务依次运行，不同账号的任务最多max_jobs个同时运行
+- 限速分两级：每个任务自己的令牌桶 + 所有任务共享的全局令牌桶，所有任务共享同一个熔断器（与多账号备份相同）
+- 请求中的cookie保存为 output_root/_cookies/<账号名>.txt（仅所有者可读），之后同一账号的任务可省略
+- 服务不做身份验证，默认只监听本机地址
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+import functools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from rate_limiter import (
+    HostRateLimiter, ChainedRateLimiter, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST, DEFAULT_JITTER
+)
+from retry_policy import CircuitBreaker
+from jjwxc_col import (
+    JJWXCBackupTool, results_exit_code, EXIT_OK, EXIT_PARTIAL, EXIT_LOGIN_FAILED, EXIT_NO_MATCH
+)
+from multi_account import PROFILE_OPTIONS, safe_account_name
+from novel_filter import build_novel_filter
+
+# 任务状态：排队中、运行中，以及结束后的状态
+FINAL_STATUSES = ('completed', 'partial', 'login_failed', 'no_match', 'failed', 'cancelled')
+EXIT_STATUSES = {
+    EXIT_OK: 'completed',
+    EXIT_PARTIAL: 'partial',
+    EXIT_LOGIN_FAILED: 'login_failed',
+    EXIT_NO_MATCH: 'no_match',
+}
+
+# 作品筛选条件（同novel_filter.build_novel_filter）
+SELECTION_KEYS = ('novel_ids', 'titles', 'statuses')
+
+# 任务请求可以设置的备份参数：服务不做身份验证，任务会带上账号保存的Cookie，
+# 所以后台地址（base_url）只能在启动服务时设置，不能由请求指定
+JOB_OPTIONS = tuple(option for option in PROFILE_OPTIONS if option != 'base_url')
+
+# 事件流保活间隔（秒），防止代理断开空闲连接
+KEEPALIVE_SECONDS = 15
+
+
+class BackupJob:
+    def __init__(self, job_id, account, selection, options, max_events=10000):
+        """
+        备份任务
+
+        参数：
+            job_id (str): 任务ID
+            account (str): 账号名（决定Cookie文件和输出子目录）
+            selection (dict): 作品筛选条件 {'novel_ids', 'titles', 'statuses'}
+            options (dict): 传给JJWXCBackupTool的备份参数（JOB_OPTIONS）
+            max_events (int): 保留的进度事件数（超出后丢弃最早的事件）
+
+        说明：
+            除cancel_event和tool外，任务状态只在服务的事件循环中修改
+        """
+        self.id = job_id
+        self.account = account
+        self.selection = selection
+        self.options = options
+        self.status = 'queued'
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.output_dir = None
+        self.novels = []
+        self.chapters = {'total': 0, 'saved': 0, 'failed': 0}
+        self.error = None
+        self.events = deque(maxlen=max_events)
+        self.last_event_id = 0
+        self.cancel_event = threading.Event()
+        self.tool = None
+        self.future = None
+
+    @property
+    def finished(self):
+        return self.status in FINAL_STATUSES
+
+    def to_dict(self, detail=False):
+        """
+        任务信息（JSON）
+
+        参数：
+            detail (bool): 是否包含各作品的备份结果
+        """
+        data = {
+            'id': self.id,
+            'account': self.account,
+            'status': self.status,
+            'selection': self.selection,
+            'options': self.options,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'output_dir': self.output_dir,
+            'chapters': self.chapters,
+            'error': self.error,
+        }
+        if detail:
+            data['novels'] = self.novels
+        return data
+
+
+class JobManager:
+    def __init__(self, output_root="backup", max_jobs=2, global_requests_per_second=4.0, global_burst=4,
+                 max_events=10000, **tool_options):
+        """
+        备份任务管理
+
+        参数：
+            output_root (str): 备份根目录，每个账号一个子目录
+            max_jobs (int): 同时运行的任务数（任务线程池大小）
+            global_requests_per_second (float): 所有任务合计的请求速率上限（请求/秒）
+            global_burst (int): 全局允许的突发请求数
+            max_events (int): 每个任务保留的进度事件数
+            **tool_options: 传给每个JJWXCBackupTool的参数（任务请求中的同名参数优先）
+        """
+        self.output_root = output_root
+        self.max_jobs = max(1, int(max_jobs))
+        self.max_events = max_events
+        self.global_limiter = HostRateLimiter(global_requests_per_second, global_burst, jitter=0)
+        self.circuit_breaker = tool_options.pop('circuit_breaker', None) or CircuitBreaker()
+        self.tool_options = tool_options
+        self.jobs = {}  # {任务ID: BackupJob}，按提交顺序
+        self._queue = []  # 排队中的任务
+        self._running = {}  # {账号名: 运行中的任务}
+        self._subscribers = {}  # {任务ID: 事件流队列集合}
+        self._executor = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="job")
+        self._loop = None
+
+    def start(self, loop):
+        """绑定服务的事件循环（任务线程通过它投递进度事件）"""
+        self._loop = loop
+
+    def cookie_path(self, account):
+        """账号的Cookie文件路径"""
+        return os.path.join(self.output_root, "_cookies", f"{account}.txt")
+
+    def submit(self, request):
+        """
+        提交备份任务
+
+        参数：
+            request (dict): {
+                "account": "作者A",              # 账号名，默认default
+                "cookie": "name=value; ...",     # 可选，保存后同一账号的任务可省略
+                "novel_ids": ["1234567"],        # 作品筛选条件（同命令行--novel-id/--title/--status），
+                "titles": [], "statuses": [],    # 都省略时备份全部作品
+                "max_workers": 4, ...            # 备份参数，见JOB_OPTIONS（不能指定base_url）
+            }
+
+        返回：
+            BackupJob: 新任务（排队中或已开始）
+
+        异常：
+            ValueError: 请求格式错误、有未知参数或账号没有Cookie
+        """
+        if not isinstance(request, dict):
+            raise ValueError("请求内容应为JSON对象")
+        request = dict(request)
+        account = safe_account_name(request.pop('account', None) or 'default')
+        cookie = request.pop('cookie', None)
+        selection = {key: _string_list(request.pop(key, None), key) for key in SELECTION_KEYS}
+        unknown = set(request) - set(JOB_OPTIONS)
+        if unknown:
+            raise ValueError(f"未知参数: {', '.join(sorted(unknown))}")
+
+        cookie_file = self.cookie_path(account)
+        if cookie:
+            _write_private(cookie_file, str(cookie).strip())
+        elif not os.path.isfile(cookie_file):
+            raise ValueError(f"账号 {account} 没有保存的Cookie，请在请求中提供cookie")
+
+        job = BackupJob(uuid.uuid4().hex[:12], account, selection, request, self.max_events)
+        self.jobs[job.id] = job
+        self._queue.append(job)
+        self._subscribers[job.id] = set()
+        self._publish(job, 'status', status=job.status)
+        self._dispatch()
+        return job
+
+    def cancel(self, job):
+        """
+        取消任务
+
+        返回：
+            bool: 是否已请求取消（任务已结束时返回False）
+        """
+        if job.finished:
+            return False
+        job.cancel_event.set()
+        if job.status == 'queued':
+            self._queue.remove(job)
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            self._publish(job, 'status', status=job.status)
+        else:
+            # 运行中的任务：工具尚未创建时由任务线程在创建后检查cancel_event
+            tool = job.tool
+            if tool is not None:
+                tool.cancel()
+            self._publish(job, 'cancelling')
+        return True
+
+    def subscribe(self, job):
+        """
+        订阅任务的进度事件
+
+        返回：
+            tuple: (已有事件列表, asyncio.Queue)，队列中的None表示服务正在关闭
+        """
+        queue = asyncio.Queue()
+        self._subscribers[job.id].add(queue)
+        return list(job.events), queue
+
+    def unsubscribe(self, job, queue):
+        self._subscribers[job.id].discard(queue)
+
+    async def close(self):
+        """关闭服务：取消所有任务，结束所有事件流"""
+        for job in list(self.jobs.values()):
+            self.cancel(job)
+        for queues in self._subscribers.values():
+            for queue in queues:
+                queue.put_nowait(None)
+        # 运行中的任务在当前章节完成后停止，不在事件循环中等待
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self):
+        """启动可以运行的排队任务（同一账号同时只运行一个任务）"""
+        for job in list(self._queue):
+            if len(self._running) >= self.max_jobs:
+                break
+            if job.account in self._running:
+                continue
+            self._queue.remove(job)
+            self._running[job.account] = job
+            job.status = 'running'
+            job.started_at = time.time()
+            self._publish(job, 'status', status=job.status)
+            job.future = self._executor.submit(self._run_job, job)
+            job.future.add_done_callback(lambda future, job=job: self._call_in_loop(self._finish, job, future))
+
+    def _run_job(self, job):
+        """
+        运行备份任务（在任务线程中执行）
+
+        返回：
+            list: backup_all_novels的返回值
+        """
+        options = dict(self.tool_options)
+        options.update(job.options)
+        rate_limiter = ChainedRateLimiter(
+            HostRateLimiter(
+                options.pop('requests_per_second', DEFAULT_REQUESTS_PER_SECOND),
+                options.pop('burst', DEFAULT_BURST), options.pop('jitter', DEFAULT_JITTER)
+            ),
+            self.global_limiter
+        )
+        tool = JJWXCBackupTool(
+            cookie_file=self.cookie_path(job.account),
+            output_root=os.path.join(self.output_root, job.account),
+            novel_filter=build_novel_filter(**job.selection),
+            rate_limiter=rate_limiter,
+            circuit_breaker=self.circuit_breaker,
+            progress=lambda event: self._call_in_loop(self._publish, job, event.pop('event'), **event),
+            **options
+        )
+        job.tool = tool
+        if job.cancel_event.is_set():
+            tool.cancel()
+        return tool.backup_all_novels()
+
+    def _finish(self, job, future):
+        """任务线程结束后更新任务状态，并启动下一个排队任务"""
+        self._running.pop(job.account, None)
+        job.finished_at = time.time()
+        if job.tool is not None:
+            job.output_dir = job.tool.output_dir
+        try:
+            results = future.result()
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+        else:
+            job.novels = [result for result in results or [] if result is not None]
+            for key in ('total', 'saved', 'failed'):
+                job.chapters[key] = sum(result[key] for result in job.novels)
+            job.status = EXIT_STATUSES[results_exit_code(results)]
+            if job.status == 'login_failed':
+                job.error = "未登录，请检查Cookie是否有效"
+        if job.cancel_event.is_set() and job.status in ('completed', 'partial'):
+            job.status = 'cancelled'
+        self._publish(job, 'status', status=job.status, chapters=job.chapters, error=job.error)
+        self._dispatch()
+
+    def _publish(self, job, event, **fields):
+        """记录进度事件并发给订阅者（只在事件循环中调用）"""
+        job.last_event_id += 1
+        data = dict(fields, id=job.last_event_id, event=event, job_id=job.id, time=time.time())
+        job.events.append(data)
+        for queue in self._subscribers.get(job.id, ()):
+            queue.put_nowait(data)
+
+    def _call_in_loop(self, callback, *args, **kwargs):
+        """从任务线程把调用交给事件循环（服务已关闭时忽略）"""
+        try:
+            self._loop.call_soon_threadsafe(lambda: callback(*args, **kwargs))
+        except RuntimeError:
+            pass
+
+
+def _string_list(value, key):
+    """把筛选条件转换为字符串列表（也接受逗号分隔的字符串），省略时为None"""
+    if value is None:
+        return None
+    if isinstance(value, (str, int)):
+        value = str(value).split(',')
+    if not isinstance(value, list):
+        raise ValueError(f"{key} 应为列表或逗号分隔的字符串")
+    items = [str(item).strip() for item in value if str(item).strip()]
+    if not items:
+        # 空的条件会被当作不筛选而备份全部作品
+        raise ValueError(f"{key} 不能为空（省略{key}为不按该条件筛选）")
+    return items
+
+
+def _write_private(path, content):
+    """写入只有所有者可读写的文件"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+MANAGER = web.AppKey("manager", JobManager)
+routes = web.RouteTableDef()
+
+# JSON响应保留中文（与备份目录中的JSON文件一致）
+json_response = functools.partial(web.json_response, dumps=functools.partial(json.dumps, ensure_ascii=False))
+
+
+def _get_job(request):
+    job = request.app[MANAGER].jobs.get(request.match_info['job_id'])
+    if job is None:
+        raise web.HTTPNotFound(text=json.dumps({'error': "任务不存在"}, ensure_ascii=False), content_type='application/json')
+    return job
+
+
+@routes.get('/api/health')
+async def health(request):
+    manager = request.app[MANAGER]
+    statuses = [job.status for job in manager.jobs.values()]
+    return json_response({
+        'status': 'ok',
+        'max_jobs': manager.max_jobs,
+        'running': statuses.count('running'),
+        'queued': statuses.count('queued'),
+    })
+
+
+@routes.post('/api/jobs')
+async def submit_job(request):
+    # 只接受application/json：浏览器跨域发送text/plain等“简单请求”时不做预检，
+    # 网页可借此在本机服务上提交任务
+    if request.content_type != 'application/json':
+        return json_response({'error': "请求内容类型应为application/json"}, status=415)
+    try:
+        body = await request.json()
+    except ValueError:
+        return json_response({'error': "请求内容不是有效的JSON"}, status=400)
+    try:
+        job = request.app[MANAGER].submit(body)
+    except ValueError as e:
+        return json_response({'error': str(e)}, status=400)
+    return json_response(job.to_dict(), status=201)
+
+
+@routes.get('/api/jobs')
+async def list_jobs(request):
+    return json_response({'jobs': [job.to_dict() for job in request.app[MANAGER].jobs.values()]})
+
+
+@routes.get('/api/jobs/{job_id}')
+async def get_job(request):
+    return json_response(_get_job(request).to_dict(detail=True))
+
+
+@routes.post('/api/jobs/{job_id}/cancel')
+async def cancel_job(request):
+    job = _get_job(request)
+    if not request.app[MANAGER].cancel(job):
+        return json_response({'error': "任务已结束", 'job': job.to_dict()}, status=409)
+    return json_response(job.to_dict(), status=202)
+
+
+@routes.get('/api/jobs/{job_id}/events')
+async def job_events(request):
+    """
+    进度事件流（text/event-stream）
+
+    说明：
+        每个事件为 id / event / data（JSON）三行；任务结束（status事件的状态为结束状态）后关闭连接
+    """
+    job = _get_job(request)
+    manager = request.app[MANAGER]
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or 0)
+    except ValueError:
+        last_id = 0
+
+    response = web.StreamResponse(headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.content_type = 'text/event-stream'
+    response.charset = 'utf-8'
+    await response.prepare(request)
+
+    # 订阅时已结束的任务，结束事件在已有事件中；否则之后的事件都会进入队列
+    history, queue = manager.subscribe(job)
+    finished = job.finished
+    try:
+        for event in history:
+            if event['id'] > last_id:
+                await _write_event(response, event)
+        while not finished:
+            try:
+                event = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                await response.write(b": keepalive\n\n")
+                continue
+            if event is None:
+                break
+            await _write_event(response, event)
+            finished = event['event'] == 'status' and event['status'] in FINAL_STATUSES
+    except ConnectionResetError:
+        pass
+    finally:
+        manager.unsubscribe(job, queue)
+    return response
+
+
+async def _write_event(response, event):
+    data = json.dumps(event, ensure_ascii=False)
+    await response.write(f"id: {event['id']}\nevent: {event['event']}\ndata: {data}\n\n".encode('utf-8'))
+
+
+def create_app(output_root="backup", max_jobs=2, global_requests_per_second=4.0, global_burst=4, **tool_options):
+    """
+    创建备份任务服务
+
+    参数：
+        同JobManager
+
+    返回：
+        web.Application: 可用web.run_app运行，或在测试中用aiohttp.test_utils.TestServer启动
+    """
+    app = web.Application()
+    manager = JobManager(
+        output_root=output_root, max_jobs=max_jobs, global_requests_per_second=global_requests_per_second,
+        global_burst=global_burst, **tool_options
+    )
+    app[MANAGER] = manager
+
+    async def on_startup(app):
+        manager.start(asyncio.get_running_loop())
+
+    async def on_shutdown(app):
+        await manager.close()
+
+    app.on_startup.append(on_startup)
+    app.on_shutdown.append(on_shutdown)
+    app.add_routes(routes)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="备份任务服务")
+    parser.add_argument('--host', default="127.0.0.1", help="监听地址（默认127.0.0.1，服务不做身份验证）")
+    parser.add_argument('--port', type=int, default=8000, help="监听端口（默认8000）")
+    parser.add_argument('--output-root', default="backup", metavar='DIR', help="备份根目录（默认backup）")
+    parser.add_argument('--jobs', type=int, default=2, metavar='N', help="同时运行的任务数（默认2）")
+    parser.add_argument('--global-rps', type=float, default=4.0, help="所有任务合计的请求速率上限（默认4）")
+    parser.add_argument('--base-url', help="作者后台地址（默认https://my.jjwxc.net，任务请求不能指定）")
+    args = parser.parse_args(argv)
+
+    tool_options = {'base_url': args.base_url} if args.base_url else {}
+    app = create_app(output_root=args.output_root, max_jobs=args.jobs, global_requests_per_second=args.global_rps,
+                     **tool_options)
+    print(f"备份任务服务: http://{args.host}:{args.port}/api/jobs（备份根目录 {args.output_root}）")
+    web.run_app(app, host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     DOCX生成性能对比
+=================================================================
+功能：比较流式写入(stream)与python-docx两种DOCX生成方式的耗时和内存峰值
+
+使用方法：
+python tests/benchmark_docx_export.py              # 默认 200/800/2000 章
+python tests/benchmark_docx_export.py 500 3000     # 指定章节数
+
+测试内容：
+- 生成模拟章节日志（每章约3000字、60段，含作者有话说）
+- 每次生成都在新的子进程中进行，记录耗时和生成期间的峰值RSS增量
+  （包含python-docx在lxml中占用的内存，见 tests/peak_memory.py）
+- 检查两种方式生成的document.xml完全一致
+
+注意：不访问网络，无需Cookie；章节数较大时python-docx方式耗时较长；
+      内存测量依赖resource模块，只能在Unix上运行
+=================================================================
+"""
+import os
+import sys
+import time
+import zipfile
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chapter_journal import ChapterJournal
+from docx_render import DOCX_ENGINES
+from exporters import render_docx_from_journal
+from peak_memory import CHILD_FLAG, peak_rss_mb, run_child, report_child
+
+DEFAULT_SIZES = (200, 800, 2000)
+
+
+def chapter_list(chapter_count):
+    """模拟章节日志的章节列表"""
+    return [{'id': str(n), 'title': f"标题{n}", 'chapter_number': n} for n in range(1, chapter_count + 1)]
+
+
+def build_journal(path, chapter_count):
+    """生成模拟章节日志，返回章节列表"""
+    paragraph = "　　晋江文学城作者后台备份性能测试段落，包含中文标点、全角空格和足够的长度。" * 2
+    chapters = chapter_list(chapter_count)
+    with ChapterJournal(path, fsync=False) as journal:
+        journal.write_novel({'id': '1', 'title': '性能测试', 'word_count': '0', 'status': '测试'}, "测试简介")
+        for chapter in chapters:
+            content = "\n".join([paragraph] * 55 + [""] * 3) + "\n【作者有话说】\n" + "\n".join(["作者备注"] * 5)
+            journal.write_chapter(chapter, content)
+    return chapters
+
+
+def measure_child(engine, journal_path, chapter_count, output_path):
+    """子进程：生成一次文档，输出耗时和峰值RSS增量"""
+    chapters = chapter_list(int(chapter_count))
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    render_docx_from_journal(journal_path, chapters, {}, output_path, engine)
+    elapsed = time.perf_counter() - start
+    report_child({'seconds': elapsed, 'rss_mb': peak_rss_mb() - baseline})
+
+
+def measure(journal_path, chapter_count, output_path, engine):
+    """在新的子进程中生成一次文档，返回(耗时秒, 峰值RSS增量MB)"""
+    result = run_child(__file__, engine, journal_path, chapter_count, output_path)
+    return result['seconds'], result['rss_mb']
+
+
+def main(sizes):
+    print(f"{'章节数':>6} {'方式':>12} {'耗时(秒)':>10} {'RSS增量(MB)':>14} {'文件(MB)':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for chapter_count in sizes:
+            journal_path = os.path.join(tmp_dir, f"{chapter_count}.journal.jsonl")
+            build_journal(journal_path, chapter_count)
+            outputs = {}
+            for engine in DOCX_ENGINES:
+                output_path = os.path.join(tmp_dir, f"{chapter_count}-{engine}.docx")
+                elapsed, peak_mb = measure(journal_path, chapter_count, output_path, engine)
+                outputs[engine] = output_path
+                size_mb = os.path.getsize(output_path) / 1024 / 1024
+                print(f"{chapter_count:>6} {engine:>12} {elapsed:>10.2f} {peak_mb:>14.1f} {size_mb:>10.1f}")
+
+            documents = {
+                engine: zipfile.ZipFile(path).read('word/document.xml')
+                for engine, path in outputs.items()
+            }
+            same = len(set(documents.values())) == 1
+            print(f"{'':>6} document.xml {'一致' if same else '不一致！'}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == [CHILD_FLAG]:
+        measure_child(*sys.argv[2:])
+        sys.exit(0)
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES)
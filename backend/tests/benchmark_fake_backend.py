@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     模拟后台吞吐量对比
+=================================================================
+功能：对本地模拟作者后台（tests/fake_jjwxc_server.py）完整运行backup_all_novels，
+      比较不同并发设置下每秒备份的章节数
+
+使用方法：
+python tests/benchmark_fake_backend.py                          # 默认并发 1/2/4/8/16，两种获取引擎
+python tests/benchmark_fake_backend.py --workers 4 8 --latency 0.1 --chapters 100
+python tests/benchmark_fake_backend.py --error-rate 0.05        # 章节页返回5xx时的吞吐量和失败数
+python tests/benchmark_fake_backend.py --adaptive --error-rate 0.05   # 并发数为自适应并发的上限
+
+测试内容：
+- 每个(获取引擎, 并发数)组合在新的临时目录中备份全部作品
+- 报告耗时、章节/秒、失败章节数和服务器收到的请求数
+- 请求速率上限设为很大，只比较并发和流水线本身
+
+注意：不访问外部网络，无需Cookie；模拟延迟越大，并发数的影响越明显
+=================================================================
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from async_engine import aiohttp
+from jjwxc_col import JJWXCBackupTool
+from fake_jjwxc_server import FakeJJWXCServer
+
+DEFAULT_WORKERS = (1, 2, 4, 8, 16)
+
+
+def run_once(server, engine, workers, novel_concurrency, adaptive=False):
+    """
+    完整备份一次模拟后台
+
+    返回：
+        dict: {'seconds', 'saved', 'failed', 'requests'}
+    """
+    requests_before = server.stats['requests']
+    with tempfile.TemporaryDirectory() as work_dir:
+        old_cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            # 备份过程的进度输出很多，测量时丢弃
+            with contextlib.redirect_stdout(io.StringIO()):
+                tool = JJWXCBackupTool(
+                    max_workers=workers, fetch_engine=engine, requests_per_second=10000, burst=1000,
+                    jitter=0, novel_concurrency=novel_concurrency, use_http_cache=False,
+                    use_object_store=False, use_catalog=False, use_search_index=False,
+                    base_url=server.base_url, adaptive_concurrency=adaptive
+                )
+                tool.select_novels_to_backup = lambda novel_list: novel_list
+                started = time.perf_counter()
+                results = tool.backup_all_novels() or []
+                seconds = time.perf_counter() - started
+        finally:
+            os.chdir(old_cwd)
+    return {
+        'seconds': seconds,
+        'saved': sum(r['saved'] for r in results),
+        'failed': sum(r['failed'] for r in results),
+        'requests': server.stats['requests'] - requests_before
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟后台吞吐量对比")
+    parser.add_argument('--workers', type=int, nargs='+', default=list(DEFAULT_WORKERS), help="比较的并发数")
+    parser.add_argument('--engines', nargs='+', default=['threads', 'asyncio'], choices=['threads', 'asyncio'],
+                        help="比较的获取引擎")
+    parser.add_argument('--novels', type=int, default=3, help="作品数（默认3）")
+    parser.add_argument('--chapters', type=int, default=60, help="每部作品的章节数（默认60）")
+    parser.add_argument('--novel-concurrency', type=int, default=3, help="同时备份的作品数（默认3）")
+    parser.add_argument('--latency', type=float, default=0.05, help="模拟的每个请求延迟（秒，默认0.05）")
+    parser.add_argument('--latency-jitter', type=float, default=0.02, help="额外随机延迟的上限（秒）")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="章节页返回5xx的概率")
+    parser.add_argument('--adaptive', action='store_true', help="启用自适应并发（并发数作为上限）")
+    args = parser.parse_args()
+
+    engines = [engine for engine in args.engines if engine != 'asyncio' or aiohttp is not None]
+    if len(engines) < len(args.engines):
+        print("未安装aiohttp，跳过asyncio引擎")
+
+    with FakeJJWXCServer(novels=args.novels, chapters=args.chapters, latency=args.latency,
+                         latency_jitter=args.latency_jitter, error_rate=args.error_rate) as server:
+        print(f"模拟后台: {server.base_url}，{args.novels} 部作品共 {server.total_chapters()} 章，"
+              f"延迟 {args.latency * 1000:.0f}+{args.latency_jitter * 1000:.0f} ms")
+        print(f"{'引擎':>8} {'并发数':>6} {'耗时(秒)':>10} {'章节/秒':>10} {'失败':>6} {'请求数':>8}")
+        for engine in engines:
+            for workers in args.workers:
+                result = run_once(server, engine, workers, args.novel_concurrency, args.adaptive)
+                print(f"{engine:>8} {workers:>6} {result['seconds']:>10.2f} "
+                      f"{result['saved'] / result['seconds']:>10.1f} {result['failed']:>6} {result['requests']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     解析与渲染性能基准
+=================================================================
+功能：用tests/fixtures/中的匿名后台页面离线测量解析和渲染性能，与保存的基准比较
+
+使用方法：
+python tests/benchmark_parsers.py                    # 运行并与基准比较，变慢时退出码为1
+python tests/benchmark_parsers.py --save-baseline    # 运行并保存为新的基准
+python tests/benchmark_parsers.py --case chapters    # 只运行名称包含chapters的项目
+
+测试内容：
+- get_novel_list：作者后台首页（60部作品）
+- get_chapters：作品管理页（40章 / 2000章）
+- get_chapter_content：章节编辑页（4千字 / 12万字 / 含原始标签走DOM解析）
+- _add_content_to_doc：把章节内容写入python-docx文档（每次新建文档）
+- 每项报告每秒次数(ops/s)，以及在新的子进程中执行一次的峰值RSS增量
+  （包含lxml等C扩展的内存，见 tests/peak_memory.py）
+
+基准比较：
+- 每项测量多轮，每轮先测固定纯Python计算的速度（校准），紧接着测该项目，
+  两者之比为与机器快慢无关的相对速度，取各轮的中位数
+- 各轮相对速度的四分位距除以中位数为波动，容差至少是本次和基准波动中较大者的3倍
+- 相对速度低于基准的(1-容差)，或RSS增量超过基准的(1+容差)时判定为变慢
+- 校准速度本身波动超过10%时说明机器负载不稳定，只报告结果，不判定变慢；
+  此时保存基准会提示，保存的波动较大时之后的比较也相应放宽
+- 基准保存在tests/fixtures/benchmark_baseline.json，用同样的方式测量；
+  解析或渲染代码有意改变性能后重新保存（可用更多的 --rounds）
+
+注意：不访问网络，无需Cookie；页面由tests/fixture_pages.py生成
+=================================================================
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import contextlib
+from datetime import datetime
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'tools'))
+sys.path.insert(0, TESTS_DIR)
+
+import requests
+from docx import Document
+from jjwxc_col import JJWXCBackupTool
+from jjwxc_parser import parse_chapter_content
+from fixture_pages import FIXTURES_DIR, load_fixture
+from peak_memory import CHILD_FLAG, peak_rss_mb, run_child, report_child
+
+BASELINE_PATH = os.path.join(FIXTURES_DIR, 'benchmark_baseline.json')
+DEFAULT_TOLERANCE = 0.3
+DEFAULT_ROUNDS = 11
+DEFAULT_ROUND_TIME = 0.2
+# 容差至少是测得波动的倍数
+SPREAD_FACTOR = 3
+# 校准速度的波动超过该比例时只报告结果，不判定变慢
+CALIBRATION_NOISE_LIMIT = 0.1
+# RSS增量允许的绝对波动（MB），增量很小的项目主要受内存分配粒度影响
+MEMORY_SLACK_MB = 2
+
+
+def calibration_workload():
+    """
+    固定的纯Python计算，其速度用于消除机器快慢的影响
+
+    说明：
+        计算内容与解析代码类似（字符串切分、字典和正则），不访问磁盘
+    """
+    text = "　　晋江文学城作者后台离线性能基准，用于校准解析速度。" * 40
+    pattern = re.compile(r'[，。]')
+
+    def workload():
+        counts = {}
+        for part in pattern.split(text):
+            for i in range(0, len(part) - 1, 2):
+                counts[part[i:i + 2]] = counts.get(part[i:i + 2], 0) + 1
+        return counts
+
+    return workload()
+
+
+def ops_per_sec(fn, round_time):
+    """重复执行fn至少round_time秒（至少一次），返回每秒次数"""
+    iterations = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < round_time or iterations == 0:
+        fn()
+        iterations += 1
+        elapsed = time.perf_counter() - started
+    return iterations / elapsed
+
+
+def spread(values):
+    """波动：四分位距除以中位数"""
+    if len(values) < 2:
+        return 0.0
+    q1, median, q3 = statistics.quantiles(values, n=4, method='inclusive')
+    return (q3 - q1) / median if median else 0.0
+
+
+def measure_speed(fn, rounds=DEFAULT_ROUNDS, round_time=DEFAULT_ROUND_TIME):
+    """
+    交替测量校准计算和fn的速度
+
+    返回：
+        dict: {'ops_per_sec': fn每秒次数中位数, 'relative': 相对速度中位数,
+               'spread': 相对速度的波动, 'calibrations': 各轮校准速度}
+    """
+    # 预热
+    calibration_workload()
+    fn()
+    speeds, ratios, calibrations = [], [], []
+    for _ in range(rounds):
+        calibration = ops_per_sec(calibration_workload, round_time)
+        speed = ops_per_sec(fn, round_time)
+        calibrations.append(calibration)
+        speeds.append(speed)
+        ratios.append(speed / calibration)
+    return {
+        'ops_per_sec': statistics.median(speeds),
+        'relative': statistics.median(ratios),
+        'spread': spread(ratios),
+        'calibrations': calibrations,
+    }
+
+
+def make_tool(work_dir):
+    """创建不访问网络的备份工具，后台页面从fixtures读取"""
+    tool = JJWXCBackupTool(use_http_cache=False, use_object_store=False, use_catalog=False,
+                           use_search_index=False)
+    tool.output_dir = work_dir
+    pages = {
+        'oneauthor_login.php': load_fixture('oneauthor_login.html'),
+        'managenovel.php?novelid=1000000': load_fixture('managenovel_small.html'),
+        'managenovel.php?novelid=1000037': load_fixture('managenovel_large.html'),
+    }
+
+    def fake_get(url, session=None, use_cache=True, **kwargs):
+        response = requests.models.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = next(body for key, body in pages.items() if url.endswith(key))
+        return response
+
+    tool._get = fake_get
+    return tool
+
+
+def build_cases(tool, names=None):
+    """
+    构建基准项目
+
+    参数：
+        names (collection): 只构建这些项目（默认全部；测量内存时只构建要测的项目，
+                            避免其他项目的准备工作抬高基线）
+
+    返回：
+        dict: {名称: 无参数函数}
+    """
+    def get_novel_list():
+        # 清空页面备忘，每次都重新解析
+        tool._page_memo.clear()
+        return tool.get_novel_list()
+
+    def get_chapters(novel_id):
+        def run():
+            tool._manage_memo.clear()
+            return tool.get_chapters(f"//my.jjwxc.net/backend/managenovel.php?novelid={novel_id}")
+        return run
+
+    def get_chapter_content(name):
+        page = load_fixture(f"{name}.html")
+
+        def run():
+            tool.fetch_chapter_page = lambda chapter_link, session=None: page
+            return tool.get_chapter_content("chaptermodify.php?novelid=1&chapterid=1")
+        return run
+
+    def add_content_to_doc(name):
+        content = parse_chapter_content(load_fixture(f"{name}.html"))
+
+        def run():
+            doc = Document()
+            tool._add_content_to_doc(doc, content)
+            return doc
+        return run
+
+    builders = {
+        'get_novel_list[60部]': lambda: get_novel_list,
+        'get_chapters[40章]': lambda: get_chapters(1000000),
+        'get_chapters[2000章]': lambda: get_chapters(1000037),
+        'get_chapter_content[4千字]': lambda: get_chapter_content('chaptermodify'),
+        'get_chapter_content[12万字]': lambda: get_chapter_content('chaptermodify_long'),
+        'get_chapter_content[DOM解析]': lambda: get_chapter_content('chaptermodify_markup'),
+        '_add_content_to_doc[4千字]': lambda: add_content_to_doc('chaptermodify'),
+        '_add_content_to_doc[12万字]': lambda: add_content_to_doc('chaptermodify_long'),
+    }
+    return {name: build() for name, build in builders.items() if names is None or name in names}
+
+
+@contextlib.contextmanager
+def benchmark_cases(names=None):
+    """在临时工作目录中构建基准项目（参数见build_cases），退出时删除"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        old_cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            # 解析函数会打印进度，构建时丢弃输出
+            with contextlib.redirect_stdout(io.StringIO()):
+                tool = make_tool(work_dir)
+                cases = build_cases(tool, names)
+            yield cases
+        finally:
+            os.chdir(old_cwd)
+
+
+def measure_memory_child(name):
+    """子进程：执行一次基准项目，输出峰值RSS增量"""
+    with benchmark_cases([name]) as cases:
+        fn = cases[name]
+        baseline = peak_rss_mb()
+        with contextlib.redirect_stdout(io.StringIO()):
+            fn()
+        rss_mb = peak_rss_mb() - baseline
+    report_child({'rss_mb': rss_mb})
+
+
+def run_benchmarks(case_filter=None, rounds=DEFAULT_ROUNDS, round_time=DEFAULT_ROUND_TIME):
+    """
+    运行基准项目
+
+    返回：
+        dict: {'calibration': 校准速度中位数, 'calibration_spread': 校准速度的波动,
+               'cases': {名称: {'ops_per_sec', 'relative', 'spread', 'rss_mb'}}}
+    """
+    results = {}
+    calibrations = []
+    with benchmark_cases() as cases:
+        for name, fn in cases.items():
+            if case_filter and case_filter not in name:
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                speed = measure_speed(fn, rounds, round_time)
+            calibrations.extend(speed['calibrations'])
+            results[name] = {
+                'ops_per_sec': round(speed['ops_per_sec'], 2),
+                'relative': speed['relative'],
+                'spread': round(speed['spread'], 4),
+                'rss_mb': round(run_child(__file__, name)['rss_mb'], 1)
+            }
+    return {
+        'calibration': statistics.median(calibrations) if calibrations else 0.0,
+        'calibration_spread': spread(calibrations),
+        'cases': results
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    与基准比较
+
+    返回：
+        list: [(名称, 状态说明, 是否变慢)]
+    """
+    rows = []
+    for name, result in results['cases'].items():
+        reference = baseline.get('cases', {}).get(name)
+        if reference is None:
+            rows.append((name, "无基准", False))
+            continue
+        speed_ratio = result['relative'] / reference['relative']
+        # 本次或基准测量波动较大时相应放宽容差
+        case_tolerance = max(tolerance, SPREAD_FACTOR * max(result.get('spread', 0.0), reference.get('spread', 0.0)))
+        problems = []
+        if speed_ratio < 1 - case_tolerance:
+            problems.append(f"速度 {speed_ratio:.0%}（容差{case_tolerance:.0%}）")
+        # 旧格式的基准没有RSS，不比较内存
+        if 'rss_mb' in reference and result['rss_mb'] > reference['rss_mb'] * (1 + tolerance) + MEMORY_SLACK_MB:
+            problems.append(f"内存 {result['rss_mb']:.1f}MB（基准{reference['rss_mb']:.1f}MB）")
+        if problems:
+            rows.append((name, "✗ 变慢: " + "，".join(problems), True))
+        else:
+            rows.append((name, f"✓ 速度 {speed_ratio:.0%}", False))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解析与渲染性能基准")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果保存为基准")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="基准文件路径")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"允许的性能波动比例（默认{DEFAULT_TOLERANCE}）")
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS,
+                        help=f"每个项目的测量轮数，取中位数（默认{DEFAULT_ROUNDS}）")
+    parser.add_argument('--round-time', type=float, default=DEFAULT_ROUND_TIME,
+                        help=f"每轮的最短测量时间（秒，默认{DEFAULT_ROUND_TIME}）")
+    parser.add_argument('--case', help="只运行名称包含该字符串的项目")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.case, args.rounds, args.round_time)
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    statuses = {name: (status, slower) for name, status, slower in compare(results, baseline, args.tolerance)}
+
+    noisy = results['calibration_spread'] > CALIBRATION_NOISE_LIMIT
+    print(f"校准速度: {results['calibration']:.0f} 次/秒（波动 {results['calibration_spread']:.1%}）")
+    print(f"{'项目':<28} {'次/秒':>10} {'相对速度':>10} {'波动':>7} {'RSS增量(MB)':>12}  结果")
+    for name, result in results['cases'].items():
+        status = statuses[name][0] if baseline else ""
+        print(f"{name:<28} {result['ops_per_sec']:>10.1f} {result['relative']:>10.4f} "
+              f"{result['spread']:>7.1%} {result['rss_mb']:>12.1f}  {status}")
+
+    if args.save_baseline:
+        if noisy:
+            # 仍然保存：各项目的波动一起保存，之后比较时相应放宽容差
+            print("⚠ 校准速度波动过大，机器负载不稳定，最好在空闲时重新保存基准")
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'rounds': args.rounds,
+                'round_time': args.round_time,
+                'calibration_spread': round(results['calibration_spread'], 4),
+                'cases': {name: {'relative': r['relative'], 'spread': r['spread'], 'rss_mb': r['rss_mb']}
+                          for name, r in results['cases'].items()}
+            }, f, ensure_ascii=False, indent=2)
+        print(f"✓ 已保存基准: {args.baseline}")
+        return 0
+
+    if any(slower for _, slower in statuses.values()):
+        if noisy:
+            print(f"⚠ 校准速度波动超过{CALIBRATION_NOISE_LIMIT:.0%}，机器负载不稳定，以上结果仅供参考")
+            return 0
+        print("✗ 部分项目比基准慢，请检查最近的解析或渲染改动")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == [CHILD_FLAG]:
+        measure_memory_child(sys.argv[2])
+        sys.exit(0)
+    sys.exit(main())
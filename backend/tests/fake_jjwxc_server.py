@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     本地模拟作者后台服务器
+=================================================================
+功能：在本机启动与晋江作者后台页面结构相同的HTTP服务器，供端到端测试和吞吐量对比使用
+
+使用方法：
+python tests/fake_jjwxc_server.py --novels 5 --chapters 200 --latency 0.05
+python tools/jjwxc_col.py --base-url http://127.0.0.1:8765   # 另一个终端，备份工具指向模拟服务器
+
+代码中使用：
+    with FakeJJWXCServer(novels=3, chapters=20, error_rate=0.1) as server:
+        tool = JJWXCBackupTool(base_url=server.base_url, ...)
+
+页面（与tools/jjwxc_parser.py解析的结构相同，由tests/fixture_pages.py生成）：
+- /backend/oneauthor_login.php               作者后台首页（作品列表）
+- /backend/managenovel.php?novelid=N         作品管理页（简介和章节列表）
+- /backend/chaptermodify.php?novelid=N&chapterid=M   章节编辑页（正文和作者有话说）
+
+故障注入（默认只作用于章节编辑页，见inject_on）：
+- latency / latency_jitter：每个请求的固定延迟和随机附加延迟（秒）
+- error_rate：返回error_statuses中的状态码（429/503可附带Retry-After）
+- fail_first：每个页面的前N次请求一定返回错误状态码（测试重试）
+- timeout_rate：等待hang_seconds秒后直接断开连接，不返回响应
+- truncate_rate：声明完整的Content-Length，只发送一半内容后断开
+- logout_rate / logged_out：返回"请登录"页面（状态码200，与Cookie失效时相同）
+- valid_cookies：设置后只有Cookie中包含其中一项的请求视为已登录（模拟多个账号）
+
+注意：
+- 是否注入故障由(页面, 第几次请求该页面)决定，与线程调度顺序无关，同样的配置结果可重复
+- 仅用于测试，只监听127.0.0.1
+=================================================================
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_pages import ENCODING, novel_list_page, manage_page, chapter_page
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><meta http-equiv="Content-Type" content="text/html; charset=gb18030" />
+<title>请登录</title></head><body>
+<form action="/login.php" method="post">
+<p>登录晋江作者后台</p>
+<p>账号：<input type="text" name="loginname" /></p>
+<p>密码：<input type="password" name="loginpass" /></p>
+<input type="submit" value="登录" />
+</form></body></html>""".encode(ENCODING)
+
+# 各类故障在统计中的名称
+FAULTS = ('error', 'timeout', 'truncated', 'logged_out')
+
+
+class FakeJJWXCServer:
+    def __init__(self, novels=3, chapters=20, chapter_length=3000, note_length=100, vip_from=None,
+                 latency=0.0, latency_jitter=0.0, error_rate=0.0, error_statuses=(500, 502, 503),
+                 retry_after=None, timeout_rate=0.0, hang_seconds=60.0, truncate_rate=0.0,
+                 logout_rate=0.0, logged_out=False, fail_first=0, valid_cookies=None,
+                 inject_on=('chaptermodify.php',), seed=0, port=0):
+        """
+        创建模拟服务器（调用start后开始监听）
+
+        参数：
+            novels (int): 作品数
+            chapters (int|list): 每部作品的章节数（列表时按作品顺序分别指定）
+            chapter_length (int): 每章正文字数
+            note_length (int): 每章作者有话说字数（0为没有）
+            vip_from (int): 从第几章开始为VIP章节（None为全部免费）
+            latency (float): 每个请求的固定延迟（秒）
+            latency_jitter (float): 每个请求额外随机延迟的上限（秒）
+            error_rate (float): 返回错误状态码的概率
+            error_statuses (tuple): 注入的错误状态码，同一页面的多次请求轮流使用
+            retry_after (int): 429/503响应附带的Retry-After秒数（None为不附带）
+            timeout_rate (float): 不返回响应（等待hang_seconds后断开）的概率
+            hang_seconds (float): 模拟超时时的等待时间（秒），应大于客户端超时
+            truncate_rate (float): 只发送一半正文后断开连接的概率
+            logout_rate (float): 返回登录页面的概率（模拟Cookie中途失效）
+            logged_out (bool): 所有后台页面都返回登录页面
+            fail_first (int): 每个页面的前几次请求一定返回错误状态码
+            valid_cookies (iterable): 有效的Cookie（"名称=值"），None为不检查Cookie
+            inject_on (tuple): 注入故障的页面（路径中包含其中任意一项即注入）
+            seed (int): 随机种子（页面内容和故障注入）
+            port (int): 监听端口（0为自动选择空闲端口）
+        """
+        self.novel_ids = [str(1000000 + n * 37) for n in range(novels)]
+        if isinstance(chapters, int):
+            chapters = [chapters] * novels
+        self.chapter_counts = dict(zip(self.novel_ids, chapters))
+        self.chapter_length = chapter_length
+        self.note_length = note_length
+        self.vip_from = vip_from
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.error_statuses = tuple(error_statuses)
+        self.retry_after = retry_after
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.truncate_rate = truncate_rate
+        self.logout_rate = logout_rate
+        self.logged_out = logged_out
+        self.fail_first = fail_first
+        self.valid_cookies = tuple(valid_cookies) if valid_cookies is not None else None
+        self.inject_on = tuple(inject_on)
+        self.seed = seed
+        self.port = port
+
+        self._pages = {}  # {页面路径: 页面字节}，首次请求时生成
+        self._attempts = {}  # {页面路径: 已请求次数}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._httpd = None
+        self._thread = None
+        self.stats = {'requests': 0, 'bytes': 0, 'chapter_pages': 0, 'ok': 0}
+        self.stats.update({fault: 0 for fault in FAULTS})
+
+    @property
+    def base_url(self):
+        """服务器地址（传给JJWXCBackupTool的base_url）"""
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        """在后台线程中开始监听"""
+        handler = type('FakeJJWXCHandler', (_Handler,), {'server_state': self})
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', self.port), handler)
+        self._httpd.daemon_threads = True
+        self._httpd.block_on_close = False
+        self.port = self._httpd.server_address[1]
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止监听（正在模拟超时的请求立即断开）"""
+        self._stopping.set()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def total_chapters(self):
+        """所有作品的章节总数"""
+        return sum(self.chapter_counts.values())
+
+    def page(self, path, query):
+        """
+        生成后台页面
+
+        返回：
+            bytes: 页面内容，页面不存在时返回None
+        """
+        key = (path, tuple(sorted((k, v[0]) for k, v in query.items())))
+        with self._lock:
+            if key in self._pages:
+                return self._pages[key]
+        novel_id = query.get('novelid', [None])[0]
+        content = None
+        if path.endswith('/oneauthor_login.php'):
+            content = novel_list_page(novel_count=len(self.novel_ids), seed=self.seed + 1)
+        elif path.endswith('/managenovel.php') and novel_id in self.chapter_counts:
+            content = manage_page(novel_id, chapter_count=self.chapter_counts[novel_id],
+                                  vip_from=self.vip_from, seed=self.seed + int(novel_id))
+        elif path.endswith('/chaptermodify.php') and novel_id in self.chapter_counts:
+            chapter_id = query.get('chapterid', ['0'])[0]
+            if chapter_id.isdigit() and 1 <= int(chapter_id) <= self.chapter_counts[novel_id]:
+                content = chapter_page(int(chapter_id), length=self.chapter_length,
+                                       note_length=self.note_length,
+                                       seed=self.seed + int(novel_id) * 100000 + int(chapter_id))
+        if content is not None:
+            with self._lock:
+                self._pages[key] = content
+        return content
+
+    def choose_fault(self, target):
+        """
+        决定本次请求注入的故障
+
+        参数：
+            target (str): 请求路径（含查询字符串）
+
+        返回：
+            tuple: (FAULTS中的一项（不注入时为None）, 第几次请求该页面（从0开始）)
+        """
+        with self._lock:
+            attempt = self._attempts.get(target, 0)
+            self._attempts[target] = attempt + 1
+        if self.logged_out:
+            return 'logged_out', attempt
+        if not any(part in target for part in self.inject_on):
+            return None, attempt
+        if attempt < self.fail_first:
+            return 'error', attempt
+        roll = random.Random(f"{self.seed}:{target}:{attempt}").random()
+        for fault, rate in (('error', self.error_rate), ('timeout', self.timeout_rate),
+                            ('truncated', self.truncate_rate), ('logged_out', self.logout_rate)):
+            if roll < rate:
+                return fault, attempt
+            roll -= rate
+        return None, attempt
+
+    def logged_in(self, cookie_header):
+        """请求的Cookie是否有效（未设置valid_cookies时总是有效）"""
+        if self.valid_cookies is None:
+            return True
+        cookies = {part.strip() for part in cookie_header.split(';')}
+        return any(cookie in cookies for cookie in self.valid_cookies)
+
+    def record(self, key, count=1):
+        with self._lock:
+            self.stats[key] += count
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """模拟服务器的请求处理（server_state由FakeJJWXCServer.start设置）"""
+    protocol_version = 'HTTP/1.1'
+    server_state = None
+
+    def log_message(self, format, *args):
+        # 不输出访问日志
+        pass
+
+    def do_GET(self):
+        state = self.server_state
+        state.record('requests')
+        url = urlsplit(self.path)
+        if url.path.endswith('/chaptermodify.php'):
+            state.record('chapter_pages')
+
+        delay = state.latency
+        if state.latency_jitter:
+            delay += random.uniform(0, state.latency_jitter)
+        if delay and state._stopping.wait(delay):
+            return
+
+        if not state.logged_in(self.headers.get('Cookie', '')):
+            state.record('logged_out')
+            self._send(200, LOGIN_PAGE)
+            return
+
+        fault, attempt = state.choose_fault(self.path)
+        if fault is not None:
+            state.record(fault)
+        if fault == 'timeout':
+            state._stopping.wait(state.hang_seconds)
+            self.close_connection = True
+            return
+        if fault == 'error':
+            status = state.error_statuses[attempt % len(state.error_statuses)]
+            body = f"<html><body><h1>{status} Server Error</h1></body></html>".encode(ENCODING)
+            headers = {}
+            if state.retry_after is not None and status in (429, 503):
+                headers['Retry-After'] = str(state.retry_after)
+            self._send(status, body, headers)
+            return
+        if fault == 'logged_out':
+            self._send(200, LOGIN_PAGE)
+            return
+
+        content = state.page(url.path, parse_qs(url.query))
+        if content is None:
+            self._send(404, "<html><body>页面不存在</body></html>".encode(ENCODING))
+            return
+        if fault == 'truncated':
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=gb18030')
+            self.send_header('Content-Length', str(len(content)))
+            self.end_headers()
+            self.wfile.write(content[:len(content) // 2])
+            self.close_connection = True
+            return
+        state.record('ok')
+        self._send(200, content)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=gb18030')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server_state.record('bytes', len(body))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟晋江作者后台服务器")
+    parser.add_argument('--port', type=int, default=8765, help="监听端口（默认8765）")
+    parser.add_argument('--novels', type=int, default=3, help="作品数（默认3）")
+    parser.add_argument('--chapters', type=int, default=20, help="每部作品的章节数（默认20）")
+    parser.add_argument('--chapter-length', type=int, default=3000, help="每章正文字数（默认3000）")
+    parser.add_argument('--vip-from', type=int, help="从第几章开始为VIP章节")
+    parser.add_argument('--latency', type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument('--latency-jitter', type=float, default=0.0, help="额外随机延迟的上限（秒）")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="章节页返回5xx的概率")
+    parser.add_argument('--retry-after', type=int, help="503响应附带的Retry-After秒数")
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help="章节页不返回响应的概率")
+    parser.add_argument('--hang-seconds', type=float, default=60.0, help="模拟超时的等待时间（秒）")
+    parser.add_argument('--truncate-rate', type=float, default=0.0, help="章节页只返回一半内容的概率")
+    parser.add_argument('--logout-rate', type=float, default=0.0, help="章节页返回登录页面的概率")
+    parser.add_argument('--logged-out', action='store_true', help="所有页面都返回登录页面")
+    parser.add_argument('--fail-first', type=int, default=0, help="每个章节页的前N次请求返回错误状态码")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    server = FakeJJWXCServer(
+        novels=args.novels, chapters=args.chapters, chapter_length=args.chapter_length,
+        vip_from=args.vip_from, latency=args.latency, latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate, retry_after=args.retry_after, timeout_rate=args.timeout_rate,
+        hang_seconds=args.hang_seconds, truncate_rate=args.truncate_rate,
+        logout_rate=args.logout_rate, logged_out=args.logged_out,
+        fail_first=args.fail_first, seed=args.seed, port=args.port
+    ).start()
+    print(f"模拟作者后台已启动: {server.base_url}（{len(server.novel_ids)} 部作品，"
+          f"共 {server.total_chapters()} 章），按Ctrl+C停止")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(f"请求统计: {server.stats}")
+
+
+if __name__ == "__main__":
+    main()
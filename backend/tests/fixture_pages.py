@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     离线测试页面（匿名化作者后台页面）
+=================================================================
+功能：生成与作者后台结构相同的匿名页面，供离线测试和性能对比使用；
+      也可以把浏览器保存的真实后台页面匿名化后加入fixtures目录
+
+使用方法：
+python tests/fixture_pages.py                       # 重新生成tests/fixtures/下的页面
+python tests/fixture_pages.py anonymize 页面.html 输出.html
+
+页面说明（tests/fixtures/，均为gb18030编码）：
+- oneauthor_login.html       作者后台首页，60部作品
+- managenovel_small.html     作品管理页，40章
+- managenovel_large.html     作品管理页，2000章（超长章节表格）
+- chaptermodify.html         章节编辑页，约4千字正文 + 作者有话说
+- chaptermodify_long.html    章节编辑页，约12万字正文（超长章节）
+- chaptermodify_markup.html  章节编辑页，正文含原始标签，走完整DOM解析
+
+注意：
+- 页面由固定随机种子生成，内容与真实作品无关，重新生成结果完全相同
+- 匿名化会替换文字节点中的汉字和字母（保留页面结构、数字和解析依赖的关键字），
+  删除<script>内容和隐藏字段的值
+=================================================================
+"""
+import os
+import re
+import sys
+import random
+import hashlib
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+ENCODING = 'gb18030'
+
+# 常用汉字，用于生成正文和标题
+COMMON_CHARS = (
+    "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面"
+    "而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性"
+    "好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第"
+    "向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管"
+)
+PUNCTUATION = "，，，。。！？；："
+
+PAGE_HEAD = """<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN" "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml"><head>
+<meta http-equiv="Content-Type" content="text/html; charset=gb18030" />
+<title>{title}</title>
+<link href="//static.jjwxc.net/css/backend.css" rel="stylesheet" type="text/css" />
+<script type="text/javascript" src="//static.jjwxc.net/scripts/jquery-1.8.0.min.js"></script>
+</head><body>
+<div id="header"><a href="//www.jjwxc.net/">晋江文学城</a> | <a href="//my.jjwxc.net/backend/oneauthor_login.php">作者后台</a>
+| <a href="//my.jjwxc.net/backend/logout.php">退出</a></div>
+<div id="nav"><ul><li><a href="//my.jjwxc.net/backend/oneauthor_login.php">作品管理</a></li>
+<li><a href="//my.jjwxc.net/backend/newnovel.php">新建作品</a></li>
+<li><a href="//my.jjwxc.net/backend/income.php">收入查询</a></li></ul></div>
+"""
+PAGE_TAIL = """<div id="footer">Copyright 晋江文学城 All rights reserved</div>
+</body></html>"""
+
+
+def _text(rng, length, paragraph=None):
+    """生成指定长度的随机中文（paragraph为每段字数，段首加全角空格）"""
+    chars = []
+    since_punct = 0
+    for n in range(length):
+        if paragraph and n and n % paragraph == 0:
+            chars.append("\n\n　　")
+            since_punct = 0
+        if since_punct > 6 and rng.random() < 0.12:
+            chars.append(rng.choice(PUNCTUATION))
+            since_punct = 0
+        else:
+            chars.append(rng.choice(COMMON_CHARS))
+            since_punct += 1
+    text = ''.join(chars)
+    return "　　" + text if paragraph else text
+
+
+def novel_list_page(novel_count=60, seed=1):
+    """
+    作者后台首页(oneauthor_login.php)
+
+    参数：
+        novel_count (int): 作品数
+        seed (int): 随机种子
+
+    返回：
+        bytes: gb18030编码的页面
+    """
+    rng = random.Random(seed)
+    rows = []
+    for n in range(novel_count):
+        novel_id = 1000000 + n * 37
+        title = _text(rng, rng.randint(2, 8))
+        rows.append(
+            f'<tr><td><input type="checkbox" name="novelids[]" value="{novel_id}" /></td>'
+            f'<td><a href="//www.jjwxc.net/onebook.php?novelid={novel_id}" target="_blank">{title}</a></td>'
+            f'<td>原创</td><td>{rng.choice(["言情", "纯爱", "无CP", "百合"])}</td>'
+            f'<td>{rng.choice(["近代现代", "古色古香", "架空历史", "幻想未来"])}</td>'
+            f'<td>{rng.randint(1, 300)}</td><td>{rng.randint(1000, 900000)}</td>'
+            f'<td>{rng.randint(0, 10 ** 8)}</td><td>{rng.randint(0, 50000)}</td><td>{rng.randint(0, 9000)}</td>'
+            f'<td><a href="//my.jjwxc.net/backend/managenovel.php?novelid={novel_id}">管理</a></td>'
+            f'<td>{rng.choice(["是", "否"])}</td><td>{rng.choice(["连载中", "已完成", "暂停"])}</td></tr>'
+        )
+    page = (
+        PAGE_HEAD.format(title="晋江文学城作者后台")
+        + '<table class="cytable" id="novellist"><tr><th>选择</th><th>作品</th><th>类型</th><th>性向</th>'
+        + '<th>时代</th><th>章节</th><th>字数</th><th>积分</th><th>收藏</th><th>评论</th><th>管理</th>'
+        + '<th>签约</th><th>状态</th></tr>\n'
+        + '\n'.join(rows)
+        + '\n</table>\n' + PAGE_TAIL
+    )
+    return page.encode(ENCODING)
+
+
+def manage_page(novel_id, chapter_count=40, vip_from=None, seed=2):
+    """
+    作品管理页(managenovel.php)
+
+    参数：
+        novel_id (int|str): 作品ID
+        chapter_count (int): 章节数
+        vip_from (int): 从第几章开始为VIP章节（None为全部免费）
+        seed (int): 随机种子
+
+    返回：
+        bytes: gb18030编码的页面
+    """
+    rng = random.Random(seed)
+    intro = _text(rng, 300, paragraph=100)
+    rows = []
+    for n in range(1, chapter_count + 1):
+        chapter_id = n
+        title = _text(rng, rng.randint(2, 12))
+        vip = vip_from is not None and n >= vip_from
+        link = (f"//my.jjwxc.net/onebook_vip.php?novelid={novel_id}&amp;chapterid={chapter_id}" if vip
+                else f"//www.jjwxc.net/onebook.php?novelid={novel_id}&amp;chapterid={chapter_id}")
+        rows.append(
+            f'<tr><td><input type="checkbox" name="chapterid" value="{chapter_id}" /></td><td>{n}</td>'
+            f'<td><a href="{link}" target="_blank">{title}</a></td>'
+            f'<td>{_text(rng, rng.randint(0, 10))}</td><td>{rng.randint(2000, 9000)}</td>'
+            f'<td>2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00</td>'
+            f'<td>{rng.randint(0, 5000)}</td>'
+            f'<td><a href="//my.jjwxc.net/backend/chaptermodify.php?novelid={novel_id}&amp;chapterid={chapter_id}">修改</a>'
+            f' <a href="javascript:delchapter({chapter_id})">删除</a></td></tr>'
+        )
+    page = (
+        PAGE_HEAD.format(title="作品管理")
+        + f'<form action="managenovel.php?novelid={novel_id}" method="post">\n'
+        + '<textarea id="novelintro" name="novelintro" rows="8" cols="80">' + intro + '</textarea>\n'
+        + '<table class="cytable" id="chapterlist"><tr><th>选择</th><th>章节</th><th>标题</th><th>内容提要</th>'
+        + '<th>字数</th><th>更新时间</th><th>点击</th><th>操作</th></tr>\n'
+        + '\n'.join(rows)
+        + '\n</table>\n'
+        + f'<input type="hidden" name="chapterid" value="{chapter_count + 1}" />\n'
+        + f'<input type="text" name="chaptername" placeholder="第{chapter_count + 1}章" />\n'
+        + '</form>\n' + PAGE_TAIL
+    )
+    return page.encode(ENCODING)
+
+
+def chapter_page(chapter_id=1, length=4000, note_length=200, markup=False, seed=3):
+    """
+    章节编辑页(chaptermodify.php)
+
+    参数：
+        chapter_id (int): 章节ID
+        length (int): 正文字数
+        note_length (int): 作者有话说字数（0为没有作者有话说）
+        markup (bool): 正文中插入原始标签（快速提取失败，走完整DOM解析）
+        seed (int): 随机种子
+
+    返回：
+        bytes: gb18030编码的页面
+    """
+    rng = random.Random(seed)
+    body = _text(rng, length, paragraph=rng.randint(80, 160))
+    body = body.replace("。", "。&lt;书名&gt;", 1)
+    if markup:
+        body = body.replace("。", "。<b>加粗</b>", 1)
+    note = _text(rng, note_length, paragraph=60) if note_length else ""
+    page = (
+        PAGE_HEAD.format(title="章节修改")
+        + '<form action="chaptermodify.php" method="post" name="chapterform">\n'
+        + f'<input type="hidden" name="chapterid" value="{chapter_id}" />\n'
+        + f'<input type="text" name="chaptername" value="{_text(rng, 6)}" />\n'
+        + '<textarea name="content" id="content" rows="30" cols="100">' + body + '</textarea>\n'
+        + '<textarea name="note" id="note" rows="6" cols="100">' + note + '</textarea>\n'
+        + '<input type="submit" value="提交修改" />\n</form>\n' + PAGE_TAIL
+    )
+    return page.encode(ENCODING)
+
+
+# fixtures目录中的页面及生成方式
+FIXTURES = {
+    'oneauthor_login.html': lambda: novel_list_page(novel_count=60),
+    'managenovel_small.html': lambda: manage_page(1000000, chapter_count=40, vip_from=21),
+    'managenovel_large.html': lambda: manage_page(1000037, chapter_count=2000, vip_from=31, seed=4),
+    'chaptermodify.html': lambda: chapter_page(length=4000, note_length=200),
+    'chaptermodify_long.html': lambda: chapter_page(length=120000, note_length=1000, seed=5),
+    'chaptermodify_markup.html': lambda: chapter_page(length=4000, note_length=200, markup=True, seed=6),
+}
+
+
+def load_fixture(name):
+    """读取fixtures目录中的页面（原始字节）"""
+    with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def write_fixtures(directory=FIXTURES_DIR):
+    """重新生成fixtures目录中的全部页面"""
+    os.makedirs(directory, exist_ok=True)
+    for name, build in FIXTURES.items():
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(build())
+        print(f"✓ {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+# 匿名化时保留的字（解析依赖的关键字和常见后台文字）
+_KEEP_CHARS = set("第章卷已更新至作者有话说晋江文学城后台管理修改删除选择标题字数状态连载中完成暂停是否")
+_TEXT_NODE = re.compile(r'>([^<]+)<')
+_SCRIPT = re.compile(r'(<script\b[^>]*>).*?(</script>)', re.I | re.S)
+_HIDDEN_VALUE = re.compile(r'(<input\b[^>]*type="hidden"[^>]*\bvalue=")([^"]*)(")', re.I)
+_CJK_CHAR = re.compile(r'[\u3400-\u9fff\uf900-\ufaff]')
+_LETTER = re.compile(r'[A-Za-z]')
+
+
+def anonymize_page(content):
+    """
+    匿名化保存的后台页面
+
+    参数：
+        content (bytes): 真实页面原始字节
+
+    返回：
+        bytes: 匿名化后的页面（gb18030编码）
+
+    说明：
+        同一个字总是替换为同一个字，文字长度、换行和标点不变，解析结果的结构（作品数、章节数、
+        章节编号、VIP标记）与原页面一致
+    """
+    page = content.decode(ENCODING, errors='replace')
+
+    def replace_char(match):
+        char = match.group(0)
+        if char in _KEEP_CHARS:
+            return char
+        digest = hashlib.sha1(char.encode('utf-8')).digest()
+        if _LETTER.fullmatch(char):
+            return 'abcdefghijklmnopqrstuvwxyz'[digest[0] % 26]
+        return COMMON_CHARS[int.from_bytes(digest[:2], 'big') % len(COMMON_CHARS)]
+
+    def replace_text(match):
+        text = _CJK_CHAR.sub(replace_char, match.group(1))
+        # 保留实体引用(&amp;等)中的字母
+        text = re.sub(r'&[A-Za-z]+;|[A-Za-z]', lambda m: m.group(0) if len(m.group(0)) > 1 else replace_char(m), text)
+        return f'>{text}<'
+
+    page = _SCRIPT.sub(r'\1\2', page)
+    page = _HIDDEN_VALUE.sub(
+        lambda m: m.group(0) if 'name="chapterid"' in m.group(0) else m.group(1) + m.group(3), page
+    )
+    page = _TEXT_NODE.sub(replace_text, page)
+    return page.encode(ENCODING)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == 'anonymize':
+        with open(sys.argv[2], 'rb') as f:
+            anonymized = anonymize_page(f.read())
+        with open(sys.argv[3], 'wb') as f:
+            f.write(anonymized)
+        print(f"✓ 已匿名化: {sys.argv[3]}")
+    else:
+        write_fixtures()
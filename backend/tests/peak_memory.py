@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     子进程内存峰值测量
+=================================================================
+功能：在新的子进程中运行一次测量，读取子进程的峰值常驻内存（RSS），
+      供性能对比和内存测试使用
+
+使用方法（测量脚本）：
+    if sys.argv[1:2] == [CHILD_FLAG]:
+        ...                                  # 读取参数、准备数据
+        baseline = peak_rss_mb()
+        ...                                  # 要测量的操作
+        report_child({'rss_mb': peak_rss_mb() - baseline, ...})
+    result = run_child(__file__, 参数...)     # 在父进程中调用
+
+说明：
+- tracemalloc只统计Python分配的内存，lxml等C扩展（python-docx、lxml解析器）
+  的内存不计入；RSS包含全部内存
+- 峰值无法重置，所以每次测量都使用新的子进程；Linux上读取/proc/self/status的
+  VmHWM（exec后重新统计），因为ru_maxrss会保留fork时父进程的峰值
+- 子进程先记录导入模块、准备数据后的峰值作为基线，报告测量期间的增量；
+  增量低于导入时的临时峰值时记为0，所以只适合比较MB级的差距
+
+注意：resource模块只在Unix上可用
+=================================================================
+"""
+import json
+import subprocess
+import sys
+import resource
+
+# 子进程模式的命令行标志
+CHILD_FLAG = '--child'
+
+
+def peak_rss_mb():
+    """当前进程的峰值RSS（MB）"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # 没有/proc时使用ru_maxrss：Linux以KB为单位，macOS以字节为单位
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def run_child(script, *args):
+    """
+    在新的子进程中运行测量脚本
+
+    参数：
+        script (str): 测量脚本路径，以 `python script --child 参数...` 运行
+        args: 传给子进程的参数（转为字符串）
+
+    返回：
+        dict: 子进程用report_child输出的结果
+    """
+    completed = subprocess.run(
+        [sys.executable, script, CHILD_FLAG, *map(str, args)],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"测量子进程失败（退出码{completed.returncode}）:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def report_child(result):
+    """子进程输出测量结果（最后一行JSON）"""
+    print(json.dumps(result))
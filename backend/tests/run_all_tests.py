@@ -16,6 +16,28 @@ python tests/test_author_notes.py
 python tests/test_novel_list.py  
 python tests/test_chapter_list.py
 python tests/test_docx_format.py
+python tests/test_concurrent_fetch.py
+python tests/test_rate_limiter.py
+python tests/test_chapter_journal.py
+python tests/test_resume_backup.py
+python tests/test_incremental_backup.py
+python tests/test_http_cache.py
+python tests/test_parser_backends.py
+python tests/test_fair_scheduler.py
+python tests/test_chapter_pipeline.py
+python tests/test_docx_stream.py
+python tests/test_exporters.py
+python tests/test_object_store.py
+python tests/test_catalog.py
+python tests/test_search_index.py
+python tests/test_parser_fixtures.py
+python tests/test_fake_backend.py
+python tests/test_metrics.py
+python tests/test_retry_policy.py
+python tests/test_adaptive_concurrency.py
+python tests/test_multi_account.py
+python tests/test_cli.py
+python tests/test_job_service.py
 
 测试说明：
 1. test_novel_list - 测试作品列表获取
@@ -24,6 +46,33 @@ python tests/test_docx_format.py
 4. test_vip_content - 测试VIP章节内容
 5. test_author_notes - 测试作者有话说
 6. test_docx_format - 测试DOCX文档生成
+7. test_concurrent_fetch - 测试并发章节获取（离线）
+8. test_rate_limiter - 测试请求限速器（离线）
+9. test_chapter_journal - 测试章节日志（离线）
+10. test_resume_backup - 测试断点续传（离线）
+11. test_incremental_backup - 测试增量备份（离线）
+12. test_http_cache - 测试响应缓存（离线）
+13. test_parser_backends - 测试解析后端一致性（离线）
+14. test_fair_scheduler - 测试多作品并行备份（离线）
+15. test_chapter_pipeline - 测试章节流水线和进程池渲染（离线）
+16. test_docx_stream - 测试流式DOCX写入与python-docx一致（离线）
+17. test_exporters - 测试多格式导出（离线）
+18. test_object_store - 测试章节对象存储和快照去重（离线）
+19. test_catalog - 测试SQLite作品目录（离线）
+20. test_search_index - 测试全文检索（离线）
+21. test_parser_fixtures - 测试匿名后台页面解析（离线）
+22. test_fake_backend - 测试对本地模拟后台的完整备份和故障注入（离线）
+23. test_metrics - 测试运行指标和报告（离线）
+24. test_retry_policy - 测试请求重试和熔断（离线）
+25. test_adaptive_concurrency - 测试自适应并发上限（离线）
+26. test_multi_account - 测试多账号同时备份（离线）
+27. test_cli - 测试命令行非交互运行和退出码（离线）
+28. test_job_service - 测试备份任务服务的提交、取消和进度事件流（离线，需要aiohttp）
+
+性能对比（不包含在测试套件中）：
+python tests/benchmark_docx_export.py
+python tests/benchmark_parsers.py          # 解析与渲染基准，变慢时退出码为1
+python tests/benchmark_fake_backend.py     # 对本地模拟后台比较各并发数的章节/秒
 
 注意：需要有效的Cookie才能运行网络相关测试
 =================================================================
@@ -81,6 +130,28 @@ def main():
         ("test_free_content", "免费章节内容测试"),
         ("test_vip_content", "VIP章节内容测试"),
         ("test_author_notes", "作者有话说测试"),
+        ("test_concurrent_fetch", "并发章节获取测试"),
+        ("test_rate_limiter", "请求限速器测试"),
+        ("test_chapter_journal", "章节日志测试"),
+        ("test_resume_backup", "断点续传测试"),
+        ("test_incremental_backup", "增量备份测试"),
+        ("test_http_cache", "响应缓存测试"),
+        ("test_parser_backends", "解析后端一致性测试"),
+        ("test_fair_scheduler", "多作品并行备份测试"),
+        ("test_chapter_pipeline", "章节流水线测试"),
+        ("test_docx_stream", "流式DOCX写入测试"),
+        ("test_exporters", "多格式导出测试"),
+        ("test_object_store", "章节对象存储测试"),
+        ("test_catalog", "作品目录测试"),
+        ("test_search_index", "全文检索测试"),
+        ("test_parser_fixtures", "离线页面解析测试"),
+        ("test_fake_backend", "模拟后台端到端测试"),
+        ("test_metrics", "运行指标测试"),
+        ("test_retry_policy", "请求重试和熔断测试"),
+        ("test_adaptive_concurrency", "自适应并发测试"),
+        ("test_multi_account", "多账号备份测试"),
+        ("test_cli", "命令行非交互运行测试"),
+        ("test_job_service", "备份任务服务测试"),
     ]
     
     print(f"将运行 {len(tests)} 个测试:")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     自适应并发测试
+=================================================================
+功能：测试按请求耗时和错误自动调整同时获取章节数的AIMD并发上限
+
+使用场景：
+- 验证后台正常时并发上限逐步增加到max_workers，不会超过上限
+- 检查5xx、超时和登录失效页面使上限减半，一次拥塞只减少一次
+- 确认调整记录写入运行报告（metrics.json）
+
+测试内容：
+- 加性增加、乘性减少、p95超过目标时保持不变、排队等待
+- 对本地模拟后台（tests/fake_jjwxc_server.py）完整备份：正常时增加（threads / asyncio），
+  5xx和登录失效时减少
+
+注意：不访问外部网络，无需Cookie，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from adaptive_limit import AdaptiveConcurrencyLimiter, classify_status
+from jjwxc_col import JJWXCBackupTool
+from jjwxc_parser import is_login_page
+from retry_policy import RetryPolicy, CircuitBreaker
+from fake_jjwxc_server import FakeJJWXCServer, LOGIN_PAGE
+from fixture_pages import chapter_page
+
+
+def run_backup(server, **kwargs):
+    """在临时目录中对模拟服务器完整运行一次备份，返回(工具, 备份结果, 运行报告)"""
+    options = dict(max_workers=8, adaptive_concurrency=True, requests_per_second=500, burst=50, jitter=0,
+                   checkpoint_interval=0, use_http_cache=False, use_object_store=False, use_catalog=False,
+                   use_search_index=False, base_url=server.base_url)
+    options.update(kwargs)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(**options)
+            tool.select_novels_to_backup = lambda novel_list: novel_list
+            results = tool.backup_all_novels()
+            with open(os.path.join(tool.output_dir, "metrics.json"), 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            return tool, results, report
+        finally:
+            os.chdir(old_cwd)
+
+
+def test_aimd_rules():
+    """测试加性增加和乘性减少"""
+    limiter = AdaptiveConcurrencyLimiter(max_limit=4, min_limit=1, target_p95=0.5)
+    # 每一轮（样本数等于当前上限）都正常时加1：1→2→3→4，之后保持上限
+    for _ in range(1 + 2 + 3 + 8):
+        limiter.observe(0.0)
+    assert limiter.limit == 4 and limiter.increases == 3
+
+    limiter.observe(0.0, 'server_error')
+    assert limiter.limit == 2
+    # 减少之前发出的请求再失败不重复减少
+    limiter.observe(1.0, 'timeout')
+    assert limiter.limit == 2
+    limiter.observe(0.0, 'logged_out')
+    limiter.observe(0.0, 'throttled')
+    assert limiter.limit == 1 and limiter.decreases == 2
+    assert [entry['to'] for entry in limiter.summary()['history']] == [2, 3, 4, 2, 1]
+
+    # p95超过目标时保持不变
+    slow = AdaptiveConcurrencyLimiter(max_limit=4, target_p95=0.01)
+    time.sleep(0.05)
+    for _ in range(10):
+        slow.observe(0.03)
+    assert slow.limit == 1 and not slow.history
+
+    assert [classify_status(code) for code in (200, 304, 404, 429, 503)] == \
+        ['ok', 'ok', 'ok', 'throttled', 'server_error']
+    assert is_login_page(LOGIN_PAGE) and not is_login_page(chapter_page(1))
+    print("✓ 正常时加1，出错时减半，一次拥塞只减少一次，p95超过目标时不增加")
+
+
+def test_acquire_waits_for_limit():
+    """测试达到上限时排队，上限增加后立即放行"""
+    limiter = AdaptiveConcurrencyLimiter(max_limit=2)
+    limiter.acquire()
+    entered = threading.Event()
+
+    def worker():
+        with limiter:
+            entered.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not entered.wait(0.2)
+    limiter.observe(0.0)  # 一轮正常，上限1→2
+    assert entered.wait(2)
+    thread.join()
+    limiter.release()
+    assert limiter.in_flight == 0 and limiter.peak_in_flight == 2
+    print("✓ 达到上限时排队，上限增加后放行")
+
+
+def test_backup_ramps_up():
+    """测试后台正常时并发上限逐步增加"""
+    for engine in ('threads', 'asyncio'):
+        with FakeJJWXCServer(novels=2, chapters=30, latency=0.01) as server:
+            tool, results, report = run_backup(server, fetch_engine=engine)
+        limiter = tool.concurrency_limiter
+        assert [(r['saved'], r['failed']) for r in results] == [(30, 0), (30, 0)]
+        assert limiter.limit == 8 and limiter.decreases == 0
+        assert 1 < limiter.peak_in_flight <= 8
+        assert report['settings']['adaptive_concurrency'] is True
+        assert report['concurrency']['increases'] == limiter.increases >= 7
+        print(f"✓ {engine}: 并发上限 1 → {limiter.limit}，最多同时 {limiter.peak_in_flight} 个请求")
+
+
+def test_backup_backs_off():
+    """测试5xx和登录失效页面使并发上限减少"""
+    with FakeJJWXCServer(novels=1, chapters=60, error_rate=0.1, seed=4) as server:
+        tool, results, report = run_backup(
+            server, retry_policy=RetryPolicy(backoff=0.01, jitter=0),
+            circuit_breaker=CircuitBreaker(failure_threshold=1000)
+        )
+    limiter = tool.concurrency_limiter
+    assert results[0]['saved'] == 60
+    assert limiter.decreases >= 1
+    assert {entry['reason'] for entry in limiter.history if entry['to'] < entry['from']} == {'HTTP 5xx'}
+
+    with FakeJJWXCServer(novels=1, chapters=60, logout_rate=0.1, seed=4) as server:
+        tool, results, report = run_backup(server)
+    limiter = tool.concurrency_limiter
+    assert results[0]['failed'] == server.stats['logged_out'] > 0
+    assert limiter.decreases >= 1
+    assert {entry['reason'] for entry in limiter.history if entry['to'] < entry['from']} == {'登录失效页面'}
+    print(f"✓ 5xx和登录失效页面使并发上限减少（最终 {limiter.limit}）")
+
+
+if __name__ == "__main__":
+    test_aimd_rules()
+    test_acquire_waits_for_limit()
+    test_backup_ramps_up()
+    test_backup_backs_off()
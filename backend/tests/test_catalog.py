@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     作品目录测试
+=================================================================
+功能：测试备份时把作品、章节和运行结果记录到SQLite作品目录
+
+使用场景：
+- 验证作品列表、章节列表、正文哈希和字数都写入了目录
+- 检查"某时间之后修改过哪些章节"的查询结果
+- 确认每次运行的状态和各作品结果（包括出错的作品）都有记录
+
+测试内容：
+- 两次备份同一批作品，第二次修改1章正文、修改1章标题、新增1章
+- 模拟时间，不需要等待
+
+注意：不访问网络，无需Cookie，数据库保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import time
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+import catalog as catalog_module
+from catalog import Catalog
+from jjwxc_col import JJWXCBackupTool
+
+NOVELS = [
+    {'id': '1', 'title': '目录测试', 'link': 'novel-1', 'word_count': '100', 'status': '连载',
+     'chapter_count': '5', 'category': '原创-言情'},
+    {'id': '2', 'title': '出错作品', 'link': 'novel-2', 'word_count': '0', 'status': '连载'},
+]
+
+
+def chapter_page(text):
+    """构造只包含正文textarea的章节编辑页面"""
+    return f"<form><textarea name='content'>{text}</textarea></form>".encode('gb18030')
+
+
+def run_backup(run_id, count, renamed=(), rewritten=()):
+    """在backup/<run_id>下备份全部作品，返回工具"""
+    tool = JJWXCBackupTool(max_workers=2, checkpoint_interval=0, use_http_cache=False, use_object_store=False)
+    tool.output_dir = os.path.join("backup", run_id)
+    os.makedirs(tool.output_dir, exist_ok=True)
+
+    def fake_get_chapters(novel_link):
+        if novel_link != 'novel-1':
+            raise RuntimeError("模拟章节列表获取失败")
+        return [
+            {'id': str(n), 'title': f"新标题{n}" if n in renamed else f"标题{n}", 'link': f"chapter-{n}",
+             'chapter_number': n, 'is_vip': n > 3, 'row_hash': f"row-{n}-{n in renamed}"}
+            for n in range(1, count + 1)
+        ]
+
+    def fake_fetch_chapter_page(chapter_link, session=None):
+        number = int(chapter_link.split('-')[1])
+        version = "修改后" if number in rewritten else "原始"
+        return chapter_page(f"{chapter_link} {version}正文，长度足够通过有效内容检查。\n【作者有话说】\n备注")
+
+    tool.check_login = lambda: True
+    tool.get_novel_list = lambda: NOVELS
+    tool.select_novels_to_backup = lambda novel_list: novel_list
+    tool.get_chapters = fake_get_chapters
+    tool.get_intro_from_backend = lambda novel_id: "测试简介"
+    tool.fetch_chapter_page = fake_fetch_chapter_page
+    tool.backup_all_novels()
+    return tool
+
+
+def test_catalog_backup_runs():
+    """测试两次备份后的目录查询"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        old_now = catalog_module._now
+        os.chdir(tmp_dir)
+        try:
+            catalog_module._now = lambda: "2026-01-01T00:00:00"
+            run_backup("20260101_000000", 5)
+            catalog_module._now = lambda: "2026-01-08T00:00:00"
+            tool = run_backup("20260108_000000", 6, renamed={2}, rewritten={4})
+
+            db = tool.catalog
+            novels = {novel['id']: novel for novel in db.novels()}
+            assert novels['1']['title'] == '目录测试' and novels['1']['category'] == '原创-言情'
+            assert novels['1']['chapters'] == 6 and novels['1']['vip_chapters'] == 3
+            assert novels['2']['chapters'] == 0
+
+            chapters = db.chapters('1')
+            assert [c['chapter_number'] for c in chapters] == [1, 2, 3, 4, 5, 6]
+            first = chapters[0]
+            assert first['first_seen'] == "2026-01-01T00:00:00" and first['last_seen'] == "2026-01-08T00:00:00"
+            assert first['content_hash'] and first['note_size'] == len("\n备注")
+            assert first['content_size'] == first['body_size'] + len("【作者有话说】") + first['note_size']
+
+            # 第2章改标题、第4章改正文、第6章新增
+            started = time.perf_counter()
+            changed = db.changed_since("2026-01-05T00:00:00")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            assert [c['chapter_number'] for c in changed] == [2, 4, 6], changed
+            assert changed[0]['novel_title'] == '目录测试'
+            assert db.changed_since("2026-01-05T00:00:00", novel_id='2') == []
+            assert db.chapter('1', 4)['content_hash'] != first['content_hash']
+            print(f"修改过的章节查询耗时: {elapsed_ms:.2f} ms")
+
+            runs = db.runs()
+            assert [r['id'] for r in runs] == ["20260108_000000", "20260101_000000"]
+            assert runs[0]['status'] == 'completed' and runs[0]['novels'] == 2 and runs[0]['saved'] == 6
+            results = {r['novel_id']: r for r in db.run_novels("20260108_000000")}
+            assert results['1']['saved'] == 6 and results['1']['seconds'] is not None
+            assert "模拟章节列表获取失败" in results['2']['error']
+        finally:
+            catalog_module._now = old_now
+            os.chdir(old_cwd)
+    print("✓ 作品、章节和运行结果都已记录，可离线查询修改过的章节")
+
+
+def test_catalog_indexes():
+    """测试章节查询使用索引"""
+    with Catalog(':memory:') as db:
+        plans = {
+            "novel": "SELECT * FROM chapters WHERE novel_id='1' ORDER BY chapter_number",
+            "number": "SELECT * FROM chapters WHERE chapter_number=3",
+            "changed": "SELECT * FROM chapters WHERE changed_at >= '2026-01-01'",
+            "run_novels": "SELECT * FROM run_novels WHERE novel_id='1'",
+        }
+        for name, sql in plans.items():
+            plan = " ".join(row['detail'] for row in db._query(f"EXPLAIN QUERY PLAN {sql}"))
+            assert "USING INDEX" in plan or "USING COVERING INDEX" in plan, (name, plan)
+    print("✓ 按作品、章节编号、修改时间查询都使用索引")
+
+
+if __name__ == "__main__":
+    test_catalog_backup_runs()
+    test_catalog_indexes()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     章节日志测试
+=================================================================
+功能：测试追加式章节日志的写入、读取和崩溃容错
+
+使用场景：
+- 验证章节记录追加后可以完整读回
+- 检查崩溃导致的不完整末行被忽略，再次打开日志后追加的记录可以读回
+- 验证同一章节重复写入时以最后一条为准
+
+注意：不访问网络，无需Cookie
+=================================================================
+"""
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from chapter_journal import ChapterJournal
+
+
+def test_chapter_journal():
+    """测试章节日志读写"""
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal_path = os.path.join(tmp_dir, "测试.journal.jsonl")
+        novel = {'id': '1', 'title': '测试'}
+        
+        with ChapterJournal(journal_path) as journal:
+            journal.write_novel(novel, "简介")
+            for n in range(1, 4):
+                journal.write_chapter({'id': str(n), 'title': f"标题{n}", 'chapter_number': n}, f"正文{n}\n第二行")
+            journal.write_chapter({'id': '2', 'title': "标题2", 'chapter_number': 2}, "修改后的正文2")
+        
+        # 模拟写到一半时崩溃
+        with open(journal_path, 'a', encoding='utf-8') as f:
+            f.write('{"type": "chapter", "id": "4", "cont')
+        
+        novel_record, chapters = ChapterJournal.read(journal_path)
+        print(f"作品记录: {novel_record['novel']}，简介: {novel_record['intro']}")
+        print(f"读回章节: {sorted(chapters)}")
+        
+        assert novel_record['novel'] == novel
+        assert novel_record['intro'] == "简介"
+        assert sorted(chapters) == ['1', '2', '3']
+        assert chapters['1']['content'] == "正文1\n第二行"
+        assert chapters['2']['content'] == "修改后的正文2"
+        print("✓ 日志读写正确，不完整末行已忽略")
+        
+        # 续传时再次打开：截掉不完整的末行，新记录不会接在该行后面
+        with ChapterJournal(journal_path) as journal:
+            journal.write_novel(novel, "续传后的简介")
+            journal.write_chapter({'id': '4', 'title': "标题4", 'chapter_number': 4}, "正文4")
+        novel_record, chapters = ChapterJournal.read(journal_path)
+        assert novel_record['intro'] == "续传后的简介"
+        assert sorted(chapters) == ['1', '2', '3', '4']
+        with open(journal_path, 'rb') as f:
+            assert b'"cont{' not in f.read()
+        print("✓ 再次打开时截掉不完整末行，续传的记录可以读回")
+
+
+if __name__ == "__main__":
+    test_chapter_journal()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     章节流水线测试
+=================================================================
+功能：测试 获取 → 解析 → 写入 流水线和进程池渲染
+
+使用场景：
+- 验证写入跟不上时流水线停止提交获取请求（背压），内存占用有上限
+- 检查解析阶段的异常会交给调用方处理
+- 确认进程池渲染的文档与后台线程渲染的结果一致
+
+注意：不访问网络，无需Cookie，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from fair_scheduler import FairScheduler
+from chapter_pipeline import ChapterPipeline
+from jjwxc_col import JJWXCBackupTool
+from docx import Document
+
+NOVEL = {'id': '1', 'title': '流水线测试', 'word_count': '0', 'status': '测试'}
+CHAPTERS = [
+    {'id': str(n), 'title': f"标题{n}", 'link': f"chapter-{n}", 'chapter_number': n, 'is_vip': False}
+    for n in range(1, 31)
+]
+
+
+def chapter_page(text):
+    """构造只包含正文textarea的章节编辑页面"""
+    return f"<form><textarea name='content'>{text}</textarea></form>".encode('gb18030')
+
+
+def test_backpressure():
+    """测试写入缓慢时在途章节不超过depth"""
+    lock = threading.Lock()
+    state = {'fetched': 0, 'consumed': 0, 'max_outstanding': 0}
+
+    def fetch(chapter):
+        with lock:
+            state['fetched'] += 1
+            outstanding = state['fetched'] - state['consumed']
+            state['max_outstanding'] = max(state['max_outstanding'], outstanding)
+        return chapter['link'].encode()
+
+    def parse(page):
+        if page == b'chapter-7':
+            raise ValueError("模拟解析失败")
+        return page.decode()
+
+    scheduler = FairScheduler(max_workers=4)
+    try:
+        pipeline = ChapterPipeline(scheduler, 'novel', fetch, parse, depth=5)
+        results = []
+        for chapter, text, error in pipeline.run(CHAPTERS):
+            time.sleep(0.005)  # 模拟缓慢的写入阶段
+            with lock:
+                state['consumed'] += 1
+            results.append((chapter['id'], text, error))
+    finally:
+        scheduler.shutdown()
+
+    print(f"最大在途章节数: {pipeline.max_in_flight}，最大未写入页面数: {state['max_outstanding']}")
+    assert len(results) == len(CHAPTERS)
+    assert pipeline.max_in_flight <= 5 and state['max_outstanding'] <= 5
+    errors = {chapter_id: error for chapter_id, _, error in results if error is not None}
+    assert list(errors) == ['7'] and isinstance(errors['7'], ValueError)
+    print("✓ 写入跟不上时暂停获取，解析异常交给调用方")
+
+
+def render_with(render_processes):
+    """用指定渲染方式备份测试作品，返回文档段落"""
+    tool = JJWXCBackupTool(max_workers=3, checkpoint_interval=4, pipeline_depth=4,
+                           render_processes=render_processes, use_http_cache=False)
+    tool.get_intro_from_backend = lambda novel_id: "测试简介"
+    tool.fetch_chapter_page = lambda chapter_link, session=None: chapter_page(
+        f"{chapter_link} 的正文内容，长度足够通过有效内容检查。\n【作者有话说】\n作者备注"
+    )
+    result = tool.create_docx_with_realtime_save(NOVEL, CHAPTERS)
+    assert result['saved'] == len(CHAPTERS) and not result['error']
+    doc = Document(os.path.join(tool.output_dir, "流水线测试.docx"))
+    return [(p.style.name, p.text) for p in doc.paragraphs]
+
+
+def test_process_pool_render():
+    """测试进程池渲染与线程渲染结果一致"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            os.makedirs("threads")
+            os.makedirs("processes")
+            os.chdir("threads")
+            expected = render_with(0)
+            os.chdir(os.path.join(tmp_dir, "processes"))
+            actual = render_with(2)
+        finally:
+            os.chdir(old_cwd)
+
+    headings = [text for style, text in actual if style == 'Heading 1']
+    assert headings == [f"第{n}章 标题{n}" for n in range(1, 31)]
+    assert actual == expected
+    print("✓ 进程池渲染结果与线程渲染一致")
+
+
+if __name__ == "__main__":
+    test_backpressure()
+    test_process_pool_render()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     命令行非交互运行测试
+=================================================================
+功能：测试jjwxc_col.py命令行在没有终端时的作品选择、安静模式和退出码
+
+使用场景：
+- 验证--all / --novel-id / --title / --status选择作品时不调用input()，可用于定时任务
+- 检查全部成功、部分失败、未登录、没有匹配作品、参数错误和运行出错时的退出码
+- 确认--quiet只输出每部作品的结果，--output-dir指定备份根目录
+
+测试内容：
+- 作品筛选条件的组合（ID或链接、书名、状态）
+- 对本地模拟后台（tests/fake_jjwxc_server.py）运行main()，检查退出码和输出文件
+
+注意：不访问外部网络，测试文档保存到临时目录
+=================================================================
+"""
+import io
+import os
+import sys
+import builtins
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jjwxc_col import (
+    main, JJWXCBackupTool, EXIT_OK, EXIT_PARTIAL, EXIT_USAGE, EXIT_LOGIN_FAILED, EXIT_NO_MATCH, EXIT_ERROR
+)
+from jjwxc_parser import parse_novel_list
+from novel_filter import build_novel_filter
+from fake_jjwxc_server import FakeJJWXCServer
+
+
+def run_cli(server, tmp_dir, *args):
+    """
+    在临时目录中运行命令行，禁止读取标准输入
+
+    返回：
+        tuple: (退出码, 标准输出)
+    """
+    def no_input(*_):
+        raise AssertionError("非交互运行不应调用input()")
+
+    cookie_file = os.path.join(tmp_dir, "cookie.txt")
+    with open(cookie_file, 'w', encoding='utf-8') as f:
+        f.write("jjwxc_token=test")
+    argv = ['--cookie', cookie_file, '--output-dir', os.path.join(tmp_dir, "out"), '--rps', '500',
+            '--burst', '50', '--jitter', '0', '--no-cache', '--no-store', '--no-catalog', '--no-index']
+    if server is not None:
+        argv += ['--base-url', server.base_url]
+    output = io.StringIO()
+    old_input, old_stdin = builtins.input, sys.stdin
+    builtins.input, sys.stdin = no_input, io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            code = main(argv + list(args))
+    finally:
+        builtins.input, sys.stdin = old_input, old_stdin
+    return code, output.getvalue()
+
+
+def output_documents(tmp_dir):
+    """输出目录中生成的DOCX文件"""
+    root = os.path.join(tmp_dir, "out")
+    return [name for run in os.listdir(root) if os.path.isdir(os.path.join(root, run))
+            for name in os.listdir(os.path.join(root, run)) if name.endswith('.docx')]
+
+
+def test_novel_filter():
+    """测试作品筛选条件的组合"""
+    novels = [
+        {'id': '1', 'title': '春日来信', 'status': '连载中'},
+        {'id': '2', 'title': '夏夜长谈', 'status': '已完成'},
+        {'id': '3', 'title': '秋日私语', 'status': '连载中'},
+    ]
+    ids = lambda novels: [novel['id'] for novel in novels]
+    assert ids(build_novel_filter()(novels)) == ['1', '2', '3']
+    assert ids(build_novel_filter(['3', 'https://www.jjwxc.net/onebook.php?novelid=1'])(novels)) == ['1', '3']
+    assert ids(build_novel_filter(titles=['日', '夏'])(novels)) == ['1', '2', '3']
+    assert ids(build_novel_filter(titles=['日'], statuses=['连载'])(novels)) == ['1', '3']
+    assert ids(build_novel_filter(['2'], statuses=['连载'])(novels)) == []
+    print("✓ 同类条件为或、不同类条件为且，作品链接可代替ID")
+
+
+def test_exit_codes():
+    """测试各种运行结果的退出码"""
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeJJWXCServer(novels=3, chapters=[4, 3, 2]) as server:
+        novels = parse_novel_list(server.page('/backend/oneauthor_login.php', {}), base_url=server.base_url)
+
+        code, output = run_cli(server, tmp_dir, '--all', '--quiet')
+        assert code == EXIT_OK
+        assert len(output_documents(tmp_dir)) == 3
+        # 安静模式只输出每部作品的结果和输出目录
+        lines = output.strip().splitlines()
+        assert len(lines) == 4 and all(line.startswith("✓") for line in lines[:3]), output
+
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeJJWXCServer(novels=3, chapters=[4, 3, 2]) as server:
+        code, _ = run_cli(server, tmp_dir, '--novel-id', f"{novels[1]['id']},{novels[2]['id']}", '-q')
+        assert code == EXIT_OK and len(output_documents(tmp_dir)) == 2
+        code, _ = run_cli(server, tmp_dir, '--title', novels[0]['title'], '--status', novels[0]['status'], '-q')
+        assert code == EXIT_OK and len(output_documents(tmp_dir)) == 3
+        code, _ = run_cli(server, tmp_dir, '--novel-id', '999', '-q')
+        assert code == EXIT_NO_MATCH
+
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            FakeJJWXCServer(novels=1, chapters=20, error_rate=0.3, seed=1) as server:
+        code, output = run_cli(server, tmp_dir, '--all', '--retries', '0', '-q')
+        assert code == EXIT_PARTIAL and "失败" in output
+
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeJJWXCServer(logged_out=True) as server:
+        code, _ = run_cli(server, tmp_dir, '--all', '-q')
+        assert code == EXIT_LOGIN_FAILED
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # 没有终端又没有指定作品
+        code, _ = run_cli(None, tmp_dir)
+        assert code == EXIT_USAGE
+        code, _ = run_cli(None, tmp_dir, '--all', '--formats', 'pdf')
+        assert code == EXIT_USAGE
+        code, _ = run_cli(None, tmp_dir, '--all', '--resume', os.path.join(tmp_dir, "missing"))
+        assert code == EXIT_USAGE
+    print("✓ 全部成功 0、部分失败 1、参数错误 2、未登录 3、没有匹配的作品 4")
+
+
+def test_runtime_value_error():
+    """测试备份过程中的ValueError按运行出错退出，而不是参数错误"""
+    def broken_novel_list(self):
+        raise ValueError("作品列表格式异常")
+
+    original = JJWXCBackupTool.get_novel_list
+    JJWXCBackupTool.get_novel_list = broken_novel_list
+    stderr = io.StringIO()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir, FakeJJWXCServer() as server, \
+                contextlib.redirect_stderr(stderr):
+            code, _ = run_cli(server, tmp_dir, '--all', '-q')
+    finally:
+        JJWXCBackupTool.get_novel_list = original
+    assert code == EXIT_ERROR
+    assert "Traceback" in stderr.getvalue() and "作品列表格式异常" in stderr.getvalue()
+    print("✓ 运行中的ValueError退出码为 5，并输出调用栈")
+
+
+if __name__ == "__main__":
+    test_novel_filter()
+    test_exit_codes()
+    test_runtime_value_error()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     并发章节获取测试
+=================================================================
+功能：测试线程池并发获取章节时的顺序组装
+
+使用场景：
+- 验证章节乱序完成时文档仍按章节编号排列
+- 检查工作线程使用独立Session并共享Cookie
+
+测试内容：
+- 模拟耗时不同的章节请求（不访问网络）
+- 检查生成的DOCX中章节标题顺序
+
+注意：无需Cookie，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from jjwxc_col import JJWXCBackupTool
+from docx import Document
+
+
+def chapter_page(text):
+    """构造只包含正文textarea的章节编辑页面"""
+    return f"<form><textarea name='content'>{text}</textarea></form>".encode('gb18030')
+
+
+def test_concurrent_fetch():
+    """测试并发获取与顺序组装"""
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(max_workers=4, checkpoint_interval=5)
+            tool.get_intro_from_backend = lambda novel_id: "测试简介"
+            sessions = set()
+            
+            def fake_fetch_chapter_page(chapter_link, session=None):
+                sessions.add(id(session))
+                assert session.cookies is tool.session.cookies
+                # 让后面的章节先完成，模拟乱序返回
+                time.sleep(random.uniform(0, 0.05))
+                return chapter_page(f"{chapter_link} 的正文内容，长度足够通过有效内容检查。\n第二行")
+            
+            tool.fetch_chapter_page = fake_fetch_chapter_page
+            
+            chapters = [
+                {'id': str(n), 'title': f"标题{n}", 'link': f"chapter-{n}", 'chapter_number': n, 'is_vip': False}
+                for n in range(1, 13)
+            ]
+            random.shuffle(chapters)
+            novel = {'id': '1', 'title': '并发测试', 'word_count': '0', 'status': '测试'}
+            tool.create_docx_with_realtime_save(novel, chapters)
+            
+            doc = Document(os.path.join(tool.output_dir, "并发测试.docx"))
+            headings = [p.text for p in doc.paragraphs if p.style.name == 'Heading 1']
+            expected = [f"第{n}章 标题{n}" for n in range(1, 13)]
+            
+            print(f"章节标题顺序: {headings}")
+            print(f"使用的工作线程Session数: {len(sessions)}")
+            assert headings == expected
+            assert 1 <= len(sessions) <= 4
+            print("✓ 章节按编号顺序写入")
+        finally:
+            os.chdir(old_cwd)
+
+
+if __name__ == "__main__":
+    test_concurrent_fetch()
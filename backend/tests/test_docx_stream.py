@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     流式DOCX写入测试
+=================================================================
+功能：测试流式DOCX写入与python-docx生成的文档一致，且内存占用不随章节数增长
+
+使用场景：
+- 修改文档结构或格式后确认两种生成方式仍然一致
+- 检查特殊字符（XML转义、制表符、回车、首尾空格、控制字符）的写法
+
+测试内容：
+- 标题、居中信息行、简介、分页符、章节标题、蓝色"作者有话说"标题、红色错误信息
+- 两种方式生成的word/document.xml逐字节比较
+- 50章与2000章在子进程中生成时的峰值RSS增量比较（见 tests/peak_memory.py）
+
+注意：不访问网络，无需Cookie；性能对比见 tests/benchmark_docx_export.py
+=================================================================
+"""
+import os
+import sys
+import zipfile
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chapter_journal import ChapterJournal
+from exporters import render_docx_from_journal
+from docx import Document
+from peak_memory import CHILD_FLAG, peak_rss_mb, run_child, report_child
+
+NOVEL = {'id': '1', 'title': '流式 & "写入" <测试>', 'word_count': '100', 'status': '连载'}
+
+
+def chapter_list(chapter_count):
+    """测试章节列表"""
+    return [
+        {'id': str(n), 'title': f"标题{n} & <b>", 'chapter_number': n}
+        for n in range(1, chapter_count + 1)
+    ]
+
+
+def build_journal(path, chapter_count, skip=()):
+    """生成章节日志，返回章节列表"""
+    chapters = chapter_list(chapter_count)
+    with ChapterJournal(path, fsync=False) as journal:
+        journal.write_novel(NOVEL, "简介第一行\n简介第二行")
+        for chapter in chapters:
+            if chapter['id'] in skip:
+                continue
+            journal.write_chapter(chapter, (
+                f"　　第{chapter['id']}章正文\n\n  前导空格\t制表符 \r回车 <标签> & 符号\n"
+                "【作者有话说】\n作者备注 "
+            ))
+    return chapters
+
+
+def test_stream_matches_python_docx():
+    """测试两种生成方式的document.xml完全一致"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal_path = os.path.join(tmp_dir, "测试.journal.jsonl")
+        chapters = build_journal(journal_path, 5, skip={'3'})
+        failures = {'3': "[章节内容获取失败: 测试]"}
+
+        outputs = {}
+        for engine in ('stream', 'python-docx'):
+            path = os.path.join(tmp_dir, f"{engine}.docx")
+            render_docx_from_journal(journal_path, chapters, failures, path, engine)
+            outputs[engine] = path
+
+        stream_zip = zipfile.ZipFile(outputs['stream'])
+        reference_zip = zipfile.ZipFile(outputs['python-docx'])
+        assert sorted(stream_zip.namelist()) == sorted(reference_zip.namelist())
+        assert stream_zip.read('word/document.xml') == reference_zip.read('word/document.xml')
+
+        doc = Document(outputs['stream'])
+        styles = [p.style.name for p in doc.paragraphs]
+        assert styles[0] == 'Title' and styles.count('Heading 1') == 5 and styles.count('Heading 2') == 4
+        author_heading = next(p for p in doc.paragraphs if p.style.name == 'Heading 2')
+        assert str(author_heading.runs[0].font.color.rgb) == '0000FF'
+        error = next(p for p in doc.paragraphs if p.text == failures['3'])
+        assert str(error.runs[0].font.color.rgb) == 'FF0000'
+    print("✓ 流式写入与python-docx生成的document.xml一致")
+
+
+def test_stream_strips_control_characters():
+    """测试XML不允许的控制字符被去掉，文档仍可打开"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        journal_path = os.path.join(tmp_dir, "控制字符.journal.jsonl")
+        chapter = {'id': '1', 'title': "标题", 'chapter_number': 1}
+        with ChapterJournal(journal_path, fsync=False) as journal:
+            journal.write_novel(NOVEL, "")
+            journal.write_chapter(chapter, "正文\x07含有\x1b控制字符")
+        path = os.path.join(tmp_dir, "控制字符.docx")
+        render_docx_from_journal(journal_path, [chapter], {}, path)
+        texts = [p.text for p in Document(path).paragraphs]
+    assert "正文含有控制字符" in texts
+    print("✓ 控制字符已去除")
+
+
+def render_child(journal_path, chapter_count, output_path, engine):
+    """子进程：从已有的章节日志生成文档，输出峰值RSS增量"""
+    chapters = chapter_list(int(chapter_count))
+    baseline = peak_rss_mb()
+    render_docx_from_journal(journal_path, chapters, {}, output_path, engine)
+    report_child({'rss_mb': peak_rss_mb() - baseline})
+
+
+def render_peak(tmp_dir, chapter_count, engine='stream'):
+    """在新的子进程中生成文档，返回峰值RSS增量（MB）"""
+    journal_path = os.path.join(tmp_dir, f"{chapter_count}.journal.jsonl")
+    build_journal(journal_path, chapter_count)
+    output_path = os.path.join(tmp_dir, f"{chapter_count}-{engine}.docx")
+    return run_child(__file__, journal_path, chapter_count, output_path, engine)['rss_mb']
+
+
+def test_stream_memory_is_flat():
+    """测试流式写入的峰值RSS不随章节数明显增长"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        small = render_peak(tmp_dir, 50)
+        large = render_peak(tmp_dir, 2000)
+    # python-docx方式从50章到2000章约增长17MB（含lxml），流式写入应基本不变
+    print(f"峰值RSS增量: 50章 {small:.1f}MB，2000章 {large:.1f}MB")
+    assert large < small + 4
+    print("✓ 流式写入内存占用与章节数基本无关")
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == [CHILD_FLAG]:
+        render_child(*sys.argv[2:])
+        sys.exit(0)
+    test_stream_matches_python_docx()
+    test_stream_strips_control_characters()
+    test_stream_memory_is_flat()
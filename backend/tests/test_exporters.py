@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     多格式导出测试
+=================================================================
+功能：测试一次获取同时导出DOCX、TXT、Markdown、JSONL、EPUB
+
+使用场景：
+- 验证每种格式的章节顺序和内容
+- 检查JSONL记录的字段和EPUB的文件结构
+- 确认获取失败的章节在各格式中都有标记
+- 确认文件未能写入时作品结果记录错误，章节日志保留
+
+测试内容：
+- 模拟5个章节（第3章获取失败），导出全部格式
+- EPUB中所有XHTML/XML文件都能被XML解析器解析
+- Markdown中的标题、引用、列表、强调、链接和内联HTML都转义为普通文字
+
+注意：不访问网络，无需Cookie，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import json
+import zipfile
+import tempfile
+import xml.dom.minidom
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from exporters import EXPORT_FORMATS, Exporter, parse_formats, escape_markdown
+from jjwxc_col import JJWXCBackupTool
+from docx import Document
+
+NOVEL = {'id': '7', 'title': '导出测试', 'word_count': '100', 'status': '完结'}
+CHAPTERS = [
+    {'id': str(n), 'title': f"标题{n} <&>", 'link': f"chapter-{n}", 'chapter_number': n, 'is_vip': False}
+    for n in range(1, 6)
+]
+
+
+def chapter_page(text):
+    """构造只包含正文textarea的章节编辑页面"""
+    return f"<form><textarea name='content'>{text}</textarea></form>".encode('gb18030')
+
+
+def fake_fetch_chapter_page(chapter_link, session=None):
+    if chapter_link == "chapter-3":
+        raise ConnectionError("模拟网络错误")
+    return chapter_page(
+        f"{chapter_link} 正文第一行，长度足够通过有效内容检查。\n\n# 不是标题\n"
+        "【作者有话说】\n作者备注 &amp; 感谢"
+    )
+
+
+def test_parse_formats():
+    """测试格式列表解析"""
+    assert parse_formats("docx, TXT,.epub,txt") == ('docx', 'txt', 'epub')
+    assert parse_formats(['md']) == ('md',)
+    for bad in ("pdf", ""):
+        try:
+            parse_formats(bad)
+            assert False, f"应当拒绝: {bad!r}"
+        except ValueError:
+            pass
+    print("✓ 格式列表解析正确")
+
+
+def test_export_all_formats():
+    """测试一次获取导出全部格式"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(max_workers=2, export_formats=",".join(EXPORT_FORMATS),
+                                   use_http_cache=False)
+            tool.get_intro_from_backend = lambda novel_id: "作品简介"
+            fetched = []
+            tool.fetch_chapter_page = lambda chapter_link, session=None: (
+                fetched.append(chapter_link) or fake_fetch_chapter_page(chapter_link)
+            )
+            result = tool.create_docx_with_realtime_save(NOVEL, CHAPTERS)
+            base = os.path.join(tool.output_dir, "导出测试")
+
+            assert sorted(fetched) == [f"chapter-{n}" for n in range(1, 6)]
+            assert result['saved'] == 4 and result['failed'] == 1
+
+            # DOCX
+            headings = [p.text for p in Document(f"{base}.docx").paragraphs if p.style.name == 'Heading 1']
+            assert headings == [f"第{n}章 标题{n} <&>" for n in range(1, 6)]
+
+            # TXT
+            with open(f"{base}.txt", encoding='utf-8') as f:
+                txt = f.read()
+            assert txt.startswith("导出测试\n作品ID: 7 | 字数: 100 | 状态: 完结\n\n作品简介\n")
+            positions = [txt.index(f"第{n}章 标题{n}") for n in range(1, 6)]
+            assert positions == sorted(positions)
+            assert "作者有话说\n作者备注 & 感谢" in txt and "[章节内容获取失败:" in txt
+
+            # Markdown
+            with open(f"{base}.md", encoding='utf-8') as f:
+                md = f.read()
+            assert md.startswith("# 导出测试\n") and "## 第1章 标题1 \\<\\&\\>" in md
+            assert "\\# 不是标题" in md and "### 作者有话说" in md
+
+            # JSONL
+            with open(f"{base}.jsonl", encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+            assert [r['chapter_number'] for r in records] == [1, 2, 3, 4, 5]
+            assert records[0]['author_note'] == "作者备注 & 感谢"
+            assert records[0]['content'].startswith("chapter-1 正文第一行")
+            assert records[2]['content'] is None and records[2]['error']
+
+            # EPUB
+            with zipfile.ZipFile(f"{base}.epub") as epub:
+                first = epub.infolist()[0]
+                assert first.filename == 'mimetype' and first.compress_type == zipfile.ZIP_STORED
+                for name in epub.namelist():
+                    if name.endswith(('.xhtml', '.opf', '.ncx', '.xml')):
+                        xml.dom.minidom.parseString(epub.read(name))
+                chapters = sorted(n for n in epub.namelist() if n.startswith('OEBPS/chapter_'))
+                assert len(chapters) == 5
+                opf = epub.read('OEBPS/content.opf').decode('utf-8')
+                assert opf.count('<itemref') == 6
+                assert "作者有话说" in epub.read(chapters[0]).decode('utf-8')
+        finally:
+            os.chdir(old_cwd)
+    print("✓ 一次获取导出全部格式")
+
+
+def test_markdown_escaping():
+    """测试Markdown导出把标记和HTML转义为普通文字"""
+    cases = {
+        "# 不是标题": "\\# 不是标题",
+        "> 不是引用": "\\> 不是引用",
+        "- 不是列表": "\\- 不是列表",
+        "* 不是列表": "\\* 不是列表",
+        "1. 不是列表": "1\\. 不是列表",
+        "---": "\\---",
+        "<script>alert(1)</script>": "\\<script\\>alert(1)\\</script\\>",
+        "**粗体** _斜体_ [链接](x) `代码` &amp;": "\\*\\*粗体\\*\\* \\_斜体\\_ \\[链接\\](x) \\`代码\\` \\&amp;",
+        "    缩进": "&nbsp;&nbsp;&nbsp;&nbsp;缩进",
+        "　　全角缩进的正文。": "　　全角缩进的正文。",
+    }
+    for text, expected in cases.items():
+        assert escape_markdown(text) == expected, (text, escape_markdown(text))
+
+    # 导出器接口的方法都是抽象方法，缺少实现的子类不能实例化
+    class Incomplete(Exporter):
+        def begin(self, novel, intro):
+            pass
+    try:
+        Incomplete("x.md")
+        assert False, "缺少抽象方法时应当报错"
+    except TypeError:
+        pass
+    print("✓ Markdown标记和HTML转义为普通文字，导出器基类为抽象类")
+
+
+def test_export_failure_is_reported():
+    """测试文件未能写入时作品结果记录错误"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(max_workers=2, export_formats="docx,txt", use_http_cache=False)
+            tool.get_intro_from_backend = lambda novel_id: "作品简介"
+            tool.fetch_chapter_page = lambda chapter_link, session=None: fake_fetch_chapter_page(chapter_link)
+            base = os.path.join(tool.output_dir, "导出测试")
+            # 与TXT文件同名的目录使替换临时文件失败（相当于文件正被其他程序占用）
+            os.makedirs(f"{base}.txt")
+            result = tool.create_docx_with_realtime_save(NOVEL, CHAPTERS)
+
+            assert result['saved'] == 4 and "文档未生成" in result['error'] and f"{base}.txt" in result['error']
+            assert os.path.exists(f"{base}.docx")
+            # 文档未全部生成时保留章节日志，可续传重新生成
+            assert os.path.exists(f"{base}.journal.jsonl")
+        finally:
+            os.chdir(old_cwd)
+    print("✓ 文件未能写入时作品结果记录错误，章节日志保留")
+
+
+if __name__ == "__main__":
+    test_parse_formats()
+    test_markdown_escaping()
+    test_export_all_formats()
+    test_export_failure_is_reported()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     多作品并行备份测试
+=================================================================
+功能：测试公平调度器和多部作品同时备份
+
+使用场景：
+- 验证调度器按作品轮流执行章节请求，长篇作品不会让短篇一直排队
+- 检查一部作品出错时其他作品照常完成
+- 确认每部作品都生成了按章节顺序排列的文档
+- 备份中途按Ctrl+C时，各作品用已保存的章节生成文档后再退出
+
+测试内容：
+- 单线程调度器的执行顺序
+- 模拟一部长篇、一部短篇和一部获取章节列表出错的作品
+- 向主线程发送SIGINT模拟中断
+
+注意：不访问网络，无需Cookie，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+import signal
+import contextlib
+import io
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from fair_scheduler import FairScheduler
+from jjwxc_col import JJWXCBackupTool
+from docx import Document
+
+
+def chapter_page(text):
+    """构造只包含正文textarea的章节编辑页面"""
+    return f"<form><textarea name='content'>{text}</textarea></form>".encode('gb18030')
+
+
+def test_round_robin_order():
+    """测试调度器按分组轮流取任务"""
+    order = []
+    gate = threading.Event()
+    scheduler = FairScheduler(max_workers=1)
+    try:
+        # 先占住唯一的工作线程，保证后面的任务全部进入队列
+        blocker = scheduler.submit('blocker', gate.wait)
+        futures = [scheduler.submit('long', order.append, f"long-{n}") for n in range(5)]
+        futures += [scheduler.submit('short', order.append, f"short-{n}") for n in range(2)]
+        futures.append(scheduler.submit('failing', lambda: 1 / 0))
+        gate.set()
+        blocker.result(timeout=5)
+        for future in futures:
+            future.exception(timeout=5)
+    finally:
+        scheduler.shutdown()
+
+    print(f"执行顺序: {order}")
+    assert order == ['long-0', 'short-0', 'long-1', 'short-1', 'long-2', 'long-3', 'long-4']
+    assert isinstance(futures[-1].exception(), ZeroDivisionError)
+    print("✓ 按分组轮流执行，单个任务出错不影响其他任务")
+
+
+def test_cancel_group():
+    """测试只取消某一分组尚未开始的任务"""
+    gate = threading.Event()
+    scheduler = FairScheduler(max_workers=1)
+    try:
+        scheduler.submit('blocker', gate.wait)
+        a = [scheduler.submit('a', lambda: 'a') for _ in range(3)]
+        b = [scheduler.submit('b', lambda: 'b') for _ in range(3)]
+        assert scheduler.cancel('a') == 3
+        gate.set()
+        assert [f.result(timeout=5) for f in b] == ['b', 'b', 'b']
+        assert all(f.cancelled() for f in a)
+    finally:
+        scheduler.shutdown()
+    print("✓ 取消一部作品的任务不影响其他作品")
+
+
+def test_parallel_novels():
+    """测试多部作品同时备份"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(max_workers=2, novel_concurrency=3, checkpoint_interval=0,
+                                   use_http_cache=False)
+            novels = [
+                {'id': '1', 'title': '长篇', 'link': 'novel-1', 'word_count': '0', 'status': '测试'},
+                {'id': '2', 'title': '短篇', 'link': 'novel-2', 'word_count': '0', 'status': '测试'},
+                {'id': '3', 'title': '出错', 'link': 'novel-3', 'word_count': '0', 'status': '测试'},
+            ]
+            sizes = {'novel-1': 40, 'novel-2': 3}
+            finished_at = {}
+
+            def fake_get_chapters(novel_link):
+                if novel_link not in sizes:
+                    raise RuntimeError("模拟章节列表获取失败")
+                return [
+                    {'id': f"{novel_link}-{n}", 'title': f"标题{n}", 'link': f"{novel_link}/chapter-{n}",
+                     'chapter_number': n, 'is_vip': False}
+                    for n in range(1, sizes[novel_link] + 1)
+                ]
+
+            def fake_fetch_chapter_page(chapter_link, session=None):
+                time.sleep(0.01)
+                finished_at[chapter_link] = time.monotonic()
+                return chapter_page(f"{chapter_link} 的正文内容，长度足够通过有效内容检查。")
+
+            tool.check_login = lambda: True
+            tool.get_novel_list = lambda: novels
+            tool.select_novels_to_backup = lambda novel_list: novel_list
+            tool.get_chapters = fake_get_chapters
+            tool.get_intro_from_backend = lambda novel_id: "测试简介"
+            tool.fetch_chapter_page = fake_fetch_chapter_page
+
+            results = tool.backup_all_novels()
+
+            print(f"备份结果: {results}")
+            assert [r['title'] for r in results] == ['长篇', '短篇', '出错']
+            assert results[0]['saved'] == 40 and results[1]['saved'] == 3
+            assert results[2]['error']
+
+            # 短篇在长篇完成前就已全部完成
+            short_done = max(t for link, t in finished_at.items() if link.startswith('novel-2'))
+            long_done = max(t for link, t in finished_at.items() if link.startswith('novel-1'))
+            assert short_done < long_done
+
+            doc = Document(os.path.join(tool.output_dir, "短篇.docx"))
+            headings = [p.text for p in doc.paragraphs if p.style.name == 'Heading 1']
+            assert headings == [f"第{n}章 标题{n}" for n in range(1, 4)]
+            print("✓ 多部作品同时备份，出错的作品不影响其他作品")
+        finally:
+            os.chdir(old_cwd)
+
+
+def test_interrupt_parallel_novels():
+    """测试多部作品同时备份时中断"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(max_workers=2, novel_concurrency=2, checkpoint_interval=0,
+                                   use_http_cache=False)
+            novels = [
+                {'id': str(n), 'title': f"作品{n}", 'link': f"novel-{n}", 'word_count': '0', 'status': '测试'}
+                for n in (1, 2)
+            ]
+            fetched = []
+            lock = threading.Lock()
+
+            def fake_fetch_chapter_page(chapter_link, session=None):
+                time.sleep(0.01)
+                with lock:
+                    fetched.append(chapter_link)
+                    if len(fetched) == 6:
+                        # 相当于按下Ctrl+C
+                        signal.pthread_kill(threading.main_thread().ident, signal.SIGINT)
+                return chapter_page(f"{chapter_link} 的正文内容，长度足够通过有效内容检查。")
+
+            tool.check_login = lambda: True
+            tool.get_novel_list = lambda: novels
+            tool.select_novels_to_backup = lambda novel_list: novel_list
+            tool.get_chapters = lambda novel_link: [
+                {'id': f"{novel_link}-{n}", 'title': f"标题{n}", 'link': f"{novel_link}/chapter-{n}",
+                 'chapter_number': n, 'is_vip': False}
+                for n in range(1, 201)
+            ]
+            tool.get_intro_from_backend = lambda novel_id: "测试简介"
+            tool.fetch_chapter_page = fake_fetch_chapter_page
+
+            output = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(output):
+                    tool.backup_all_novels()
+                assert False, "应当被中断"
+            except KeyboardInterrupt:
+                pass
+            print(output.getvalue()[-300:])
+
+            # 中断后不再发出新的章节请求，也不会因渲染池已关闭而生成文档失败
+            assert len(fetched) < 400
+            assert "创建文档出错" not in output.getvalue()
+            saved = 0
+            for novel in novels:
+                doc = Document(os.path.join(tool.output_dir, f"{novel['title']}.docx"))
+                headings = [p.text for p in doc.paragraphs if p.style.name == 'Heading 1']
+                # 文档包含快照中保存的全部章节（快照保存后章节日志已删除）
+                snapshot = tool.object_store.load_snapshot(tool.object_store.snapshot_path(novel['id'], tool.run_id))
+                stored = [entry for entry in snapshot['chapters'] if entry.get('body')]
+                assert len(headings) == len(stored)
+                saved += len(stored)
+            assert saved > 0
+            print("✓ 中断时各作品用已保存的章节生成文档后退出")
+        finally:
+            os.chdir(old_cwd)
+
+
+if __name__ == "__main__":
+    test_round_robin_order()
+    test_cancel_group()
+    test_parallel_novels()
+    test_interrupt_parallel_novels()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     模拟后台端到端测试
+=================================================================
+功能：备份工具指向本地模拟作者后台（tests/fake_jjwxc_server.py），完整运行backup_all_novels
+
+使用场景：
+- 验证base_url可配置，后台页面地址全部由base_url拼接
+- 在没有网络的机器上检查同步线程池和异步引擎两条获取路径
+- 检查5xx、截断响应、登录失效和超时等故障时的表现
+
+测试内容：
+- 3部作品完整备份（threads / asyncio）
+- 章节页随机返回5xx、截断正文和登录页面时，失败章节数与注入的故障数一致
+- 未登录时不备份任何作品；超时请求在服务器停止时立即断开
+- 同样的配置注入的故障完全相同
+- 异步引擎的作品管理页面：多个调用方共享一次请求，一个调用方取消不影响其他调用方，
+  被取消的请求不保留
+- 异步引擎整批获取一部作品的章节：并发获取、在途章节受depth限制、提前结束时取消整批，
+  备份时不创建调度器线程
+
+注意：不访问外部网络，无需Cookie，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from jjwxc_col import JJWXCBackupTool
+from retry_policy import RetryPolicy
+from async_engine import AsyncEngineExecutor, AsyncChapterBatch
+from jjwxc_parser import parse_chapter_content
+from fake_jjwxc_server import FakeJJWXCServer
+
+
+def run_backup(server, **kwargs):
+    """在临时目录中对模拟服务器完整运行一次备份，返回(工具, 备份结果)"""
+    options = dict(max_workers=4, requests_per_second=500, burst=50, jitter=0, checkpoint_interval=0,
+                   use_http_cache=False, use_object_store=False, use_catalog=False,
+                   use_search_index=False, base_url=server.base_url)
+    options.update(kwargs)
+    tool = JJWXCBackupTool(**options)
+    tool.select_novels_to_backup = lambda novel_list: novel_list
+    return tool, tool.backup_all_novels()
+
+
+def test_full_backup():
+    """测试完整备份模拟后台的全部作品"""
+    for engine in ('threads', 'asyncio'):
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                FakeJJWXCServer(novels=3, chapters=[12, 5, 8], vip_from=4, latency=0.002) as server:
+            old_cwd = os.getcwd()
+            os.chdir(tmp_dir)
+            try:
+                tool, results = run_backup(server, fetch_engine=engine)
+                assert tool.check_login()
+                assert [(r['total'], r['saved'], r['failed']) for r in results] == [(12, 12, 0), (5, 5, 0), (8, 8, 0)]
+                assert server.stats['chapter_pages'] == server.total_chapters()
+                assert len([name for name in os.listdir(tool.output_dir) if name.endswith('.docx')]) == 3
+            finally:
+                os.chdir(old_cwd)
+        print(f"✓ {engine}: 3部作品 {server.total_chapters()} 章全部备份，共 {server.stats['requests']} 个请求")
+
+
+def test_injected_faults():
+    """测试章节页注入故障时的备份结果"""
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            FakeJJWXCServer(novels=2, chapters=30, error_rate=0.15, truncate_rate=0.1,
+                            logout_rate=0.05, seed=7) as server:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            # 不重试，每个故障对应一个失败章节
+            _, results = run_backup(server, retry_policy=RetryPolicy(max_attempts=1))
+        finally:
+            os.chdir(old_cwd)
+    injected = server.stats['error'] + server.stats['truncated'] + server.stats['logged_out']
+    print(f"注入故障: {server.stats}")
+    assert injected > 0
+    assert sum(r['failed'] for r in results) == injected
+    assert sum(r['saved'] for r in results) == server.total_chapters() - injected
+    print(f"✓ {injected} 个故障章节记为失败，其余章节正常保存")
+
+
+def test_logged_out_and_timeout():
+    """测试未登录和超时"""
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeJJWXCServer(logged_out=True) as server:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool, results = run_backup(server)
+            assert tool.check_login() is False
+            assert results is None
+        finally:
+            os.chdir(old_cwd)
+
+    server = FakeJJWXCServer(novels=1, chapters=1, timeout_rate=1.0, hang_seconds=30).start()
+    try:
+        started = time.monotonic()
+        try:
+            requests.get(f"{server.base_url}/backend/chaptermodify.php?novelid=1000000&chapterid=1", timeout=0.3)
+            assert False, "应当超时"
+        except requests.Timeout:
+            pass
+        assert time.monotonic() - started < 5
+    finally:
+        server.stop()
+    assert server.stats['timeout'] == 1
+    print("✓ 未登录时不备份，超时请求按客户端超时结束")
+
+
+def test_faults_repeatable():
+    """测试故障注入与请求顺序无关"""
+    def faults(server, order):
+        return {target: server.choose_fault(target) for target in order}
+
+    targets = [f"/backend/chaptermodify.php?novelid=1000000&chapterid={n}" for n in range(1, 50)]
+    first = faults(FakeJJWXCServer(error_rate=0.3, truncate_rate=0.2, seed=3), targets)
+    second = faults(FakeJJWXCServer(error_rate=0.3, truncate_rate=0.2, seed=3), list(reversed(targets)))
+    assert first == second
+    assert {fault for fault, _ in first.values()} == {None, 'error', 'truncated'}
+    print("✓ 同样的配置注入的故障相同")
+
+
+def test_async_manage_page_memo():
+    """测试异步引擎共享作品管理页面请求"""
+    with FakeJJWXCServer(novels=1, chapters=5, latency=0.2) as server:
+        tool = JJWXCBackupTool(fetch_engine='asyncio', requests_per_second=500, burst=50, jitter=0,
+                               use_http_cache=False, use_object_store=False, use_catalog=False,
+                               use_search_index=False, base_url=server.base_url)
+        novel_id = tool.get_novel_list()[0]['id']
+
+        async def scenario(engine):
+            async with engine:
+                # 一个调用方取消等待，共享的请求继续，其他调用方得到结果
+                first = asyncio.ensure_future(engine._get_manage_page(novel_id))
+                second = asyncio.ensure_future(engine._get_manage_page(novel_id))
+                await asyncio.sleep(0.05)
+                first.cancel()
+                _, chapters = await second
+                assert first.cancelled() and len(chapters) == 5
+
+                # 共享的请求被取消时不保留，下次调用重新请求
+                engine._manage_memo.clear()
+                waiter = asyncio.ensure_future(engine._get_manage_page(novel_id))
+                await asyncio.sleep(0.05)
+                engine._manage_memo[novel_id].cancel()
+                try:
+                    await waiter
+                    assert False, "应当被取消"
+                except asyncio.CancelledError:
+                    pass
+                assert novel_id not in engine._manage_memo
+                _, chapters = await engine._get_manage_page(novel_id)
+                assert len(chapters) == 5
+
+        asyncio.run(scenario(tool.create_async_engine()))
+    print("✓ 管理页面请求共享，取消的调用方不影响其他调用方，被取消的请求不保留")
+
+
+def test_async_chapter_batch():
+    """测试异步引擎整批获取章节"""
+    with FakeJJWXCServer(novels=1, chapters=40, latency=0.05) as server:
+        tool = JJWXCBackupTool(max_workers=8, fetch_engine='asyncio', requests_per_second=500, burst=50,
+                               jitter=0, use_http_cache=False, use_object_store=False, use_catalog=False,
+                               use_search_index=False, base_url=server.base_url)
+        chapters = tool.get_chapters(tool.get_novel_list()[0]['link'])
+        executor = AsyncEngineExecutor(tool.create_async_engine())
+        try:
+            def new_batch(depth):
+                return AsyncChapterBatch(
+                    executor, fetch=lambda chapter: executor.engine.fetch_chapter_page(chapter['link']),
+                    parse=parse_chapter_content, depth=depth, workers=8
+                )
+
+            # 整批获取：8个协程并发，逐章获取需要2秒
+            batch = new_batch(depth=6)
+            started = time.monotonic()
+            results = list(batch.run(chapters))
+            elapsed = time.monotonic() - started
+            assert sorted(chapter['id'] for chapter, _, _ in results) == sorted(c['id'] for c in chapters)
+            assert all(error is None and text for _, text, error in results)
+            assert batch.max_in_flight == 6 and elapsed < 1.0
+            print(f"✓ 40章并发获取 {elapsed:.2f} 秒，最多 {batch.max_in_flight} 章在途")
+
+            # 调用方不取结果时最多获取depth章；提前结束时取消整批
+            before = server.stats['chapter_pages']
+            results = new_batch(depth=4).run(chapters)
+            next(results)
+            time.sleep(0.3)
+            assert server.stats['chapter_pages'] - before <= 5
+            results.close()
+            time.sleep(0.2)
+            stopped_at = server.stats['chapter_pages']
+            time.sleep(0.3)
+            assert server.stats['chapter_pages'] == stopped_at
+            print(f"✓ 背压和取消：只获取了 {stopped_at - before} 章")
+        finally:
+            executor.shutdown()
+
+    # 完整备份：请求都在事件循环中，不创建调度器线程
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            FakeJJWXCServer(novels=2, chapters=30, latency=0.01) as server:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        names = set()
+        running = True
+
+        def sample_threads():
+            while running:
+                names.update(thread.name for thread in threading.enumerate())
+                time.sleep(0.005)
+
+        sampler = threading.Thread(target=sample_threads, daemon=True)
+        sampler.start()
+        try:
+            _, results = run_backup(server, fetch_engine='asyncio', max_workers=8, novel_concurrency=2)
+        finally:
+            running = False
+            sampler.join()
+            os.chdir(old_cwd)
+        assert [r['saved'] for r in results] == [30, 30]
+        assert not [name for name in names if name.startswith('FairScheduler')]
+    print("✓ asyncio引擎备份时不为章节请求创建线程")
+
+
+if __name__ == "__main__":
+    test_full_backup()
+    test_injected_faults()
+    test_logged_out_and_timeout()
+    test_faults_repeatable()
+    test_async_manage_page_memo()
+    test_async_chapter_batch()
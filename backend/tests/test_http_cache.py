@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     响应缓存测试
+=================================================================
+功能：测试磁盘响应缓存的条件请求、TTL和LRU淘汰
+
+使用场景：
+- 验证重复请求发送If-None-Match并在304时复用缓存正文
+- 检查TTL内的请求不访问服务器
+- 确认缓存超过大小上限时淘汰最久未访问的条目
+- 检查没有ETag/Last-Modified的响应和登录页面不缓存，章节编辑页面默认不经过缓存
+- 确认异步引擎与同步方案共用同一缓存和条件请求
+
+注意：使用本地HTTP服务器，不访问晋江网站，无需Cookie
+=================================================================
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+import threading
+import http.server
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from http_cache import ResponseCache
+from jjwxc_col import JJWXCBackupTool
+from fake_jjwxc_server import LOGIN_PAGE
+
+PAGE = "<html><body>缓存测试页面</body></html>".encode('gb18030')
+ETAG = {'ETag': '"v1"'}
+
+
+class ETagHandler(http.server.BaseHTTPRequestHandler):
+    """返回带ETag的页面，条件请求命中时返回304"""
+    requests_seen = []
+    
+    def do_GET(self):
+        ETagHandler.requests_seen.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+    
+    def log_message(self, *args):
+        pass
+
+
+def test_conditional_requests():
+    """测试条件请求和TTL"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/backend/managenovel.php?novelid=1"
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            ETagHandler.requests_seen = []
+            tool = JJWXCBackupTool()
+            
+            first = tool._get(url, timeout=5)
+            second = tool._get(url, timeout=5)
+            print(f"服务器收到的If-None-Match: {ETagHandler.requests_seen}")
+            assert ETagHandler.requests_seen == [None, '"v1"']
+            assert first.content == PAGE and second.content == PAGE
+            assert getattr(second, 'from_cache', False)
+            
+            # TTL内不访问服务器
+            tool.http_cache.ttl = 60
+            tool._get(url, timeout=5)
+            assert len(ETagHandler.requests_seen) == 2
+            
+            # 绕过缓存时完整下载
+            tool._get(url, use_cache=False, timeout=5)
+            assert ETagHandler.requests_seen[-1] is None
+            print("✓ 304复用缓存、TTL命中和绕过缓存均正确")
+        finally:
+            os.chdir(old_cwd)
+            server.shutdown()
+
+
+def test_lru_eviction():
+    """测试缓存大小上限和LRU淘汰"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(cache_dir, max_bytes=250)
+        for name in ('a', 'b'):
+            cache.store(f"https://example.com/{name}", 200, ETAG, b'x' * 100)
+            time.sleep(0.01)
+        
+        # 访问a，使b成为最久未访问的条目
+        time.sleep(0.01)
+        cache.read_body(cache.lookup("https://example.com/a"))
+        cache.store("https://example.com/c", 200, ETAG, b'x' * 100)
+        
+        remaining = [name for name in 'abc' if cache.lookup(f"https://example.com/{name}")]
+        print(f"淘汰后剩余条目: {remaining}")
+        assert remaining == ['a', 'c']
+        
+        # 非200响应和重定向响应不缓存
+        cache.store("https://example.com/d", 500, ETAG, b'error')
+        cache.store("https://example.com/e", 200, ETAG, b'login', redirected=True)
+        assert cache.lookup("https://example.com/d") is None
+        assert cache.lookup("https://example.com/e") is None
+        print("✓ LRU淘汰正确，错误和重定向响应未缓存")
+
+
+def test_uncacheable_responses():
+    """测试没有验证信息的响应和登录页面不缓存"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(cache_dir, ttl=60)
+        cache.store("https://example.com/plain", 200, {}, PAGE)
+        assert cache.lookup("https://example.com/plain") is None
+        cache.store("https://example.com/dated", 200, {'Last-Modified': "Wed, 01 Jan 2025 00:00:00 GMT"}, PAGE)
+        assert cache.read_body(cache.lookup("https://example.com/dated")) == PAGE
+
+        # Cookie失效时的登录页面状态码为200，不能当作正文缓存
+        cache.store("https://example.com/login", 200, ETAG, LOGIN_PAGE)
+        assert cache.lookup("https://example.com/login") is None
+    print("✓ 没有ETag/Last-Modified的响应和登录页面未缓存")
+
+
+def test_chapter_pages_bypass_cache():
+    """测试章节编辑页面默认不经过缓存"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    link = f"http://127.0.0.1:{server.server_port}/backend/chaptermodify.php?novelid=1&chapterid=1"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            for cache_chapter_pages, expected in ((False, [None, None]), (True, [None, '"v1"'])):
+                ETagHandler.requests_seen = []
+                tool = JJWXCBackupTool(base_url=f"http://127.0.0.1:{server.server_port}",
+                                       cache_chapter_pages=cache_chapter_pages, requests_per_second=100)
+                tool.fetch_chapter_page(link)
+                tool.fetch_chapter_page(link)
+                assert ETagHandler.requests_seen == expected, ETagHandler.requests_seen
+        finally:
+            os.chdir(old_cwd)
+            server.shutdown()
+    print("✓ 章节编辑页面默认不缓存，--cache-chapters时发送条件请求")
+
+
+def test_async_engine_uses_cache():
+    """测试异步引擎与同步方案共用响应缓存"""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ETagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/backend/managenovel.php?novelid=1"
+
+    async def fetch_twice(engine):
+        async with engine:
+            return [await engine._fetch(url, timeout=5), await engine._fetch(url, timeout=5)]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            ETagHandler.requests_seen = []
+            tool = JJWXCBackupTool(requests_per_second=100)
+            tool._get(url, timeout=5)
+            # 同步方案保存的缓存：异步引擎发送条件请求，304时复用缓存正文
+            assert asyncio.run(fetch_twice(tool.create_async_engine())) == [PAGE, PAGE]
+            assert ETagHandler.requests_seen == [None, '"v1"', '"v1"'], ETagHandler.requests_seen
+            assert tool.metrics.counter('http_cache', result='revalidated') == 2
+        finally:
+            os.chdir(old_cwd)
+            server.shutdown()
+    print("✓ 异步引擎发送条件请求，304时复用缓存正文")
+
+
+if __name__ == "__main__":
+    test_conditional_requests()
+    test_lru_eviction()
+    test_uncacheable_responses()
+    test_chapter_pages_bypass_cache()
+    test_async_engine_uses_cache()
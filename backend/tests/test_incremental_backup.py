@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     增量备份测试
+=================================================================
+功能：测试增量备份只获取新增或修改过的章节
+
+使用场景：
+- 验证章节行指纹未变化的章节复用上次备份的正文
+- 检查新增章节和指纹变化的章节会重新获取
+- 确认增量备份生成的文档包含全部章节
+- 检查点击、评论等计数列变化时章节行指纹不变，标题、字数、更新时间变化时指纹改变
+
+注意：不访问网络，无需Cookie
+=================================================================
+"""
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jjwxc_col import JJWXCBackupTool
+from jjwxc_parser import make_soup, row_fingerprint
+from fixture_pages import manage_page
+from docx import Document
+
+NOVEL = {'id': '7', 'title': '增量测试', 'word_count': '0', 'status': '测试'}
+
+
+def chapter_page(text):
+    """构造只包含正文textarea的章节编辑页面"""
+    return f"<form><textarea name='content'>{text}</textarea></form>".encode('gb18030')
+
+
+def make_chapters(count, modified=()):
+    """生成章节列表，modified中的章节编号使用新的行指纹"""
+    return [
+        {
+            'id': str(200 + n), 'title': f"标题{n}", 'link': f"chapter-{n}",
+            'chapter_number': n, 'is_vip': False,
+            'row_hash': f"row-{n}-v2" if n in modified else f"row-{n}"
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def make_tool(fetched, output_dir, incremental):
+    """创建不访问网络的备份工具，记录实际获取的章节"""
+    tool = JJWXCBackupTool(max_workers=2, incremental=incremental)
+    tool.output_dir = output_dir
+    os.makedirs(output_dir, exist_ok=True)
+    tool.get_intro_from_backend = lambda novel_id: "测试简介"
+    
+    def fake_fetch_chapter_page(chapter_link, session=None):
+        fetched.append(chapter_link)
+        return chapter_page(f"{chapter_link} 第{len(fetched)}次获取的正文内容，长度足够通过有效内容检查。")
+    
+    tool.fetch_chapter_page = fake_fetch_chapter_page
+    return tool
+
+
+def test_incremental_backup():
+    """测试增量备份"""
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            # 第一次完整备份
+            fetched = []
+            make_tool(fetched, os.path.join("backup", "20260101_000000"), False).create_docx_with_realtime_save(
+                NOVEL, make_chapters(10)
+            )
+            assert len(fetched) == 10
+            
+            # 第二次增量备份：第3章被修改，新增第11章
+            fetched = []
+            tool = make_tool(fetched, os.path.join("backup", "20260102_000000"), True)
+            tool.create_docx_with_realtime_save(NOVEL, make_chapters(11, modified={3}))
+            print(f"增量备份获取的章节: {sorted(fetched)}")
+            assert sorted(fetched) == ["chapter-11", "chapter-3"]
+            
+            doc = Document(os.path.join(tool.output_dir, "增量测试.docx"))
+            headings = [p.text for p in doc.paragraphs if p.style.name == 'Heading 1']
+            body = [p.text for p in doc.paragraphs if p.text.startswith("chapter-")]
+            assert headings == [f"第{n}章 标题{n}" for n in range(1, 12)]
+            assert body[0].startswith("chapter-1 第")
+            print(f"文档章节数: {len(headings)}")
+            print("✓ 只获取了新增和修改的章节，文档完整")
+        finally:
+            os.chdir(old_cwd)
+
+
+def test_row_fingerprint_ignores_counters():
+    """测试章节行指纹只包含与章节内容有关的列"""
+    soup = make_soup(manage_page(7, chapter_count=3))
+    row = soup.find('input', {'name': 'chapterid'}).find_parent('tr')
+    cells = row.find_all('td')  # 选择、章节、标题、内容提要、字数、更新时间、点击、操作
+    original = row_fingerprint(row)
+
+    # 点击数变化：指纹不变
+    cells[6].string = "987654"
+    assert row_fingerprint(row) == original
+
+    # 字数、更新时间或标题变化：指纹改变
+    for index, value in ((4, "12345"), (5, "2030-01-01 00:00:00")):
+        changed = make_soup(manage_page(7, chapter_count=3))
+        changed_row = changed.find('input', {'name': 'chapterid'}).find_parent('tr')
+        changed_row.find_all('td')[index].string = value
+        assert row_fingerprint(changed_row) != original
+    row.find('a').string = "新标题"
+    assert row_fingerprint(row) != original
+
+    # 没有表头的表格：只使用标题链接和日期时间
+    headless = make_soup(
+        "<table><tr><td>1</td><td><a href='#'>标题</a></td><td>3000</td>"
+        "<td>2025-01-01 08:00:00</td><td>120</td></tr></table>"
+    )
+    row = headless.find('tr')
+    original = row_fingerprint(row)
+    row.find_all('td')[4].string = "121"
+    assert row_fingerprint(row) == original
+    row.find_all('td')[3].string = "2025-01-02 08:00:00"
+    assert row_fingerprint(row) != original
+    print("✓ 计数列变化不影响章节行指纹，标题、字数、更新时间变化时重新获取")
+
+
+if __name__ == "__main__":
+    test_row_fingerprint_ignores_counters()
+    test_incremental_backup()
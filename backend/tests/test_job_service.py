@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     备份任务服务测试
+=================================================================
+功能：测试app/main.py的备份任务接口：提交、列表、取消和按章节推送的进度事件流
+
+使用场景：
+- 验证提交任务后立即返回，备份在任务线程池中运行，事件流按章节推送进度
+- 检查同一账号的任务依次运行，排队中和运行中的任务都可以取消
+- 确认请求错误、未登录和不存在的任务返回明确的状态
+- 确认请求不能指定后台地址，非application/json的请求被拒绝
+
+测试内容：
+- 对本地模拟后台（tests/fake_jjwxc_server.py）提交任务，读取事件流直到任务结束
+- 断线重连时按Last-Event-ID只补发之后的事件
+- 运行中取消：已保存的章节生成文档，剩余章节不再获取
+
+注意：不访问外部网络，需要aiohttp，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import json
+import asyncio
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from aiohttp.test_utils import TestServer, TestClient
+from main import create_app
+from fake_jjwxc_server import FakeJJWXCServer
+
+# 任务请求中的备份参数（模拟后台不需要限速）
+FAST = {'requests_per_second': 500, 'burst': 50, 'jitter': 0}
+
+
+def run_service(output_root, server, scenario):
+    """启动连接模拟后台server的服务，运行scenario(client)，结束后关闭服务"""
+    async def run():
+        app = create_app(
+            output_root=output_root, max_jobs=2, global_requests_per_second=500, global_burst=50,
+            checkpoint_interval=0, use_http_cache=False, use_object_store=False, use_catalog=False,
+            use_search_index=False, base_url=server.base_url
+        )
+        async with TestClient(TestServer(app)) as client:
+            await scenario(client)
+    asyncio.run(run())
+
+
+async def read_events(client, job_id, last_event_id=None, until=None):
+    """
+    读取任务的事件流
+
+    参数：
+        until (callable): until(事件)为真时提前断开（默认读到服务关闭连接）
+    """
+    headers = {'Last-Event-ID': str(last_event_id)} if last_event_id is not None else {}
+    events = []
+    async with client.get(f"/api/jobs/{job_id}/events", headers=headers) as response:
+        assert response.status == 200
+        assert response.headers['Content-Type'].startswith('text/event-stream')
+        fields = {}
+        async for raw in response.content:
+            line = raw.decode('utf-8').rstrip('\n')
+            if line.startswith(':'):
+                continue
+            if line:
+                name, _, value = line.partition(': ')
+                fields[name] = value
+                continue
+            event = json.loads(fields['data'])
+            assert event['id'] == int(fields['id']) and event['event'] == fields['event']
+            events.append(event)
+            fields = {}
+            if until is not None and until(event):
+                break
+    return events
+
+
+async def wait_finished(client, job_id, timeout=30):
+    """轮询直到任务结束，返回任务详情"""
+    for _ in range(int(timeout / 0.05)):
+        async with client.get(f"/api/jobs/{job_id}") as response:
+            job = await response.json()
+        if job['finished_at'] is not None:
+            return job
+        await asyncio.sleep(0.05)
+    raise AssertionError(f"任务未在{timeout}秒内结束: {job}")
+
+
+def test_submit_and_stream():
+    """测试提交任务和按章节推送的进度事件"""
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeJJWXCServer(novels=2, chapters=[5, 3]) as server:
+        async def scenario(client):
+            async with client.post('/api/jobs', json=dict(
+                FAST, account="alice", cookie="jjwxc_token=alice"
+            )) as response:
+                assert response.status == 201
+                job = await response.json()
+            assert job['account'] == "alice" and job['status'] in ('queued', 'running')
+
+            events = await read_events(client, job['id'])
+            kinds = [event['event'] for event in events]
+            assert kinds[0] == 'status' and events[0]['status'] == 'queued'
+            assert kinds.count('run_started') == 1 and len(events[kinds.index('run_started')]['novels']) == 2
+            chapters = [event for event in events if event['event'] == 'chapter']
+            assert len(chapters) == 8 and {event['status'] for event in chapters} == {'saved'}
+            assert sorted(event['done'] for event in chapters if event['total'] == 3) == [1, 2, 3]
+            assert kinds.count('novel_finished') == 2
+            assert events[-1]['event'] == 'status' and events[-1]['status'] == 'completed'
+            assert [event['id'] for event in events] == list(range(1, len(events) + 1))
+
+            # 断线重连只补发之后的事件
+            replay = await read_events(client, job['id'], last_event_id=events[-3]['id'])
+            assert replay == events[-2:]
+
+            job = await wait_finished(client, job['id'])
+            assert job['status'] == 'completed' and job['chapters'] == {'total': 8, 'saved': 8, 'failed': 0}
+            assert len([n for n in os.listdir(job['output_dir']) if n.endswith('.docx')]) == 2
+            assert os.path.dirname(job['output_dir']) == os.path.join(tmp_dir, "alice")
+            cookie_file = os.path.join(tmp_dir, "_cookies", "alice.txt")
+            assert oct(os.stat(cookie_file).st_mode & 0o777) == oct(0o600)
+
+            # 同一账号的第二个任务沿用保存的Cookie，只备份选中的作品
+            async with client.post('/api/jobs', json=dict(
+                FAST, account="alice", novel_ids=[server.novel_ids[1]]
+            )) as response:
+                second = await response.json()
+            second = await wait_finished(client, second['id'])
+            assert second['status'] == 'completed' and second['chapters']['saved'] == 3
+            assert [novel['total'] for novel in second['novels']] == [3]
+
+            async with client.get('/api/jobs') as response:
+                jobs = (await response.json())['jobs']
+            assert [item['id'] for item in jobs] == [job['id'], second['id']]
+            assert 'novels' not in jobs[0]
+        run_service(tmp_dir, server, scenario)
+    print("✓ 提交任务后按章节推送进度，断线重连只补发之后的事件")
+
+
+def test_queue_and_cancel():
+    """测试同一账号的任务排队，以及取消排队中和运行中的任务"""
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            FakeJJWXCServer(novels=1, chapters=200, latency=0.02) as server:
+        async def scenario(client):
+            request = dict(FAST, account="bob", cookie="jjwxc_token=bob", max_workers=1)
+            ids = []
+            for _ in range(2):
+                async with client.post('/api/jobs', json=request) as response:
+                    ids.append((await response.json())['id'])
+            running, queued = ids
+            async with client.get(f"/api/jobs/{queued}") as response:
+                assert (await response.json())['status'] == 'queued'
+
+            # 排队中的任务直接取消
+            async with client.post(f"/api/jobs/{queued}/cancel") as response:
+                assert response.status == 202
+            async with client.get(f"/api/jobs/{queued}") as response:
+                job = await response.json()
+            assert job['status'] == 'cancelled' and job['started_at'] is None
+            async with client.post(f"/api/jobs/{queued}/cancel") as response:
+                assert response.status == 409
+
+            # 运行中的任务保存几章后取消
+            await read_events(client, running, until=lambda event: event['event'] == 'chapter' and event['done'] >= 3)
+            async with client.post(f"/api/jobs/{running}/cancel") as response:
+                assert response.status == 202
+            job = await wait_finished(client, running)
+            assert job['status'] == 'cancelled'
+            assert 3 <= job['chapters']['saved'] < 200 and job['novels'][0]['error'] == "已取消"
+            assert len([n for n in os.listdir(job['output_dir']) if n.endswith('.docx')]) == 1
+            events = await read_events(client, running)
+            assert 'cancelling' in [event['event'] for event in events]
+        run_service(tmp_dir, server, scenario)
+    print("✓ 同一账号的任务排队运行，排队中和运行中的任务都可以取消")
+
+
+def test_bad_requests():
+    """测试请求错误、未登录和不存在的任务"""
+    with tempfile.TemporaryDirectory() as tmp_dir, FakeJJWXCServer(logged_out=True) as server:
+        async def scenario(client):
+            for body in ({'account': "carol"}, {'cookie': "a=1", 'password': "x"}, {'cookie': "a=1", 'titles': {}},
+                         {'cookie': "a=1", 'novel_ids': []}):
+                async with client.post('/api/jobs', json=body) as response:
+                    assert response.status == 400
+                    print(f"  预期的错误: {(await response.json())['error']}")
+            async with client.post('/api/jobs', data="not json", headers={'Content-Type': 'application/json'}) as response:
+                assert response.status == 400
+            # 后台地址不能由请求指定，非JSON类型的请求（浏览器跨域的简单请求）不接受
+            async with client.post('/api/jobs', json={'cookie': "a=1", 'base_url': "https://example.com"}) as response:
+                assert response.status == 400
+            async with client.post('/api/jobs', data=json.dumps({'account': "carol"}),
+                                   headers={'Content-Type': 'text/plain'}) as response:
+                assert response.status == 415
+            for method, path in (('GET', "/api/jobs/missing"), ('POST', "/api/jobs/missing/cancel"),
+                                 ('GET', "/api/jobs/missing/events")):
+                async with client.request(method, path) as response:
+                    assert response.status == 404
+
+            async with client.post('/api/jobs', json=dict(FAST, cookie="a=1")) as response:
+                job = await response.json()
+            job = await wait_finished(client, job['id'])
+            assert job['status'] == 'login_failed' and job['error']
+
+            async with client.get('/api/health') as response:
+                health = await response.json()
+            assert health['status'] == 'ok' and health['running'] == 0
+        run_service(tmp_dir, server, scenario)
+    print("✓ 请求错误返回400，不存在的任务返回404，Cookie失效的任务为login_failed")
+
+
+if __name__ == "__main__":
+    test_submit_and_stream()
+    test_queue_and_cancel()
+    test_bad_requests()
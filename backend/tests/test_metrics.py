@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     运行指标测试
+=================================================================
+功能：测试各阶段耗时直方图、运行报告和Prometheus文本格式
+
+使用场景：
+- 验证p50/p95/p99估计值的误差在一个桶的宽度以内
+- 检查完整备份后metrics.json中请求、解析、渲染和保存的次数与实际一致
+- 确认Prometheus格式的桶为累计值，_count与报告一致
+
+测试内容：
+- 已知分布的直方图分位数、合并和出错计时
+- 对本地模拟后台（tests/fake_jjwxc_server.py）完整备份，检查报告内容
+
+注意：不访问外部网络，无需Cookie，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import re
+import sys
+import json
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from metrics import Metrics, Histogram, format_summary
+from jjwxc_col import JJWXCBackupTool
+from retry_policy import RetryPolicy
+from fake_jjwxc_server import FakeJJWXCServer
+
+
+def test_histogram():
+    """测试分位数估计、合并和出错计时"""
+    histogram = Histogram()
+    for n in range(1, 1001):
+        histogram.observe(n / 1000)
+    for q in (0.5, 0.95, 0.99):
+        assert abs(histogram.quantile(q) - q) / q < 0.2, (q, histogram.quantile(q))
+    assert histogram.quantile(1.0) == 1.0 and histogram.min == 0.001
+
+    other = Histogram()
+    other.observe(5.0)
+    histogram.merge(other)
+    assert histogram.count == 1001 and histogram.max == 5.0
+
+    metrics = Metrics()
+    try:
+        with metrics.timer('parse_chapter', size=10):
+            raise ValueError("模拟解析出错")
+    except ValueError:
+        pass
+    with metrics.timer('parse_chapter') as timer:
+        timer.size = 5
+    stats = metrics.stage('parse_chapter')
+    assert (stats['count'], stats['errors'], stats['bytes']) == (2, 1, 15)
+    assert metrics.stage('render') is None
+    print("✓ 分位数误差在桶宽度以内，出错的计时单独计数")
+
+
+def test_backup_report():
+    """测试完整备份后的运行报告"""
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            FakeJJWXCServer(novels=2, chapters=15, error_rate=0.1, seed=2) as server:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(requests_per_second=500, burst=50, jitter=0, checkpoint_interval=5,
+                                   use_http_cache=False, use_object_store=False, use_catalog=False,
+                                   use_search_index=False, base_url=server.base_url,
+                                   export_formats="docx,txt", metrics_prometheus=True,
+                                   retry_policy=RetryPolicy(max_attempts=1))
+            tool.select_novels_to_backup = lambda novel_list: novel_list
+            tool.backup_all_novels()
+
+            with open(os.path.join(tool.output_dir, "metrics.json"), 'r', encoding='utf-8') as f:
+                report = json.load(f)
+            with open(os.path.join(tool.output_dir, "metrics.prom"), 'r', encoding='utf-8') as f:
+                prometheus = f.read()
+        finally:
+            os.chdir(old_cwd)
+
+    stages = report['stages']
+    print(format_summary(report))
+    assert report['status'] == 'completed'
+    assert stages['http_get']['count'] == server.stats['requests']
+    assert stages['http_get']['errors'] == server.stats['error']
+    assert stages['http_get']['bytes'] == server.stats['bytes']
+    assert stages['parse_chapter']['count'] == server.total_chapters()
+    assert stages['parse_manage']['count'] == 2 and stages['parse_novel_list']['count'] == 1
+    saved = report['chapters']['saved']
+    assert saved == server.total_chapters() - server.stats['error'] == stages['journal_write']['count']
+    # 最终文档每部作品两种格式各保存一次，检查点另外保存
+    assert stages['save']['count'] >= 2 * 2 and stages['render']['count'] >= saved
+    assert stages['http_get']['p50_seconds'] <= stages['http_get']['p99_seconds']
+    statuses = {c['labels']['code']: c['value'] for c in report['counters'] if c['name'] == 'http_status'}
+    # 每个章节只请求一次，注入的错误都是第一次请求对应的500
+    assert statuses == {'200': server.stats['ok'], '500': server.stats['error']}
+
+    buckets = [int(n) for n in re.findall(r'_bucket\{stage="http_get",le="[^"]+"\} (\d+)', prometheus)]
+    assert buckets == sorted(buckets) and buckets[-1] == stages['http_get']['count']
+    assert f'jjwxc_backup_stage_seconds_count{{stage="http_get"}} {stages["http_get"]["count"]}' in prometheus
+    assert 'jjwxc_backup_http_status_total{code="200"}' in prometheus
+    print("✓ 运行报告的各阶段次数与实际请求、解析和保存一致")
+
+
+if __name__ == "__main__":
+    test_histogram()
+    test_backup_report()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     多账号备份测试
+=================================================================
+功能：测试一次运行同时备份多个作者账号
+
+使用场景：
+- 验证每个账号使用自己的Cookie文件、登录检查和输出子目录
+- 检查Cookie失效的账号被跳过，其他账号正常备份
+- 确认所有账号合计的请求速率不超过全局上限，合并报告包含每个账号的结果
+
+测试内容：
+- Cookie文件目录和账号配置文件（.json）的读取、未知参数和重名检查
+- 对本地模拟后台（tests/fake_jjwxc_server.py，按Cookie区分账号）同时备份3个账号
+- 多级限速器同时满足每账号和全局速率
+
+注意：不访问外部网络，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rate_limiter import HostRateLimiter, ChainedRateLimiter
+from multi_account import MultiAccountBackup, load_accounts
+from fake_jjwxc_server import FakeJJWXCServer
+
+
+def write_cookie(path, value):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"jjwxc_token={value}; other=1")
+
+
+def test_load_accounts():
+    """测试账号来源的读取"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cookie_dir = os.path.join(tmp_dir, "cookies")
+        os.makedirs(cookie_dir)
+        for name in ("alice", "bob"):
+            write_cookie(os.path.join(cookie_dir, f"{name}.txt"), name)
+        accounts = load_accounts([cookie_dir])
+        assert [(a['name'], a['novels'], a['options']) for a in accounts] == [
+            ('alice', None, {}), ('bob', None, {})
+        ]
+
+        profile = os.path.join(tmp_dir, "accounts.json")
+        with open(profile, 'w', encoding='utf-8') as f:
+            json.dump({"accounts": [
+                {"name": "作者/甲", "cookie_file": "cookies/alice.txt", "novels": [1000000],
+                 "requests_per_second": 1}
+            ]}, f, ensure_ascii=False)
+        accounts = load_accounts([profile])
+        assert accounts[0]['name'] == "作者_甲" and accounts[0]['novels'] == ["1000000"]
+        assert accounts[0]['cookie_file'] == os.path.join(tmp_dir, "cookies", "alice.txt")
+        assert accounts[0]['options'] == {'requests_per_second': 1}
+
+        bad_profiles = []
+        for n, entry in enumerate(({"cookie_file": "cookies/alice.txt", "password": "x"},
+                                   {"cookie_file": "cookies/alice.txt", "novels": []},
+                                   {"cookie_file": "cookies/alice.txt", "novels": "1000000"})):
+            bad_profiles.append(os.path.join(tmp_dir, f"bad{n}.json"))
+            with open(bad_profiles[-1], 'w', encoding='utf-8') as f:
+                json.dump([entry], f)
+        for sources in [[path] for path in bad_profiles] + [[cookie_dir, os.path.join(cookie_dir, "alice.txt")]]:
+            try:
+                load_accounts(sources)
+                assert False, "应当报错"
+            except ValueError as e:
+                print(f"  预期的错误: {e}")
+
+    print("✓ Cookie目录和账号配置文件读取正确，未知参数、空的作品列表和重名账号报错")
+
+
+def test_chained_rate_limiter():
+    """测试多级限速同时满足每账号和全局速率"""
+    global_limiter = HostRateLimiter(rate=20, burst=1, jitter=0)
+    accounts = [ChainedRateLimiter(HostRateLimiter(rate=1000, burst=100, jitter=0), global_limiter)
+                for _ in range(2)]
+    started = time.monotonic()
+    for n in range(10):
+        accounts[n % 2].acquire("http://127.0.0.1/backend/")
+    # 全局每秒20个：第一个立即发送，其余9个间隔0.05秒
+    assert time.monotonic() - started >= 0.4
+    print("✓ 两个账号合计的请求速率不超过全局上限")
+
+
+def test_multi_account_backup():
+    """测试同时备份多个账号"""
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            FakeJJWXCServer(novels=2, chapters=[6, 4], valid_cookies=["jjwxc_token=alice", "jjwxc_token=bob"]) \
+            as server:
+        for name in ("alice", "bob", "carol"):
+            write_cookie(os.path.join(tmp_dir, f"{name}.txt"), name)
+        profile = os.path.join(tmp_dir, "accounts.json")
+        with open(profile, 'w', encoding='utf-8') as f:
+            json.dump([{"name": "bob", "cookie_file": "bob.txt", "novels": [server.novel_ids[1]]}], f)
+        accounts = load_accounts([os.path.join(tmp_dir, "alice.txt"), profile, os.path.join(tmp_dir, "carol.txt")])
+
+        output_root = os.path.join(tmp_dir, "backup")
+        backup = MultiAccountBackup(
+            accounts, output_root=output_root, max_accounts=3, global_requests_per_second=500, global_burst=50,
+            requests_per_second=500, burst=50, jitter=0, checkpoint_interval=0, use_http_cache=False,
+            use_object_store=False, use_catalog=False, use_search_index=False, base_url=server.base_url
+        )
+        report = backup.run()
+
+        results = {account['name']: account for account in report['accounts']}
+        assert results['alice']['status'] == 'completed' and results['alice']['chapters']['saved'] == 10
+        assert results['bob']['status'] == 'completed' and results['bob']['chapters']['saved'] == 4
+        assert results['carol']['status'] == 'login_failed'
+        assert report['status'] == 'partial' and report['chapters']['saved'] == 14
+
+        # 每个账号自己的输出子目录
+        for name, documents in (('alice', 2), ('bob', 1)):
+            output_dir = results[name]['output_dir']
+            assert os.path.dirname(os.path.abspath(output_dir)) == os.path.join(output_root, name)
+            assert len([n for n in os.listdir(output_dir) if n.endswith('.docx')]) == documents
+            assert os.path.exists(os.path.join(output_dir, "metrics.json"))
+
+        # 合并报告：章节解析次数为两个账号之和
+        runs = os.listdir(os.path.join(output_root, "_runs"))
+        with open(os.path.join(output_root, "_runs", runs[0], "metrics.json"), 'r', encoding='utf-8') as f:
+            saved_report = json.load(f)
+        assert saved_report['stages']['parse_chapter']['count'] == 14
+        assert len(saved_report['accounts']) == 3
+    print("✓ 3个账号同时备份：2个完成，Cookie失效的账号跳过，合并报告包含每个账号")
+
+
+if __name__ == "__main__":
+    test_load_accounts()
+    test_chained_rate_limiter()
+    test_multi_account_backup()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     章节对象存储测试
+=================================================================
+功能：测试章节正文按内容哈希压缩保存，并在多次备份快照间去重
+
+使用场景：
+- 验证内容未变化的多次备份不增加对象，只修改一章时只增加该章的对象
+- 检查上次的备份目录被删除后，增量备份改用快照复用章节
+- 确认gc按保留数量删除旧快照和不再被引用的对象
+- 确认从快照还原的内容与备份时获取的章节完全一致
+- 确认快照保存后章节日志已删除，取消后续传从快照还原日志
+- 确认指定keep_backups时才自动删除旧备份目录，中断的备份目录保留以便续传
+
+注意：不访问网络，无需Cookie，测试文件保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import shutil
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from jjwxc_col import JJWXCBackupTool
+from chapter_journal import ChapterJournal
+from object_store import ObjectStore, split_content, join_content, prune_backup_dirs
+
+NOVEL = {'id': '9', 'title': '快照测试', 'word_count': '0', 'status': '测试'}
+
+
+def chapter_page(text):
+    """构造只包含正文textarea的章节编辑页面"""
+    return f"<form><textarea name='content'>{text}</textarea></form>".encode('gb18030')
+
+
+def make_chapters(count, modified=()):
+    """生成章节列表，modified中的章节编号使用新的行指纹"""
+    return [
+        {
+            'id': str(300 + n), 'title': f"标题{n}", 'link': f"chapter-{n}",
+            'chapter_number': n, 'is_vip': False,
+            'row_hash': f"row-{n}-v2" if n in modified else f"row-{n}"
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def expected_content(number, version="原始"):
+    """fake_fetch_chapter_page返回的第number章内容"""
+    text = f"chapter-{number} {version}正文内容，长度足够通过有效内容检查。\n\n第二段"
+    if number % 2:
+        text += "\n【作者有话说】\n  作者备注\n"
+    return text
+
+
+def run_backup(run_id, chapters, modified=(), incremental=False, cancel_after=None, keep_backups=0):
+    """在backup/<run_id>下备份一次（保存cancel_after章后取消），返回(工具, 实际获取的章节)"""
+    fetched = []
+
+    def cancel_on_progress(event):
+        if cancel_after is not None and event['event'] == 'chapter' and event['done'] >= cancel_after:
+            tool.cancel()
+
+    os.makedirs(os.path.join("backup", run_id), exist_ok=True)
+    tool = JJWXCBackupTool(max_workers=2, incremental=incremental, use_http_cache=False,
+                           resume_dir=os.path.join("backup", run_id), keep_backups=keep_backups,
+                           progress=cancel_on_progress)
+    tool.get_intro_from_backend = lambda novel_id: "测试简介"
+
+    def fake_fetch_chapter_page(chapter_link, session=None):
+        fetched.append(chapter_link)
+        number = int(chapter_link.split('-')[1])
+        return chapter_page(expected_content(number, "修改后" if number in modified else "原始"))
+
+    tool.fetch_chapter_page = fake_fetch_chapter_page
+    tool.create_docx_with_realtime_save(NOVEL, chapters)
+    return tool, fetched
+
+
+def test_split_content():
+    """测试正文和作者有话说的无损拆分"""
+    for content in ("只有正文", "正文\n【作者有话说】\n  备注  \n", "【作者有话说】", "a【作者有话说】b【作者有话说】c"):
+        body, note = split_content(content)
+        assert join_content(body, note) == content
+    assert split_content("只有正文") == ("只有正文", None)
+    print("✓ 正文和作者有话说拆分后可无损还原")
+
+
+def test_dedupe_across_snapshots():
+    """测试多次备份之间的去重和增量复用"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool, _ = run_backup("20260101_000000", make_chapters(6))
+            store = tool.object_store
+            first_count, first_size = store.disk_usage()
+            # 6章正文 + 1个作者有话说（3章内容相同，只保存一次）+ 简介
+            assert first_count == 8, first_count
+
+            run_backup("20260102_000000", make_chapters(6))
+            run_backup("20260103_000000", make_chapters(6))
+            assert store.disk_usage() == (first_count, first_size)
+            assert len(store.snapshots(NOVEL['id'])) == 3
+
+            # 只修改第3章：只增加该章的正文对象（作者有话说不变）
+            run_backup("20260104_000000", make_chapters(6, modified={3}), modified={3})
+            assert store.disk_usage()[0] == first_count + 1
+            print(f"4次快照共 {store.disk_usage()[0]} 个对象，{store.disk_usage()[1]} 字节")
+
+            # 删除所有备份目录后，增量备份从最近的快照复用未变化的章节
+            for name in os.listdir("backup"):
+                if not name.startswith('.') and os.path.isdir(os.path.join("backup", name)):
+                    shutil.rmtree(os.path.join("backup", name))
+            tool, fetched = run_backup("20260105_000000", make_chapters(7, modified={3}),
+                                       modified={3}, incremental=True)
+            assert fetched == ["chapter-7"], fetched
+            snapshot = tool.object_store.latest_snapshot(NOVEL['id'])
+            contents = {entry['id']: tool.object_store.chapter_content(entry) for entry in snapshot['chapters']}
+            assert contents['303'].startswith("chapter-3 修改后正文")
+            assert contents['301'].endswith("【作者有话说】\n  作者备注\n")
+        finally:
+            os.chdir(old_cwd)
+    print("✓ 未变化的内容只保存一次，增量备份可从快照复用")
+
+
+def test_gc_and_restore():
+    """测试保留策略和从快照还原"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool, _ = run_backup("20260101_000000", make_chapters(4))
+            tool, _ = run_backup("20260102_000000", make_chapters(4, modified={1, 2}), modified={1, 2})
+            store = tool.object_store
+            before, _ = store.disk_usage()
+
+            # 宽限期内的对象不删除
+            stats = store.gc(keep=1)
+            assert stats['snapshots_removed'] == 1 and stats['objects_removed'] == 0
+
+            stats = store.gc(keep=1, grace=0)
+            assert stats['objects_removed'] == 2, stats
+            assert store.disk_usage()[0] == before - 2
+            assert [os.path.basename(path) for path in store.snapshots()] == ["20260102_000000.json"]
+
+            # 还原的章节日志与备份时获取的内容一致
+            snapshot = store.load_snapshot(store.snapshots()[0])
+            restored_path = os.path.join(tmp_dir, "restored.journal.jsonl")
+            chapters, failures = store.restore_journal(snapshot, restored_path)
+            assert not failures and [c['chapter_number'] for c in chapters] == [1, 2, 3, 4]
+            restored_novel, restored = ChapterJournal.read(restored_path)
+            assert restored_novel['intro'] == "测试简介"
+            assert {k: r['content'] for k, r in restored.items()} == {
+                str(300 + n): expected_content(n, "修改后" if n in (1, 2) else "原始") for n in range(1, 5)
+            }
+
+            # 只删除已有快照的旧备份目录
+            removed = prune_backup_dirs("backup", ObjectStore(os.path.join("backup", ".store")), keep=0)
+            assert removed == [os.path.join("backup", "20260102_000000")], removed
+            assert os.path.isdir(os.path.join("backup", "20260101_000000"))
+        finally:
+            os.chdir(old_cwd)
+    print("✓ gc按保留策略删除旧快照和未引用对象，快照可完整还原")
+
+
+def test_snapshot_is_retained():
+    """测试快照作为保留的备份：删除日志、从快照续传、按需清理旧备份目录"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            # 保存3章后取消：已保存的章节进入快照，章节日志删除，文档保留
+            tool, fetched = run_backup("20260101_000000", make_chapters(8), cancel_after=3)
+            journal_path = os.path.join(tool.output_dir, "快照测试.journal.jsonl")
+            assert not os.path.exists(journal_path)
+            assert os.path.exists(os.path.join(tool.output_dir, "快照测试.docx"))
+            snapshot = tool.object_store.latest_snapshot(NOVEL['id'])
+            saved = sorted(entry['id'] for entry in snapshot['chapters'] if entry.get('body'))
+            assert len(saved) == 3, saved
+
+            # 续传同一目录：从快照还原日志，只获取剩余章节
+            tool, fetched = run_backup("20260101_000000", make_chapters(8))
+            assert sorted(fetched) == sorted(f"chapter-{n}" for n in range(1, 9) if str(300 + n) not in saved), fetched
+            snapshot = tool.object_store.latest_snapshot(NOVEL['id'])
+            assert all(entry.get('body') for entry in snapshot['chapters'])
+            assert not os.path.exists(journal_path)
+            print(f"✓ 取消前保存 {len(saved)} 章，续传从快照还原，只获取剩余 {len(fetched)} 章")
+
+            # 20260102中断，之后两次完整备份
+            run_backup("20260102_000000", make_chapters(8), cancel_after=3)
+            run_backup("20260103_000000", make_chapters(8))
+            tool, _ = run_backup("20260104_000000", make_chapters(8))
+
+            def run_dirs():
+                return sorted(name for name in os.listdir("backup")
+                              if not name.startswith('.') and os.path.isdir(os.path.join("backup", name)))
+
+            # 默认不删除备份目录
+            tool._prune_old_backups()
+            assert run_dirs() == ["20260101_000000", "20260102_000000", "20260103_000000", "20260104_000000"]
+
+            # 保留最近2个：更早的完整备份删除（文档可从快照还原），中断的备份保留以便续传
+            tool.keep_backups = 2
+            tool._prune_old_backups()
+            assert run_dirs() == ["20260102_000000", "20260103_000000", "20260104_000000"]
+            assert len(tool.object_store.snapshots(NOVEL['id'])) == 4
+            print("✓ 指定keep_backups时删除旧备份目录，中断的备份和快照全部保留")
+        finally:
+            os.chdir(old_cwd)
+
+
+if __name__ == "__main__":
+    test_split_content()
+    test_dedupe_across_snapshots()
+    test_gc_and_restore()
+    test_snapshot_is_retained()
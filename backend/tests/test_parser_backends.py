@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     解析后端一致性测试
+=================================================================
+功能：测试不同HTML解析后端（html.parser / lxml / html5lib）的解析结果一致，
+      以及章节正文快速提取与完整DOM解析的结果一致
+
+使用场景：
+- 切换到更快的解析后端前确认结果不变
+- 检查作品列表、章节列表、简介和章节正文的提取
+
+测试内容：
+- 使用模拟的作者后台页面（gb18030编码）
+- 对每个已安装的后端分别解析并与html.parser的结果比较
+
+- 确认同一后台页面在一次运行内只请求一次
+
+注意：不访问网络，无需Cookie；未安装的后端自动跳过
+=================================================================
+"""
+import os
+import sys
+import tempfile
+import requests
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from jjwxc_parser import (
+    available_parser_backends, extract_textareas, parse_novel_list, parse_intro,
+    parse_chapters, parse_chapter_content
+)
+from jjwxc_col import JJWXCBackupTool
+
+NOVEL_LIST_PAGE = """<html><head><title>晋江文学城作者后台</title></head><body>
+<table>
+<tr><th>选择</th><th>作品</th><th>类型</th><th>风格</th><th>进度</th><th>章节</th><th>字数</th>
+<th>积分</th><th>收藏</th><th>评论</th><th>管理</th><th>签约</th><th>状态</th></tr>
+<tr><td><input type="checkbox"></td><td><a href="//www.jjwxc.net/onebook.php?novelid=1001">测试作品一</a></td>
+<td>原创</td><td>言情</td><td>连载</td><td>12</td><td>34567</td><td>0</td><td>5</td><td>1</td>
+<td><a href="//my.jjwxc.net/backend/managenovel.php?novelid=1001">管理</a></td><td>否</td><td>连载中</td></tr>
+<tr><td><input type="checkbox"></td><td><a href="//www.jjwxc.net/onebook.php?novelid=1002">测试作品二&amp;番外</a></td>
+<td>衍生</td><td>纯爱</td><td>完结</td><td>3</td><td>8000</td><td>0</td><td>0</td><td>0</td>
+<td><a href="//my.jjwxc.net/backend/managenovel.php?novelid=1002">管理</a></td><td>是</td><td>已完成</td></tr>
+</table></body></html>""".encode('gb18030')
+
+MANAGE_PAGE = """<html><body>
+<textarea id="novelintro" name="novelintro">  这是作品简介，
+包含换行 &amp; 特殊字符。  </textarea>
+<form action="managenovel.php" method="post">
+<table>
+<tr><th>选择</th><th>序号</th><th>标题</th><th>字数</th><th>更新时间</th></tr>
+<tr><td><input type="checkbox" name="chapterid" value="501"></td><td>1</td>
+<td><a href="//www.jjwxc.net/onebook.php?novelid=1001&amp;chapterid=1">第一章 开始</a></td><td>3000</td><td>2025-01-01 10:00</td></tr>
+<tr><td><input type="checkbox" name="chapterid" value="503"></td><td>3</td>
+<td><a href="//my.jjwxc.net/onebook_vip.php?novelid=1001&amp;chapterid=3">[VIP]第三章</a></td><td>3100</td><td>2025-01-03 10:00</td></tr>
+<tr><td><input type="checkbox" name="chapterid" value="502"></td><td>2</td>
+<td><a href="//www.jjwxc.net/onebook.php?novelid=1001&amp;chapterid=2">第二章</a></td><td>2900</td><td>2025-01-02 10:00</td></tr>
+</table>
+<input type="hidden" name="chapterid" value="504">
+<input type="text" placeholder="第4章" name="chaptername">
+</form></body></html>""".encode('gb18030')
+
+CHAPTER_PAGE = """<html><head><title>章节修改</title></head><body>
+<table><tr><td><a href="managenovel.php">返回</a></td></tr></table>
+<form action="chaptermodify.php" method="post">
+<input type="hidden" name="chapterid" value="501">
+<textarea name="content" rows="20">
+第一行 &amp;lt;书名&amp;gt; A&amp;B &quot;引号&quot;
+
+第三行&nbsp;不换行空格
+　　全角缩进的第四行
+</textarea>
+<textarea name="note">
+作者有话说第一行
+
+作者有话说第三行
+</textarea>
+</form></body></html>""".encode('gb18030')
+
+
+def parse_all(backend):
+    """用指定后端解析全部模拟页面"""
+    return {
+        'novels': parse_novel_list(NOVEL_LIST_PAGE, backend),
+        'intro': parse_intro(MANAGE_PAGE, backend),
+        'chapters': parse_chapters(MANAGE_PAGE, '1001', backend),
+        'content': parse_chapter_content(CHAPTER_PAGE, backend),
+    }
+
+
+def test_parser_backends():
+    """测试各解析后端结果一致"""
+    backends = available_parser_backends()
+    print(f"已安装的解析后端: {backends}")
+    
+    reference = parse_all('html.parser')
+    assert [n['id'] for n in reference['novels']] == ['1001', '1002']
+    assert reference['novels'][1]['title'] == "测试作品二&番外"
+    assert reference['novels'][0]['status'] == "连载中"
+    assert reference['intro'].startswith("这是作品简介")
+    assert [c['chapter_number'] for c in reference['chapters']] == [1, 2, 3]
+    assert [c['is_vip'] for c in reference['chapters']] == [False, False, True]
+    assert '<书名>' in reference['content'] and '【作者有话说】' in reference['content']
+    
+    for backend in backends:
+        result = parse_all(backend)
+        for key in reference:
+            assert result[key] == reference[key], f"{backend} 的 {key} 解析结果与html.parser不一致"
+        print(f"✓ {backend} 解析结果一致")
+
+
+def test_page_memo():
+    """测试同一后台页面在一次运行内只请求一次"""
+    original_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            tool = JJWXCBackupTool(use_http_cache=False)
+            pages = {
+                'oneauthor_login.php': NOVEL_LIST_PAGE,
+                'managenovel.php?novelid=1001': MANAGE_PAGE,
+            }
+            fetched = []
+            
+            def fake_get(url, session=None, use_cache=True, **kwargs):
+                fetched.append(url)
+                response = requests.models.Response()
+                response.status_code = 200
+                response.url = url
+                response._content = next(body for key, body in pages.items() if url.endswith(key))
+                return response
+            
+            tool._get = fake_get
+            assert tool.check_login()
+            novels = tool.get_novel_list()
+            intro = tool.get_intro_from_backend('1001')
+            chapters = tool.get_chapters(novels[0]['link'])
+            chapters[0]['title'] = "调用方修改"
+            chapters_again = tool.get_chapters(novels[0]['link'])
+        finally:
+            os.chdir(original_cwd)
+    
+    assert len(fetched) == 2, f"应只请求2个页面，实际请求: {fetched}"
+    assert intro == parse_intro(MANAGE_PAGE)
+    assert chapters_again == parse_chapters(MANAGE_PAGE, '1001')
+    print(f"✓ 登录检查、作品列表、简介和章节列表共请求 {len(fetched)} 次")
+
+
+def test_textarea_fast_path():
+    """测试章节正文快速提取与完整DOM解析结果一致"""
+    # 传入已解码的字符串时不走快速路径，作为对照
+    assert extract_textareas(CHAPTER_PAGE) is not None
+    assert parse_chapter_content(CHAPTER_PAGE) == parse_chapter_content(CHAPTER_PAGE.decode('gb18030'))
+    
+    # 快速路径无法保证一致的内容（原始标签、未知实体）会回退到DOM解析
+    fallback_bodies = [
+        "正文里有<b>原始标签</b>，需要由DOM解析处理的情况",
+        "正文里有&unknown;未知实体，需要由DOM解析处理的情况",
+    ]
+    for body in fallback_bodies:
+        page = f"<form><textarea name='content'>{body}</textarea></form>".encode('gb18030')
+        assert extract_textareas(page) is None
+        assert parse_chapter_content(page) == parse_chapter_content(page.decode('gb18030'))
+    
+    # 没有目标textarea的页面（如登录页）同样回退
+    login_page = "<html><body>请登录</body></html>".encode('gb18030')
+    assert extract_textareas(login_page) is None
+    assert parse_chapter_content(login_page).startswith("内容获取失败")
+    print("✓ 快速提取结果与DOM解析一致，特殊内容正确回退")
+
+
+if __name__ == "__main__":
+    test_parser_backends()
+    test_textarea_fast_path()
+    test_page_memo()
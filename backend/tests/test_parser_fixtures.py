@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     离线页面解析测试
+=================================================================
+功能：用tests/fixtures/中的匿名后台页面检查解析结果，以及性能基准的比较逻辑
+
+使用场景：
+- 修改解析代码后，不需要Cookie即可确认作品列表、章节列表和正文的解析结果
+- 确认fixtures目录中的页面与tests/fixture_pages.py的生成结果一致
+- 确认匿名化后的页面解析结构不变
+
+测试内容：
+- 60部作品的后台首页、2000章的管理页、12万字的章节页、含原始标签的章节页
+- benchmark_parsers.compare对变慢和内存增长的判定，测量波动大时放宽容差
+
+注意：不访问网络，无需Cookie
+=================================================================
+"""
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jjwxc_parser import (
+    extract_textareas, parse_novel_list, parse_intro, parse_chapters, parse_chapter_content
+)
+from fixture_pages import FIXTURES, load_fixture, anonymize_page
+from benchmark_parsers import compare
+
+
+def test_fixtures_up_to_date():
+    """测试fixtures目录中的页面与生成器一致"""
+    for name, build in FIXTURES.items():
+        assert load_fixture(name) == build(), f"{name} 与生成结果不一致，请运行 python tests/fixture_pages.py"
+    print(f"✓ {len(FIXTURES)} 个页面与生成器一致")
+
+
+def test_parse_fixtures():
+    """测试解析匿名后台页面"""
+    novels = parse_novel_list(load_fixture('oneauthor_login.html'))
+    assert len(novels) == 60 and len({n['id'] for n in novels}) == 60
+    assert all(n['link'].endswith(f"managenovel.php?novelid={n['id']}") for n in novels)
+    assert all(n['status'] in ("连载中", "已完成", "暂停") for n in novels)
+
+    large = parse_chapters(load_fixture('managenovel_large.html'), '1000037')
+    assert [c['chapter_number'] for c in large] == list(range(1, 2001))
+    assert sum(c['is_vip'] for c in large) == 2000 - 30
+    assert len({c['row_hash'] for c in large}) == 2000
+    assert len(parse_intro(load_fixture('managenovel_small.html'))) > 300
+
+    content = parse_chapter_content(load_fixture('chaptermodify_long.html'))
+    assert len(content) > 120000 and "【作者有话说】" in content and "<书名>" in content
+
+    markup_page = load_fixture('chaptermodify_markup.html')
+    assert extract_textareas(markup_page) is None
+    assert "加粗" in parse_chapter_content(markup_page)
+    print("✓ 作品列表、2000章章节列表、超长章节和DOM解析结果正确")
+
+
+def test_anonymize_keeps_structure():
+    """测试匿名化后解析结构不变"""
+    for name, novel_id in (('managenovel_small.html', '1000000'), ('managenovel_large.html', '1000037')):
+        original = parse_chapters(load_fixture(name), novel_id)
+        anonymized = parse_chapters(anonymize_page(load_fixture(name)), novel_id)
+        assert [(c['id'], c['chapter_number'], c['is_vip']) for c in anonymized] == \
+               [(c['id'], c['chapter_number'], c['is_vip']) for c in original]
+        assert [c['title'] for c in anonymized] != [c['title'] for c in original]
+    novels = parse_novel_list(anonymize_page(load_fixture('oneauthor_login.html')))
+    assert len(novels) == 60
+    print("✓ 匿名化后章节编号、ID和VIP标记不变，标题已替换")
+
+
+def test_benchmark_compare():
+    """测试性能基准的比较逻辑"""
+    baseline = {'cases': {
+        'a': {'relative': 1.0, 'spread': 0.02, 'rss_mb': 1.0},
+        'b': {'relative': 1.0, 'spread': 0.02, 'rss_mb': 1.0},
+        'c': {'relative': 1.0, 'spread': 0.02, 'rss_mb': 10.0},
+        'e': {'relative': 1.0, 'spread': 0.15, 'rss_mb': 1.0},
+    }}
+    results = {'cases': {
+        'a': {'relative': 0.9, 'spread': 0.02, 'rss_mb': 2.5},
+        'b': {'relative': 0.5, 'spread': 0.02, 'rss_mb': 1.0},
+        'c': {'relative': 1.0, 'spread': 0.02, 'rss_mb': 20.0},
+        'd': {'relative': 1.0, 'spread': 0.02, 'rss_mb': 1.0},
+        # 基准波动15%，容差放宽到45%
+        'e': {'relative': 0.6, 'spread': 0.02, 'rss_mb': 1.0},
+    }}
+    slower = {name: flag for name, _, flag in compare(results, baseline, tolerance=0.3)}
+    assert slower == {'a': False, 'b': True, 'c': True, 'd': False, 'e': False}
+    print("✓ 速度下降和内存增长超出容差时判定为变慢")
+
+
+if __name__ == "__main__":
+    test_fixtures_up_to_date()
+    test_parse_fixtures()
+    test_anonymize_keeps_structure()
+    test_benchmark_compare()
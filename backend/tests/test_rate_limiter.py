@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     请求限速器测试
+=================================================================
+功能：测试令牌桶限速器的突发容量和平均速率
+
+使用场景：
+- 验证多线程同时请求时总速率不超过设定值
+- 检查不同主机使用独立的令牌桶
+
+注意：不访问网络，无需Cookie
+=================================================================
+"""
+import os
+import sys
+import time
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from rate_limiter import TokenBucket, HostRateLimiter
+
+
+def test_token_bucket_schedule():
+    """测试令牌桶预约的发送时间"""
+    bucket = TokenBucket(rate=20, burst=2)
+    waits = [bucket.reserve() for _ in range(10)]
+    print(f"预约等待时间: {[round(w, 3) for w in waits]}")
+    
+    # 前burst个请求无需等待，之后按1/rate的间隔排队
+    assert waits[0] == 0 and waits[1] == 0
+    for idx in range(2, 10):
+        assert abs(waits[idx] - (idx - 1) / 20) < 0.01
+    print("✓ 突发容量和平均速率正确")
+
+
+def test_rate_across_threads():
+    """测试多线程共享限速器时的总速率"""
+    limiter = HostRateLimiter(rate=50, burst=1, jitter=0)
+    url = "https://my.jjwxc.net/backend/chaptermodify.php?novelid=1&chapterid=1"
+    
+    start = time.monotonic()
+    threads = [threading.Thread(target=lambda: [limiter.acquire(url) for _ in range(5)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+    
+    # 20个请求、容量1、速率50/秒，至少需要19/50秒
+    print(f"4线程共20个请求耗时: {elapsed:.3f}秒")
+    assert elapsed >= 19 / 50 - 0.02
+    
+    # 其他主机不受影响
+    assert limiter.bucket_for("https://www.jjwxc.net/") is not limiter.bucket_for(url)
+    print("✓ 多线程总速率受限，不同主机独立计数")
+
+
+if __name__ == "__main__":
+    test_token_bucket_schedule()
+    test_rate_across_threads()
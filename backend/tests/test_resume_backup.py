@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     断点续传测试
+=================================================================
+功能：测试中断后使用resume_dir继续备份
+
+使用场景：
+- 验证中断前保存的章节都已写入章节日志
+- 检查续传时只获取未完成的章节
+- 确认续传生成的DOCX与一次完成的DOCX一致
+
+注意：不访问网络，无需Cookie
+=================================================================
+"""
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from jjwxc_col import JJWXCBackupTool
+from chapter_journal import ChapterJournal
+from docx import Document
+
+NOVEL = {'id': '1', 'title': '续传测试', 'word_count': '0', 'status': '测试'}
+CHAPTERS = [
+    {'id': str(100 + n), 'title': f"标题{n}", 'link': f"chapter-{n}", 'chapter_number': n, 'is_vip': False}
+    for n in range(1, 11)
+]
+
+
+def chapter_page(text):
+    """构造只包含正文textarea的章节编辑页面"""
+    return f"<form><textarea name='content'>{text}</textarea></form>".encode('gb18030')
+
+
+def make_tool(fetched, interrupt_at=None, resume_dir=None):
+    """创建不访问网络的备份工具，记录实际获取的章节"""
+    tool = JJWXCBackupTool(max_workers=1, checkpoint_interval=3, resume_dir=resume_dir)
+    tool.get_intro_from_backend = lambda novel_id: "测试简介"
+    
+    def fake_fetch_chapter_page(chapter_link, session=None):
+        if chapter_link == interrupt_at:
+            raise KeyboardInterrupt
+        fetched.append(chapter_link)
+        return chapter_page(f"{chapter_link} 的正文内容，长度足够通过有效内容检查。\n【作者有话说】\n作者备注内容足够长")
+    
+    tool.fetch_chapter_page = fake_fetch_chapter_page
+    return tool
+
+
+def docx_texts(path):
+    return [(p.style.name, p.text) for p in Document(path).paragraphs]
+
+
+def test_resume_backup():
+    """测试中断后续传"""
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            # 一次完成的备份作为对照
+            fetched = []
+            full_tool = make_tool(fetched)
+            full_tool.create_docx_with_realtime_save(NOVEL, CHAPTERS)
+            expected = docx_texts(os.path.join(full_tool.output_dir, "续传测试.docx"))
+            
+            # 在第6章中断（换一个工作目录，避免与对照备份使用同一时间戳目录）
+            os.makedirs("interrupted")
+            os.chdir("interrupted")
+            fetched = []
+            tool = make_tool(fetched, interrupt_at="chapter-6")
+            try:
+                tool.create_docx_with_realtime_save(NOVEL, CHAPTERS)
+                assert False, "应当被中断"
+            except KeyboardInterrupt:
+                pass
+            print(f"中断前获取: {fetched}")
+            
+            _, journaled = ChapterJournal.index(os.path.join(tool.output_dir, "续传测试.journal.jsonl"))
+            print(f"章节日志中的章节: {sorted(journaled)}")
+            assert sorted(journaled) == ['101', '102', '103', '104', '105']
+            
+            # 续传：只获取剩余章节
+            fetched = []
+            resumed = make_tool(fetched, resume_dir=tool.output_dir)
+            resumed.create_docx_with_realtime_save(NOVEL, CHAPTERS)
+            print(f"续传时获取: {fetched}")
+            assert fetched == [f"chapter-{n}" for n in range(6, 11)]
+            
+            assert docx_texts(os.path.join(tool.output_dir, "续传测试.docx")) == expected
+            print("✓ 续传结果与一次完成的备份一致")
+        finally:
+            os.chdir(old_cwd)
+
+
+if __name__ == "__main__":
+    test_resume_backup()
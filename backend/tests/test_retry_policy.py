@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     请求重试和熔断测试
+=================================================================
+功能：测试连接错误、超时和429/5xx的重试、Retry-After、请求期限和按主机熔断
+
+使用场景：
+- 验证偶发的5xx在重试后成功，不再记为失败章节（同步线程池和异步引擎）
+- 检查服务器要求的Retry-After被遵守，超时请求在期限内结束
+- 确认后台持续出错时所有工作线程暂停请求，恢复后自动继续
+
+测试内容：
+- Retry-After解析（秒数和HTTP日期）、退避时间和期限
+- 同步和异步方案共用的发送记录：重试判断、指标和熔断器，取消后不再重试
+- 每个章节页前两次请求返回5xx时完整备份（threads / asyncio）
+- 429 + Retry-After等待；不返回响应的请求在1秒期限内结束
+- 熔断器断开、试探、恢复的状态变化；后台全部出错期间请求数有上限
+
+注意：不访问外部网络，无需Cookie，测试文档保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+from datetime import datetime, timezone, timedelta
+from email.utils import format_datetime
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+from jjwxc_col import JJWXCBackupTool
+from metrics import Metrics
+from retry_policy import RetryPolicy, CircuitBreaker, CircuitOpenError, RequestAttempts, parse_retry_after
+from fake_jjwxc_server import FakeJJWXCServer
+
+
+def run_backup(server, **kwargs):
+    """在临时目录中对模拟服务器完整运行一次备份，返回(工具, 备份结果)"""
+    options = dict(max_workers=4, requests_per_second=500, burst=50, jitter=0, checkpoint_interval=0,
+                   use_http_cache=False, use_object_store=False, use_catalog=False,
+                   use_search_index=False, base_url=server.base_url)
+    options.update(kwargs)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(**options)
+            tool.select_novels_to_backup = lambda novel_list: novel_list
+            return tool, tool.backup_all_novels()
+        finally:
+            os.chdir(old_cwd)
+
+
+def test_retry_after_and_backoff():
+    """测试Retry-After解析和退避时间"""
+    now = datetime(2025, 1, 1, 12, 0, 0, tzinfo=timezone.utc)
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after(format_datetime(now + timedelta(seconds=30), usegmt=True), now=now) == 30.0
+    assert parse_retry_after(format_datetime(now - timedelta(seconds=30), usegmt=True), now=now) == 0.0
+    assert parse_retry_after("稍后再试") is None and parse_retry_after(None) is None
+
+    policy = RetryPolicy(max_attempts=4, backoff=1, max_backoff=3, jitter=0, deadline=60, max_retry_after=20)
+    deadline = policy.start()
+    assert [policy.next_delay(n, deadline) for n in (1, 2, 3, 4)] == [1, 2, 3, None]
+    assert policy.next_delay(1, deadline, retry_after=10) == 10
+    assert policy.next_delay(1, deadline, retry_after=600) == 20
+    # 剩余时间不够等一次时不再重试
+    assert policy.next_delay(1, time.monotonic() + 0.5) is None
+    assert policy.attempt_timeout(30, time.monotonic() + 2) <= 2
+    assert policy.should_retry_status(503) and not policy.should_retry_status(404)
+
+    jittered = RetryPolicy(backoff=1, jitter=0.5)
+    delays = [jittered.next_delay(1, jittered.start()) for _ in range(50)]
+    assert all(0.5 <= delay <= 1 for delay in delays) and len(set(delays)) > 1
+    print("✓ Retry-After解析、指数退避、随机抖动和期限正确")
+
+
+def test_request_attempts():
+    """测试同步和异步方案共用的发送记录"""
+    url = "http://127.0.0.1:1/backend/managenovel.php"
+    policy = RetryPolicy(max_attempts=3, backoff=1, jitter=0, deadline=60)
+    breaker = CircuitBreaker(failure_threshold=10)
+    metrics = Metrics()
+    outcomes = []
+    attempts = RequestAttempts(policy, breaker, metrics, url, observe=lambda seconds, outcome: outcomes.append(outcome))
+
+    attempts.begin(30)
+    assert attempts.failed(requests.ConnectionError("断开")) == 1
+    attempts.begin(30)
+    assert attempts.response(503, 10, "5") == 5
+    attempts.begin(30)
+    # 重试用尽，交给调用方处理错误响应
+    assert attempts.response(503, 10) is None
+    assert outcomes == ['connection_error', 'server_error', 'server_error'], outcomes
+    assert metrics.counter('http_retries', reason='ConnectionError') == 1
+    assert metrics.counter('http_retries', reason='HTTP 503') == 1
+    assert metrics.counter('http_status', code=503) == 2
+
+    # 成功的响应恢复熔断器计数
+    attempts = RequestAttempts(policy, breaker, metrics, url)
+    attempts.begin(30)
+    assert attempts.response(200, 10) is None and breaker.state(url) == 'closed'
+
+    # 备份已取消时不再重试
+    attempts = RequestAttempts(policy, breaker, metrics, url, cancelled=lambda: True)
+    attempts.begin(30)
+    assert attempts.failed(requests.Timeout("超时"), timed_out=True) is None
+    print("✓ 发送记录的重试判断、指标和取消正确")
+
+
+def test_retry_until_success():
+    """测试章节页前两次请求出错时重试后全部成功"""
+    for engine in ('threads', 'asyncio'):
+        with FakeJJWXCServer(novels=2, chapters=6, fail_first=2, error_statuses=(503, 500)) as server:
+            tool, results = run_backup(
+                server, fetch_engine=engine,
+                retry_policy=RetryPolicy(max_attempts=3, backoff=0.01, jitter=0),
+                circuit_breaker=CircuitBreaker(failure_threshold=1000)
+            )
+        assert [(r['saved'], r['failed']) for r in results] == [(6, 0), (6, 0)]
+        assert server.stats['chapter_pages'] == 3 * server.total_chapters()
+        assert server.stats['error'] == 2 * server.total_chapters()
+        retries = {c['labels']['reason']: c['value'] for c in tool.metrics.snapshot()['counters']
+                   if c['name'] == 'http_retries'}
+        assert retries == {'HTTP 503': server.total_chapters(), 'HTTP 500': server.total_chapters()}
+        print(f"✓ {engine}: {server.stats['error']} 个5xx响应重试后，{server.total_chapters()} 章全部保存")
+
+
+def test_retry_after_and_deadline():
+    """测试429 + Retry-After等待和请求期限"""
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            FakeJJWXCServer(novels=1, chapters=1, fail_first=1, error_statuses=(429,), retry_after=1) as server:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(requests_per_second=500, burst=50, jitter=0, use_http_cache=False,
+                                   use_object_store=False, use_catalog=False, use_search_index=False,
+                                   base_url=server.base_url,
+                                   retry_policy=RetryPolicy(backoff=0.01, jitter=0))
+            url = f"{server.base_url}/backend/chaptermodify.php?novelid={server.novel_ids[0]}&chapterid=1"
+            started = time.monotonic()
+            response = tool._get(url, use_cache=False, timeout=5)
+            assert response.status_code == 200
+            assert time.monotonic() - started >= 0.9
+        finally:
+            os.chdir(old_cwd)
+
+    with tempfile.TemporaryDirectory() as tmp_dir, \
+            FakeJJWXCServer(novels=1, chapters=1, timeout_rate=1.0, hang_seconds=30) as server:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(requests_per_second=500, burst=50, jitter=0, use_http_cache=False,
+                                   use_object_store=False, use_catalog=False, use_search_index=False,
+                                   base_url=server.base_url,
+                                   retry_policy=RetryPolicy(backoff=0.2, jitter=0, deadline=1))
+            url = f"{server.base_url}/backend/chaptermodify.php?novelid={server.novel_ids[0]}&chapterid=1"
+            started = time.monotonic()
+            try:
+                tool._get(url, use_cache=False, timeout=30)
+                assert False, "应当超时"
+            except requests.Timeout:
+                pass
+            assert time.monotonic() - started < 2
+        finally:
+            os.chdir(old_cwd)
+    print("✓ 按Retry-After等待后重试成功，无响应的请求在期限内结束")
+
+
+def test_circuit_breaker_states():
+    """测试熔断器的断开、试探和恢复"""
+    url = "https://my.jjwxc.net/backend/chaptermodify.php"
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.2, max_recovery_timeout=0.3)
+    assert not breaker.record_failure(url) and breaker.record_failure(url)
+    assert breaker.state(url) == 'open' and breaker.opened == 1
+    # 其他主机不受影响
+    breaker.before_request("http://127.0.0.1:8765/backend/")
+
+    started = time.monotonic()
+    breaker.before_request(url)
+    assert time.monotonic() - started >= 0.15 and breaker.state(url) == 'half_open'
+
+    # 试探失败：暂停时间加倍（不超过上限），期限内不会恢复时直接报错
+    assert breaker.record_failure(url) and breaker.state(url) == 'open'
+    try:
+        breaker.before_request(url, deadline=time.monotonic() + 0.1)
+        assert False, "应当抛出CircuitOpenError"
+    except CircuitOpenError:
+        pass
+    breaker.before_request(url)
+    breaker.record_success(url)
+    assert breaker.state(url) == 'closed' and breaker.opened == 2
+    print("✓ 连续失败后暂停，试探失败暂停时间加倍，成功后恢复")
+
+
+def test_circuit_breaker_pauses_backup():
+    """测试后台持续出错期间暂停请求，恢复后完整备份"""
+    with FakeJJWXCServer(novels=1, chapters=8, error_rate=1.0) as server:
+        recover = threading.Timer(0.5, lambda: setattr(server, 'error_rate', 0.0))
+        recover.start()
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=0.3)
+        try:
+            _, results = run_backup(
+                server, retry_policy=RetryPolicy(max_attempts=6, backoff=0.01, jitter=0, deadline=10),
+                circuit_breaker=breaker
+            )
+        finally:
+            recover.cancel()
+    assert (results[0]['saved'], results[0]['failed']) == (8, 0)
+    assert breaker.opened >= 1
+    # 没有熔断时，4个线程在0.5秒内会发出大量失败请求；熔断后只有断开前的几次和试探请求
+    assert server.stats['error'] <= 10, server.stats
+    print(f"✓ 后台出错期间只发出 {server.stats['error']} 个失败请求，恢复后 8 章全部保存")
+
+
+if __name__ == "__main__":
+    test_retry_after_and_backoff()
+    test_request_attempts()
+    test_retry_until_success()
+    test_retry_after_and_deadline()
+    test_circuit_breaker_states()
+    test_circuit_breaker_pauses_backup()
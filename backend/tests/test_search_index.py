@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+=================================================================
+                     全文检索测试
+=================================================================
+功能：测试已备份章节的全文索引（二元分词 + SQLite FTS5）
+
+使用场景：
+- 验证中文二元分词和查询表达式
+- 检查备份时章节保存即写入索引，正文和作者有话说都能检索
+- 确认章节修改后旧内容从索引中删除，未变化的章节不重复建立索引
+- 确认章节日志删除后可从快照重建索引
+- 检查百万字规模的索引检索耗时
+
+注意：不访问网络，无需Cookie，索引保存到临时目录
+=================================================================
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+from jjwxc_col import JJWXCBackupTool
+from search_index import SearchIndex, tokenize, build_match_query
+
+NOVEL = {'id': '5', 'title': '检索测试', 'word_count': '0', 'status': '测试'}
+CHAPTERS = [
+    {'id': str(n), 'title': f"标题{n}", 'link': f"chapter-{n}", 'chapter_number': n, 'is_vip': False}
+    for n in range(1, 4)
+]
+PAGES = {
+    "chapter-1": "春眠不觉晓，处处闻啼鸟。长度足够通过有效内容检查的正文，这一段只是为了让章节内容足够长。\n【作者有话说】\n感谢Alice的地雷！",
+    "chapter-2": "夜来风雨声，花落知多少。长度足够通过有效内容检查的正文，这一段只是为了让章节内容足够长。",
+    "chapter-3": "床前明月光，疑是地上霜。长度足够通过有效内容检查的正文，这一段只是为了让章节内容足够长。",
+}
+
+
+def chapter_page(text):
+    """构造只包含正文textarea的章节编辑页面"""
+    return f"<form><textarea name='content'>{text}</textarea></form>".encode('gb18030')
+
+
+def test_tokenize():
+    """测试二元分词和查询表达式"""
+    assert tokenize("晋江文学城，Hello 2025的书") == ['晋江', '江文', '文学', '学城', 'hello', '2025', '的书']
+    assert tokenize("好") == ['好']
+    assert build_match_query("文学城 hello") == '"文学 学城" AND "hello"'
+    assert build_match_query("好") == '"好"*'
+    assert build_match_query("，。 ") is None
+    print("✓ 二元分词和查询表达式正确")
+
+
+def test_backup_updates_index():
+    """测试备份时更新索引"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(max_workers=2, use_http_cache=False, use_object_store=False, use_catalog=False)
+            tool.get_intro_from_backend = lambda novel_id: "作品简介"
+            tool.fetch_chapter_page = lambda chapter_link, session=None: chapter_page(PAGES[chapter_link])
+            tool.create_docx_with_realtime_save(NOVEL, CHAPTERS)
+            index = tool.search_index
+
+            hits = index.search("明月")
+            assert [(h['novel_title'], h['chapter_number'], h['kind']) for h in hits] == [('检索测试', 3, 'body')]
+            assert "[明月]光" in hits[0]['snippet']
+            hits = index.search("alice 地雷")
+            assert [(h['chapter_number'], h['kind']) for h in hits] == [(1, 'note')]
+            assert index.search("地雷", kinds=('body',)) == []
+            assert {h['chapter_number'] for h in index.search("正文")} == {1, 2, 3}
+            assert index.search("正文", novel_id='6') == []
+            # 跨标点的文字不算连续
+            assert index.search("晓处") == []
+
+            # 未变化的章节不重复建立索引，修改后的章节删除旧内容
+            assert not index.index_chapter(NOVEL, CHAPTERS[1], PAGES["chapter-2"])
+            assert index.index_chapter(NOVEL, CHAPTERS[1], "春风又绿江南岸。")
+            assert index.search("花落") == []
+            assert [h['chapter_number'] for h in index.search("江南")] == [2]
+            assert index.stats()['documents'] == 4
+        finally:
+            os.chdir(old_cwd)
+    print("✓ 章节保存时更新索引，正文和作者有话说都能检索")
+
+
+def test_rebuild_from_snapshot():
+    """测试从快照重建索引（保存快照后章节日志已删除）"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        old_cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            tool = JJWXCBackupTool(max_workers=2, use_http_cache=False, use_catalog=False, use_search_index=False)
+            tool.get_intro_from_backend = lambda novel_id: "作品简介"
+            tool.fetch_chapter_page = lambda chapter_link, session=None: chapter_page(PAGES[chapter_link])
+            tool.create_docx_with_realtime_save(NOVEL, CHAPTERS)
+            assert not os.path.exists(os.path.join(tool.output_dir, "检索测试.journal.jsonl"))
+
+            store = tool.object_store
+            snapshot = store.load_snapshot(store.snapshot_path(NOVEL['id'], tool.run_id))
+            with SearchIndex(os.path.join(tmp_dir, "rebuilt.sqlite3")) as index:
+                assert index.index_snapshot(store, snapshot) == 3
+                assert [(h['chapter_number'], h['kind']) for h in index.search("明月")] == [(3, 'body')]
+                assert [(h['chapter_number'], h['kind']) for h in index.search("alice 地雷")] == [(1, 'note')]
+                # 未变化的章节不重复建立索引
+                assert index.index_snapshot(store, snapshot) == 0
+        finally:
+            os.chdir(old_cwd)
+    print("✓ 章节日志删除后从快照重建索引")
+
+
+def test_search_speed():
+    """测试百万字索引的检索耗时"""
+    rng = random.Random(0)
+    alphabet = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with SearchIndex(os.path.join(tmp_dir, "search.sqlite3")) as index:
+            for n in range(400):
+                text = ''.join(rng.choice(alphabet) for _ in range(2500))
+                if n == 321:
+                    text += "独一无二的关键句"
+                novel = {'id': str(n // 40), 'title': f"作品{n // 40}"}
+                index.index_chapter(novel, {'id': str(n), 'chapter_number': n % 40 + 1, 'title': "标题"}, text)
+            assert index.stats()['characters'] >= 1000000
+
+            for query in ("独一无二的关键句", "的一", "中大为 上个"):
+                started = time.perf_counter()
+                hits = index.search(query)
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                print(f"检索 {query!r}: {len(hits)} 条结果，{elapsed_ms:.1f} ms")
+                assert elapsed_ms < 100
+            assert [(h['novel_id'], h['chapter_number']) for h in index.search("独一无二的关键句")] == [('8', 2)]
+    print("✓ 百万字索引检索耗时低于100ms")
+
+
+if __name__ == "__main__":
+    test_tokenize()
+    test_backup_updates_index()
+    test_rebuild_from_snapshot()
+    test_search_speed()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应并发上限（AIMD）
+
+功能：根据观察到的请求耗时和错误自动调整同时获取的章节数，
+      后台正常时逐步提高并发，出现超时、429/5xx或登录失效时立即减半
+
+说明：
+- 加性增加：每完成一轮请求（数量等于当前上限）检查这一轮的p95耗时和错误率，
+  都低于目标时上限加increase，不超过max_limit
+- 乘性减少：超时、连接错误、429、5xx或登录失效页面使上限乘以decrease，不低于min_limit；
+  调整之前已经发出的请求再失败不重复减少（一次拥塞只减一次）
+- p95超过目标但没有错误时保持不变
+- 每次调整都打印并记录到history，运行报告中可查看
+- acquire/release控制同时进行的章节获取数（异步引擎用acquire_async）；
+  observe由请求层在每次请求（含重试）后调用
+"""
+import time
+import asyncio
+import threading
+
+# 触发减少的请求结果（连接被重置、响应被截断也按过载处理）
+DECREASE_OUTCOMES = ('timeout', 'connection_error', 'throttled', 'server_error', 'logged_out')
+
+# 调整记录中显示的原因
+OUTCOME_LABELS = {
+    'timeout': '请求超时',
+    'connection_error': '连接错误',
+    'throttled': 'HTTP 429',
+    'server_error': 'HTTP 5xx',
+    'logged_out': '登录失效页面',
+}
+
+
+def classify_status(status):
+    """
+    把HTTP状态码归类为请求结果
+
+    返回：
+        str: 'throttled'（429）/ 'server_error'（5xx）/ 'ok'
+    """
+    if status == 429:
+        return 'throttled'
+    if status >= 500:
+        return 'server_error'
+    return 'ok'
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(self, max_limit=8, min_limit=1, initial_limit=None, increase=1, decrease=0.5,
+                 target_p95=2.0, target_error_rate=0.05, history_size=200):
+        """
+        初始化自适应并发上限
+
+        参数：
+            max_limit (int): 并发上限的上限（不会超过此值）
+            min_limit (int): 并发上限的下限
+            initial_limit (int): 初始上限（默认min_limit，从低并发开始逐步提高）
+            increase (int): 每轮加性增加的数量
+            decrease (float): 乘性减少的系数（0~1）
+            target_p95 (float): 目标p95请求耗时（秒），超过时不再增加
+            target_error_rate (float): 目标错误率，一轮中超过时不再增加
+            history_size (int): 保留的调整记录条数
+        """
+        self.max_limit = max(1, int(max_limit))
+        self.min_limit = min(self.max_limit, max(1, int(min_limit)))
+        if initial_limit is None:
+            initial_limit = self.min_limit
+        self.limit = min(self.max_limit, max(self.min_limit, int(initial_limit)))
+        self.increase = max(1, int(increase))
+        self.decrease = min(0.99, max(0.01, float(decrease)))
+        self.target_p95 = float(target_p95)
+        self.target_error_rate = float(target_error_rate)
+        self.history_size = history_size
+        self.history = []  # [{'elapsed', 'from', 'to', 'reason'}]
+        self.increases = 0
+        self.decreases = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._started = time.monotonic()
+        self._changed_at = self._started
+        self._samples = []  # 本轮的(耗时, 是否出错)
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """阻塞直到同时进行的获取数低于当前上限"""
+        with self._cond:
+            while self.in_flight >= self.limit:
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def acquire_async(self):
+        """异步等待直到同时进行的获取数低于当前上限"""
+        while True:
+            with self._cond:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+                    return
+            # 释放时不会通知协程，分段等待以便及时继续
+            await asyncio.sleep(0.01)
+
+    def release(self):
+        """结束一次获取"""
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def observe(self, seconds, outcome='ok'):
+        """
+        记录一次请求的结果
+
+        参数：
+            seconds (float): 请求耗时（秒）
+            outcome (str): 'ok'，或DECREASE_OUTCOMES中的一项，其他值按普通错误统计
+        """
+        now = time.monotonic()
+        with self._cond:
+            # 上一次调整之前发出的请求反映的是旧的并发，不再参与判断
+            if now - seconds < self._changed_at:
+                return
+            if outcome in DECREASE_OUTCOMES:
+                self._set_limit(max(self.min_limit, int(self.limit * self.decrease)), OUTCOME_LABELS[outcome], now)
+                return
+            self._samples.append((seconds, outcome != 'ok'))
+            if len(self._samples) < self.limit:
+                return
+            durations = sorted(seconds for seconds, _ in self._samples)
+            p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            error_rate = sum(error for _, error in self._samples) / len(self._samples)
+            self._samples = []
+            if p95 <= self.target_p95 and error_rate <= self.target_error_rate:
+                self._set_limit(min(self.max_limit, self.limit + self.increase),
+                                f"p95 {p95 * 1000:.0f} ms，错误率 {error_rate:.0%}", now)
+
+    def _set_limit(self, limit, reason, now):
+        """调整上限并记录（调用方持有锁）"""
+        if limit == self.limit:
+            return
+        entry = {'elapsed': round(now - self._started, 3), 'from': self.limit, 'to': limit, 'reason': reason}
+        self.history.append(entry)
+        del self.history[:-self.history_size]
+        if limit > self.limit:
+            self.increases += 1
+            arrow = "↑"
+        else:
+            self.decreases += 1
+            arrow = "↓"
+        print(f"  {arrow} 并发上限 {self.limit} → {limit}（{reason}）")
+        self.limit = limit
+        self._changed_at = now
+        self._samples = []
+        self._cond.notify_all()
+
+    def summary(self):
+        """当前状态和调整记录（写入运行报告）"""
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'min_limit': self.min_limit,
+                'max_limit': self.max_limit,
+                'peak_in_flight': self.peak_in_flight,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'history': list(self.history),
+            }
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+晋江作者后台异步获取引擎（可选）
+
+功能：基于asyncio + aiohttp，在单个事件循环中并发获取后台页面
+
+说明：
+- 需要额外安装aiohttp: pip install aiohttp
+- 使用信号量限制同时进行中的请求数，请求速率由HostRateLimiter控制
+- 页面解析复用jjwxc_parser中的函数，结果与同步方案一致
+- AsyncEngineExecutor可在后台线程运行事件循环，供同步代码按Future方式调用
+- AsyncChapterBatch把一部作品的待获取章节作为一个批次交给事件循环，
+  由不超过并发数的协程依次取出获取，不为每个请求占用一个线程
+- 作品管理页面每部作品只请求一次，简介和章节列表共用同一次解析结果
+- 重试和熔断规则、响应缓存与同步方案相同（retry_policy.RequestAttempts、http_cache），
+  重试等待期间不占用并发名额
+"""
+import queue
+import asyncio
+import threading
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp为可选依赖，未安装时只能使用同步方案
+    aiohttp = None
+
+from metrics import Metrics
+from rate_limiter import HostRateLimiter
+from retry_policy import RetryPolicy, CircuitBreaker, RequestAttempts
+from jjwxc_parser import (
+    DEFAULT_BASE_URL, backend_url, extract_novel_id, build_chapter_edit_url,
+    parse_novel_list, parse_manage_page, parse_chapter_content
+)
+
+
+class AsyncJJWXCEngine:
+    def __init__(self, cookies=None, headers=None, max_concurrency=8, rate_limiter=None,
+                 parser_backend=None, base_url=DEFAULT_BASE_URL, metrics=None,
+                 retry_policy=None, circuit_breaker=None, concurrency_limiter=None,
+                 http_cache=None, cache_chapter_pages=False, cancelled=None):
+        """
+        初始化异步引擎
+
+        参数：
+            cookies (dict): 认证Cookie（通常来自JJWXCBackupTool.session.cookies）
+            headers (dict): 默认请求头
+            max_concurrency (int): 同时进行中的最大请求数
+            rate_limiter (HostRateLimiter): 请求限速器（默认HostRateLimiter()，即rate_limiter.DEFAULT_REQUESTS_PER_SECOND）
+            parser_backend (str): HTML解析后端（默认html.parser）
+            base_url (str): 作者后台地址（默认https://my.jjwxc.net）
+            metrics (Metrics): 记录请求耗时的指标对象（默认新建）
+            retry_policy (RetryPolicy): 请求重试策略（默认新建）
+            circuit_breaker (CircuitBreaker): 按主机熔断器（通常与同步方案共享）
+            concurrency_limiter (AdaptiveConcurrencyLimiter): 接收每次请求耗时和结果的自适应并发上限（可选）
+            http_cache (ResponseCache): 后台页面响应缓存（通常与同步方案共享，None为不使用）
+            cache_chapter_pages (bool): 章节编辑页面是否也经过响应缓存
+            cancelled (callable): 返回备份是否已取消，已取消时不再重试（可选）
+        """
+        if aiohttp is None:
+            raise RuntimeError("异步引擎需要安装aiohttp: pip install aiohttp")
+
+        self.cookies = dict(cookies or {})
+        self.headers = dict(headers or {})
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.parser_backend = parser_backend
+        self.base_url = base_url.rstrip('/')
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        self.concurrency_limiter = concurrency_limiter
+        self.http_cache = http_cache
+        self.cache_chapter_pages = cache_chapter_pages
+        self.cancelled = cancelled
+        self._semaphore = None
+        self._session = None
+        self._manage_memo = {}  # {作品ID: 正在进行或已完成的管理页面获取任务}
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        """创建aiohttp会话和并发信号量（必须在事件循环内调用）"""
+        if self._session is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+            # 请求头在每次请求时传入（条件请求需要去掉Cache-Control等默认请求头）
+            self._session = aiohttp.ClientSession(cookies=self.cookies, connector=connector)
+
+    async def close(self):
+        """关闭aiohttp会话"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _fetch(self, url, referer=None, timeout=30, use_cache=True):
+        """
+        在并发和速率限制内获取页面原始内容
+
+        参数：
+            url (str): 页面地址
+            referer (str): 覆盖默认Referer
+            timeout (int): 单次请求超时时间（秒），不超过请求的剩余期限
+            use_cache (bool): 是否使用响应缓存（同JJWXCBackupTool._get）
+
+        返回：
+            bytes: 页面原始内容（重试用尽时可能是429/5xx的响应正文）
+        """
+        headers = dict(self.headers)
+        if referer:
+            headers['Referer'] = referer
+        cache = self.http_cache if use_cache else None
+        entry = None
+        if cache is not None:
+            entry, body, headers = cache.prepare(url, headers)
+            if body is not None:
+                self.metrics.count('http_cache', result='fresh')
+                return body
+
+        status, response_headers, body, redirected = await self._send_with_retry(url, headers, timeout)
+
+        if cache is not None:
+            cached = cache.complete(url, entry, status, response_headers, body, redirected)
+            if cached is not None:
+                self.metrics.count('http_cache', result='revalidated')
+                return cached
+        return body
+
+    async def _send_with_retry(self, url, headers, timeout):
+        """
+        按重试策略发送请求（经过熔断器、并发信号量和限速器，规则同JJWXCBackupTool._send_with_retry）
+
+        返回：
+            tuple: (状态码, 响应头, 正文, 是否经过重定向)
+
+        说明：
+            结果统计和重试判断见retry_policy.RequestAttempts，这里只负责发送；重试等待期间不占用并发名额
+        """
+        attempts = RequestAttempts(
+            self.retry_policy, self.circuit_breaker, self.metrics, url,
+            observe=self._observe_concurrency, cancelled=self.cancelled
+        )
+        while True:
+            await self.circuit_breaker.before_request_async(url, attempts.deadline)
+            async with self._semaphore:
+                await self.rate_limiter.acquire_async(url)
+                attempt_timeout = attempts.begin(timeout)
+                try:
+                    async with self._session.get(
+                        url, headers=headers, timeout=aiohttp.ClientTimeout(total=attempt_timeout)
+                    ) as response:
+                        body = await response.read()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    delay = attempts.failed(e, timed_out=isinstance(e, asyncio.TimeoutError))
+                    if delay is None:
+                        raise
+                except Exception as e:
+                    attempts.error(e)
+                    raise
+                else:
+                    delay = attempts.response(response.status, len(body), response.headers.get('Retry-After'))
+                    if delay is None:
+                        return response.status, response.headers, body, bool(response.history)
+            await asyncio.sleep(delay)
+
+    def _observe_concurrency(self, seconds, outcome):
+        """把一次请求的耗时和结果交给自适应并发上限（未设置时忽略）"""
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.observe(seconds, outcome)
+
+    async def _get_manage_page(self, novel_id):
+        """
+        获取并解析作品管理页面（每部作品只请求一次，并发调用共享同一任务）
+
+        返回：
+            tuple: (作品简介, 章节列表)
+        """
+        task = self._manage_memo.get(novel_id)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_manage_page(novel_id))
+            self._manage_memo[novel_id] = task
+            task.add_done_callback(lambda t: self._forget_failed_manage_page(novel_id, t))
+        else:
+            print(f"复用已获取的章节管理页面: {novel_id}")
+        # shield：一个调用方被取消时不取消其他调用方共享的任务
+        return await asyncio.shield(task)
+
+    def _forget_failed_manage_page(self, novel_id, task):
+        """失败或被取消的结果不保留，下次调用重新请求"""
+        if (task.cancelled() or task.exception() is not None) and self._manage_memo.get(novel_id) is task:
+            del self._manage_memo[novel_id]
+
+    async def _fetch_manage_page(self, novel_id):
+        manage_url = backend_url(f"managenovel.php?novelid={novel_id}", self.base_url)
+        print(f"访问后台章节管理页面: {manage_url}")
+        content = await self._fetch(manage_url, referer=backend_url("", self.base_url))
+        return await asyncio.to_thread(
+            parse_manage_page, content, novel_id, self.parser_backend, self.base_url
+        )
+
+    async def get_novel_list(self):
+        """获取作者作品列表"""
+        author_url = backend_url("oneauthor_login.php", self.base_url)
+        try:
+            print(f"获取作品列表: {author_url}")
+            content = await self._fetch(author_url, timeout=20)
+            return await asyncio.to_thread(parse_novel_list, content, self.parser_backend, self.base_url)
+        except Exception as e:
+            print(f"获取作品列表出错: {str(e)}")
+            return []
+
+    async def get_intro_from_backend(self, novel_id):
+        """从作者后台获取作品简介"""
+        try:
+            novel_intro, _ = await self._get_manage_page(novel_id)
+            if novel_intro:
+                print(f"获取到作品简介: {len(novel_intro)} 字符")
+            return novel_intro
+        except Exception as e:
+            print(f"获取作品简介失败: {e}")
+            return ""
+
+    async def get_chapters(self, novel_link):
+        """获取作品的完整章节列表"""
+        if not novel_link:
+            return []
+
+        try:
+            novel_id = extract_novel_id(novel_link)
+            if not novel_id:
+                print(f"无法从链接中提取作品ID: {novel_link}")
+                return []
+            _, chapters = await self._get_manage_page(novel_id)
+            return [dict(chapter) for chapter in chapters]
+        except Exception as e:
+            print(f"获取章节列表出错: {str(e)}")
+            return []
+
+    async def get_chapter_content(self, chapter_link, is_vip=False):
+        """获取章节内容（统一后台方案），失败时返回以"内容获取失败"开头的提示"""
+        if not chapter_link:
+            return "章节链接无效"
+
+        try:
+            content = await self.fetch_chapter_page(chapter_link)
+            return await asyncio.to_thread(parse_chapter_content, content, self.parser_backend)
+        except Exception as e:
+            print(f"  章节内容获取出错: {str(e)}")
+            return f"内容获取失败：{str(e)}"
+
+    async def fetch_chapter_page(self, chapter_link):
+        """获取章节后台编辑页面的原始内容（不解析），失败时抛出异常"""
+        edit_url = build_chapter_edit_url(chapter_link, self.base_url)
+        if not edit_url:
+            raise ValueError("无法从链接中提取章节信息")
+        return await self._fetch(
+            edit_url,
+            referer=backend_url("managenovel.php", self.base_url),
+            use_cache=self.cache_chapter_pages
+        )
+
+    async def get_chapter_contents(self, chapters):
+        """
+        并发获取多个章节内容
+
+        返回：
+            list: 与chapters顺序一致的章节内容列表
+        """
+        return await asyncio.gather(
+            *(self.get_chapter_content(chapter['link']) for chapter in chapters)
+        )
+
+
+class AsyncEngineExecutor:
+    """
+    在后台线程的事件循环中运行AsyncJJWXCEngine
+
+    提供与ThreadPoolExecutor相同的submit/shutdown接口，
+    submit接收协程函数并返回concurrent.futures.Future
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(engine.open(), self._loop).result()
+
+    def submit(self, coro_fn, *args, **kwargs):
+        """在事件循环中调度协程，返回concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro_fn(*args, **kwargs), self._loop)
+
+    def call_soon(self, callback, *args):
+        """从其他线程安排在事件循环中调用callback（循环已关闭时忽略）"""
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """关闭引擎并停止事件循环"""
+        if self._loop.is_closed():
+            return
+        if cancel_futures:
+            self._loop.call_soon_threadsafe(self._cancel_all_tasks)
+        asyncio.run_coroutine_threadsafe(self.engine.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        # 引擎已关闭，事件循环线程会立即退出，因此总是等待并释放循环
+        self._thread.join()
+        self._loop.close()
+
+    def _cancel_all_tasks(self):
+        for task in asyncio.all_tasks(self._loop):
+            task.cancel()
+
+
+_DONE = object()
+
+
+class AsyncChapterBatch:
+    """
+    在事件循环中获取一部作品的章节，产出格式与ChapterPipeline.run相同
+
+    说明：
+    - 整批章节只提交一个协程（一个Future），其中最多workers个协程从队列中依次取出章节获取，
+      所有作品的请求共用引擎的并发信号量和限速器
+    - 页面在线程中解析（asyncio.to_thread），不阻塞事件循环
+    - 背压：获取、解析或等待调用方取走的章节最多depth个，调用方每取走一章释放一个名额
+    """
+
+    def __init__(self, executor, fetch, parse, depth=16, workers=8):
+        """
+        初始化批次
+
+        参数：
+            executor (AsyncEngineExecutor): 运行事件循环的执行器
+            fetch (callable): 协程函数，fetch(chapter) -> 页面原始内容
+            parse (callable): parse(page) -> 章节文本
+            depth (int): 同时在途的最大章节数
+            workers (int): 同时获取的最大章节数（通常为引擎的并发数）
+        """
+        self.executor = executor
+        self.fetch = fetch
+        self.parse = parse
+        self.depth = max(1, int(depth))
+        self.workers = max(1, int(workers))
+        self.max_in_flight = 0
+        self._slots = None
+        self._in_flight = 0
+
+    def run(self, chapters):
+        """
+        按完成顺序产出章节结果
+
+        参数：
+            chapters (list): 待获取的章节列表
+
+        产出：
+            tuple: (章节信息, 章节文本, 异常)，成功时异常为None，失败时章节文本为None
+
+        说明：
+            提前结束迭代（break或异常）时取消整个批次；批次被取消（调度器关闭）时直接结束
+        """
+        chapters = list(chapters)
+        if not chapters:
+            return
+        results = queue.Queue()
+        future = self.executor.submit(self._run, chapters, results)
+        future.add_done_callback(lambda f: results.put(_DONE))
+        remaining = len(chapters)
+        try:
+            while remaining:
+                item = results.get()
+                if item is _DONE:
+                    # 批次提前结束：被取消时不再产出，出错时交给调用方
+                    if future.cancelled():
+                        return
+                    future.result()
+                    return
+                remaining -= 1
+                self.executor.call_soon(self._release_slot)
+                yield item
+        finally:
+            future.cancel()
+
+    async def _run(self, chapters, results):
+        self._slots = asyncio.Semaphore(self.depth)
+        pending = asyncio.Queue()
+        for chapter in chapters:
+            pending.put_nowait(chapter)
+        await asyncio.gather(*(
+            self._worker(pending, results) for _ in range(min(self.workers, len(chapters)))
+        ))
+
+    async def _worker(self, pending, results):
+        while not pending.empty():
+            await self._slots.acquire()
+            if pending.empty():
+                self._slots.release()
+                return
+            chapter = pending.get_nowait()
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            try:
+                page = await self.fetch(chapter)
+                text, error = await asyncio.to_thread(self.parse, page), None
+            except Exception as e:
+                text, error = None, e
+            results.put((chapter, text, error))
+
+    def _release_slot(self):
+        self._in_flight -= 1
+        self._slots.release()
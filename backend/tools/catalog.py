@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+作品目录（SQLite）
+
+功能：记录作品、章节和每次备份运行的元数据，离线回答"哪些章节最近修改过"等问题
+
+说明：
+- 数据库位于backup/catalog.sqlite3，所有备份目录共享
+- novels：作品列表（get_novel_list的结果）
+- chapters：章节列表（get_chapters的结果）及正文哈希、字数；记录首次出现、
+  最近一次变化（标题、章节行指纹或正文哈希改变）和最近一次出现的时间
+- runs / run_novels：每次备份运行及其中每部作品的耗时和结果
+- 时间统一为本地时间ISO格式字符串（如2025-01-01T12:00:00），可直接按字符串比较
+- 连接在线程间共享，写操作由锁串行化
+
+命令行：
+python tools/catalog.py novels
+python tools/catalog.py chapters <作品ID>
+python tools/catalog.py changed --days 7 [--novel 作品ID]
+python tools/catalog.py runs [--limit 10]
+"""
+import os
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+from chapter_journal import ChapterJournal
+from object_store import split_content
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS novels (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    link TEXT,
+    status TEXT,
+    word_count TEXT,
+    chapter_count TEXT,
+    category TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chapters (
+    novel_id TEXT NOT NULL,
+    chapter_id TEXT NOT NULL,
+    chapter_number INTEGER,
+    title TEXT,
+    is_vip INTEGER NOT NULL DEFAULT 0,
+    row_hash TEXT,
+    content_hash TEXT,
+    content_size INTEGER,
+    body_size INTEGER,
+    note_size INTEGER,
+    first_seen TEXT NOT NULL,
+    changed_at TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    last_run TEXT,
+    PRIMARY KEY (novel_id, chapter_id)
+);
+CREATE INDEX IF NOT EXISTS idx_chapters_novel_number ON chapters (novel_id, chapter_number);
+CREATE INDEX IF NOT EXISTS idx_chapters_number ON chapters (chapter_number);
+CREATE INDEX IF NOT EXISTS idx_chapters_changed ON chapters (changed_at);
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    output_dir TEXT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    status TEXT NOT NULL,
+    novels INTEGER NOT NULL DEFAULT 0,
+    saved INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS run_novels (
+    run_id TEXT NOT NULL,
+    novel_id TEXT NOT NULL,
+    title TEXT,
+    total INTEGER NOT NULL DEFAULT 0,
+    saved INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    seconds REAL,
+    finished_at TEXT NOT NULL,
+    PRIMARY KEY (run_id, novel_id)
+);
+CREATE INDEX IF NOT EXISTS idx_run_novels_novel ON run_novels (novel_id);
+"""
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class Catalog:
+    def __init__(self, path):
+        """
+        打开（或创建）作品目录
+
+        参数：
+            path (str): 数据库文件路径（':memory:'为内存数据库）
+        """
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ':memory:':
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    # ---------- 写入 ----------
+
+    def upsert_novels(self, novels):
+        """
+        记录作品列表
+
+        参数：
+            novels (list): get_novel_list返回的作品列表
+        """
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO novels (id, title, link, status, word_count, chapter_count, category, first_seen, last_seen)
+                VALUES (:id, :title, :link, :status, :word_count, :chapter_count, :category, :now, :now)
+                ON CONFLICT (id) DO UPDATE SET
+                    title=excluded.title, link=excluded.link, status=excluded.status,
+                    word_count=excluded.word_count, chapter_count=excluded.chapter_count,
+                    category=excluded.category, last_seen=excluded.last_seen
+                """,
+                [
+                    {
+                        'id': str(novel['id']), 'title': novel.get('title', ''), 'link': novel.get('link'),
+                        'status': novel.get('status'), 'word_count': novel.get('word_count'),
+                        'chapter_count': novel.get('chapter_count'), 'category': novel.get('category'),
+                        'now': now
+                    }
+                    for novel in novels
+                ]
+            )
+
+    def upsert_chapters(self, novel_id, chapters, run_id=None):
+        """
+        记录作品的章节列表
+
+        参数：
+            novel_id (str): 作品ID
+            chapters (list): get_chapters返回的章节列表
+            run_id (str): 本次备份运行ID
+
+        说明：
+            标题或章节行指纹改变时更新changed_at
+        """
+        now = _now()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO chapters (novel_id, chapter_id, chapter_number, title, is_vip, row_hash,
+                                      first_seen, changed_at, last_seen, last_run)
+                VALUES (:novel_id, :chapter_id, :chapter_number, :title, :is_vip, :row_hash,
+                        :now, :now, :now, :run_id)
+                ON CONFLICT (novel_id, chapter_id) DO UPDATE SET
+                    changed_at=CASE
+                        WHEN chapters.title IS NOT excluded.title OR chapters.row_hash IS NOT excluded.row_hash
+                        THEN excluded.changed_at ELSE chapters.changed_at END,
+                    chapter_number=excluded.chapter_number, title=excluded.title, is_vip=excluded.is_vip,
+                    row_hash=excluded.row_hash, last_seen=excluded.last_seen,
+                    last_run=COALESCE(excluded.last_run, chapters.last_run)
+                """,
+                [
+                    {
+                        'novel_id': str(novel_id), 'chapter_id': str(chapter['id']),
+                        'chapter_number': chapter.get('chapter_number'), 'title': chapter.get('title'),
+                        'is_vip': int(bool(chapter.get('is_vip'))), 'row_hash': chapter.get('row_hash'),
+                        'now': now, 'run_id': run_id
+                    }
+                    for chapter in chapters
+                ]
+            )
+
+    def record_journal(self, novel_id, journal_path, run_id=None):
+        """
+        从章节日志记录正文哈希和字数
+
+        参数：
+            novel_id (str): 作品ID
+            journal_path (str): 章节日志路径
+            run_id (str): 本次备份运行ID
+
+        返回：
+            int: 记录的章节数
+
+        说明：
+            正文哈希改变时更新changed_at；日志中没有的章节（获取失败）保持原值
+        """
+        now = _now()
+        _, offsets = ChapterJournal.index(journal_path)
+        rows = []
+        with open(journal_path, 'rb') as journal:
+            for offset in offsets.values():
+                record = ChapterJournal.read_at(journal, offset)
+                body, note = split_content(record['content'])
+                rows.append({
+                    'novel_id': str(novel_id), 'chapter_id': str(record['id']),
+                    'chapter_number': record.get('chapter_number'), 'title': record.get('title'),
+                    'row_hash': record.get('row_hash'), 'content_hash': record.get('content_hash'),
+                    'content_size': len(record['content']), 'body_size': len(body),
+                    'note_size': len(note) if note is not None else 0,
+                    'now': now, 'run_id': run_id
+                })
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO chapters (novel_id, chapter_id, chapter_number, title, row_hash, content_hash,
+                                      content_size, body_size, note_size, first_seen, changed_at, last_seen, last_run)
+                VALUES (:novel_id, :chapter_id, :chapter_number, :title, :row_hash, :content_hash,
+                        :content_size, :body_size, :note_size, :now, :now, :now, :run_id)
+                ON CONFLICT (novel_id, chapter_id) DO UPDATE SET
+                    changed_at=CASE
+                        WHEN chapters.content_hash IS NOT NULL AND chapters.content_hash IS NOT excluded.content_hash
+                        THEN excluded.changed_at ELSE chapters.changed_at END,
+                    content_hash=excluded.content_hash, content_size=excluded.content_size,
+                    body_size=excluded.body_size, note_size=excluded.note_size,
+                    last_seen=excluded.last_seen, last_run=COALESCE(excluded.last_run, chapters.last_run)
+                """,
+                rows
+            )
+        return len(rows)
+
+    def begin_run(self, run_id, output_dir=None):
+        """记录一次备份运行开始（续传同一目录时重新标记为running）"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO runs (id, output_dir, started_at, status) VALUES (?, ?, ?, 'running')
+                ON CONFLICT (id) DO UPDATE SET status='running', finished_at=NULL, error=NULL
+                """,
+                (run_id, output_dir, _now())
+            )
+
+    def record_novel_result(self, run_id, novel_id, result, seconds=None):
+        """
+        记录一次运行中单部作品的备份结果
+
+        参数：
+            result (dict): create_docx_with_realtime_save返回的备份结果
+            seconds (float): 该作品的备份耗时
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO run_novels (run_id, novel_id, title, total, saved, failed, error, seconds, finished_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (run_id, str(novel_id), result.get('title'), result.get('total', 0), result.get('saved', 0),
+                 result.get('failed', 0), result.get('error'), seconds, _now())
+            )
+
+    def finish_run(self, run_id, status, error=None):
+        """
+        记录一次备份运行结束，汇总各作品结果
+
+        参数：
+            status (str): completed / cancelled / interrupted / failed
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                UPDATE runs SET finished_at=?, status=?, error=?,
+                    novels=(SELECT COUNT(*) FROM run_novels WHERE run_id=runs.id),
+                    saved=(SELECT COALESCE(SUM(saved), 0) FROM run_novels WHERE run_id=runs.id),
+                    failed=(SELECT COALESCE(SUM(failed), 0) FROM run_novels WHERE run_id=runs.id)
+                WHERE id=?
+                """,
+                (_now(), status, error, run_id)
+            )
+
+    # ---------- 查询 ----------
+
+    def novels(self):
+        """所有作品及已记录的章节数、VIP章节数和正文总字数"""
+        return self._query(
+            """
+            SELECT n.*, COUNT(c.chapter_id) AS chapters, COALESCE(SUM(c.is_vip), 0) AS vip_chapters,
+                   COALESCE(SUM(c.content_size), 0) AS content_size, MAX(c.changed_at) AS last_changed
+            FROM novels n LEFT JOIN chapters c ON c.novel_id = n.id
+            GROUP BY n.id ORDER BY n.id
+            """
+        )
+
+    def chapters(self, novel_id):
+        """作品的章节（按章节编号排序）"""
+        return self._query(
+            "SELECT * FROM chapters WHERE novel_id=? ORDER BY chapter_number, chapter_id",
+            (str(novel_id),)
+        )
+
+    def chapter(self, novel_id, chapter_number):
+        """按章节编号查找章节，不存在时返回None"""
+        rows = self._query(
+            "SELECT * FROM chapters WHERE novel_id=? AND chapter_number=?",
+            (str(novel_id), chapter_number)
+        )
+        return rows[0] if rows else None
+
+    def changed_since(self, since, novel_id=None):
+        """
+        查询某时间之后新增或修改的章节
+
+        参数：
+            since (str|datetime): 起始时间
+            novel_id (str): 只查询该作品（None为所有作品）
+
+        返回：
+            list: 章节记录（带作品标题），按作品和章节编号排序
+        """
+        if isinstance(since, datetime):
+            since = since.isoformat(timespec='seconds')
+        sql = """
+            SELECT c.*, n.title AS novel_title FROM chapters c LEFT JOIN novels n ON n.id = c.novel_id
+            WHERE c.changed_at >= ?
+        """
+        params = [since]
+        if novel_id is not None:
+            sql += " AND c.novel_id = ?"
+            params.append(str(novel_id))
+        sql += " ORDER BY c.novel_id, c.chapter_number"
+        return self._query(sql, params)
+
+    def runs(self, limit=20):
+        """最近的备份运行（新的在前）"""
+        return self._query("SELECT * FROM runs ORDER BY started_at DESC, id DESC LIMIT ?", (limit,))
+
+    def run_novels(self, run_id):
+        """一次备份运行中各作品的结果"""
+        return self._query("SELECT * FROM run_novels WHERE run_id=? ORDER BY novel_id", (run_id,))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="作品目录查询")
+    parser.add_argument('--db', default=os.path.join('backup', 'catalog.sqlite3'),
+                        help="数据库路径（默认backup/catalog.sqlite3）")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('novels', help="列出作品")
+
+    chapters_parser = subparsers.add_parser('chapters', help="列出作品的章节")
+    chapters_parser.add_argument('novel_id', help="作品ID")
+
+    changed_parser = subparsers.add_parser('changed', help="列出最近新增或修改的章节")
+    changed_parser.add_argument('--days', type=float, default=7, help="最近多少天（默认7）")
+    changed_parser.add_argument('--since', help="起始时间（如2025-01-01，优先于--days）")
+    changed_parser.add_argument('--novel', help="只查询该作品")
+
+    runs_parser = subparsers.add_parser('runs', help="列出最近的备份运行")
+    runs_parser.add_argument('--limit', type=int, default=10, help="显示条数（默认10）")
+
+    args = parser.parse_args()
+    if not os.path.exists(args.db):
+        print(f"❌ 未找到作品目录: {args.db}")
+        exit(1)
+
+    with Catalog(args.db) as catalog:
+        if args.command == 'novels':
+            for novel in catalog.novels():
+                print(f"{novel['id']}\t{novel['title']}\t{novel['status'] or ''}\t"
+                      f"{novel['chapters']} 章（VIP {novel['vip_chapters']}）\t{novel['content_size']} 字\t"
+                      f"最近修改: {novel['last_changed'] or '-'}")
+
+        elif args.command == 'chapters':
+            for chapter in catalog.chapters(args.novel_id):
+                vip = "VIP" if chapter['is_vip'] else "免费"
+                size = chapter['content_size'] if chapter['content_size'] is not None else '-'
+                print(f"第{chapter['chapter_number']}章\t{chapter['title']}\t{vip}\t{size} 字\t"
+                      f"修改: {chapter['changed_at']}")
+
+        elif args.command == 'changed':
+            since = args.since or (datetime.now() - timedelta(days=args.days)).isoformat(timespec='seconds')
+            rows = catalog.changed_since(since, args.novel)
+            for chapter in rows:
+                print(f"{chapter['novel_title'] or chapter['novel_id']}\t第{chapter['chapter_number']}章\t"
+                      f"{chapter['title']}\t{chapter['changed_at']}")
+            print(f"{since} 之后新增或修改的章节: {len(rows)} 章")
+
+        elif args.command == 'runs':
+            for run in catalog.runs(args.limit):
+                print(f"{run['id']}\t{run['status']}\t{run['started_at']} → {run['finished_at'] or '-'}\t"
+                      f"{run['novels']} 部作品，保存 {run['saved']} 章，失败 {run['failed']} 章")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+章节日志（追加写入）
+
+功能：每部作品一个JSONL日志文件，章节获取完成后立即追加一行记录
+
+说明：
+- 追加写入的成本与已保存章节数无关，取代每章节重新保存整个DOCX
+- 每次追加后flush（并可选fsync），程序崩溃后已写入的章节不会丢失
+- 最后一行若因崩溃而不完整，读取时自动忽略；再次打开时先截掉该行，新记录从新行开始
+- 记录类型：
+  - novel: 作品信息和简介（每次打开日志写入一次，读取时以最后一条为准）
+  - chapter: 章节内容（同一章节重复出现时以最后一条为准）
+- 日志即断点续传状态：有内容记录的章节即已完成，续传时无需另外的清单
+"""
+import json
+import os
+import hashlib
+import threading
+from datetime import datetime
+
+
+class ChapterJournal:
+    def __init__(self, path, fsync=True):
+        """
+        打开（或创建）章节日志
+
+        参数：
+            path (str): 日志文件路径
+            fsync (bool): 每次追加后是否fsync到磁盘
+        """
+        self.path = path
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        _truncate_partial_line(path)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def append(self, record):
+        """追加一条记录并立即落盘"""
+        record = dict(record)
+        record.setdefault('saved_at', datetime.now().isoformat(timespec='seconds'))
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+
+    def write_novel(self, novel, intro):
+        """记录作品信息和简介"""
+        self.append({'type': 'novel', 'novel': novel, 'intro': intro})
+
+    def write_chapter(self, chapter, content):
+        """
+        记录一个已成功获取的章节
+
+        说明：
+            同时记录章节行指纹(row_hash)和正文哈希(content_hash)，供下次增量备份比对
+        """
+        self.append({
+            'type': 'chapter',
+            'id': chapter['id'],
+            'chapter_number': chapter.get('chapter_number'),
+            'title': chapter['title'],
+            'row_hash': chapter.get('row_hash'),
+            'content_hash': content_hash(content),
+            'content': content
+        })
+
+    def close(self):
+        """关闭日志文件"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @staticmethod
+    def read(path):
+        """
+        读取日志
+
+        返回：
+            tuple: (novel_record, chapters)
+                - novel_record: 最后一条novel记录（不存在时为None）
+                - chapters: {章节ID: chapter记录}
+        """
+        novel_record = None
+        chapters = {}
+        if not os.path.exists(path):
+            return novel_record, chapters
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时写了一半的行，忽略
+                    continue
+                if record.get('type') == 'novel':
+                    novel_record = record
+                elif record.get('type') == 'chapter':
+                    chapters[str(record['id'])] = record
+        return novel_record, chapters
+
+    @staticmethod
+    def index(path):
+        """
+        建立日志索引，不在内存中保留章节内容
+
+        返回：
+            tuple: (novel_record, offsets)
+                - novel_record: 最后一条novel记录（不存在时为None）
+                - offsets: {章节ID: 该章节最后一条记录在文件中的字节偏移}
+
+        说明：
+            配合read_at按需读取章节，生成长篇作品的文档时内存占用与章节内容总量无关
+        """
+        novel_record = None
+        offsets = {}
+        if not os.path.exists(path):
+            return novel_record, offsets
+
+        offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                start, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if record.get('type') == 'novel':
+                    novel_record = record
+                elif record.get('type') == 'chapter':
+                    offsets[str(record['id'])] = start
+        return novel_record, offsets
+
+    @staticmethod
+    def read_at(f, offset):
+        """
+        读取指定偏移处的一条记录
+
+        参数：
+            f: 以二进制模式打开的日志文件
+            offset (int): index返回的字节偏移
+        """
+        f.seek(offset)
+        return json.loads(f.readline())
+
+
+def _truncate_partial_line(path, block_size=65536):
+    """截掉崩溃时写了一半的最后一行，否则下一条记录会接在该行后面，两条记录都无法读取"""
+    try:
+        f = open(path, 'r+b')
+    except FileNotFoundError:
+        return
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        # 从末尾向前查找最后一个换行符
+        end = size
+        while end > 0:
+            start = max(0, end - block_size)
+            f.seek(start)
+            position = f.read(end - start).rfind(b'\n')
+            if position >= 0:
+                f.truncate(start + position + 1)
+                return
+            end = start
+        f.truncate(0)
+
+
+def content_hash(content):
+    """计算章节内容的SHA-256"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
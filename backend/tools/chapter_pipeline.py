@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+章节获取流水线
+
+功能：把一部作品的章节处理拆成 获取 → 解析 → 写入 三个阶段，各阶段之间用有界队列连接
+
+说明：
+- 获取：在共享的FairScheduler中执行，得到页面原始内容
+- 解析：每部作品一个解析线程，把原始页面转换为章节文本
+- 写入：调用方迭代run()的结果，写入章节日志（DOCX渲染由调用方交给渲染池）
+- 背压：同时处于获取、解析或等待写入状态的章节最多depth个，
+  写入或解析跟不上时不再提交新的获取请求，内存占用与作品长度无关
+"""
+import queue
+import threading
+from concurrent.futures import CancelledError
+
+_STOP = object()
+
+
+class ChapterPipeline:
+    def __init__(self, scheduler, key, fetch, parse, depth=16):
+        """
+        初始化流水线
+
+        参数：
+            scheduler (FairScheduler): 获取阶段使用的调度器（多部作品共享）
+            key (hashable): 调度器中的分组（通常为作品ID）
+            fetch (callable): fetch(chapter) -> 页面原始内容
+            parse (callable): parse(page) -> 章节文本
+            depth (int): 同时在流水线中的最大章节数
+        """
+        self.scheduler = scheduler
+        self.key = key
+        self.fetch = fetch
+        self.parse = parse
+        self.depth = max(1, int(depth))
+        # 在途章节不超过depth，队列容量多留一个位置给结束标记，放入时永远不会阻塞
+        self._pages = queue.Queue(maxsize=self.depth + 1)
+        self._texts = queue.Queue(maxsize=self.depth)
+        self.max_in_flight = 0
+
+    def run(self, chapters):
+        """
+        按完成顺序产出章节结果
+
+        参数：
+            chapters (list): 待获取的章节列表
+
+        产出：
+            tuple: (章节信息, 章节文本, 异常)，成功时异常为None，失败时章节文本为None
+
+        说明：
+            提前结束迭代（break或异常）时会取消本作品尚未开始的获取请求
+        """
+        parser_thread = threading.Thread(target=self._parse_loop, daemon=True)
+        parser_thread.start()
+
+        pending = iter(chapters)
+        in_flight = 0
+        exhausted = False
+        try:
+            while True:
+                # 补充获取请求，直到在途章节达到depth
+                while not exhausted and in_flight < self.depth:
+                    chapter = next(pending, None)
+                    if chapter is None:
+                        exhausted = True
+                        break
+                    future = self.scheduler.submit(self.key, self.fetch, chapter)
+                    future.add_done_callback(
+                        lambda f, chapter=chapter: self._pages.put((chapter, f))
+                    )
+                    in_flight += 1
+                    self.max_in_flight = max(self.max_in_flight, in_flight)
+
+                if in_flight == 0:
+                    return
+                chapter, text, error = self._texts.get()
+                in_flight -= 1
+                yield chapter, text, error
+        finally:
+            self.scheduler.cancel(self.key)
+            self._pages.put(_STOP)
+
+    def _parse_loop(self):
+        """解析线程：把获取完成的页面解析为章节文本"""
+        while True:
+            item = self._pages.get()
+            if item is _STOP:
+                return
+            chapter, future = item
+            try:
+                if future.cancelled():
+                    raise CancelledError()
+                text, error = self.parse(future.result()), None
+            except BaseException as e:
+                # KeyboardInterrupt等也交给调用方处理
+                text, error = None, e
+            self._texts.put((chapter, text, error))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DOCX文档渲染
+
+功能：DOCX段落写入和章节内容格式化，保留正文格式和作者有话说
+
+生成方式：
+- stream（默认）：StreamingDocxWriter逐段写入document.xml，内存占用与作品长度无关
+- python-docx：逐段落创建python-docx对象，保存前整篇文档都在内存中
+
+说明：
+- PythonDocxWriter与docx_stream.StreamingDocxWriter接口相同，由exporters.DocxExporter选择使用
+- JJWXCBackupTool._add_content_to_doc 调用这里的add_content_to_doc
+"""
+from docx import Document
+from docx.shared import Pt, RGBColor
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+
+
+DOCX_ENGINES = ('stream', 'python-docx')
+DEFAULT_DOCX_ENGINE = 'stream'
+
+_ALIGNMENTS = {'center': WD_PARAGRAPH_ALIGNMENT.CENTER}
+
+
+class PythonDocxWriter:
+    """python-docx写入器，提供与StreamingDocxWriter相同的接口"""
+
+    def __init__(self, path):
+        self.path = path
+        self.doc = Document()
+
+    def add_paragraph(self, text='', style=None, align=None, size=None, color=None):
+        paragraph = self.doc.add_paragraph(text, style=style)
+        self._format(paragraph, align, size, color)
+
+    def add_heading(self, text, level=1, align=None, color=None):
+        paragraph = self.doc.add_heading(text, level=level)
+        self._format(paragraph, align, None, color)
+
+    def add_page_break(self):
+        self.doc.add_page_break()
+
+    def _format(self, paragraph, align, size, color):
+        if align:
+            paragraph.alignment = _ALIGNMENTS[align]
+        if paragraph.runs:
+            if size:
+                paragraph.runs[0].font.size = Pt(size)
+            if color:
+                paragraph.runs[0].font.color.rgb = RGBColor.from_string(color)
+
+    @classmethod
+    def wrap(cls, doc):
+        """包装已有的Document对象（不负责保存）"""
+        writer = cls.__new__(cls)
+        writer.path = None
+        writer.doc = doc
+        return writer
+
+    def close(self):
+        self.doc.save(self.path)
+
+    def abort(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def split_author_notes(content):
+    """
+    以【作者有话说】为分界点分离正文和作者有话说
+
+    返回：
+        tuple: (正文, 作者有话说)，均已去除首尾空白
+    """
+    if '【作者有话说】' in content:
+        main_text, author_notes = content.split('【作者有话说】', 1)
+        return main_text.strip(), author_notes.strip()
+    return content.strip(), ""
+
+
+def write_chapter_content(writer, content):
+    """
+    将章节内容写入文档（StreamingDocxWriter或PythonDocxWriter）
+
+    说明：
+        每行一个段落，空行写入空段落；作者有话说前加蓝色二级标题，格式规则见add_content_to_doc
+    """
+    main_text, author_notes = split_author_notes(content)
+    if main_text:
+        for line in main_text.split('\n'):
+            writer.add_paragraph(line)
+    if author_notes:
+        writer.add_heading('作者有话说', level=2, color='0000FF')
+        for line in author_notes.split('\n'):
+            writer.add_paragraph(line)
+
+
+def add_content_to_doc(doc, content):
+    """
+    将章节内容添加到DOCX文档中（格式保留版）
+
+    参数：
+        doc: python-docx Document对象
+        content (str): 章节完整内容
+
+    功能：
+    1. 内容分离：
+       - 以【作者有话说】为分界点
+       - 分离正文和作者有话说两部分
+       - 去除首尾空白但保留内部格式
+
+    2. 正文处理：
+       - 按换行符(\n)分割为行
+       - 每行创建独立段落
+       - 完整保留空行（空段落）
+       - 不做任何文本清理或去空格
+
+    3. 作者有话说处理：
+       - 添加蓝色二级标题"作者有话说"
+       - 同样按行处理内容
+       - 保持与正文相同的格式处理方式
+
+    格式保留策略（核心）：
+    - split('\n')：严格按换行符分割
+    - 不使用strip()：保留每行原始内容
+    - 空行处理：创建空段落保持版式
+    - 段落独立：每行一个段落确保换行效果
+
+    与之前版本区别：
+    - 旧版：复杂的段落和换行处理，容易丢失格式
+    - 新版：简单的行级处理，完美保留原始格式
+
+    使用场景：
+    - VIP章节：保留从后台获取的原始格式
+    - 免费章节：保留从页面解析的格式
+    - 作者有话说：保留特殊格式和换行
+    """
+    # 添加到python-docx文档，写法与流式写入一致
+    write_chapter_content(PythonDocxWriter.wrap(doc), content)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式DOCX写入器
+
+功能：直接把word/document.xml逐段写入zip文件，不为每个段落创建python-docx对象
+
+说明：
+- 样式、主题、设置等部件原样复制python-docx的默认模板，生成的文档与
+  python-docx方案使用相同的样式（Title、Heading1、Heading2）和页面设置
+- 段落写出后即释放，内存占用与作品长度基本无关
+- 段落XML与python-docx生成的结构一致（对齐、字号、颜色、制表符和换行的写法相同）
+- 只实现备份文档用到的段落类型：标题、普通段落、分页符
+"""
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+import docx
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(docx.__file__), 'templates', 'default.docx')
+DOCUMENT_PART = 'word/document.xml'
+
+# XML 1.0不允许的控制字符（python-docx遇到时会报错，这里直接去掉）
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+# python-docx把\t写成<w:tab/>，把\n和\r写成<w:br/>
+_RUN_BREAKS = re.compile('([\t\n\r])')
+
+_ALIGNMENTS = {'left': 'left', 'center': 'center', 'right': 'right', 'justify': 'both'}
+
+
+def _split_template(document_xml):
+    """把模板document.xml拆成 <w:body>之前 和 sectPr到结尾 两部分"""
+    # 与python-docx保存时一致：XML声明后换行，其余标签之间不留空白
+    prolog_end = document_xml.index('?>') + len('?>')
+    body_start = document_xml.index('<w:body>') + len('<w:body>')
+    sect_start = document_xml.index('<w:sectPr', body_start)
+    head = re.sub(r'>\s+<', '><', document_xml[prolog_end:body_start]).strip()
+    tail = re.sub(r'>\s+<', '><', document_xml[sect_start:]).strip()
+    return document_xml[:prolog_end] + '\n' + head, tail
+
+
+def _run_xml(text, size=None, color=None):
+    """生成一个<w:r>，字号单位为磅，颜色为RRGGBB"""
+    props = ''
+    if color:
+        props += f'<w:color w:val="{color}"/>'
+    if size:
+        props += f'<w:sz w:val="{int(size * 2)}"/>'
+    parts = [f'<w:r><w:rPr>{props}</w:rPr>' if props else '<w:r>']
+    for piece in _RUN_BREAKS.split(_INVALID_XML_CHARS.sub('', text)):
+        if not piece:
+            continue
+        if piece == '\t':
+            parts.append('<w:tab/>')
+        elif piece in '\r\n':
+            parts.append('<w:br/>')
+        elif piece != piece.strip():
+            parts.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+        else:
+            parts.append(f'<w:t>{escape(piece)}</w:t>')
+    parts.append('</w:r>')
+    return ''.join(parts)
+
+
+class StreamingDocxWriter:
+    def __init__(self, path, template_path=TEMPLATE_PATH):
+        """
+        创建流式DOCX写入器
+
+        参数：
+            path (str): 输出路径
+            template_path (str): 模板DOCX（默认为python-docx自带模板）
+        """
+        self.path = path
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+        with zipfile.ZipFile(template_path) as template:
+            for info in template.infolist():
+                if info.filename == DOCUMENT_PART:
+                    self._head, self._tail = _split_template(template.read(info).decode('utf-8'))
+                else:
+                    self._zip.writestr(info, template.read(info), compress_type=zipfile.ZIP_DEFLATED)
+        self._document = self._zip.open(DOCUMENT_PART, 'w', force_zip64=True)
+        self._write(self._head)
+        self.paragraph_count = 0
+
+    def _write(self, xml):
+        self._document.write(xml.encode('utf-8'))
+
+    def add_paragraph(self, text='', style=None, align=None, size=None, color=None):
+        """
+        写入一个段落
+
+        参数：
+            text (str): 段落文本（空字符串写入空段落）
+            style (str): 段落样式ID（如Heading1）
+            align (str): 对齐方式 left / center / right / justify
+            size (float): 字号（磅）
+            color (str): 文字颜色，RRGGBB
+        """
+        props = ''
+        if style:
+            props += f'<w:pStyle w:val="{style}"/>'
+        if align:
+            props += f'<w:jc w:val="{_ALIGNMENTS[align]}"/>'
+        xml = '<w:p>'
+        if props:
+            xml += f'<w:pPr>{props}</w:pPr>'
+        if text:
+            xml += _run_xml(text, size=size, color=color)
+        xml += '</w:p>'
+        if xml == '<w:p></w:p>':
+            xml = '<w:p/>'
+        self._write(xml)
+        self.paragraph_count += 1
+
+    def add_heading(self, text, level=1, align=None, color=None):
+        """写入标题（level=0为Title样式，其余为HeadingN）"""
+        style = 'Title' if level == 0 else f'Heading{level}'
+        self.add_paragraph(text, style=style, align=align, color=color)
+
+    def add_page_break(self):
+        """写入分页符"""
+        self._write('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+        self.paragraph_count += 1
+
+    def close(self):
+        """写入文档结尾并关闭zip文件"""
+        if self._zip is None:
+            return
+        self._write(self._tail)
+        self._document.close()
+        self._zip.close()
+        self._zip = None
+
+    def abort(self):
+        """出错时关闭文件（内容不完整，调用方应删除）"""
+        if self._zip is None:
+            return
+        try:
+            self._document.close()
+        finally:
+            self._zip.close()
+            self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,540 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+作品导出器
+
+功能：从章节日志一次读取，同时导出DOCX、TXT、Markdown、JSONL、EPUB中的一种或多种格式
+
+说明：
+- 所有导出器都是流式的：begin写入作品信息，之后每次接收一个章节，写出后即释放
+- 章节内容按日志索引逐章读取，一次遍历同时交给所有选中的导出器
+- 每种格式先写入临时文件，完成后os.replace，某个文件被占用时不影响其他格式
+- 只导出从第一章开始连续可用的章节（已保存或已确认失败），检查点与最终结果的前半部分一致
+
+格式：
+- docx: 与原有文档结构相同（标题、信息行、简介、分页符、章节标题、作者有话说）
+- txt: UTF-8纯文本，可直接交给tools/fix.py等文本工具处理
+- md: Markdown，章节为二级标题，作者有话说为三级标题；标题和正文中的Markdown标记和HTML都转义为普通文字
+- jsonl: 每章一行，包含id、chapter_number、title、content、author_note
+- epub: EPUB 3（附带toc.ncx兼容旧阅读器），每章一个XHTML文件
+"""
+import os
+import re
+import abc
+import json
+import time
+import uuid
+import zipfile
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+from chapter_journal import ChapterJournal
+from docx_render import (
+    DOCX_ENGINES, DEFAULT_DOCX_ENGINE, PythonDocxWriter, split_author_notes, write_chapter_content
+)
+from docx_stream import StreamingDocxWriter
+
+SEPARATOR = "─" * 50
+
+
+def novel_info_line(novel):
+    """作品信息行（ID、字数、状态）"""
+    return (
+        f"作品ID: {novel['id']} | "
+        f"字数: {novel.get('word_count', '未知')} | "
+        f"状态: {novel.get('status', '未知')}"
+    )
+
+
+# Markdown转义（CommonMark允许用反斜杠转义任意ASCII标点）
+# 行内：强调、代码、链接、内联HTML、表格、删除线、实体，以及标题和引用标记
+_MD_INLINE = re.compile(r'([\\`*_\[\]<>&|~#!])')
+# 行首：列表、分隔线和Setext标题
+_MD_BLOCK = re.compile(r'^(\s*)([+\-=])')
+_MD_ORDERED_LIST = re.compile(r'^(\s*\d+)([.)])')
+
+
+def escape_markdown(line):
+    """
+    转义一行文本，使其在Markdown中只显示为普通文字（不会被解析为标记或HTML）
+
+    说明：
+        行首的半角空格和制表符写成&nbsp;，避免4个以上时被解析为代码块
+    """
+    line = _MD_INLINE.sub(r'\\\1', line)
+    line = _MD_BLOCK.sub(r'\1\\\2', line)
+    line = _MD_ORDERED_LIST.sub(r'\1\\\2', line)
+    stripped = line.lstrip(' \t')
+    return "&nbsp;" * (len(line) - len(stripped)) + stripped
+
+
+class Exporter(abc.ABC):
+    """
+    导出器基类
+
+    调用顺序：begin → (write_chapter | write_failure)* → close，出错时调用abort
+    """
+    extension = None
+
+    def __init__(self, path):
+        self.path = path
+
+    @abc.abstractmethod
+    def begin(self, novel, intro):
+        """写入作品信息和简介"""
+
+    @abc.abstractmethod
+    def write_chapter(self, chapter, title, content, last):
+        """
+        写入一个章节
+
+        参数：
+            chapter (dict): 章节信息
+            title (str): 带编号的章节标题（第X章 标题）
+            content (str): 章节完整内容（正文和作者有话说）
+            last (bool): 是否为作品的最后一章
+        """
+
+    @abc.abstractmethod
+    def write_failure(self, chapter, title, message, last):
+        """写入获取失败的章节"""
+
+    @abc.abstractmethod
+    def close(self):
+        """完成写入并关闭文件"""
+
+    def abort(self):
+        """出错时关闭文件（内容不完整，调用方应删除）"""
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class DocxExporter(Exporter):
+    extension = '.docx'
+
+    def __init__(self, path, docx_engine=DEFAULT_DOCX_ENGINE):
+        super().__init__(path)
+        if docx_engine not in DOCX_ENGINES:
+            raise ValueError(f"未知的DOCX生成方式: {docx_engine}")
+        writer_class = StreamingDocxWriter if docx_engine == 'stream' else PythonDocxWriter
+        self.writer = writer_class(path)
+
+    def begin(self, novel, intro):
+        # 添加作品标题（最高级标题）
+        self.writer.add_heading(novel['title'], level=0, align='center')
+        # 添加作品基本信息
+        self.writer.add_paragraph(novel_info_line(novel), align='center', size=10)
+        # 插入作品简介到状态下方
+        if intro:
+            self.writer.add_paragraph(intro, align='center', size=11)
+        # 添加分页符
+        self.writer.add_page_break()
+
+    def write_chapter(self, chapter, title, content, last):
+        self.writer.add_heading(title, level=1)
+        write_chapter_content(self.writer, content)
+        self._separator(last)
+
+    def write_failure(self, chapter, title, message, last):
+        self.writer.add_heading(title, level=1)
+        # 内容获取失败的情况
+        self.writer.add_paragraph(message, color='FF0000')
+        self._separator(last)
+
+    def _separator(self, last):
+        # 添加章节分隔符
+        if not last:
+            self.writer.add_paragraph()
+            self.writer.add_paragraph(SEPARATOR, align='center')
+            self.writer.add_paragraph()
+
+    def close(self):
+        self.writer.close()
+
+    def abort(self):
+        self.writer.abort()
+
+
+class TxtExporter(Exporter):
+    extension = '.txt'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'w', encoding='utf-8', newline='\n')
+
+    def begin(self, novel, intro):
+        self._file.write(f"{novel['title']}\n{novel_info_line(novel)}\n\n")
+        if intro:
+            self._file.write(f"{intro}\n\n")
+
+    def write_chapter(self, chapter, title, content, last):
+        main_text, author_notes = split_author_notes(content)
+        self._file.write(f"{title}\n\n")
+        if main_text:
+            self._file.write(f"{main_text}\n")
+        if author_notes:
+            self._file.write(f"\n作者有话说\n{author_notes}\n")
+        self._separator(last)
+
+    def write_failure(self, chapter, title, message, last):
+        self._file.write(f"{title}\n\n{message}\n")
+        self._separator(last)
+
+    def _separator(self, last):
+        if not last:
+            self._file.write(f"\n{SEPARATOR}\n\n")
+
+    def close(self):
+        self._file.close()
+
+
+class MarkdownExporter(Exporter):
+    extension = '.md'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'w', encoding='utf-8', newline='\n')
+
+    def _lines(self, text):
+        """每行一个段落，空行保留为空段落，文字中的Markdown标记和HTML都转义"""
+        for line in text.split('\n'):
+            self._file.write(f"{escape_markdown(line)}\n\n" if line.strip() else "&nbsp;\n\n")
+
+    def begin(self, novel, intro):
+        self._file.write(f"# {escape_markdown(novel['title'])}\n\n> {escape_markdown(novel_info_line(novel))}\n\n")
+        if intro:
+            self._lines(intro)
+        self._file.write("---\n\n")
+
+    def write_chapter(self, chapter, title, content, last):
+        main_text, author_notes = split_author_notes(content)
+        self._file.write(f"## {escape_markdown(title)}\n\n")
+        if main_text:
+            self._lines(main_text)
+        if author_notes:
+            self._file.write("### 作者有话说\n\n")
+            self._lines(author_notes)
+
+    def write_failure(self, chapter, title, message, last):
+        self._file.write(f"## {escape_markdown(title)}\n\n> **{escape_markdown(message)}**\n\n")
+
+    def close(self):
+        self._file.close()
+
+
+class JsonlExporter(Exporter):
+    extension = '.jsonl'
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._file = open(path, 'w', encoding='utf-8', newline='\n')
+        self._novel_id = None
+
+    def begin(self, novel, intro):
+        self._novel_id = novel['id']
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def write_chapter(self, chapter, title, content, last):
+        main_text, author_notes = split_author_notes(content)
+        self._write({
+            'novel_id': self._novel_id,
+            'id': chapter['id'],
+            'chapter_number': chapter.get('chapter_number'),
+            'title': chapter['title'],
+            'content': main_text,
+            'author_note': author_notes
+        })
+
+    def write_failure(self, chapter, title, message, last):
+        self._write({
+            'novel_id': self._novel_id,
+            'id': chapter['id'],
+            'chapter_number': chapter.get('chapter_number'),
+            'title': chapter['title'],
+            'content': None,
+            'author_note': None,
+            'error': message
+        })
+
+    def close(self):
+        self._file.close()
+
+
+class EpubExporter(Exporter):
+    extension = '.epub'
+
+    _STYLE = (
+        "body { font-family: serif; line-height: 1.6; }\n"
+        "h1.novel-title, p.info, p.intro { text-align: center; }\n"
+        "p.info { font-size: 0.9em; }\n"
+        "h3.author-note { color: #0000ff; }\n"
+        "p.error { color: #ff0000; }\n"
+        "p { margin: 0; text-indent: 0; white-space: pre-wrap; }\n"
+    )
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._zip = zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED)
+        # mimetype必须是第一个文件且不压缩
+        self._zip.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        self._zip.writestr('META-INF/container.xml', (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">'
+            '<rootfiles><rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+            '</rootfiles></container>'
+        ))
+        self._zip.writestr('OEBPS/style.css', self._STYLE)
+        self._novel = None
+        self._toc = []  # [(文件名, 章节标题)]，只保存目录信息
+
+    @staticmethod
+    def _xhtml(title, body):
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE html>\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" '
+            'xml:lang="zh-CN" lang="zh-CN">'
+            f'<head><meta charset="UTF-8"/><title>{escape(title)}</title>'
+            '<link rel="stylesheet" type="text/css" href="style.css"/></head>'
+            f'<body>{body}</body></html>'
+        )
+
+    @staticmethod
+    def _paragraphs(text, css_class=None):
+        attr = f' class="{css_class}"' if css_class else ''
+        return ''.join(
+            f'<p{attr}>{escape(line)}</p>' if line.strip() else f'<p{attr}><br/></p>'
+            for line in text.split('\n')
+        )
+
+    def begin(self, novel, intro):
+        self._novel = novel
+        body = (
+            f'<h1 class="novel-title">{escape(novel["title"])}</h1>'
+            f'<p class="info">{escape(novel_info_line(novel))}</p>'
+        )
+        if intro:
+            body += self._paragraphs(intro, 'intro')
+        self._zip.writestr('OEBPS/title.xhtml', self._xhtml(novel['title'], body))
+
+    def _write_page(self, title, body):
+        filename = f"chapter_{len(self._toc) + 1:05d}.xhtml"
+        self._zip.writestr(f'OEBPS/{filename}', self._xhtml(title, f'<h2>{escape(title)}</h2>{body}'))
+        self._toc.append((filename, title))
+
+    def write_chapter(self, chapter, title, content, last):
+        main_text, author_notes = split_author_notes(content)
+        body = self._paragraphs(main_text) if main_text else ''
+        if author_notes:
+            body += '<h3 class="author-note">作者有话说</h3>' + self._paragraphs(author_notes)
+        self._write_page(title, body)
+
+    def write_failure(self, chapter, title, message, last):
+        self._write_page(title, self._paragraphs(message, 'error'))
+
+    def close(self):
+        if self._zip is None:
+            return
+        novel = self._novel or {'id': '', 'title': ''}
+        book_uuid = uuid.uuid5(uuid.NAMESPACE_URL, f"jjwxc-novel-{novel['id']}")
+        identifier = f"urn:uuid:{book_uuid}"
+        modified = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        title = escape(novel['title'])
+
+        items = ''.join(
+            f'<item id="c{index}" href="{filename}" media-type="application/xhtml+xml"/>'
+            for index, (filename, _) in enumerate(self._toc, 1)
+        )
+        spine = ''.join(f'<itemref idref="c{index}"/>' for index in range(1, len(self._toc) + 1))
+        self._zip.writestr('OEBPS/content.opf', (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="book-id" '
+            'xml:lang="zh-CN">'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<dc:identifier id="book-id">{identifier}</dc:identifier>'
+            f'<dc:title>{title}</dc:title><dc:language>zh-CN</dc:language>'
+            f'<meta property="dcterms:modified">{modified}</meta></metadata>'
+            '<manifest>'
+            '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>'
+            '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>'
+            '<item id="css" href="style.css" media-type="text/css"/>'
+            '<item id="title" href="title.xhtml" media-type="application/xhtml+xml"/>'
+            f'{items}</manifest>'
+            f'<spine toc="ncx"><itemref idref="title"/>{spine}</spine></package>'
+        ))
+
+        nav_items = ''.join(
+            f'<li><a href="{filename}">{escape(chapter_title)}</a></li>'
+            for filename, chapter_title in self._toc
+        )
+        self._zip.writestr('OEBPS/nav.xhtml', self._xhtml(
+            novel['title'], f'<nav epub:type="toc" id="toc"><h1>目录</h1><ol>{nav_items}</ol></nav>'
+        ))
+
+        nav_points = ''.join(
+            f'<navPoint id="p{index}" playOrder="{index}"><navLabel><text>{escape(chapter_title)}</text>'
+            f'</navLabel><content src="{filename}"/></navPoint>'
+            for index, (filename, chapter_title) in enumerate(self._toc, 1)
+        )
+        self._zip.writestr('OEBPS/toc.ncx', (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">'
+            f'<head><meta name="dtb:uid" content="{identifier}"/></head>'
+            f'<docTitle><text>{title}</text></docTitle><navMap>{nav_points}</navMap></ncx>'
+        ))
+        self._zip.close()
+        self._zip = None
+
+    def abort(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+
+EXPORTERS = {
+    'docx': DocxExporter,
+    'txt': TxtExporter,
+    'md': MarkdownExporter,
+    'jsonl': JsonlExporter,
+    'epub': EpubExporter,
+}
+EXPORT_FORMATS = tuple(EXPORTERS)
+DEFAULT_EXPORT_FORMATS = ('docx',)
+
+
+def parse_formats(value):
+    """
+    解析格式列表（如"docx,txt"）
+
+    返回：
+        tuple: 去重后的格式列表
+
+    异常：
+        ValueError: 包含不支持的格式
+    """
+    formats = []
+    for name in (value.split(',') if isinstance(value, str) else value):
+        name = name.strip().lower().lstrip('.')
+        if not name:
+            continue
+        if name not in EXPORTERS:
+            raise ValueError(f"不支持的导出格式: {name}（可用: {', '.join(EXPORT_FORMATS)}）")
+        if name not in formats:
+            formats.append(name)
+    if not formats:
+        raise ValueError("至少需要选择一种导出格式")
+    return tuple(formats)
+
+
+def export_paths(base_path, formats):
+    """{格式: 输出路径}，base_path为不含扩展名的路径"""
+    return {fmt: f"{base_path}{EXPORTERS[fmt].extension}" for fmt in formats}
+
+
+def export_from_journal(journal_path, chapters, failures, base_path, formats=DEFAULT_EXPORT_FORMATS,
+                        docx_engine=DEFAULT_DOCX_ENGINE, timings=None):
+    """
+    从章节日志导出一种或多种格式（原子替换）
+
+    参数：
+        journal_path (str): 章节日志路径
+        chapters (list): 按章节编号排序的章节列表
+        failures (dict): {章节ID: 错误信息}，获取失败的章节
+        base_path (str): 输出路径（不含扩展名）
+        formats (iterable): 导出格式，见EXPORT_FORMATS
+        docx_engine (str): DOCX生成方式
+        timings (dict): 传入时记录耗时：'render'为每章写入所有格式的秒数列表，
+                        'save'为每个文件的(保存秒数, 文件字节数)列表
+
+    返回：
+        list: 成功写入的文件路径
+    """
+    novel_record, offsets = ChapterJournal.index(journal_path)
+    novel = novel_record['novel']
+    paths = export_paths(base_path, formats)
+
+    exporters = {}
+    try:
+        for fmt, path in paths.items():
+            temp_path = f"{path}.tmp"
+            if fmt == 'docx':
+                exporters[fmt] = DocxExporter(temp_path, docx_engine)
+            else:
+                exporters[fmt] = EXPORTERS[fmt](temp_path)
+
+        with open(journal_path, 'rb') as journal:
+            for exporter in exporters.values():
+                exporter.begin(novel, novel_record.get('intro'))
+
+            total_chapters = len(chapters)
+            for idx, chapter in enumerate(chapters):
+                offset = offsets.get(str(chapter['id']))
+                if offset is None and chapter['id'] not in failures:
+                    break
+
+                # 章节标题（带章节编号）
+                title = f"第{chapter.get('chapter_number', idx+1)}章 {chapter['title']}"
+                last = idx == total_chapters - 1
+                if offset is not None:
+                    content = ChapterJournal.read_at(journal, offset)['content']
+                    started = time.perf_counter()
+                    for exporter in exporters.values():
+                        exporter.write_chapter(chapter, title, content, last)
+                    if timings is not None:
+                        timings.setdefault('render', []).append(time.perf_counter() - started)
+                else:
+                    for exporter in exporters.values():
+                        exporter.write_failure(chapter, title, failures[chapter['id']], last)
+
+        for fmt, exporter in exporters.items():
+            started = time.perf_counter()
+            exporter.close()
+            if timings is not None:
+                timings.setdefault('save', []).append(
+                    (time.perf_counter() - started, os.path.getsize(f"{paths[fmt]}.tmp"))
+                )
+    except Exception as e:
+        for exporter in exporters.values():
+            try:
+                exporter.abort()
+            except Exception:
+                pass
+        print(f"文档生成失败: {e}")
+        return []
+
+    written = []
+    for fmt, path in paths.items():
+        try:
+            os.replace(f"{path}.tmp", path)
+            written.append(path)
+        except Exception as e:
+            print(f"文档保存失败（文件可能正被打开）: {path} - {e}")
+    return written
+
+
+def export_with_timings(*args, **kwargs):
+    """
+    调用export_from_journal并返回耗时（供渲染进程池使用，耗时随结果返回主进程）
+
+    返回：
+        tuple: (成功写入的文件路径, timings)
+    """
+    timings = {}
+    written = export_from_journal(*args, timings=timings, **kwargs)
+    return written, timings
+
+
+def render_docx_from_journal(journal_path, chapters, failures, filepath, engine=DEFAULT_DOCX_ENGINE):
+    """从章节日志生成DOCX文档（原子替换），只导出docx格式的export_from_journal"""
+    return export_from_journal(
+        journal_path, chapters, failures, os.path.splitext(filepath)[0], ('docx',), engine
+    )
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+公平任务调度器
+
+功能：多部作品共享同一组工作线程，按作品轮流取出章节请求执行
+
+说明：
+- 每个key（通常为作品ID）一个等待队列，工作线程按key轮询取任务，
+  章节很多的作品不会让其他作品一直排队
+- 提供与ThreadPoolExecutor相似的submit/shutdown接口，submit额外接收key，
+  返回concurrent.futures.Future，可直接配合as_completed使用
+- cancel(key)只取消某一个key尚未开始的任务，其他作品不受影响
+"""
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+
+class FairScheduler:
+    def __init__(self, max_workers=4):
+        """
+        初始化调度器并启动工作线程
+
+        参数：
+            max_workers (int): 工作线程数，即同时执行的最大任务数
+        """
+        self.max_workers = max(1, int(max_workers))
+        self._queues = OrderedDict()  # {key: deque[(future, fn, args, kwargs)]}，顺序即轮询顺序
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._threads = []
+        for index in range(self.max_workers):
+            thread = threading.Thread(target=self._worker, name=f"FairScheduler-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        提交任务
+
+        参数：
+            key (hashable): 任务所属的分组（如作品ID）
+            fn (callable): 要执行的函数
+
+        返回：
+            concurrent.futures.Future: 任务结果
+        """
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("调度器已关闭，不能再提交任务")
+            self._queues.setdefault(key, deque()).append((future, fn, args, kwargs))
+            self._cond.notify()
+        return future
+
+    def pending(self, key=None):
+        """尚未开始的任务数（指定key时只统计该分组）"""
+        with self._cond:
+            if key is not None:
+                return len(self._queues.get(key, ()))
+            return sum(len(queue) for queue in self._queues.values())
+
+    def cancel(self, key):
+        """
+        取消某个分组尚未开始的全部任务
+
+        返回：
+            int: 取消的任务数
+        """
+        with self._cond:
+            queue = self._queues.pop(key, None)
+        if not queue:
+            return 0
+        for future, _, _, _ in queue:
+            future.cancel()
+        return len(queue)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """
+        关闭调度器
+
+        参数：
+            wait (bool): 是否等待工作线程执行完已取出的任务后退出
+            cancel_futures (bool): 是否取消所有尚未开始的任务（否则会继续执行完）
+        """
+        with self._cond:
+            self._shutdown = True
+            if cancel_futures:
+                queues = list(self._queues.values())
+                self._queues.clear()
+            else:
+                queues = []
+            self._cond.notify_all()
+        for queue in queues:
+            for future, _, _, _ in queue:
+                future.cancel()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=True)
+
+    def _next_task(self):
+        """按key轮询取出下一个任务（需持有锁）"""
+        key, queue = next(iter(self._queues.items()))
+        task = queue.popleft()
+        # 取过任务的key移到队尾，下一次先轮到其他key
+        del self._queues[key]
+        if queue:
+            self._queues[key] = queue
+        return task
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._queues and not self._shutdown:
+                    self._cond.wait()
+                if not self._queues:
+                    return
+                future, fn, args, kwargs = self._next_task()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args, **kwargs)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
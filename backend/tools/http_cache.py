@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台页面HTTP响应缓存（磁盘持久化）
+
+功能：按URL缓存响应正文和验证信息(ETag/Last-Modified)，重复运行时发送条件请求
+
+说明：
+- TTL内的缓存直接使用，不发送请求（ttl=0表示每次都向服务器确认）
+- 超过TTL后发送If-None-Match/If-Modified-Since，收到304时复用缓存正文
+- 只缓存未经重定向、带有ETag或Last-Modified的200响应：
+  没有验证信息的响应无法发送条件请求，缓存只会重复保存一份正文
+- 不缓存登录页面（Cookie失效时后台页面返回登录页，状态码仍为200），已缓存的登录页面不再使用
+- 章节编辑页面默认不经过缓存（见JJWXCBackupTool的cache_chapter_pages）
+- 总大小超过上限时按最近访问时间(LRU)淘汰
+- 缓存目录结构：<sha1(url)>.body 为正文，<sha1(url)>.json 为元数据
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+from jjwxc_parser import is_login_page
+
+
+class ResponseCache:
+    def __init__(self, cache_dir, ttl=0, max_bytes=256 * 1024 * 1024, enabled=True):
+        """
+        初始化响应缓存
+
+        参数：
+            cache_dir (str): 缓存目录
+            ttl (float): 缓存免确认有效期（秒），0表示每次都发送条件请求
+            max_bytes (int): 缓存正文总大小上限（字节）
+            enabled (bool): 是否启用缓存（False时所有方法都不读写磁盘）
+        """
+        self.cache_dir = cache_dir
+        self.ttl = max(0.0, float(ttl))
+        self.max_bytes = int(max_bytes)
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._sizes = {}  # {key: 正文大小}
+        self._total_bytes = 0
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_index()
+
+    def _load_index(self):
+        """扫描缓存目录，统计已有条目的大小"""
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.body'):
+                key = name[:-len('.body')]
+                try:
+                    size = os.path.getsize(os.path.join(self.cache_dir, name))
+                except OSError:
+                    continue
+                self._sizes[key] = size
+                self._total_bytes += size
+
+    def _key(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return f"{base}.body", f"{base}.json"
+
+    def lookup(self, url):
+        """
+        查找URL的缓存条目
+
+        返回：
+            dict: 元数据（url、etag、last_modified、stored_at、size），不存在时返回None
+        """
+        if not self.enabled:
+            return None
+        key = self._key(url)
+        body_path, meta_path = self._paths(key)
+        if key not in self._sizes:
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        entry['key'] = key
+        return entry
+
+    def is_fresh(self, entry):
+        """缓存条目是否仍在TTL内"""
+        return self.ttl > 0 and time.time() - entry.get('stored_at', 0) < self.ttl
+
+    def conditional_headers(self, entry):
+        """构建条件请求头"""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def read_body(self, entry):
+        """
+        读取缓存正文并更新最近访问时间
+
+        返回：
+            bytes: 正文，文件丢失或正文为登录页面时返回None
+        """
+        body_path, _ = self._paths(entry['key'])
+        try:
+            with open(body_path, 'rb') as f:
+                body = f.read()
+            os.utime(body_path)  # 以修改时间记录最近访问，用于LRU淘汰
+        except OSError:
+            return None
+        return None if is_login_page(body) else body
+
+    def revalidated(self, entry):
+        """
+        服务器返回304后刷新条目的确认时间
+
+        返回：
+            bytes: 缓存正文
+        """
+        _, meta_path = self._paths(entry['key'])
+        meta = {name: value for name, value in entry.items() if name != 'key'}
+        meta['stored_at'] = time.time()
+        with self._lock:
+            self._write_json(meta_path, meta)
+        return self.read_body(entry)
+
+    def prepare(self, url, headers):
+        """
+        请求前查找缓存（同步和异步请求共用）
+
+        参数：
+            url (str): 请求地址
+            headers (dict): 请求头
+
+        返回：
+            tuple: (缓存条目, TTL内的缓存正文, 请求头)；缓存正文不为None时不需要发送请求，
+                   有缓存条目时请求头去掉强制不缓存的字段并附带验证信息
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            return None, None, headers
+        if self.is_fresh(entry):
+            body = self.read_body(entry)
+            if body is not None:
+                return entry, body, headers
+        headers = dict(headers or {})
+        headers.pop('Cache-Control', None)
+        headers.pop('Pragma', None)
+        headers.update(self.conditional_headers(entry))
+        return entry, None, headers
+
+    def complete(self, url, entry, status_code, headers, body, redirected=False):
+        """
+        收到响应后更新缓存（参数同store，entry为prepare返回的缓存条目）
+
+        返回：
+            bytes: 304时的缓存正文，其他情况返回None（使用响应正文）
+        """
+        if status_code == 304 and entry is not None:
+            cached = self.revalidated(entry)
+            if cached is not None:
+                return cached
+        self.store(url, status_code, headers, body, redirected)
+        return None
+
+    def store(self, url, status_code, headers, body, redirected=False):
+        """
+        保存响应（只保存未重定向、带验证信息且不是登录页面的200响应）
+
+        参数：
+            url (str): 请求地址
+            status_code (int): 响应状态码
+            headers (Mapping): 响应头
+            body (bytes): 响应正文
+            redirected (bool): 请求是否经过重定向
+        """
+        if not self.enabled or status_code != 200 or redirected:
+            return
+        if not (headers.get('ETag') or headers.get('Last-Modified')):
+            return
+        if is_login_page(body):
+            return
+        key = self._key(url)
+        body_path, meta_path = self._paths(key)
+        entry = {
+            'url': url,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'stored_at': time.time(),
+            'size': len(body)
+        }
+        with self._lock:
+            temp_path = f"{body_path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(body)
+            os.replace(temp_path, body_path)
+            self._write_json(meta_path, entry)
+
+            self._total_bytes += len(body) - self._sizes.get(key, 0)
+            self._sizes[key] = len(body)
+            self._evict()
+
+    def _write_json(self, path, data):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _evict(self):
+        """超过上限时淘汰最久未访问的条目，降到上限的90%以下（需持有锁）"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        target_bytes = self.max_bytes * 0.9
+
+        def last_access(key):
+            try:
+                return os.path.getmtime(self._paths(key)[0])
+            except OSError:
+                return 0
+
+        for key in sorted(self._sizes, key=last_access):
+            if self._total_bytes <= target_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._total_bytes -= self._sizes.pop(key)
@@ -1,52 +1,501 @@
 import os
+import sys
 import time
-import random
+import argparse
+import contextlib
 import requests
-from bs4 import BeautifulSoup
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
 import re
 import json
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, CancelledError, as_completed
 from datetime import datetime
 import urllib.parse
 
+from async_engine import AsyncJJWXCEngine, AsyncEngineExecutor, AsyncChapterBatch
+from fair_scheduler import FairScheduler
+from chapter_pipeline import ChapterPipeline
+from docx_render import DOCX_ENGINES, DEFAULT_DOCX_ENGINE, add_content_to_doc
+from exporters import (
+    EXPORT_FORMATS, DEFAULT_EXPORT_FORMATS, parse_formats, export_paths,
+    export_with_timings
+)
+from rate_limiter import HostRateLimiter, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST, DEFAULT_JITTER
+from http_cache import ResponseCache
+from chapter_journal import ChapterJournal
+from object_store import ObjectStore, prune_backup_dirs
+from catalog import Catalog
+from search_index import SearchIndex
+from metrics import Metrics, format_summary
+from novel_filter import build_novel_filter
+from retry_policy import RetryPolicy, CircuitBreaker, RequestAttempts
+from adaptive_limit import AdaptiveConcurrencyLimiter
+from jjwxc_parser import (
+    PARSER_BACKENDS, DEFAULT_PARSER_BACKEND, DEFAULT_BASE_URL, available_parser_backends,
+    backend_url, decode_page, is_login_page, extract_novel_id, build_chapter_edit_url, parse_novel_list,
+    parse_manage_page, parse_chapter_content
+)
+
 COOKIE_FILE = "my_cookie.txt"
 
+# 命令行退出码
+EXIT_OK = 0             # 选中的作品全部备份成功
+EXIT_PARTIAL = 1        # 部分作品或章节备份失败
+EXIT_USAGE = 2          # 参数错误、缺少Cookie文件，或非交互运行时没有指定要备份的作品
+EXIT_LOGIN_FAILED = 3   # 未登录或没有获取到作品列表
+EXIT_NO_MATCH = 4       # 筛选条件没有选中任何作品
+EXIT_ERROR = 5          # 运行出错
+EXIT_INTERRUPTED = 130  # 用户中断
+
+# 按retry_policy重试的请求异常（连接失败、超时、响应被截断）
+RETRYABLE_ERRORS = (
+    requests.ConnectionError, requests.Timeout,
+    requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError
+)
+
 class JJWXCBackupTool:
-    def __init__(self):
+    def __init__(self, max_workers=4, fetch_engine='threads',
+                 requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST, jitter=DEFAULT_JITTER,
+                 rate_limiter=None,
+                 checkpoint_interval=50, resume_dir=None, incremental=False,
+                 use_http_cache=True, http_cache_ttl=0, http_cache_max_mb=256, cache_chapter_pages=False,
+                 parser_backend=DEFAULT_PARSER_BACKEND, novel_concurrency=3,
+                 pipeline_depth=16, render_processes=0, docx_engine=DEFAULT_DOCX_ENGINE,
+                 export_formats=DEFAULT_EXPORT_FORMATS, use_object_store=True, keep_backups=0,
+                 use_catalog=True,
+                 use_search_index=True, base_url=DEFAULT_BASE_URL, metrics=None,
+                 metrics_prometheus=False, retry_policy=None, circuit_breaker=None,
+                 adaptive_concurrency=False, concurrency_limiter=None, cookie_file=COOKIE_FILE,
+                 output_root="backup", novel_filter=None, progress=None):
         """
         初始化备份工具
         
+        参数：
+            max_workers (int): 并发获取章节的最大线程数（默认4，设为1即逐章获取）
+            fetch_engine (str): 章节获取引擎，'threads'为线程池，'asyncio'为异步引擎（需要aiohttp）
+            requests_per_second (float): 每个主机的请求速率上限（请求/秒，默认0.6，与原来每章节之后等待1~2秒相当）
+            burst (int): 每个主机允许的突发请求数（默认1，不突发）
+            jitter (float): 每次请求额外随机等待的上限（秒）
+            rate_limiter (HostRateLimiter): 共享的限速器（传入时忽略上面三个速率参数）
+            checkpoint_interval (int): 每获取多少章从章节日志重新生成一次DOCX（0为只在结束时生成）
+            resume_dir (str): 继续之前中断的备份目录（不再创建新的时间戳目录）
+            incremental (bool): 增量备份，章节行未变化时复用上一次备份的正文
+            use_http_cache (bool): 是否使用磁盘响应缓存（False为完全绕过缓存）
+            http_cache_ttl (float): 缓存免确认有效期（秒），0表示每次都发送条件请求
+            http_cache_max_mb (int): 响应缓存大小上限（MB），超出后按LRU淘汰
+            cache_chapter_pages (bool): 章节编辑页面是否也经过响应缓存（默认否：章节页数量多，
+                增量备份已跳过未修改的章节，缓存只会多保存一份正文）
+            parser_backend (str): HTML解析后端（html.parser / lxml / html5lib）
+            novel_concurrency (int): 同时备份的作品数（共享max_workers和限速，默认3）
+            pipeline_depth (int): 每部作品同时在获取/解析/写入流水线中的最大章节数
+            render_processes (int): DOCX渲染进程数（0为在后台线程中渲染）
+            docx_engine (str): DOCX生成方式，'stream'为流式写入，'python-docx'为逐段落构建对象
+            export_formats (iterable|str): 导出格式（docx / txt / md / jsonl / epub，可多选，如"docx,txt"）
+            use_object_store (bool): 是否把每次备份的章节保存到对象存储（backup/.store，按内容去重）；
+                快照保存后删除该作品的章节日志，文档可用object_store.py restore重新生成
+            keep_backups (int): 备份完成后保留的备份目录数，更早且已保存为快照的目录自动删除
+                （默认0为不自动删除；未使用对象存储时也不删除）
+            use_catalog (bool): 是否把作品、章节和备份运行记录到作品目录（backup/catalog.sqlite3）
+            use_search_index (bool): 是否在章节保存时更新全文索引（backup/search.sqlite3）
+            base_url (str): 作者后台地址（默认https://my.jjwxc.net，测试时可指向本地模拟服务器）
+            metrics (Metrics): 记录请求、解析、渲染和保存耗时的指标对象（默认新建）
+            metrics_prometheus (bool): 运行结束时除metrics.json外再写入Prometheus文本格式（metrics.prom）
+            retry_policy (RetryPolicy): 请求重试策略（默认最多4次，指数退避，每个请求期限120秒）
+            circuit_breaker (CircuitBreaker): 按主机熔断器（默认连续5次失败后暂停10秒）
+            adaptive_concurrency (bool): 按请求耗时和错误自动调整同时获取的章节数（AIMD），
+                max_workers为上限
+            concurrency_limiter (AdaptiveConcurrencyLimiter): 自定义的自适应并发上限（传入时忽略adaptive_concurrency）
+            cookie_file (str): Cookie文件路径（默认my_cookie.txt）
+            output_root (str): 备份根目录（默认backup；多账号备份时每个账号一个子目录）
+            novel_filter (callable): novel_filter(作品列表) -> 要备份的作品列表（None为交互选择）
+            progress (callable): progress(事件字典)，每部作品开始/结束和每章保存/失败时调用（见_report_progress）
+        
         功能：
-        - 创建输出目录结构 (backup/YYYYMMDD_HHMMSS/)
+        - 创建输出目录结构 (output_root/YYYYMMDD_HHMMSS/)，或沿用resume_dir
         - 初始化HTTP会话和请求头
         - 加载Cookie文件并解析认证信息
         - 配置网络重试策略
         """
-        # 创建输出目录 - 使用timestamp确保唯一性
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        self.output_dir = os.path.join("backup", timestamp)
-        os.makedirs(self.output_dir, exist_ok=True)
-        print(f"输出目录: {self.output_dir}")
+        if resume_dir:
+            # 断点续传 - 沿用上次的输出目录，已完成的章节会被跳过
+            if not os.path.isdir(resume_dir):
+                raise ValueError(f"续传目录不存在: {resume_dir}")
+            self.output_dir = resume_dir
+            print(f"继续备份目录: {self.output_dir}")
+        else:
+            # 创建输出目录 - 使用timestamp确保唯一性
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.output_dir = os.path.join(output_root, timestamp)
+            os.makedirs(self.output_dir, exist_ok=True)
+            print(f"输出目录: {self.output_dir}")
         
         # 设置HTTP会话 - 保持Cookie和连接复用
         self.session = requests.Session()
         self.headers = self.get_default_headers()
         
-        # 初始化作者后台URL
+        # 初始化作者后台URL - 所有后台页面地址都由base_url拼接
+        self.base_url = base_url.rstrip('/')
         self.author_backend_url = None
         
         # 加载并解析Cookie文件
+        self.cookie_file = cookie_file
+        self.novel_filter = novel_filter
         cookie_count = self.load_cookie()
         print(f"已设置 {cookie_count} 个Cookie参数")
         
         # 设置请求重试策略 - 应对网络波动
-        self.session.mount('https://', requests.adapters.HTTPAdapter(
-            max_retries=3,
-            pool_connections=10,
-            pool_maxsize=20
-        ))
+        self._mount_adapters(self.session)
+        
+        # 并发获取章节配置 - 每个工作线程使用独立Session，共享同一个Cookie罐
+        self.max_workers = max(1, int(max_workers))
+        self._thread_local = threading.local()
+        
+        if fetch_engine not in ('threads', 'asyncio'):
+            raise ValueError(f"未知的获取引擎: {fetch_engine}")
+        self.fetch_engine = fetch_engine
+        
+        # 多作品并行备份 - 所有作品共享同一个章节调度器，按作品轮流发送章节请求
+        self.novel_concurrency = max(1, int(novel_concurrency))
+        self._scheduler = None
+        self._scheduler_fetch = None
+        self._engine_executor = None
+        self._tag_progress = False
+        
+        # 获取/解析/渲染流水线 - 渲染可放到进程池中使用多个CPU核心
+        self.pipeline_depth = max(1, int(pipeline_depth))
+        self.render_processes = max(0, int(render_processes))
+        self._render_pool = None
+        
+        if docx_engine not in DOCX_ENGINES:
+            raise ValueError(f"未知的DOCX生成方式: {docx_engine}")
+        self.docx_engine = docx_engine
+        
+        # 导出格式 - 一次获取，从章节日志同时导出所有选中的格式
+        self.export_formats = parse_formats(export_formats)
+        
+        # 全局请求限速 - 所有请求都经过同一个按主机划分的令牌桶
+        self.rate_limiter = rate_limiter or HostRateLimiter(
+            rate=requests_per_second,
+            burst=burst,
+            jitter=jitter
+        )
+        
+        # DOCX检查点间隔 - 章节内容先写入追加式日志，DOCX定期生成
+        self.checkpoint_interval = max(0, int(checkpoint_interval))
+        
+        # 本次运行的页面备忘 - 同一后台页面只请求一次
+        # _page_memo: {URL: 页面原始内容}，_manage_memo: {作品ID: (简介, 章节列表)}
+        self._page_memo = {}
+        self._manage_memo = {}
+        self._memo_lock = threading.Lock()
+        
+        # 增量备份 - 与backup/下最近一次备份的章节指纹比对
+        self.incremental = incremental
+        
+        # HTML解析后端 - lxml等需要额外安装
+        if parser_backend not in available_parser_backends():
+            raise ValueError(f"解析后端不可用: {parser_backend}（可用: {', '.join(available_parser_backends())}）")
+        self.parser_backend = parser_backend
+        
+        # 后台页面响应缓存 - 存放在backup/.http_cache，重复运行时发送条件请求
+        self.http_cache = ResponseCache(
+            os.path.join(os.path.dirname(os.path.abspath(self.output_dir)), ".http_cache"),
+            ttl=http_cache_ttl,
+            max_bytes=http_cache_max_mb * 1024 * 1024,
+            enabled=use_http_cache
+        )
+        self.cache_chapter_pages = cache_chapter_pages
+        
+        # 章节对象存储 - 正文按内容哈希压缩保存一次，每次备份只记录一个快照清单
+        self.object_store = ObjectStore(
+            os.path.join(os.path.dirname(os.path.abspath(self.output_dir)), ".store")
+        ) if use_object_store else None
+        self.keep_backups = keep_backups
+        
+        # 作品目录 - 作品、章节元数据和每次运行的结果，可离线查询
+        self.catalog = Catalog(
+            os.path.join(os.path.dirname(os.path.abspath(self.output_dir)), "catalog.sqlite3")
+        ) if use_catalog else None
+        
+        # 全文索引 - 章节保存时即写入，可按关键词查找正文和作者有话说
+        self.search_index = SearchIndex(
+            os.path.join(os.path.dirname(os.path.abspath(self.output_dir)), "search.sqlite3")
+        ) if use_search_index else None
+        
+        # 运行指标 - 各阶段耗时分布，运行结束时写入备份目录的metrics.json
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.metrics_prometheus = metrics_prometheus
+        
+        # 重试和熔断 - 连接错误、超时和429/5xx按指数退避重试，后台持续出错时暂停所有请求
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else CircuitBreaker()
+        
+        # 自适应并发 - 后台正常时逐步增加同时获取的章节数，超时、429/5xx或登录失效时减半
+        if concurrency_limiter is None and adaptive_concurrency:
+            concurrency_limiter = AdaptiveConcurrencyLimiter(max_limit=self.max_workers)
+        self.concurrency_limiter = concurrency_limiter
+        
+        # 进度回调和取消 - 备份服务通过回调推送进度，cancel()在章节之间停止备份
+        self.progress = progress
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        """是否已调用cancel()"""
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """
+        取消正在进行的备份（可从其他线程调用）
+        
+        说明：
+            已发出的章节请求完成后停止，尚未开始的作品跳过；已保存的章节照常生成文档，
+            可用 --resume 继续
+        """
+        self._cancel_event.set()
+
+    def _report_progress(self, event, **fields):
+        """
+        调用进度回调，回调出错只提示，不影响备份
+        
+        事件：
+            run_started: output_dir, novels（[{'id', 'title'}]）
+            novel_started: novel_id, title, total, done（续传时已完成的章节数）
+            chapter: novel_id, title, chapter_id, chapter_title, status（saved / failed）, done, total
+            novel_finished: novel_id, title, total, saved, failed, error
+        """
+        if self.progress is None:
+            return
+        try:
+            self.progress(dict(fields, event=event))
+        except Exception as e:
+            print(f"⚠ 进度回调出错: {e}")
+
+    @property
+    def run_id(self):
+        """本次备份运行ID（备份目录名，如20250101_120000）"""
+        return os.path.basename(os.path.abspath(self.output_dir))
+
+    def _mount_adapters(self, session):
+        """为Session挂载连接适配器（http用于本地模拟服务器；重试由retry_policy负责）"""
+        for prefix in ('https://', 'http://'):
+            session.mount(prefix, requests.adapters.HTTPAdapter(
+                pool_connections=10,
+                pool_maxsize=20
+            ))
+
+    def create_async_engine(self):
+        """
+        创建与当前工具共享Cookie和请求头的异步获取引擎
+        
+        返回：
+            AsyncJJWXCEngine: 并发上限为max_workers的异步引擎
+        """
+        return AsyncJJWXCEngine(
+            cookies=self.session.cookies.get_dict(),
+            headers=self.headers,
+            max_concurrency=self.max_workers,
+            rate_limiter=self.rate_limiter,
+            parser_backend=self.parser_backend,
+            base_url=self.base_url,
+            metrics=self.metrics,
+            retry_policy=self.retry_policy,
+            circuit_breaker=self.circuit_breaker,
+            concurrency_limiter=self.concurrency_limiter,
+            http_cache=self.http_cache,
+            cache_chapter_pages=self.cache_chapter_pages,
+            cancelled=lambda: self.cancelled
+        )
+
+    def _open_chapter_scheduler(self):
+        """
+        创建章节调度器（或异步引擎）和DOCX渲染池（所有正在备份的作品共享）
+        
+        说明：
+        - threads引擎：调度器的max_workers个线程按作品轮流请求章节页面
+        - asyncio引擎：不创建调度器，每部作品的待获取章节作为一个批次交给后台事件循环
+          （AsyncChapterBatch），各作品的请求共用异步引擎的并发信号量，不为每个请求占用线程
+        - 自适应并发：章节获取先在concurrency_limiter内排队，同时获取的章节数不超过当前上限
+        - 渲染池：render_processes>0时为进程池，否则为单个后台线程
+        """
+        if self.fetch_engine == 'asyncio':
+            self._engine_executor = AsyncEngineExecutor(self.create_async_engine())
+        else:
+            if self.concurrency_limiter is not None:
+                self._scheduler_fetch = self._fetch_chapter_limited
+            else:
+                self._scheduler_fetch = self._fetch_chapter_worker
+            self._scheduler = FairScheduler(max_workers=self.max_workers)
+        if self.render_processes:
+            self._render_pool = ProcessPoolExecutor(max_workers=self.render_processes)
+        else:
+            self._render_pool = ThreadPoolExecutor(max_workers=1)
+    
+    def _close_chapter_scheduler(self):
+        """关闭章节调度器和渲染池，取消尚未开始的章节请求"""
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False, cancel_futures=True)
+            self._scheduler = None
+        if self._engine_executor is not None:
+            self._engine_executor.shutdown(wait=False, cancel_futures=True)
+            self._engine_executor = None
+        if self._render_pool is not None:
+            self._render_pool.shutdown(wait=True, cancel_futures=True)
+            self._render_pool = None
+    
+    def _submit_render(self, journal_path, chapters, failures, base_path):
+        """
+        向渲染池提交导出任务（生成所有选中格式的文件）
+        
+        参数：
+            base_path (str): 输出路径（不含扩展名）
+            
+        返回：
+            concurrent.futures.Future: 导出完成时结束，结果为(写入的文件路径, 耗时)
+        """
+        future = self._render_pool.submit(
+            export_with_timings, journal_path, chapters, dict(failures), base_path,
+            self.export_formats, self.docx_engine
+        )
+        future.add_done_callback(self._record_render_timings)
+        return future
+    
+    def _missing_exports(self, written, base_path):
+        """导出任务未写入的文件路径（export_from_journal出错时不抛出异常，只返回已写入的路径）"""
+        return [path for path in export_paths(base_path, self.export_formats).values() if path not in written]
+
+    def _record_render_timings(self, future):
+        """导出任务完成时记录每章渲染和文件保存耗时（耗时在渲染进程中测量）"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        _, timings = future.result()
+        for seconds in timings.get('render', ()):
+            self.metrics.observe('render', seconds)
+        for seconds, size in timings.get('save', ()):
+            self.metrics.observe('save', seconds, size)
+
+    def _get(self, url, session=None, use_cache=True, **kwargs):
+        """
+        发送经过限速的GET请求
+        
+        参数：
+            url (str): 请求地址
+            session (requests.Session): 使用的会话（默认为主会话）
+            use_cache (bool): 是否使用响应缓存（登录检查等需要实时结果的请求应传False）
+            **kwargs: 透传给session.get的参数（headers、timeout等）
+            
+        返回：
+            requests.Response: 响应对象（来自缓存时from_cache属性为True）
+            
+        说明：
+            所有后台请求都应通过此方法发送，由令牌桶统一控制请求速率，
+            等待时间与其他线程的网络耗时重叠，不再在每次请求后固定sleep
+            
+        缓存流程：
+        1. TTL内的缓存直接返回，不发送请求
+        2. 有缓存但已过期：附带If-None-Match/If-Modified-Since发送条件请求
+        3. 服务器返回304：复用缓存正文；返回200：更新缓存
+        
+        重试：
+            连接错误、超时、截断响应和429/5xx按retry_policy重试，见_send_with_retry
+        """
+        cache = self.http_cache if use_cache else None
+        entry = None
+        if cache is not None:
+            entry, body, headers = cache.prepare(url, kwargs.get('headers') or self.headers)
+            if body is not None:
+                self.metrics.count('http_cache', result='fresh')
+                return self._cached_response(url, body)
+            if entry is not None:
+                kwargs['headers'] = headers
+        
+        response = self._send_with_retry(url, session or self.session, **kwargs)
+        
+        if cache is not None:
+            body = cache.complete(url, entry, response.status_code, response.headers, response.content,
+                                  redirected=bool(response.history))
+            if body is not None:
+                self.metrics.count('http_cache', result='revalidated')
+                return self._cached_response(url, body)
+        return response
+    
+    def _send_with_retry(self, url, session, timeout=None, **kwargs):
+        """
+        按重试策略发送请求（经过熔断器和限速器）
+        
+        参数：
+            url (str): 请求地址
+            session (requests.Session): 使用的会话
+            timeout (float): 单次请求超时（秒），不超过请求的剩余期限
+            **kwargs: 透传给session.get的参数
+            
+        返回：
+            requests.Response: 最后一次请求的响应（重试用尽时可能仍为429/5xx）
+            
+        异常：
+            requests.RequestException: 重试用尽后仍连接失败、超时或响应被截断
+            CircuitOpenError: 后台暂停中，且在请求期限内不会恢复
+            
+        说明：
+            结果统计和重试判断见retry_policy.RequestAttempts（与异步引擎共用），这里只负责发送
+        """
+        attempts = RequestAttempts(
+            self.retry_policy, self.circuit_breaker, self.metrics, url,
+            observe=self._observe_concurrency, cancelled=lambda: self.cancelled
+        )
+        while True:
+            self.circuit_breaker.before_request(url, attempts.deadline)
+            self.rate_limiter.acquire(url)
+            attempt_timeout = attempts.begin(timeout)
+            try:
+                response = session.get(url, timeout=attempt_timeout, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                delay = attempts.failed(e, timed_out=isinstance(e, requests.Timeout))
+                if delay is None:
+                    raise
+            except Exception as e:
+                attempts.error(e)
+                raise
+            else:
+                delay = attempts.response(response.status_code, len(response.content),
+                                          response.headers.get('Retry-After'))
+                if delay is None:
+                    # 不需要重试，或重试用尽（备份已取消），与不重试时一样把错误响应交给调用方处理
+                    return response
+            time.sleep(delay)
+    
+    def _observe_concurrency(self, seconds, outcome):
+        """把一次请求的耗时和结果交给自适应并发上限（未启用时忽略）"""
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.observe(seconds, outcome)
+    
+    def _cached_response(self, url, body):
+        """用缓存正文构造响应对象"""
+        response = requests.models.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        response.from_cache = True
+        return response
+
+    def _get_worker_session(self):
+        """
+        获取当前工作线程专用的HTTP会话
+        
+        返回：
+            requests.Session: 线程独立的会话对象
+            
+        说明：
+            requests.Session并非线程安全，并发获取章节时每个线程创建自己的Session，
+            但共享load_cookie加载到主会话中的Cookie罐，保证认证信息一致
+        """
+        session = getattr(self._thread_local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.cookies = self.session.cookies
+            self._mount_adapters(session)
+            self._thread_local.session = session
+        return session
 
     def get_default_headers(self):
         """
@@ -94,7 +543,7 @@ class JJWXCBackupTool:
             int: 成功解析的Cookie数量
             
         功能：
-        1. 读取my_cookie.txt文件内容
+        1. 读取Cookie文件（cookie_file，默认my_cookie.txt）内容
         2. 处理Unicode转义序列(%uXXXX)
         3. 智能解析复杂Cookie格式（包括JSON值）
         4. 设置到HTTP会话中
@@ -111,9 +560,9 @@ class JJWXCBackupTool:
         - JSON验证：确保JSON格式Cookie的有效性
         """
         cookie_count = 0
-        if os.path.exists(COOKIE_FILE):
+        if os.path.exists(self.cookie_file):
             try:
-                with open(COOKIE_FILE, 'r', encoding='utf-8') as f:
+                with open(self.cookie_file, 'r', encoding='utf-8') as f:
                     # 读取原始Cookie内容
                     raw_cookie = f.read().strip()
                     print(f"原始Cookie内容: {raw_cookie[:100]}...")
@@ -230,12 +679,11 @@ class JJWXCBackupTool:
     
     def check_login(self):
         """检查登录状态"""
-        self.author_backend_url = "https://my.jjwxc.net/backend/oneauthor_login.php"
+        self.author_backend_url = backend_url("oneauthor_login.php", self.base_url)
         try:
             print("正在检查登录状态...")
-            response = self.session.get(self.author_backend_url, headers=self.headers, timeout=15)
-            response.encoding = 'gb18030'
-            html = response.text
+            content = self._fetch_page(self.author_backend_url, use_cache=False, headers=self.headers, timeout=15)
+            html = decode_page(content)
 
             # 判断页面是否包含登录提示
             if "晋江文学城" in html:
@@ -248,132 +696,87 @@ class JJWXCBackupTool:
             print(f"检查登录状态时出错: {e}")
             return False
         
+    def _fetch_page(self, url, use_cache=True, **kwargs):
+        """
+        获取页面原始内容（本次运行内同一URL只请求一次）
+        
+        参数：
+            url (str): 页面地址
+            use_cache (bool): 首次请求时是否使用磁盘响应缓存
+            **kwargs: 透传给_get的参数
+            
+        返回：
+            bytes: 页面原始内容
+            
+        说明：
+            只用于后台首页这类少量、会被多处读取的页面；章节编辑页不经过此处，避免占用内存
+        """
+        with self._memo_lock:
+            if url in self._page_memo:
+                return self._page_memo[url]
+        
+        response = self._get(url, use_cache=use_cache, **kwargs)
+        content = response.content
+        if response.status_code == 200:
+            with self._memo_lock:
+                self._page_memo[url] = content
+        return content
+    
+    def _get_manage_page(self, novel_id):
+        """
+        获取并解析作品管理页面（本次运行内每部作品只请求和解析一次）
+        
+        参数：
+            novel_id (str): 作品ID
+            
+        返回：
+            tuple: (作品简介, 章节列表)
+        """
+        with self._memo_lock:
+            if novel_id in self._manage_memo:
+                print(f"复用已获取的章节管理页面: {novel_id}")
+                return self._manage_memo[novel_id]
+        
+        manage_url = backend_url(f"managenovel.php?novelid={novel_id}", self.base_url)
+        print(f"访问后台章节管理页面: {manage_url}")
+        headers = self.headers.copy()
+        headers['Referer'] = backend_url("", self.base_url)
+        response = self._get(manage_url, headers=headers, timeout=30)
+        
+        # 只构建一次解析树，同时提取简介和章节列表
+        with self.metrics.timer('parse_manage', size=len(response.content)):
+            result = parse_manage_page(response.content, novel_id, self.parser_backend, self.base_url)
+        if response.status_code == 200:
+            with self._memo_lock:
+                self._manage_memo[novel_id] = result
+        return result
+    
     def get_novel_list(self):
         """获取作者作品列表"""
-        author_url = "https://my.jjwxc.net/backend/oneauthor_login.php"
+        author_url = backend_url("oneauthor_login.php", self.base_url)
         
         try:
             print(f"获取作品列表: {author_url}")
-            response = self.session.get(author_url, headers=self.headers, timeout=20)
-            
-            # 设置正确的编码
-            response.encoding = 'gb18030'  # 晋江使用gb18030编码
-            
-            soup = BeautifulSoup(response.content, 'html.parser', from_encoding='gb18030')
-            novels = []
+            # 与check_login访问同一页面，本次运行内只请求一次
+            content = self._fetch_page(author_url, headers=self.headers, timeout=20)
             
             # 保存页面用于调试（已禁用，如需调试请取消注释）
             # with open(os.path.join(self.output_dir, "novel_list.html"), "w", encoding="utf-8") as f:
-            #     f.write(response.text)
+            #     f.write(decode_page(content))
             # print("作品列表页面已保存: novel_list.html")
             
-            # 查找作品管理链接
-            # 在晋江后台，作品管理链接的格式是: managenovel.php?novelid=XXXXX
-            novel_links = soup.find_all('a', href=lambda x: x and 'managenovel.php?novelid=' in x)
-            
-            if novel_links:
-                print(f"找到 {len(novel_links)} 个作品管理链接")
-                
-                for link in novel_links:
-                    # 提取作品ID
-                    href = link['href']
-                    novel_id_match = re.search(r'novelid=(\d+)', href)
-                    if novel_id_match:
-                        novel_id = novel_id_match.group(1)
-                        
-                        # 查找作品标题（在同一行的其他位置）
-                        row = link.find_parent('tr')
-                        if row:
-                            # 查找作品标题链接（指向onebook.php的链接）
-                            title_link = row.find('a', href=lambda x: x and f'onebook.php?novelid={novel_id}' in x)
-                            if title_link:
-                                title = title_link.get_text(strip=True)
-                                
-                        # 提取其他信息
-                        cells = row.find_all('td')
-                        if len(cells) >= 10:
-                            try:
-                                # 根据HTML结构提取信息
-                                category = cells[2].get_text(strip=True) if len(cells) > 2 else "未知"
-                                subcategory = cells[3].get_text(strip=True) if len(cells) > 3 else "未知"
-                                chapter_count = cells[5].get_text(strip=True) if len(cells) > 5 else "0"
-                                word_count = cells[6].get_text(strip=True) if len(cells) > 6 else "0"
-                                status = cells[12].get_text(strip=True) if len(cells) > 12 else "未知"
-                                
-                                novels.append({
-                                    'id': novel_id,
-                                    'title': title,
-                                    'link': href,
-                                    'view_link': title_link['href'],
-                                    'status': status,
-                                    'word_count': word_count,
-                                    'chapter_count': chapter_count,
-                                    'category': f"{category}-{subcategory}"
-                                })
-                                
-                            except Exception as e:
-                                print(f"解析作品信息出错 {novel_id}: {e}")
-                                novels.append({
-                                    'id': novel_id,
-                                    'title': title,
-                                    'link': href,
-                                    'view_link': title_link['href'],
-                                    'status': "未知",
-                                    'word_count': "未知",
-                                    'chapter_count': "未知",
-                                    'category': "未知"
-                                })
-                
-                print(f"成功解析 {len(novels)} 部作品")
-                return novels
-            else:
-                print("未找到作品管理链接")
-                # 备用方法：查找onebook.php链接
-                onebook_links = soup.find_all('a', href=lambda x: x and 'onebook.php?novelid=' in x)
-                if onebook_links:
-                    print(f"找到 {len(onebook_links)} 个作品阅读链接")
-                    for idx, link in enumerate(onebook_links):
-                        href = link['href']
-                        novel_id_match = re.search(r'novelid=(\d+)', href)
-                        if novel_id_match:
-                            novel_id = novel_id_match.group(1)
-                            title = link.get_text(strip=True)
-                            
-                            novels.append({
-                                'id': novel_id,
-                                'title': title,
-                                'link': f"//my.jjwxc.net/backend/managenovel.php?novelid={novel_id}",
-                                'view_link': href,
-                                'status': "未知",
-                                'word_count': "未知",
-                                'chapter_count': "未知",
-                                'category': "未知"
-                            })
-                    
-                    return novels
-                else:
-                    print("也未找到作品阅读链接")
-                    return []
+            with self.metrics.timer('parse_novel_list', size=len(content)):
+                return parse_novel_list(content, self.parser_backend, self.base_url)
             
         except Exception as e:
             print(f"获取作品列表出错: {str(e)}")
             return []
     
     def get_intro_from_backend(self, novel_id):
-        """从作者后台获取作品简介"""
+        """从作者后台获取作品简介（与get_chapters共用同一次页面请求）"""
         try:
-            backend_url = f"https://my.jjwxc.net/backend/managenovel.php?novelid={novel_id}"
-            print(f"访问后台章节管理页面: {backend_url}")
-            headers = self.headers.copy()
-            headers['Referer'] = 'https://my.jjwxc.net/backend/'
-            response = self.session.get(backend_url, headers=headers, timeout=30)
-            response.encoding = 'gb18030'
-            
-            soup = BeautifulSoup(response.content, 'html.parser', from_encoding='gb18030')
-            novel_intro = ""
-            intro_textarea = soup.find('textarea', {'id': 'novelintro'})
-            if intro_textarea:
-                novel_intro = intro_textarea.get_text(strip=True)
+            novel_intro, _ = self._get_manage_page(novel_id)
+            if novel_intro:
                 print(f"获取到作品简介: {len(novel_intro)} 字符")
             return novel_intro
         except Exception as e:
@@ -406,193 +809,25 @@ class JJWXCBackupTool:
             
         try:
             # 提取novelid
-            novel_id_match = re.search(r'novelid=(\d+)', novel_link)
-            if not novel_id_match:
+            novel_id = extract_novel_id(novel_link)
+            if not novel_id:
                 print(f"无法从链接中提取作品ID: {novel_link}")
                 return []
-            novel_id = novel_id_match.group(1)
-            backend_url = f"https://my.jjwxc.net/backend/managenovel.php?novelid={novel_id}"
-            print(f"获取所有章节列表: {backend_url}")
-            response = self.session.get(backend_url, headers=self.headers, timeout=30)
-            response.encoding = 'gb18030'
-            
-            soup = BeautifulSoup(response.content, 'html.parser', from_encoding='gb18030')
-            chapters = []
-            
-            # 新的章节解析策略：通过多种方法组合查找
-            # 方法1：查找所有包含chapterid的input，通过其父元素定位章节行
-            chapter_inputs = soup.find_all('input', {'name': 'chapterid'})
-            print(f"找到 {len(chapter_inputs)} 个章节ID输入框")
-            
-            # 过滤掉表单提交用的hidden input（通常在form中且value较大）
-            valid_chapter_inputs = []
-            for input_elem in chapter_inputs:
-                # 检查是否在表单中且value很大（可能是下一章节的ID）
-                form_parent = input_elem.find_parent('form')
-                if form_parent and input_elem.get('type') == 'hidden':
-                    # 这可能是表单提交用的input，跳过
-                    continue
-                valid_chapter_inputs.append(input_elem)
-            
-            print(f"有效章节输入框: {len(valid_chapter_inputs)}")
-            
-            # 如果没有找到有效的章节输入框，尝试其他方法
-            if not valid_chapter_inputs:
-                print("尝试备用方法：查找章节链接")
-                # 方法2：查找所有指向章节的链接
-                all_links = soup.find_all('a', href=True)
-                chapter_links = []
-                for link in all_links:
-                    href = link.get('href', '')
-                    if 'onebook' in href and ('novelid=' in href or 'chapterid=' in href):
-                        chapter_links.append(link)
-                
-                print(f"找到 {len(chapter_links)} 个章节链接")
-                
-                # 从链接中提取章节信息
-                for link in chapter_links:
-                    href = link.get('href')
-                    chapter_id_match = re.search(r'chapterid=(\d+)', href)
-                    
-                    if not chapter_id_match:
-                        continue
-                    
-                    chapter_id = chapter_id_match.group(1)
-                    title = link.get_text(strip=True)
-                    
-                    # 判断是否VIP章节
-                    is_vip = 'onebook_vip.php' in href or '[VIP]' in title
-                    
-                    # 尝试从链接的父元素中获取章节编号
-                    parent_tr = link.find_parent('tr')
-                    chapter_number = len(chapters) + 1  # 默认按顺序编号
-                    
-                    if parent_tr:
-                        tds = parent_tr.find_all('td')
-                        for td in tds:
-                            text = td.get_text(strip=True)
-                            # 查找数字编号
-                            number_match = re.search(r'^(\d+)$', text)
-                            if number_match:
-                                chapter_number = int(number_match.group(1))
-                                break
-                    
-                    # 构建统一的后台编辑链接
-                    edit_link = f"https://my.jjwxc.net/backend/chaptermodify.php?novelid={novel_id}&chapterid={chapter_id}"
-                    
-                    chapters.append({
-                        'id': chapter_id,
-                        'title': title,
-                        'link': edit_link,  # 统一使用后台编辑链接
-                        'chapter_number': chapter_number,
-                        'is_vip': is_vip
-                    })
-            
-            else:
-                # 使用有效的章节输入框解析章节
-                for input_elem in valid_chapter_inputs:
-                    chapter_id = input_elem.get('value')
-                    if not chapter_id:
-                        continue
-                    
-                    # 查找关联的章节行
-                    parent_tr = input_elem.find_parent('tr')
-                    if not parent_tr:
-                        continue
-                    
-                    # 查找章节标题链接
-                    title_link = parent_tr.find('a', href=True)
-                    if not title_link:
-                        continue
-                        
-                    title = title_link.get_text(strip=True)
-                    href = title_link.get('href')
-                    
-                    # 判断是否VIP章节
-                    is_vip = 'onebook_vip.php' in href or '[VIP]' in title
-                    
-                    # 提取章节编号
-                    chapter_number = len(chapters) + 1  # 默认编号
-                    tds = parent_tr.find_all('td')
-                    if len(tds) > 1:
-                        try:
-                            chapter_num_text = tds[1].get_text(strip=True)
-                            chapter_number = int(chapter_num_text)
-                        except (ValueError, IndexError):
-                            pass
-                    
-                    # 构建统一的后台编辑链接
-                    edit_link = f"https://my.jjwxc.net/backend/chaptermodify.php?novelid={novel_id}&chapterid={chapter_id}"
-                    
-                    chapters.append({
-                        'id': chapter_id,
-                        'title': title,
-                        'link': edit_link,  # 统一使用后台编辑链接
-                        'chapter_number': chapter_number,
-                        'is_vip': is_vip
-                    })
-            
-            # 如果常规方法都失败，尝试通过最大章节号生成章节列表
-            if not chapters:
-                print("尝试最终方案：通过最大章节号生成章节列表")
-                
-                # 查找最大章节号提示
-                max_chapter_hints = [
-                    soup.find(text=re.compile(r'已更新至第(\d+)章')),
-                    soup.find(text=re.compile(r'第(\d+)章', re.I))
-                ]
-                
-                max_chapter_num = 0
-                for hint in max_chapter_hints:
-                    if hint:
-                        match = re.search(r'第(\d+)章', str(hint))
-                        if match:
-                            chapter_num = int(match.group(1))
-                            max_chapter_num = max(max_chapter_num, chapter_num)
-                
-                # 也可以查看placeholder中的章节号（下一章节号）
-                placeholders = soup.find_all('input', {'placeholder': re.compile(r'第(\d+)章')})
-                for placeholder in placeholders:
-                    placeholder_text = placeholder.get('placeholder', '')
-                    match = re.search(r'第(\d+)章', placeholder_text)
-                    if match:
-                        next_chapter_num = int(match.group(1))
-                        max_chapter_num = max(max_chapter_num, next_chapter_num - 1)
-                
-                print(f"检测到最大章节号: {max_chapter_num}")
-                
-                if max_chapter_num > 0:
-                    print(f"生成 1-{max_chapter_num} 章节列表")
-                    for chapter_num in range(1, max_chapter_num + 1):
-                        # 构建统一的后台编辑链接
-                        edit_link = f"https://my.jjwxc.net/backend/chaptermodify.php?novelid={novel_id}&chapterid={chapter_num}"
-                        
-                        chapters.append({
-                            'id': str(chapter_num),
-                            'title': f"第{chapter_num}章",  # 临时标题，后续可以从编辑页面获取
-                            'link': edit_link,
-                            'chapter_number': chapter_num,
-                            'is_vip': False  # 暂时标记为免费，实际类型会在获取内容时确定
-                        })
-            
-            # 按章节编号排序
-            chapters.sort(key=lambda x: x['chapter_number'])
-            
-            vip_count = sum(1 for c in chapters if c['is_vip'])
-            free_count = len(chapters) - vip_count
-            print(f"成功解析 {len(chapters)} 个章节，其中免费章节数量：{free_count}，VIP章节数量：{vip_count}")
-            return chapters
+            _, chapters = self._get_manage_page(novel_id)
+            # 返回副本，调用方修改章节信息不影响缓存的解析结果
+            return [dict(chapter) for chapter in chapters]
         except Exception as e:
             print(f"获取章节列表出错: {str(e)}")
             return []
     
-    def get_chapter_content(self, chapter_link, is_vip=False):
+    def get_chapter_content(self, chapter_link, is_vip=False, session=None):
         """
         获取章节内容（统一后台方案）
         
         参数：
             chapter_link (str): 后台编辑页面链接
             is_vip (bool): 是否为VIP章节（保留参数，但不再影响处理逻辑）
+            session (requests.Session): 使用的HTTP会话（默认为主会话，并发时传入线程会话）
             
         返回：
             str: 章节完整内容（包含正文和作者有话说）
@@ -622,82 +857,45 @@ class JJWXCBackupTool:
             
         try:
             print(f"  获取章节内容（统一后台方案）...")
-            
-            # 如果传入的不是后台编辑链接，需要转换
-            if 'chaptermodify.php' not in chapter_link:
-                # 从原始链接提取novelid和chapterid
-                novel_id_match = re.search(r'novelid=(\d+)', chapter_link)
-                chapter_id_match = re.search(r'chapterid=(\d+)', chapter_link)
-                
-                if not novel_id_match or not chapter_id_match:
-                    return "无法从链接中提取章节信息"
-                
-                novel_id = novel_id_match.group(1)
-                chapter_id = chapter_id_match.group(1)
-                
-                # 构建后台编辑页面链接
-                edit_url = f"https://my.jjwxc.net/backend/chaptermodify.php?novelid={novel_id}&chapterid={chapter_id}"
-            else:
-                edit_url = chapter_link
-            
-            # 设置请求头
-            headers = self.headers.copy()
-            headers['Referer'] = f'https://my.jjwxc.net/backend/managenovel.php'
-            
-            # 访问后台编辑页面
-            response = self.session.get(edit_url, headers=headers, timeout=30)
-            response.encoding = 'gb18030'
-            soup = BeautifulSoup(response.content, 'html.parser', from_encoding='gb18030')
-            
-            main_content = ""
-            author_notes = ""
-            
-            # 从编辑页面的textarea获取正文内容
-            chapterbody_textarea = soup.find('textarea', {'name': 'content'})
-            if chapterbody_textarea:
-                # 获取原始文本内容，保留所有格式
-                main_content = chapterbody_textarea.string or chapterbody_textarea.get_text()
-                # 如果没有内容，尝试从textarea内部获取
-                if not main_content.strip():
-                    main_content = ''.join(str(content) for content in chapterbody_textarea.contents)
-                
-                # 只清理HTML实体编码，保留所有换行和空行
-                main_content = main_content.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
-                main_content = main_content.replace('&quot;', '"').replace('&#039;', "'")
-                main_content = main_content.replace('&nbsp;', ' ')  # 处理非断行空格
-            
-            # 获取作者有话说
-            authornote_textarea = soup.find('textarea', {'name': 'note'})
-            if authornote_textarea:
-                # 获取原始文本内容，保留所有格式
-                author_notes = authornote_textarea.string or authornote_textarea.get_text()
-                # 如果没有内容，尝试从textarea内部获取
-                if not author_notes.strip():
-                    author_notes = ''.join(str(content) for content in authornote_textarea.contents)
-                
-                # 只清理HTML实体编码，保留所有换行和空行
-                author_notes = author_notes.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
-                author_notes = author_notes.replace('&quot;', '"').replace('&#039;', "'")
-                author_notes = author_notes.replace('&nbsp;', ' ')  # 处理非断行空格
-            
-            # 组合内容
-            result_parts = []
-            if main_content and len(main_content.strip()) > 20:
-                result_parts.append(main_content)
-            if author_notes and len(author_notes.strip()) > 10:
-                result_parts.append('\n\n【作者有话说】\n')
-                result_parts.append(author_notes)
-            
-            if result_parts:
-                result = ''.join(result_parts)
-                if len(result.strip()) > 30:
-                    return result
-            
-            return "内容获取失败：未找到有效内容"
+            page = self.fetch_chapter_page(chapter_link, session=session)
+            return self.parse_chapter_page(page)
             
         except Exception as e:
             print(f"  章节内容获取出错: {str(e)}")
             return f"内容获取失败：{str(e)}"
+    
+    def fetch_chapter_page(self, chapter_link, session=None):
+        """
+        获取章节后台编辑页面的原始内容（流水线的获取阶段，不做解析）
+        
+        参数：
+            chapter_link (str): 章节链接（前台链接会转换为后台编辑链接）
+            session (requests.Session): 使用的HTTP会话（默认为主会话）
+            
+        返回：
+            bytes: 页面原始内容
+            
+        异常：
+            ValueError: 无法从链接中提取章节信息
+        """
+        # 如果传入的不是后台编辑链接，需要转换
+        edit_url = build_chapter_edit_url(chapter_link, self.base_url)
+        if not edit_url:
+            raise ValueError("无法从链接中提取章节信息")
+        
+        # 设置请求头
+        headers = self.headers.copy()
+        headers['Referer'] = backend_url("managenovel.php", self.base_url)
+        
+        # 访问后台编辑页面
+        response = self._get(edit_url, session=session, use_cache=self.cache_chapter_pages,
+                             headers=headers, timeout=30)
+        return response.content
+    
+    def parse_chapter_page(self, page):
+        """将章节页面原始内容解析为章节文本（流水线的解析阶段）"""
+        with self.metrics.timer('parse_chapter', size=len(page)):
+            return parse_chapter_content(page, self.parser_backend)
 
     def create_docx_with_realtime_save(self, novel, chapters):
         """
@@ -707,6 +905,9 @@ class JJWXCBackupTool:
             novel (dict): 作品信息字典
             chapters (list): 章节列表
             
+        返回：
+            dict: 备份结果 {'title', 'total', 'saved', 'failed', 'error'}
+            
         功能特性：
         1. 文档结构创建：
            - 作品标题（0级标题，居中）
@@ -715,8 +916,11 @@ class JJWXCBackupTool:
            - 分页符分隔
            
         2. 章节处理：
-           - 逐章节获取和添加内容
-           - 实时保存（每章节保存一次）
+           - 并发获取章节内容（共享调度器或异步引擎，最多max_workers个并发）
+           - 多部作品同时备份时，调度器按作品轮流发送章节请求
+           - 获取、解析、写入日志分阶段进行（ChapterPipeline），
+             在途章节最多pipeline_depth个，解析或写入跟不上时暂停获取
+           - 章节获取完成即追加到章节日志（<作品名>.journal.jsonl）
            - 章节标题格式化（第X章 标题）
            - 章节间分隔符
            
@@ -727,12 +931,18 @@ class JJWXCBackupTool:
            - 错误章节标红显示
            
         4. 实时保存机制：
+           - 断点续传：章节日志中已有的章节直接复用，不再重新获取
+           - 增量备份：章节行指纹与上次备份一致的章节复用上次的正文
            - 创建初始文档结构立即保存
-           - 每添加一章节内容后保存
-           - 用户可随时打开查看进度
+           - 每章节只追加一行日志，成本不随作品长度增长
+           - 每checkpoint_interval章由渲染池从日志重新生成一次DOCX（写临时文件后原子替换），
+             上一次检查点尚未完成时跳过
+           - 全部完成后从日志按章节编号顺序生成最终DOCX
+           - 所有文档都已生成时，保存快照后删除章节日志（快照即保留的备份，取消后续传时从快照还原日志）
            - 避免程序中断导致数据丢失
            
         5. 文件命名：
+           - 按export_formats导出一种或多种格式（<作品名>.docx / .txt / .md / .jsonl / .epub）
            - 清理标题中的非法字符
            - 生成safe的文件名
            - 保存到backup/timestamp/目录
@@ -744,97 +954,382 @@ class JJWXCBackupTool:
            
         7. 进度显示：
            - 显示当前章节进度 [X/总数]
-           - 预估剩余时间
            - 章节获取状态反馈
+           - 多作品并行时每行带作品名前缀
         """
+        result = {'title': novel['title'], 'total': len(chapters), 'saved': 0, 'failed': 0, 'error': None}
         if not chapters:
             print(f"没有找到章节内容，跳过 {novel['title']}")
-            return
+            return result
+        
+        # 并行备份多部作品时，进度前加作品名区分
+        tag = f"[{novel['title']}] " if self._tag_progress else ""
+        
+        # 单独调用时创建自己的调度器，由backup_all_novels调用时共享同一个
+        owns_scheduler = self._render_pool is None
+        if owns_scheduler:
+            self._open_chapter_scheduler()
         
         try:
-            # 创建Word文档
-            doc = Document()
+            # 准备文件名和路径
+            filename = self._clean_filename(novel['title'])
+            base_path = os.path.join(self.output_dir, filename)
+            journal_path = os.path.join(self.output_dir, f"{filename}.journal.jsonl")
             
-            # 添加作品标题（最高级标题）
-            title_paragraph = doc.add_heading(novel['title'], level=0)
-            title_paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+            # 读取上次中断时的进度 - 续传状态只来自章节日志：每章保存时已追加并落盘，
+            # 日志中有内容的章节即已完成，不再另外维护续传清单
+            # （取消后已保存快照、日志已删除时，先从本次备份的快照还原日志）
+            self._restore_journal_from_snapshot(novel, journal_path)
+            journal_novel, journaled = ChapterJournal.index(journal_path)
+            completed_ids = set(journaled)
             
-            # 添加作品基本信息
-            info_paragraph = doc.add_paragraph()
-            info_paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+            # 获取作品简介（续传时沿用日志中的简介，保证与未中断时生成的文档一致）
+            if journal_novel is not None:
+                novel_intro = journal_novel.get('intro', "")
+            else:
+                novel_intro = self.get_intro_from_backend(novel['id'])
             
-            info_run = info_paragraph.add_run(
-                f"作品ID: {novel['id']} | "
-                f"字数: {novel.get('word_count', '未知')} | "
-                f"状态: {novel.get('status', '未知')}"
-            )
-            info_run.font.size = Pt(10)
+            # 按章节编号排序，保证文档中的章节顺序与获取完成的先后无关
+            ordered_chapters = [
+                chapter for _, chapter in sorted(
+                    enumerate(chapters),
+                    key=lambda item: item[1].get('chapter_number', item[0] + 1)
+                )
+            ]
             
-            # 获取作品简介并插入到状态下方
-            novel_intro = self.get_intro_from_backend(novel['id'])
-            if novel_intro:
-                intro_paragraph = doc.add_paragraph(novel_intro)
-                intro_paragraph.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                intro_paragraph.runs[0].font.size = Pt(11)
+            total_chapters = len(ordered_chapters)
+            pending_chapters = [
+                chapter for chapter in ordered_chapters
+                if str(chapter['id']) not in completed_ids
+            ]
+            print(f"{tag}开始处理: {novel['title']} ({total_chapters}章)")
+            self._report_progress('novel_started', novel_id=novel['id'], title=novel['title'],
+                                  total=total_chapters, done=len(completed_ids))
+            if completed_ids:
+                print(f"{tag}断点续传: 已完成 {total_chapters - len(pending_chapters)} 章，剩余 {len(pending_chapters)} 章")
+            for path in export_paths(base_path, self.export_formats).values():
+                print(f"{tag}文档将保存为: {path}")
             
-            # 添加分页符
-            doc.add_page_break()
+            # 获取失败的章节不写入日志，只在内存中记录错误信息
+            failures = {}
             
-            # 准备文件名和路径
-            filename = self._clean_filename(novel['title'])
-            filepath = os.path.join(self.output_dir, f"{filename}.docx")
+            with ChapterJournal(journal_path) as journal:
+                journal.write_novel(novel, novel_intro)
+                
+                # 增量备份：未变化的章节直接从上次的章节日志复制
+                if self.incremental and pending_chapters:
+                    pending_chapters = self._reuse_unchanged_chapters(
+                        novel, filename, pending_chapters, journal, completed_ids
+                    )
+                
+                # 先保存初始文档结构（失败只提示，完成时重新生成）
+                written, _ = self._submit_render(journal_path, ordered_chapters, failures, base_path).result()
+                if self._missing_exports(written, base_path):
+                    print(f"{tag}⚠ 初始文档未能全部生成，完成时重试")
+                else:
+                    print(f"{tag}✓ 已创建初始文档，可以打开查看")
+                
+                # 流水线：调度器获取页面 → 解析线程提取正文 → 本线程按完成顺序追加到日志
+                # （asyncio引擎整批交给事件循环获取和解析）
+                # DOCX检查点交给渲染池，上一次检查点尚未完成时跳过，不阻塞写入
+                if self._engine_executor is not None:
+                    pipeline = AsyncChapterBatch(
+                        self._engine_executor,
+                        fetch=lambda chapter: self._fetch_chapter_async(chapter, tag),
+                        parse=self.parse_chapter_page,
+                        depth=self.pipeline_depth,
+                        workers=self.max_workers
+                    )
+                else:
+                    pipeline = ChapterPipeline(
+                        self._scheduler, novel['id'],
+                        fetch=lambda chapter: self._scheduler_fetch(chapter, tag),
+                        parse=self.parse_chapter_page,
+                        depth=self.pipeline_depth
+                    )
+                render_future = None
+                try:
+                    results = pipeline.run(pending_chapters)
+                    for done_count, (chapter, content, error) in enumerate(results, len(completed_ids) + 1):
+                        if isinstance(error, CancelledError) or self.cancelled:
+                            # 调度器已关闭（用户中断）或备份已取消，剩余章节留给续传
+                            break
+                        if error is not None and not isinstance(error, Exception):
+                            raise error
+                        
+                        chapter_title = f"第{chapter.get('chapter_number', '?')}章 {chapter['title']}"
+                        if error is not None:
+                            failures[chapter['id']] = f"[章节内容获取失败: 内容获取失败：{error}]"
+                            print(f"{tag}✗ 获取失败: {chapter_title} [{done_count}/{total_chapters}]")
+                        elif self._is_valid_content(content):
+                            # 检查内容是否有效
+                            with self.metrics.timer('journal_write'):
+                                journal.write_chapter(chapter, content)
+                            completed_ids.add(str(chapter['id']))
+                            self._index_chapter(novel, chapter, content)
+                            print(f"{tag}✓ 已保存: {chapter_title} [{done_count}/{total_chapters}]")
+                        else:
+                            failures[chapter['id']] = f"[章节内容获取失败: {content}]"
+                            print(f"{tag}✗ 获取失败: {chapter_title} [{done_count}/{total_chapters}]")
+                        self._report_progress(
+                            'chapter', novel_id=novel['id'], title=novel['title'], chapter_id=chapter['id'],
+                            chapter_title=chapter_title, status='failed' if chapter['id'] in failures else 'saved',
+                            done=done_count, total=total_chapters
+                        )
+                        
+                        # 定期从日志生成DOCX检查点
+                        if (self.checkpoint_interval and done_count % self.checkpoint_interval == 0
+                                and done_count < total_chapters):
+                            if render_future is None or render_future.done():
+                                render_future = self._submit_render(
+                                    journal_path, ordered_chapters, failures, base_path
+                                )
+                                print(f"{tag}✓ 已提交文档检查点 [{done_count}/{total_chapters}]")
+                finally:
+                    # 中断或出错时取消本作品尚未开始的章节请求，不影响其他作品
+                    results.close()
             
-            total_chapters = len(chapters)
-            print(f"开始处理: {novel['title']} ({total_chapters}章)")
-            print(f"文档将保存为: {filepath}")
+            # 等待未完成的检查点，再从日志生成最终文档
+            if render_future is not None:
+                render_future.result()
+            written, _ = self._submit_render(journal_path, ordered_chapters, failures, base_path).result()
+            missing = self._missing_exports(written, base_path)
+            if missing:
+                print(f"{tag}✗ 文档未生成: {', '.join(missing)}（章节日志保留，可用 --resume 重新生成）")
+            else:
+                print(f"{tag}✓ 完成保存: {novel['title']}")
+            stored = self._store_snapshot(novel, novel_intro, journal_path, ordered_chapters, failures, tag)
+            self._update_catalog('record_journal', novel['id'], journal_path, self.run_id)
+            if stored and not missing:
+                # 快照即保留的备份，章节日志不再需要
+                os.remove(journal_path)
+            result['saved'] = len(completed_ids)
+            result['failed'] = len(failures)
+            if missing:
+                result['error'] = f"文档未生成: {', '.join(missing)}"
+            elif self.cancelled and result['saved'] + result['failed'] < total_chapters:
+                result['error'] = "已取消"
             
-            # 先保存初始文档结构
-            doc.save(filepath)
-            print(f"✓ 已创建初始文档，可以打开查看")
+        except Exception as e:
+            print(f"{tag}创建文档出错: {str(e)}")
+            result['error'] = str(e)
+        finally:
+            if owns_scheduler:
+                self._close_chapter_scheduler()
+        return result
+    
+    def _store_snapshot(self, novel, intro, journal_path, chapters, failures, tag=""):
+        """
+        把本次备份的章节保存到对象存储，并记录快照清单
+        
+        返回：
+            bool: 是否已保存快照（未使用对象存储或保存失败时为False，章节日志需要保留）
+        
+        说明：
+            快照以备份目录名命名，续传时覆盖同一快照；保存失败只提示，不影响已生成的文档
+        """
+        if self.object_store is None:
+            return False
+        try:
+            self.object_store.write_snapshot(self.run_id, novel, intro, chapters, journal_path, failures)
+            print(f"{tag}✓ 已保存快照: {novel['title']}")
+            return True
+        except Exception as e:
+            print(f"{tag}保存快照失败: {e}")
+            return False
+    
+    def _restore_journal_from_snapshot(self, novel, journal_path):
+        """
+        章节日志不存在而本次备份已有该作品的快照时（取消后续传），从快照还原日志
+        
+        说明：
+            快照中获取失败的章节不写入日志，续传时重新获取
+        """
+        if self.object_store is None or os.path.exists(journal_path):
+            return
+        snapshot_path = self.object_store.snapshot_path(novel['id'], self.run_id)
+        if not os.path.exists(snapshot_path):
+            return
+        self.object_store.restore_journal(self.object_store.load_snapshot(snapshot_path), journal_path)
+    
+    def _prune_old_backups(self):
+        """
+        删除较早的、已保存为快照的备份目录，只保留最近keep_backups个（失败只提示）
+        
+        说明：
+            正在使用的备份目录（包括续传的旧目录）不删除；删除的文档可用restore从快照重新生成
+        """
+        if self.object_store is None or not self.keep_backups:
+            return
+        backup_root = os.path.dirname(os.path.abspath(self.output_dir))
+        try:
+            removed = prune_backup_dirs(backup_root, self.object_store, keep=self.keep_backups,
+                                        exclude=(self.run_id,))
+        except Exception as e:
+            print(f"⚠ 清理旧备份目录失败: {e}")
+            return
+        for run_dir in removed:
+            print(f"已删除较早的备份目录（快照保留在{self.object_store.root}）: {run_dir}")
+        if removed:
+            print("可用 python tools/object_store.py restore <作品ID> --run <备份目录名> 重新生成文档")
+    
+    def _update_catalog(self, action, *args):
+        """调用作品目录的写入方法，失败只提示，不影响备份"""
+        if self.catalog is None:
+            return
+        try:
+            getattr(self.catalog, action)(*args)
+        except Exception as e:
+            print(f"更新作品目录失败: {e}")
+    
+    def _index_chapter(self, novel, chapter, content):
+        """更新章节的全文索引（正文未变化时跳过），失败只提示，不影响备份"""
+        if self.search_index is None:
+            return
+        try:
+            self.search_index.index_chapter(novel, chapter, content)
+        except Exception as e:
+            print(f"更新全文索引失败: {e}")
+    
+    def _find_previous_journal(self, filename, novel_id):
+        """
+        查找同一作品最近一次备份的章节日志
+        
+        参数：
+            filename (str): 清理后的作品文件名
+            novel_id (str): 作品ID（防止同名作品误用）
             
-            # 逐章节处理并实时保存
-            for idx, chapter in enumerate(chapters):
-                try:
-                    # 添加章节标题（带章节编号）
-                    chapter_title = f"第{chapter.get('chapter_number', idx+1)}章 {chapter['title']}"
-                    doc.add_heading(chapter_title, level=1)
-                    
-                    # 获取章节内容（统一后台方案）
-                    print(f"正在获取: {chapter_title} [{idx+1}/{total_chapters}]")
-                    content = self.get_chapter_content(chapter['link'])
-                    
-                    # 检查内容是否有效
-                    if content and not content.startswith("内容获取失败") and not content.startswith("章节链接无效"):
-                        self._add_content_to_doc(doc, content)
-                    else:
-                        # 内容获取失败的情况
-                        error_paragraph = doc.add_paragraph(f"[章节内容获取失败: {content}]")
-                        error_paragraph.runs[0].font.color.rgb = RGBColor(255, 0, 0)
-                    
-                    # 添加章节分隔符
-                    if idx < total_chapters - 1:
-                        doc.add_paragraph()
-                        separator = doc.add_paragraph("─" * 50)
-                        separator.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
-                        doc.add_paragraph()
-                    
-                    # 实时保存文档
-                    doc.save(filepath)
-                    print(f"✓ 已保存 [{idx+1}/{total_chapters}]")
-                    
-                except Exception as e:
-                    print(f"处理章节出错: {str(e)}")
-                    error_paragraph = doc.add_paragraph(f"[章节处理错误: {chapter['title']} - {str(e)}]")
-                    error_paragraph.runs[0].font.color.rgb = RGBColor(255, 0, 0)
-                    doc.save(filepath)
-                
-                # 延迟避免请求过快
-                time.sleep(random.uniform(1.0, 2.0))
+        返回：
+            str: 章节日志路径，未找到时返回None
+        """
+        backup_root = os.path.dirname(os.path.abspath(self.output_dir))
+        current_dir = os.path.basename(os.path.abspath(self.output_dir))
+        if not os.path.isdir(backup_root):
+            return None
+        
+        # 时间戳目录名按字典序即按时间排序，从最近的开始查找
+        for name in sorted(os.listdir(backup_root), reverse=True):
+            if name == current_dir:
+                continue
+            journal_path = os.path.join(backup_root, name, f"{filename}.journal.jsonl")
+            if not os.path.exists(journal_path):
+                continue
+            novel_record, _ = ChapterJournal.read(journal_path)
+            if novel_record and str(novel_record['novel'].get('id')) == str(novel_id):
+                return journal_path
+        return None
+    
+    def _reuse_unchanged_chapters(self, novel, filename, chapters, journal, completed_ids):
+        """
+        增量备份：复用上次备份中未变化的章节
+        
+        参数：
+            novel (dict): 作品信息
+            filename (str): 清理后的作品文件名
+            chapters (list): 待获取的章节列表
+            journal (ChapterJournal): 本次备份的章节日志
+            completed_ids (set): 已完成章节ID集合（复用的章节会加入）
             
-            print(f"✓ 完成保存: {novel['title']}")
+        返回：
+            list: 仍需从后台获取的章节（新增或已修改）
             
-        except Exception as e:
-            print(f"创建文档出错: {str(e)}")
+        判断规则：
+        - 章节ID相同且章节行指纹(row_hash)一致，视为未修改
+        - 没有指纹的章节（备用方案生成的列表）一律重新获取
+        - 上次的备份目录已被清理时，改用对象存储中该作品最近的快照
+        """
+        previous_path = self._find_previous_journal(filename, novel['id'])
+        if previous_path:
+            _, records = ChapterJournal.read(previous_path)
+            previous = {chapter_id: (record.get('row_hash'), record['content'])
+                        for chapter_id, record in records.items()}
+            source = previous_path
+        else:
+            snapshot = None
+            if self.object_store is not None:
+                snapshot = self.object_store.latest_snapshot(
+                    novel['id'], exclude_run=self.run_id
+                )
+            if snapshot is None:
+                print("增量备份: 未找到上次备份，获取全部章节")
+                return chapters
+            # 快照中的正文按需读取，只解压指纹一致的章节
+            previous = {entry['id']: (entry.get('row_hash'), entry)
+                        for entry in snapshot['chapters'] if entry.get('body') is not None}
+            source = f"快照 {snapshot['run']}"
+        
+        to_fetch = []
+        for chapter in chapters:
+            row_hash, content = previous.get(str(chapter['id']), (None, None))
+            if content is not None and chapter.get('row_hash') and row_hash == chapter['row_hash']:
+                if isinstance(content, dict):
+                    content = self.object_store.chapter_content(content)
+                journal.write_chapter(chapter, content)
+                completed_ids.add(str(chapter['id']))
+                self._index_chapter(novel, chapter, content)
+            else:
+                to_fetch.append(chapter)
+        
+        print(f"增量备份: 复用 {len(chapters) - len(to_fetch)} 章（来自 {source}），"
+              f"需获取 {len(to_fetch)} 章")
+        return to_fetch
+    
+    def _is_valid_content(self, content):
+        """判断章节内容是否获取成功"""
+        return bool(content) and not content.startswith("内容获取失败") and not content.startswith("章节链接无效")
+    
+    def _fetch_chapter_worker(self, chapter, tag=""):
+        """
+        工作线程：获取单个章节的后台页面
+        
+        参数：
+            chapter (dict): 章节信息字典
+            tag (str): 进度输出前缀（多作品并行时为作品名）
+            
+        返回：
+            bytes: 页面原始内容（解析在流水线的解析阶段进行）
+            
+        说明：
+            使用线程专用Session请求，请求速率由全局限速器控制；请求失败时抛出异常
+        """
+        print(f"{tag}正在获取: 第{chapter.get('chapter_number', '?')}章 {chapter['title']}")
+        return self.fetch_chapter_page(chapter['link'], session=self._get_worker_session())
+    
+    async def _fetch_chapter_async(self, chapter, tag=""):
+        """
+        事件循环：通过异步引擎获取单个章节的后台页面（设置了自适应并发时先在上限内排队）
+        
+        说明：
+            与_fetch_chapter_limited相同，返回登录页面时在这里报告给自适应并发上限
+        """
+        engine = self._engine_executor.engine
+        limiter = self.concurrency_limiter
+        if limiter is not None:
+            await limiter.acquire_async()
+        try:
+            print(f"{tag}正在获取: 第{chapter.get('chapter_number', '?')}章 {chapter['title']}")
+            started = time.perf_counter()
+            page = await engine.fetch_chapter_page(chapter['link'])
+        finally:
+            if limiter is not None:
+                limiter.release()
+        if limiter is not None and is_login_page(page):
+            limiter.observe(time.perf_counter() - started, 'logged_out')
+        return page
+    
+    def _fetch_chapter_limited(self, chapter, tag=""):
+        """
+        调度器线程：在自适应并发上限内获取单个章节的后台页面
+        
+        说明：
+            请求耗时和429/5xx、超时由请求层报告；返回登录页面（Cookie失效或后台限流）时在这里报告
+        """
+        with self.concurrency_limiter:
+            started = time.perf_counter()
+            page = self._fetch_chapter_worker(chapter, tag)
+        if is_login_page(page):
+            self.concurrency_limiter.observe(time.perf_counter() - started, 'logged_out')
+        return page
     
     def _clean_filename(self, filename):
         """清理文件名中的非法字符"""
@@ -848,75 +1343,8 @@ class JJWXCBackupTool:
         return filename
     
     def _add_content_to_doc(self, doc, content):
-        """
-        将章节内容添加到DOCX文档中（格式保留版）
-        
-        参数：
-            doc: python-docx Document对象
-            content (str): 章节完整内容
-            
-        功能：
-        1. 内容分离：
-           - 以【作者有话说】为分界点
-           - 分离正文和作者有话说两部分
-           - 去除首尾空白但保留内部格式
-           
-        2. 正文处理：
-           - 按换行符(\n)分割为行
-           - 每行创建独立段落
-           - 完整保留空行（空段落）
-           - 不做任何文本清理或去空格
-           
-        3. 作者有话说处理：
-           - 添加蓝色二级标题"作者有话说"
-           - 同样按行处理内容
-           - 保持与正文相同的格式处理方式
-           
-        格式保留策略（核心）：
-        - split('\n')：严格按换行符分割
-        - 不使用strip()：保留每行原始内容
-        - 空行处理：创建空段落保持版式
-        - 段落独立：每行一个段落确保换行效果
-        
-        与之前版本区别：
-        - 旧版：复杂的段落和换行处理，容易丢失格式
-        - 新版：简单的行级处理，完美保留原始格式
-        
-        使用场景：
-        - VIP章节：保留从后台获取的原始格式
-        - 免费章节：保留从页面解析的格式
-        - 作者有话说：保留特殊格式和换行
-        """
-        # 分离正文和作者有话说
-        main_text = ""
-        author_notes = ""
-        
-        if '【作者有话说】' in content:
-            parts = content.split('【作者有话说】', 1)
-            main_text = parts[0].strip()
-            if len(parts) > 1:
-                author_notes = parts[1].strip()
-        else:
-            main_text = content.strip()
-        
-        # 添加正文内容
-        if main_text:
-            # 按行分割，保留所有换行符和空行
-            lines = main_text.split('\n')
-            for line in lines:
-                # 保留原始内容，包括空行
-                doc.add_paragraph(line)
-        
-        # 添加作者有话说部分
-        if author_notes:
-            author_heading = doc.add_heading('作者有话说', level=2)
-            author_heading.runs[0].font.color.rgb = RGBColor(0, 0, 255)
-            
-            # 按行分割，保留所有换行符和空行
-            lines = author_notes.split('\n')
-            for line in lines:
-                # 保留原始内容，包括空行
-                doc.add_paragraph(line)
+        """将章节内容添加到DOCX文档中，见docx_render.add_content_to_doc"""
+        add_content_to_doc(doc, content)
     
     def select_novels_to_backup(self, novels):
         """用户选择要备份的作品"""
@@ -980,7 +1408,12 @@ class JJWXCBackupTool:
                 print(f"输入错误: {e}，请重新输入")
     
     def backup_all_novels(self):
-        """备份作品主流程"""
+        """
+        备份作品主流程
+        
+        返回：
+            list: 各作品的备份结果；没有获取到作品列表时返回None，没有选中任何作品时返回空列表
+        """
         print("正在初始化...")
         
         # 检查登录状态
@@ -995,47 +1428,169 @@ class JJWXCBackupTool:
             return
         
         print(f"✓ 成功获取 {len(novels)} 部作品")
+        self._update_catalog('upsert_novels', novels)
         
-        # 用户选择要备份的作品
-        selected_novels = self.select_novels_to_backup(novels)
+        # 用户选择要备份的作品（设置了novel_filter时不询问）
+        if self.novel_filter is not None:
+            selected_novels = self.novel_filter(novels)
+        else:
+            selected_novels = self.select_novels_to_backup(novels)
         if not selected_novels:
-            return
+            return []
         
         # 保存作品列表信息
         with open(os.path.join(self.output_dir, "作品列表.json"), "w", encoding="utf-8") as f:
             json.dump(selected_novels, f, ensure_ascii=False, indent=2)
         
         total_novels = len(selected_novels)
+        self._report_progress('run_started', output_dir=self.output_dir,
+                              novels=[{'id': novel['id'], 'title': novel['title']} for novel in selected_novels])
         print(f"\n{'='*50}")
         print(f"开始备份 {total_novels} 部作品")
         print(f"{'='*50}")
         
-        # 备份每部作品
-        for idx, novel in enumerate(selected_novels):
-            print(f"\n▶ [{idx+1}/{total_novels}] 开始备份: {novel['title']}")
-            
-            # 获取章节列表
-            chapters = self.get_chapters(novel['link'])
-            
-            if chapters:
-                # 创建DOCX文件
-                self.create_docx_with_realtime_save(novel, chapters)
-            else:
-                print(f"❌ 未找到章节，跳过: {novel['title']}")
-            
-            # 作品间延迟
-            if idx < total_novels - 1:
-                delay = random.uniform(2.0, 4.0)
-                print(f"等待 {delay:.1f} 秒后继续...")
-                time.sleep(delay)
+        # 多部作品同时备份，章节请求共享同一个调度器和限速器
+        novel_workers = min(self.novel_concurrency, total_novels)
+        self._tag_progress = novel_workers > 1
+        if novel_workers > 1:
+            print(f"同时备份 {novel_workers} 部作品，章节请求按作品轮流发送")
+        self._open_chapter_scheduler()
+        novel_executor = ThreadPoolExecutor(max_workers=novel_workers)
+        
+        results = [None] * total_novels
+        self._update_catalog('begin_run', self.run_id, self.output_dir)
+        run_status = 'interrupted'
+        try:
+            futures = {
+                novel_executor.submit(self._backup_one_novel, idx, total_novels, novel): (idx, novel)
+                for idx, novel in enumerate(selected_novels)
+            }
+            for finished, future in enumerate(as_completed(futures), 1):
+                idx, novel = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 单部作品出错不影响其他作品
+                    result = {'title': novel['title'], 'total': 0, 'saved': 0, 'failed': 0, 'error': str(e)}
+                    print(f"❌ 备份出错: {novel['title']} - {e}")
+                    self._update_catalog('record_novel_result', self.run_id, novel['id'], result)
+                results[idx] = result
+                print(f"▶ 作品进度: [{finished}/{total_novels}] {self._format_novel_result(result)}")
+            run_status = 'cancelled' if self.cancelled else 'completed'
+        except KeyboardInterrupt:
+            print(f"\n已保存的章节都在章节日志中，可使用 --resume {self.output_dir} 继续备份")
+            raise
+        except Exception:
+            run_status = 'failed'
+            raise
+        finally:
+            if run_status in ('interrupted', 'failed'):
+                # 中断或出错时各作品在已发出的章节请求完成后停止，尚未开始的作品跳过
+                self.cancel()
+            # 等作品线程用已保存的章节生成文档并退出后，再关闭调度器和渲染池
+            novel_executor.shutdown(wait=True, cancel_futures=True)
+            self._close_chapter_scheduler()
+            self._update_catalog('finish_run', self.run_id, run_status)
+            # 渲染池关闭后所有渲染耗时都已记录
+            report = self.write_metrics_report(results, run_status)
+            self._tag_progress = False
+            if run_status == 'completed':
+                self._prune_old_backups()
         
         print(f"\n{'='*50}")
         print(f"🎉 备份完成！文件已保存到: {self.output_dir}")
+        for result in results:
+            print(f"  - {self._format_novel_result(result)}")
+        if report is not None:
+            print(f"{'-'*50}")
+            print(format_summary(report))
         print(f"{'='*50}")
+        return results
+    
+    def write_metrics_report(self, results=None, status=None):
+        """
+        把本次运行的指标写入备份目录（metrics.json，可选metrics.prom）
+        
+        参数：
+            results (list): 各作品的备份结果（未完成的作品为None）
+            status (str): 运行状态（completed / cancelled / interrupted / failed）
+            
+        返回：
+            dict: 报告内容，写入失败时返回None（只提示，不影响备份结果）
+        """
+        finished = [result for result in (results or []) if result is not None]
+        extra = {
+            'run_id': self.run_id,
+            'status': status,
+            'settings': {
+                'fetch_engine': self.fetch_engine,
+                'max_workers': self.max_workers,
+                'novel_concurrency': self.novel_concurrency,
+                'pipeline_depth': self.pipeline_depth,
+                'render_processes': self.render_processes,
+                'parser_backend': self.parser_backend,
+                'docx_engine': self.docx_engine,
+                'export_formats': list(self.export_formats),
+                'adaptive_concurrency': self.concurrency_limiter is not None,
+            },
+            'chapters': {
+                'total': sum(result['total'] for result in finished),
+                'saved': sum(result['saved'] for result in finished),
+                'failed': sum(result['failed'] for result in finished),
+            },
+            'novels': finished,
+        }
+        if self.concurrency_limiter is not None:
+            extra['concurrency'] = self.concurrency_limiter.summary()
+        try:
+            return self.metrics.write_report(self.output_dir, prometheus=self.metrics_prometheus, extra=extra)
+        except Exception as e:
+            print(f"⚠ 运行指标保存失败: {e}")
+            return None
+    
+    def _backup_one_novel(self, idx, total_novels, novel):
+        """
+        备份单部作品（在作品线程中执行）
+        
+        返回：
+            dict: 备份结果，格式同create_docx_with_realtime_save
+        """
+        if self.cancelled:
+            # 已取消的备份不再开始新作品（不记录到作品目录）
+            result = {'title': novel['title'], 'total': 0, 'saved': 0, 'failed': 0, 'error': "已取消"}
+            self._report_progress('novel_finished', novel_id=novel['id'], **result)
+            return result
+        
+        print(f"\n▶ [{idx+1}/{total_novels}] 开始备份: {novel['title']}")
+        started = time.time()
+        
+        # 获取章节列表
+        chapters = self.get_chapters(novel['link'])
+        
+        if not chapters:
+            print(f"❌ 未找到章节，跳过: {novel['title']}")
+            result = {'title': novel['title'], 'total': 0, 'saved': 0, 'failed': 0, 'error': "未找到章节"}
+        else:
+            self._update_catalog('upsert_chapters', novel['id'], chapters, self.run_id)
+            # 创建DOCX文件
+            result = self.create_docx_with_realtime_save(novel, chapters)
+        
+        self._update_catalog('record_novel_result', self.run_id, novel['id'], result, time.time() - started)
+        self._report_progress('novel_finished', novel_id=novel['id'], **result)
+        return result
+    
+    def _format_novel_result(self, result):
+        """格式化单部作品的备份结果"""
+        if result['error']:
+            return f"❌ {result['title']}: {result['error']}"
+        status = "✓" if not result['failed'] else "⚠"
+        text = f"{status} {result['title']}: {result['saved']}/{result['total']} 章"
+        if result['failed']:
+            text += f"，失败 {result['failed']} 章"
+        return text
 
 
-if __name__ == "__main__":
-    print("""
+BANNER = """
     ╔════════════════════════════════════════════════════════════════╗
     ║                  晋江文学城作品备份工具 v5.0                   ║
     ║                     (优化版 - 支持选择备份)                    ║
@@ -1046,39 +1601,231 @@ if __name__ == "__main__":
     ║  • 实时保存，边下载边生成DOCX文件                             ║
     ║  • 完整保留正文格式和作者有话说                               ║
     ║  • 自动添加章节编号和层级标题                                 ║
+    ║  • 中断后可用 --resume <目录> 继续，已完成章节不再下载         ║
     ║                                                                ║
     ║  使用方法:                                                     ║
     ║  1. 准备Cookie: 登录晋江→F12→Network→复制Cookie到txt文件     ║
     ║  2. 运行程序: python jjwxc_col.py                            ║
     ║  3. 选择作品: 根据提示选择要备份的作品                        ║
     ║  4. 查看结果: 备份完成后查看生成的DOCX文件                   ║
+    ║  定时任务: python jjwxc_col.py --all --quiet（无需交互）      ║
     ╚════════════════════════════════════════════════════════════════╝
-    """)
-    
-    # 检查Cookie文件
-    if not os.path.exists(COOKIE_FILE):
-        print(f"❌ 未找到 {COOKIE_FILE} 文件")
-        print("\n📝 Cookie获取步骤:")
-        print("1. 使用浏览器登录晋江文学城作者后台")
-        print("2. 按F12打开开发者工具")
-        print("3. 切换到Network(网络)选项卡")
-        print("4. 刷新页面，点击任意请求")
-        print("5. 在Request Headers中找到'Cookie'字段")
-        print("6. 复制完整的Cookie值")
-        print(f"7. 创建 {COOKIE_FILE} 文件，粘贴Cookie内容并保存")
-        print("\n按回车键退出...")
-        input()
-        exit(1)
-    
-    # 启动备份工具
-    try:
-        tool = JJWXCBackupTool()
-        tool.backup_all_novels()
-    except KeyboardInterrupt:
-        print("\n\n用户中断程序")
-    except Exception as e:
-        print(f"\n程序运行出错: {e}")
-        print("请检查网络连接和Cookie是否有效")
-    finally:
+    """
+
+
+def _split_values(values):
+    """把可重复、逗号分隔的参数值展开为列表"""
+    return [item.strip() for value in values or () for item in value.split(',') if item.strip()]
+
+
+def build_arg_parser():
+    """创建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        description="晋江文学城作品备份工具",
+        epilog="退出码：0 全部成功，1 部分失败，2 参数错误，3 未登录，4 没有匹配的作品，5 运行出错，130 中断。"
+               "不指定作品选择参数时交互选择（需要终端）；多个账号请使用tools/multi_account.py"
+    )
+    selection = parser.add_argument_group("作品选择（指定任意一项即不再交互询问）")
+    selection.add_argument('--all', action='store_true', help="备份全部作品")
+    selection.add_argument('--novel-id', action='append', metavar='ID',
+                           help="按作品ID或作品链接选择，可重复或逗号分隔")
+    selection.add_argument('--title', action='append', metavar='TEXT', help="书名包含的文字，可重复")
+    selection.add_argument('--status', action='append', metavar='TEXT', help="状态包含的文字（如 连载、完结），可重复")
+
+    concurrency = parser.add_argument_group("并发和限速")
+    concurrency.add_argument('--max-workers', type=int, default=4, metavar='N',
+                             help="同时获取的最大章节数，默认4（--adaptive时为自动调整的上限）")
+    concurrency.add_argument('--adaptive', action='store_true',
+                             help="按请求耗时和错误自动调整并发：正常时逐步增加，超时、429/5xx或登录失效时减半")
+    concurrency.add_argument('--novels', type=int, default=3, metavar='N',
+                             help="同时备份的作品数，默认3（总请求速率不变）")
+    concurrency.add_argument('--engine', default='threads', choices=('threads', 'asyncio'),
+                             help="章节获取引擎，asyncio需要安装aiohttp（默认threads）")
+    concurrency.add_argument('--rps', type=float, default=DEFAULT_REQUESTS_PER_SECOND, metavar='N',
+                             help=f"每秒最多请求数（默认{DEFAULT_REQUESTS_PER_SECOND}，与原来每章节之后等待1~2秒相当）")
+    concurrency.add_argument('--burst', type=int, default=DEFAULT_BURST, metavar='N',
+                             help=f"允许的突发请求数（默认{DEFAULT_BURST}）")
+    concurrency.add_argument('--jitter', type=float, default=0.25, metavar='SECONDS',
+                             help="每次请求额外随机等待的上限（秒，默认0.25）")
+    concurrency.add_argument('--retries', type=int, default=3, metavar='N',
+                             help="连接失败、超时或429/5xx时每个请求最多重试的次数（默认3，0为不重试）")
+    concurrency.add_argument('--deadline', type=float, default=120, metavar='SECONDS',
+                             help="每个请求含重试和暂停等待的总期限（秒，默认120）")
+
+    output = parser.add_argument_group("输出")
+    output.add_argument('--output-dir', default="backup", metavar='DIR',
+                        help="备份根目录（默认backup，每次运行在其中创建时间戳目录）")
+    output.add_argument('--formats', default=','.join(DEFAULT_EXPORT_FORMATS), metavar='LIST',
+                        help=f"导出格式，逗号分隔，可选 {','.join(EXPORT_FORMATS)}（默认docx）")
+    output.add_argument('--docx-engine', default=DEFAULT_DOCX_ENGINE, choices=DOCX_ENGINES,
+                        help="DOCX生成方式，stream为流式写入（内存占用小），python-docx为逐段落构建")
+    output.add_argument('--render-processes', type=int, default=0, metavar='N',
+                        help="DOCX渲染进程数，默认0即在后台线程中渲染")
+    output.add_argument('--resume', metavar='DIR', help="继续之前中断的备份目录（如 backup/20250101_120000）")
+    output.add_argument('--incremental', action='store_true', help="增量备份：只获取新增或修改过的章节")
+    output.add_argument('--no-store', action='store_true', help="不把本次备份保存到对象存储（<备份根目录>/.store）")
+    output.add_argument('--keep-backups', type=int, default=0, metavar='N',
+                        help="备份完成后保留最近N个备份目录，更早的只保留快照（默认0为不删除）")
+    output.add_argument('--no-catalog', action='store_true',
+                        help="不把本次备份记录到作品目录（<备份根目录>/catalog.sqlite3）")
+    output.add_argument('--no-index', action='store_true', help="不更新全文索引（<备份根目录>/search.sqlite3）")
+    output.add_argument('--metrics-prom', action='store_true',
+                        help="运行结束时除metrics.json外再写入Prometheus文本格式（metrics.prom）")
+    output.add_argument('-q', '--quiet', action='store_true',
+                        help="不输出进度，只输出每部作品的结果和错误（适合定时任务）")
+
+    other = parser.add_argument_group("其他")
+    other.add_argument('--cookie', default=COOKIE_FILE, metavar='FILE', help=f"Cookie文件（默认{COOKIE_FILE}）")
+    other.add_argument('--base-url', default=DEFAULT_BASE_URL, metavar='URL',
+                       help="作者后台地址（默认https://my.jjwxc.net，可指向tests/fake_jjwxc_server.py）")
+    other.add_argument('--parser', default=DEFAULT_PARSER_BACKEND, choices=PARSER_BACKENDS,
+                       help="HTML解析后端，lxml速度最快（需要安装lxml）")
+    other.add_argument('--no-cache', action='store_true', help="绕过磁盘响应缓存，所有页面都完整下载")
+    other.add_argument('--cache-ttl', type=float, default=0, metavar='SECONDS',
+                       help="缓存免确认有效期（秒），默认0即每次发送条件请求")
+    other.add_argument('--cache-chapters', action='store_true',
+                       help="章节编辑页面也经过响应缓存（默认只缓存作品列表和作品管理页面）")
+    return parser
+
+
+def _print_cookie_help(cookie_file):
+    """缺少Cookie文件时的说明（输出到stderr）"""
+    lines = [
+        f"❌ 未找到 {cookie_file} 文件",
+        "\n📝 Cookie获取步骤:",
+        "1. 使用浏览器登录晋江文学城作者后台",
+        "2. 按F12打开开发者工具",
+        "3. 切换到Network(网络)选项卡",
+        "4. 刷新页面，点击任意请求",
+        "5. 在Request Headers中找到'Cookie'字段",
+        "6. 复制完整的Cookie值",
+        f"7. 创建 {cookie_file} 文件，粘贴Cookie内容并保存",
+    ]
+    print('\n'.join(lines), file=sys.stderr)
+
+
+def results_exit_code(results):
+    """
+    根据backup_all_novels的返回值计算退出码
+
+    返回：
+        int: EXIT_LOGIN_FAILED（没有作品列表）/ EXIT_NO_MATCH（没有选中作品）/
+             EXIT_PARTIAL（有作品出错或章节失败）/ EXIT_OK
+    """
+    if results is None:
+        return EXIT_LOGIN_FAILED
+    if not results:
+        return EXIT_NO_MATCH
+    if any(result is None or result['error'] or result['failed'] for result in results):
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+
+def main(argv=None):
+    """
+    命令行入口
+
+    参数：
+        argv (list): 命令行参数（默认sys.argv[1:]）
+
+    返回：
+        int: 退出码（EXIT_*）
+
+    说明：
+    - 指定--all、--novel-id、--title或--status时不读取标准输入，可用于cron / systemd定时任务
+    - 未指定时交互选择作品，结束后等待回车；此时标准输入必须是终端
+    - --quiet时进度输出被丢弃，只在最后输出每部作品的结果，错误输出到stderr
+    """
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    novel_ids = _split_values(args.novel_id)
+    if args.all and (novel_ids or args.title or args.status):
+        parser.error("--all 不能与 --novel-id / --title / --status 同时使用")
+    interactive = not (args.all or novel_ids or args.title or args.status)
+    if interactive and not sys.stdin.isatty():
+        print("❌ 非交互运行时需要指定 --all、--novel-id、--title 或 --status", file=sys.stderr)
+        return EXIT_USAGE
+
+    if interactive:
+        print(BANNER)
+    if not os.path.exists(args.cookie):
+        _print_cookie_help(args.cookie)
+        return EXIT_USAGE
+
+    novel_filter = None
+    if not interactive:
+        novel_filter = build_novel_filter(novel_ids, _split_values(args.title), _split_values(args.status))
+
+    tool = None
+    exit_code = EXIT_ERROR
+    with contextlib.ExitStack() as stack:
+        if args.quiet:
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+        # 只有参数错误（格式、引擎、续传目录等在创建工具时检查）按用法错误退出
+        try:
+            tool = JJWXCBackupTool(
+                cookie_file=args.cookie,
+                output_root=args.output_dir,
+                novel_filter=novel_filter,
+                max_workers=args.max_workers,
+                adaptive_concurrency=args.adaptive,
+                fetch_engine=args.engine,
+                requests_per_second=args.rps,
+                burst=args.burst,
+                jitter=args.jitter,
+                resume_dir=args.resume,
+                incremental=args.incremental,
+                use_http_cache=not args.no_cache,
+                http_cache_ttl=args.cache_ttl,
+                cache_chapter_pages=args.cache_chapters,
+                parser_backend=args.parser,
+                novel_concurrency=args.novels,
+                render_processes=args.render_processes,
+                docx_engine=args.docx_engine,
+                export_formats=args.formats,
+                use_object_store=not args.no_store,
+                keep_backups=args.keep_backups,
+                use_catalog=not args.no_catalog,
+                use_search_index=not args.no_index,
+                base_url=args.base_url,
+                metrics_prometheus=args.metrics_prom,
+                retry_policy=RetryPolicy(max_attempts=args.retries + 1, deadline=args.deadline)
+            )
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            exit_code = EXIT_USAGE
+
+        results = None
+        if tool is not None:
+            # 运行中的错误（包括ValueError）都按运行出错退出，并保留调用栈
+            try:
+                # 未登录时作品列表为空，backup_all_novels返回None
+                results = tool.backup_all_novels()
+                exit_code = results_exit_code(results)
+            except KeyboardInterrupt:
+                print("\n\n用户中断程序", file=sys.stderr)
+                exit_code = EXIT_INTERRUPTED
+            except Exception as e:
+                traceback.print_exc(file=sys.stderr)
+                print(f"\n程序运行出错: {e}", file=sys.stderr)
+                print("请检查网络连接和Cookie是否有效", file=sys.stderr)
+                exit_code = EXIT_ERROR
+
+    if exit_code == EXIT_LOGIN_FAILED:
+        print("❌ 未登录晋江作者后台或没有获取到作品列表，请检查Cookie是否有效", file=sys.stderr)
+    elif exit_code == EXIT_NO_MATCH:
+        print("❌ 没有选中任何作品", file=sys.stderr)
+    if args.quiet and results:
+        for result in results:
+            if result is not None:
+                print(tool._format_novel_result(result))
+        print(f"输出目录: {tool.output_dir}")
+
+    if interactive:
         print("\n程序结束，按回车键退出...")
-        input()
\ No newline at end of file
+        input()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+晋江作者后台页面解析函数
+
+功能：将后台页面的原始字节解析为作品、章节和正文数据
+
+说明：
+- 只负责解析，不发起任何网络请求
+- 同步的JJWXCBackupTool与异步的AsyncJJWXCEngine共用这些函数，
+  保证两条获取路径得到完全相同的解析结果
+- 解析后端可选（html.parser / lxml / html5lib），页面字节只按gb18030解码一次，
+  BeautifulSoup不再重复检测编码
+"""
+import re
+import html
+import html.entities
+import hashlib
+from bs4 import BeautifulSoup, FeatureNotFound
+
+PAGE_ENCODING = 'gb18030'  # 晋江使用gb18030编码
+
+# 可选的解析后端（BeautifulSoup树构建器名称），lxml和html5lib需要额外安装
+PARSER_BACKENDS = ('html.parser', 'lxml', 'html5lib')
+DEFAULT_PARSER_BACKEND = 'html.parser'
+
+# 作者后台地址（测试时可指向本地模拟服务器，见tests/fake_jjwxc_server.py）
+DEFAULT_BASE_URL = 'https://my.jjwxc.net'
+
+
+def available_parser_backends():
+    """返回当前环境中已安装的解析后端"""
+    available = []
+    for backend in PARSER_BACKENDS:
+        try:
+            BeautifulSoup('', backend)
+        except FeatureNotFound:
+            continue
+        available.append(backend)
+    return available
+
+
+def decode_page(content):
+    """将页面字节按gb18030解码为字符串（已是字符串时原样返回）"""
+    if isinstance(content, bytes):
+        return content.decode(PAGE_ENCODING, errors='replace')
+    return content
+
+
+# 登录页面的提示文字（Cookie失效时后台页面返回登录页面，状态码仍为200）
+LOGIN_MARKERS = ('请登录', '登录晋江作者后台')
+_LOGIN_MARKER_BYTES = tuple(marker.encode(PAGE_ENCODING) for marker in LOGIN_MARKERS)
+
+
+def is_login_page(content):
+    """
+    判断章节编辑页面是否为登录页面（不构建解析树）
+
+    说明：
+        章节编辑页面一定有正文输入框，有输入框时不按登录页面处理
+    """
+    if isinstance(content, bytes):
+        markers, textarea = _LOGIN_MARKER_BYTES, b'<textarea'
+    else:
+        markers, textarea = LOGIN_MARKERS, '<textarea'
+    return textarea not in content and any(marker in content for marker in markers)
+
+
+def make_soup(content, backend=None):
+    """
+    构建解析树
+
+    参数：
+        content (bytes|str|BeautifulSoup): 页面原始字节、已解码的字符串或已构建的解析树
+        backend (str): 解析后端，默认html.parser
+
+    返回：
+        BeautifulSoup: 解析树（传入解析树时原样返回，便于同一页面多次提取）
+    """
+    if isinstance(content, BeautifulSoup):
+        return content
+    backend = backend or DEFAULT_PARSER_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"未知的解析后端: {backend}")
+    return BeautifulSoup(decode_page(content), backend)
+
+
+def extract_novel_id(novel_link):
+    """从作品链接中提取novelid，失败返回None"""
+    novel_id_match = re.search(r'novelid=(\d+)', novel_link or '')
+    return novel_id_match.group(1) if novel_id_match else None
+
+
+def backend_url(page, base_url=None):
+    """
+    拼接作者后台页面地址
+
+    参数：
+        page (str): 后台页面（如 'managenovel.php?novelid=1'）
+        base_url (str): 后台地址（默认DEFAULT_BASE_URL）
+    """
+    return f"{(base_url or DEFAULT_BASE_URL).rstrip('/')}/backend/{page}"
+
+
+def build_chapter_edit_url(chapter_link, base_url=None):
+    """
+    将章节链接统一转换为后台编辑页面链接
+
+    参数：
+        chapter_link (str): 章节链接（前台阅读链接或后台编辑链接）
+        base_url (str): 后台地址（默认DEFAULT_BASE_URL）
+
+    返回：
+        str: chaptermodify.php链接，无法提取章节信息时返回None
+    """
+    if 'chaptermodify.php' in chapter_link:
+        return chapter_link
+
+    # 从原始链接提取novelid和chapterid
+    novel_id_match = re.search(r'novelid=(\d+)', chapter_link)
+    chapter_id_match = re.search(r'chapterid=(\d+)', chapter_link)
+
+    if not novel_id_match or not chapter_id_match:
+        return None
+
+    novel_id = novel_id_match.group(1)
+    chapter_id = chapter_id_match.group(1)
+
+    # 构建后台编辑页面链接
+    return backend_url(f"chaptermodify.php?novelid={novel_id}&chapterid={chapter_id}", base_url)
+
+
+# 章节表格中与章节内容有关的列（表头包含其中的文字）：标题、内容提要、字数、更新时间
+# 点击、评论、收藏等计数列每天都在变化，不参与指纹
+FINGERPRINT_COLUMNS = ('标题', '提要', '字数', '时间')
+_DATETIME_CELL = re.compile(r'\d{4}-\d{1,2}-\d{1,2}')
+
+
+def _fingerprint_columns(row):
+    """
+    根据表头找出参与指纹的列序号
+
+    返回：
+        list: 列序号，表格没有表头或表头中没有相关列时返回None
+    """
+    table = row.find_parent('table')
+    header = table.find('th') if table is not None else None
+    if header is None:
+        return None
+    names = [th.get_text(strip=True) for th in header.find_parent('tr').find_all('th')]
+    columns = [index for index, name in enumerate(names) if any(key in name for key in FINGERPRINT_COLUMNS)]
+    return columns or None
+
+
+def row_fingerprint(row):
+    """
+    计算章节表格行的指纹
+
+    参数：
+        row: 章节所在的<tr>元素（可为None）
+
+    返回：
+        str: 与章节内容有关的单元格文本的SHA-1，row为None时返回None
+
+    说明：
+    - 作者修改章节后该行的字数或更新时间随之变化，增量备份据此判断章节是否需要重新获取
+    - 只使用表头为标题、内容提要、字数、更新时间的列；点击、评论、收藏等计数变化不影响指纹
+    - 表格没有表头时只使用标题链接和日期时间单元格
+    """
+    if row is None:
+        return None
+    cells = row.find_all('td')
+    columns = _fingerprint_columns(row)
+    if columns is not None:
+        parts = [cells[index].get_text(strip=True) for index in columns if index < len(cells)]
+    else:
+        link = row.find('a', href=True)
+        parts = [link.get_text(strip=True) if link is not None else '']
+        parts += [text for text in (td.get_text(strip=True) for td in cells) if _DATETIME_CELL.search(text)]
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def parse_novel_list(content, backend=None, base_url=None):
+    """
+    解析作者后台首页(oneauthor_login.php)中的作品列表
+
+    参数：
+        content (bytes|str): 页面原始内容
+        backend (str): 解析后端
+        base_url (str): 后台地址，用于页面中只有阅读链接时构建作品管理链接
+
+    返回：
+        list: 作品信息字典列表
+    """
+    soup = make_soup(content, backend)
+    novels = []
+
+    # 查找作品管理链接
+    # 在晋江后台，作品管理链接的格式是: managenovel.php?novelid=XXXXX
+    novel_links = soup.find_all('a', href=lambda x: x and 'managenovel.php?novelid=' in x)
+
+    if novel_links:
+        print(f"找到 {len(novel_links)} 个作品管理链接")
+
+        for link in novel_links:
+            # 提取作品ID
+            href = link['href']
+            novel_id_match = re.search(r'novelid=(\d+)', href)
+            if novel_id_match:
+                novel_id = novel_id_match.group(1)
+
+                # 查找作品标题（在同一行的其他位置）
+                row = link.find_parent('tr')
+                if row:
+                    # 查找作品标题链接（指向onebook.php的链接）
+                    title_link = row.find('a', href=lambda x: x and f'onebook.php?novelid={novel_id}' in x)
+                    if title_link:
+                        title = title_link.get_text(strip=True)
+
+                # 提取其他信息
+                cells = row.find_all('td')
+                if len(cells) >= 10:
+                    try:
+                        # 根据HTML结构提取信息
+                        category = cells[2].get_text(strip=True) if len(cells) > 2 else "未知"
+                        subcategory = cells[3].get_text(strip=True) if len(cells) > 3 else "未知"
+                        chapter_count = cells[5].get_text(strip=True) if len(cells) > 5 else "0"
+                        word_count = cells[6].get_text(strip=True) if len(cells) > 6 else "0"
+                        status = cells[12].get_text(strip=True) if len(cells) > 12 else "未知"
+
+                        novels.append({
+                            'id': novel_id,
+                            'title': title,
+                            'link': href,
+                            'view_link': title_link['href'],
+                            'status': status,
+                            'word_count': word_count,
+                            'chapter_count': chapter_count,
+                            'category': f"{category}-{subcategory}"
+                        })
+
+                    except Exception as e:
+                        print(f"解析作品信息出错 {novel_id}: {e}")
+                        novels.append({
+                            'id': novel_id,
+                            'title': title,
+                            'link': href,
+                            'view_link': title_link['href'],
+                            'status': "未知",
+                            'word_count': "未知",
+                            'chapter_count': "未知",
+                            'category': "未知"
+                        })
+
+        print(f"成功解析 {len(novels)} 部作品")
+        return novels
+    else:
+        print("未找到作品管理链接")
+        # 备用方法：查找onebook.php链接
+        onebook_links = soup.find_all('a', href=lambda x: x and 'onebook.php?novelid=' in x)
+        if onebook_links:
+            print(f"找到 {len(onebook_links)} 个作品阅读链接")
+            for idx, link in enumerate(onebook_links):
+                href = link['href']
+                novel_id_match = re.search(r'novelid=(\d+)', href)
+                if novel_id_match:
+                    novel_id = novel_id_match.group(1)
+                    title = link.get_text(strip=True)
+
+                    novels.append({
+                        'id': novel_id,
+                        'title': title,
+                        'link': backend_url(f"managenovel.php?novelid={novel_id}", base_url),
+                        'view_link': href,
+                        'status': "未知",
+                        'word_count': "未知",
+                        'chapter_count': "未知",
+                        'category': "未知"
+                    })
+
+            return novels
+        else:
+            print("也未找到作品阅读链接")
+            return []
+
+
+def parse_intro(content, backend=None):
+    """
+    解析作品管理页面(managenovel.php)中的作品简介
+
+    参数：
+        content (bytes|str): 页面原始内容
+        backend (str): 解析后端
+
+    返回：
+        str: 作品简介，未找到时返回空字符串
+    """
+    soup = make_soup(content, backend)
+    novel_intro = ""
+    intro_textarea = soup.find('textarea', {'id': 'novelintro'})
+    if intro_textarea:
+        novel_intro = intro_textarea.get_text(strip=True)
+    return novel_intro
+
+
+def parse_manage_page(content, novel_id, backend=None, base_url=None):
+    """
+    一次解析作品管理页面(managenovel.php)，同时提取简介和章节列表
+
+    返回：
+        tuple: (作品简介, 章节列表)
+    """
+    soup = make_soup(content, backend)
+    return parse_intro(soup), parse_chapters(soup, novel_id, base_url=base_url)
+
+
+def parse_chapters(content, novel_id, backend=None, base_url=None):
+    """
+    解析作品管理页面(managenovel.php)中的章节列表
+
+    参数：
+        content (bytes|str): 页面原始内容
+        novel_id (str): 作品ID，用于构建后台编辑链接
+        backend (str): 解析后端
+        base_url (str): 后台地址（默认DEFAULT_BASE_URL）
+
+    返回：
+        list: 按章节编号排序的章节信息列表（id、title、link、chapter_number、is_vip、row_hash）
+    """
+    soup = make_soup(content, backend)
+    chapters = []
+
+    # 新的章节解析策略：通过多种方法组合查找
+    # 方法1：查找所有包含chapterid的input，通过其父元素定位章节行
+    chapter_inputs = soup.find_all('input', {'name': 'chapterid'})
+    print(f"找到 {len(chapter_inputs)} 个章节ID输入框")
+
+    # 过滤掉表单提交用的hidden input（通常在form中且value较大）
+    valid_chapter_inputs = []
+    for input_elem in chapter_inputs:
+        # 检查是否在表单中且value很大（可能是下一章节的ID）
+        form_parent = input_elem.find_parent('form')
+        if form_parent and input_elem.get('type') == 'hidden':
+            # 这可能是表单提交用的input，跳过
+            continue
+        valid_chapter_inputs.append(input_elem)
+
+    print(f"有效章节输入框: {len(valid_chapter_inputs)}")
+
+    # 如果没有找到有效的章节输入框，尝试其他方法
+    if not valid_chapter_inputs:
+        print("尝试备用方法：查找章节链接")
+        # 方法2：查找所有指向章节的链接
+        all_links = soup.find_all('a', href=True)
+        chapter_links = []
+        for link in all_links:
+            href = link.get('href', '')
+            if 'onebook' in href and ('novelid=' in href or 'chapterid=' in href):
+                chapter_links.append(link)
+
+        print(f"找到 {len(chapter_links)} 个章节链接")
+
+        # 从链接中提取章节信息
+        for link in chapter_links:
+            href = link.get('href')
+            chapter_id_match = re.search(r'chapterid=(\d+)', href)
+
+            if not chapter_id_match:
+                continue
+
+            chapter_id = chapter_id_match.group(1)
+            title = link.get_text(strip=True)
+
+            # 判断是否VIP章节
+            is_vip = 'onebook_vip.php' in href or '[VIP]' in title
+
+            # 尝试从链接的父元素中获取章节编号
+            parent_tr = link.find_parent('tr')
+            chapter_number = len(chapters) + 1  # 默认按顺序编号
+
+            if parent_tr:
+                tds = parent_tr.find_all('td')
+                for td in tds:
+                    text = td.get_text(strip=True)
+                    # 查找数字编号
+                    number_match = re.search(r'^(\d+)$', text)
+                    if number_match:
+                        chapter_number = int(number_match.group(1))
+                        break
+
+            # 构建统一的后台编辑链接
+            edit_link = backend_url(f"chaptermodify.php?novelid={novel_id}&chapterid={chapter_id}", base_url)
+
+            chapters.append({
+                'id': chapter_id,
+                'title': title,
+                'link': edit_link,  # 统一使用后台编辑链接
+                'chapter_number': chapter_number,
+                'is_vip': is_vip,
+                'row_hash': row_fingerprint(parent_tr)
+            })
+
+    else:
+        # 使用有效的章节输入框解析章节
+        for input_elem in valid_chapter_inputs:
+            chapter_id = input_elem.get('value')
+            if not chapter_id:
+                continue
+
+            # 查找关联的章节行
+            parent_tr = input_elem.find_parent('tr')
+            if not parent_tr:
+                continue
+
+            # 查找章节标题链接
+            title_link = parent_tr.find('a', href=True)
+            if not title_link:
+                continue
+
+            title = title_link.get_text(strip=True)
+            href = title_link.get('href')
+
+            # 判断是否VIP章节
+            is_vip = 'onebook_vip.php' in href or '[VIP]' in title
+
+            # 提取章节编号
+            chapter_number = len(chapters) + 1  # 默认编号
+            tds = parent_tr.find_all('td')
+            if len(tds) > 1:
+                try:
+                    chapter_num_text = tds[1].get_text(strip=True)
+                    chapter_number = int(chapter_num_text)
+                except (ValueError, IndexError):
+                    pass
+
+            # 构建统一的后台编辑链接
+            edit_link = backend_url(f"chaptermodify.php?novelid={novel_id}&chapterid={chapter_id}", base_url)
+
+            chapters.append({
+                'id': chapter_id,
+                'title': title,
+                'link': edit_link,  # 统一使用后台编辑链接
+                'chapter_number': chapter_number,
+                'is_vip': is_vip,
+                'row_hash': row_fingerprint(parent_tr)
+            })
+
+    # 如果常规方法都失败，尝试通过最大章节号生成章节列表
+    if not chapters:
+        print("尝试最终方案：通过最大章节号生成章节列表")
+
+        # 查找最大章节号提示
+        max_chapter_hints = [
+            soup.find(text=re.compile(r'已更新至第(\d+)章')),
+            soup.find(text=re.compile(r'第(\d+)章', re.I))
+        ]
+
+        max_chapter_num = 0
+        for hint in max_chapter_hints:
+            if hint:
+                match = re.search(r'第(\d+)章', str(hint))
+                if match:
+                    chapter_num = int(match.group(1))
+                    max_chapter_num = max(max_chapter_num, chapter_num)
+
+        # 也可以查看placeholder中的章节号（下一章节号）
+        placeholders = soup.find_all('input', {'placeholder': re.compile(r'第(\d+)章')})
+        for placeholder in placeholders:
+            placeholder_text = placeholder.get('placeholder', '')
+            match = re.search(r'第(\d+)章', placeholder_text)
+            if match:
+                next_chapter_num = int(match.group(1))
+                max_chapter_num = max(max_chapter_num, next_chapter_num - 1)
+
+        print(f"检测到最大章节号: {max_chapter_num}")
+
+        if max_chapter_num > 0:
+            print(f"生成 1-{max_chapter_num} 章节列表")
+            for chapter_num in range(1, max_chapter_num + 1):
+                # 构建统一的后台编辑链接
+                edit_link = backend_url(f"chaptermodify.php?novelid={novel_id}&chapterid={chapter_num}", base_url)
+
+                chapters.append({
+                    'id': str(chapter_num),
+                    'title': f"第{chapter_num}章",  # 临时标题，后续可以从编辑页面获取
+                    'link': edit_link,
+                    'chapter_number': chapter_num,
+                    'is_vip': False,  # 暂时标记为免费，实际类型会在获取内容时确定
+                    'row_hash': None  # 没有章节行，无法判断是否修改
+                })
+
+    # 按章节编号排序
+    chapters.sort(key=lambda x: x['chapter_number'])
+
+    vip_count = sum(1 for c in chapters if c['is_vip'])
+    free_count = len(chapters) - vip_count
+    print(f"成功解析 {len(chapters)} 个章节，其中免费章节数量：{free_count}，VIP章节数量：{vip_count}")
+    return chapters
+
+
+# 章节编辑页快速提取：直接在字节层面定位textarea，只解码需要的片段
+# gb18030多字节字符的后续字节不会出现 < > " ' = 等ASCII符号，按字节扫描是安全的
+_TEXTAREA_PATTERN = re.compile(rb'<textarea\b([^>]*)>(.*?)</textarea\s*>', re.I | re.S)
+_NAME_ATTR_PATTERN = re.compile(rb'''\bname\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))''', re.I)
+_ENTITY_PATTERN = re.compile(r'&(#[0-9]+|#[xX][0-9a-fA-F]+|[A-Za-z][A-Za-z0-9]*)?(;?)')
+
+
+def _is_safe_entity(match):
+    """
+    判断实体引用在html.unescape与html.parser后端下的解码结果是否一致
+
+    说明：
+        常规的命名实体和数值实体两者结果相同；未知实体、缺少分号的前缀匹配
+        (&ampx)、控制字符等边缘情况的处理不同，遇到时改走完整DOM解析
+    """
+    name, semicolon = match.group(1), match.group(2)
+    if name is None:
+        # 单独的&（后面不是字母或#），两种方式都原样保留
+        return True
+    if not semicolon:
+        return False
+    if name.startswith('#'):
+        try:
+            codepoint = int(name[2:], 16) if name[1:2] in ('x', 'X') else int(name[1:])
+        except ValueError:
+            return False
+        return (codepoint in (9, 10, 13) or 0x20 <= codepoint <= 0x7E
+                or 0xA0 <= codepoint <= 0x10FFFF and not 0xD800 <= codepoint <= 0xDFFF)
+    return f"{name};" in html.entities.html5
+
+
+def extract_textareas(content, names=('content', 'note')):
+    """
+    快速提取指定name的textarea文本（不构建DOM）
+
+    参数：
+        content (bytes): 页面原始字节
+        names (tuple): 需要提取的textarea的name
+
+    返回：
+        dict: {name: 解码并还原实体后的文本}，每个name取第一次出现的textarea；
+              页面中没有找到任何目标textarea，或内容包含原始标签/特殊实体时返回None，
+              由调用方回退到完整DOM解析
+    """
+    fields = {}
+    for match in _TEXTAREA_PATTERN.finditer(content):
+        name_match = _NAME_ATTR_PATTERN.search(match.group(1))
+        if not name_match:
+            continue
+        name = next(group for group in name_match.groups() if group is not None).decode('ascii', 'replace')
+        if name not in names or name in fields:
+            continue
+
+        raw = match.group(2)
+        if b'<' in raw:
+            # 内容中有原始标签，html.parser会把它解析为子元素，交给DOM处理
+            return None
+        text = raw.decode(PAGE_ENCODING, errors='replace')
+        if '&' in text:
+            if not all(_is_safe_entity(entity) for entity in _ENTITY_PATTERN.finditer(text)):
+                return None
+            text = html.unescape(text)
+        fields[name] = text
+
+        if len(fields) == len(names):
+            break
+    return fields or None
+
+
+def _clean_entities(text):
+    """只清理HTML实体编码，保留所有换行和空行"""
+    text = text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&')
+    text = text.replace('&quot;', '"').replace('&#039;', "'")
+    text = text.replace('&nbsp;', ' ')  # 处理非断行空格
+    return text
+
+
+def _clean_textarea_text(textarea):
+    """获取textarea的原始文本，只清理HTML实体编码，保留所有换行和空行"""
+    # 获取原始文本内容，保留所有格式
+    text = textarea.string or textarea.get_text()
+    # 如果没有内容，尝试从textarea内部获取
+    if not text.strip():
+        text = ''.join(str(content) for content in textarea.contents)
+
+    return _clean_entities(text)
+
+
+def parse_chapter_content(content, backend=None):
+    """
+    解析章节编辑页面(chaptermodify.php)中的正文和作者有话说
+
+    参数：
+        content (bytes|str): 页面原始内容
+        backend (str): 解析后端（仅在快速提取失败时使用）
+
+    返回：
+        str: 章节完整内容（正文 + 【作者有话说】），无有效内容时返回以"内容获取失败"开头的提示
+
+    解析流程：
+    1. 快速路径：按字节定位name=content和name=note的textarea，只解码这两段
+    2. 快速路径未找到或遇到特殊内容时，回退到完整DOM解析
+    """
+    main_content = ""
+    author_notes = ""
+
+    fields = extract_textareas(content) if isinstance(content, bytes) else None
+    if fields is not None:
+        main_content = _clean_entities(fields.get('content', ""))
+        author_notes = _clean_entities(fields.get('note', ""))
+    else:
+        soup = make_soup(content, backend)
+
+        # 从编辑页面的textarea获取正文内容
+        chapterbody_textarea = soup.find('textarea', {'name': 'content'})
+        if chapterbody_textarea:
+            main_content = _clean_textarea_text(chapterbody_textarea)
+
+        # 获取作者有话说
+        authornote_textarea = soup.find('textarea', {'name': 'note'})
+        if authornote_textarea:
+            author_notes = _clean_textarea_text(authornote_textarea)
+
+    # 组合内容
+    result_parts = []
+    if main_content and len(main_content.strip()) > 20:
+        result_parts.append(main_content)
+    if author_notes and len(author_notes.strip()) > 10:
+        result_parts.append('\n\n【作者有话说】\n')
+        result_parts.append(author_notes)
+
+    if result_parts:
+        result = ''.join(result_parts)
+        if len(result.strip()) > 30:
+            return result
+
+    return "内容获取失败：未找到有效内容"
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+备份运行指标（请求、解析、渲染和保存耗时）
+
+功能：按阶段记录次数、字节数和耗时分布，运行结束时写入JSON报告（可选Prometheus文本格式）
+并输出一屏摘要，用于调整并发设置和发现变慢的后台
+
+说明：
+- 阶段：http_get（后台请求）、parse_novel_list / parse_manage / parse_chapter（页面解析）、
+  journal_write（章节日志写入）、render（每章写入各导出格式）、save（导出文件保存）
+- 耗时直方图使用固定的桶（0.1ms起每个桶上限乘以2^(1/4)，约到12分钟），内存占用与记录次数无关；
+  p50/p95/p99在所在的桶内线性插值估计，误差不超过一个桶的宽度（约19%）
+- 计数器记录HTTP状态码、缓存命中和请求异常等
+- 所有方法线程安全；渲染在进程池中执行时，耗时由渲染任务返回后在主进程记录
+
+命令行：
+python tools/metrics.py backup/20250101_120000/metrics.json   # 重新显示已保存报告的摘要
+"""
+import os
+import sys
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# 直方图桶上限（秒）：0.1ms × 2^(i/4)
+BUCKET_BOUNDS = tuple(0.0001 * 2 ** (i / 4) for i in range(96))
+QUANTILES = (0.5, 0.95, 0.99)
+
+# 摘要中各阶段的显示顺序和名称
+STAGE_NAMES = {
+    'http_get': "后台请求",
+    'parse_novel_list': "解析作品列表",
+    'parse_manage': "解析管理页面",
+    'parse_chapter': "解析章节",
+    'journal_write': "写入章节日志",
+    'render': "渲染章节",
+    'save': "保存文件",
+}
+
+REPORT_FILENAME = "metrics.json"
+PROMETHEUS_FILENAME = "metrics.prom"
+
+
+class Histogram:
+    """固定桶耗时直方图"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+    def observe(self, value):
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for i, n in enumerate(other.buckets):
+            self.buckets[i] += n
+        self.count += other.count
+        self.sum += other.sum
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q):
+        """
+        估计分位数
+
+        返回：
+            float: 分位数（秒），没有记录时返回None
+        """
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for i, n in enumerate(self.buckets):
+            if n and cumulative + n >= target:
+                lower = BUCKET_BOUNDS[i - 1] if i > 0 else 0.0
+                upper = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                value = lower + (upper - lower) * (target - cumulative) / n
+                return min(max(value, self.min), self.max)
+            cumulative += n
+        return self.max
+
+
+class StageStats:
+    """单个阶段的耗时、字节数和出错次数"""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.bytes = 0
+        self.errors = 0
+
+    def to_dict(self):
+        latency = self.latency
+        data = {
+            'count': latency.count,
+            'errors': self.errors,
+            'bytes': self.bytes,
+            'total_seconds': round(latency.sum, 6),
+            'min_seconds': latency.min,
+            'max_seconds': latency.max,
+        }
+        for q in QUANTILES:
+            data[f"p{int(q * 100)}_seconds"] = latency.quantile(q)
+        data['buckets'] = {f"{bound:.6g}": n for bound, n in zip(BUCKET_BOUNDS, latency.buckets) if n}
+        if latency.buckets[-1]:
+            data['buckets']['+Inf'] = latency.buckets[-1]
+        return data
+
+
+class _Timer:
+    """Metrics.timer返回的计时对象，可在计时结束前设置size"""
+    __slots__ = ('size',)
+
+    def __init__(self, size):
+        self.size = size
+
+
+class Metrics:
+    def __init__(self):
+        """创建空的指标记录"""
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {}
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+
+    def observe(self, stage, seconds, size=0, error=False):
+        """
+        记录一次阶段耗时
+
+        参数：
+            stage (str): 阶段名称（见STAGE_NAMES，也可以是其他名称）
+            seconds (float): 耗时（秒）
+            size (int): 处理的字节数
+            error (bool): 是否出错
+        """
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.latency.observe(seconds)
+            stats.bytes += size or 0
+            if error:
+                stats.errors += 1
+
+    @contextmanager
+    def timer(self, stage, size=0):
+        """
+        计时上下文，退出时记录耗时；块内抛出异常时记为出错并继续抛出
+
+        用法：
+            with metrics.timer('parse_chapter', size=len(page)):
+                ...
+        """
+        timer = _Timer(size)
+        started = time.perf_counter()
+        try:
+            yield timer
+        except BaseException:
+            self.observe(stage, time.perf_counter() - started, timer.size, error=True)
+            raise
+        self.observe(stage, time.perf_counter() - started, timer.size)
+
+    def count(self, name, value=1, **labels):
+        """
+        计数器加value
+
+        参数：
+            name (str): 计数器名称（如'http_status'）
+            **labels: 标签（如code=200）
+        """
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def merge(self, other):
+        """把另一个Metrics的记录合并到本对象（多个备份任务的汇总报告）"""
+        with other._lock:
+            stages = list(other._stages.items())
+            counters = list(other._counters.items())
+        with self._lock:
+            for stage, stats in stages:
+                mine = self._stages.setdefault(stage, StageStats())
+                mine.latency.merge(stats.latency)
+                mine.bytes += stats.bytes
+                mine.errors += stats.errors
+            for key, value in counters:
+                self._counters[key] = self._counters.get(key, 0) + value
+            self.started_at = min(self.started_at, other.started_at)
+            self._started = min(self._started, other._started)
+
+    def stage(self, stage):
+        """单个阶段的统计（dict），没有记录时返回None"""
+        with self._lock:
+            stats = self._stages.get(stage)
+            return stats.to_dict() if stats is not None else None
+
+    def counter(self, name, **labels):
+        """计数器当前值"""
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def snapshot(self, extra=None):
+        """
+        生成报告内容
+
+        参数：
+            extra (dict): 附加到报告中的运行信息（如作品和章节数）
+
+        返回：
+            dict: {'started_at', 'elapsed_seconds', 'stages', 'counters', ...}
+        """
+        with self._lock:
+            stages = {name: stats.to_dict() for name, stats in self._stages.items()}
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        report = {
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'elapsed_seconds': round(time.perf_counter() - self._started, 3),
+            'stages': stages,
+            'counters': counters,
+        }
+        report.update(extra or {})
+        return report
+
+    def write_report(self, output_dir, prometheus=False, extra=None):
+        """
+        把报告写入输出目录
+
+        参数：
+            output_dir (str): 备份目录
+            prometheus (bool): 同时写入Prometheus文本格式（metrics.prom）
+            extra (dict): 附加的运行信息
+
+        返回：
+            dict: 报告内容
+        """
+        report = self.snapshot(extra)
+        path = os.path.join(output_dir, REPORT_FILENAME)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(f"{path}.tmp", path)
+        if prometheus:
+            path = os.path.join(output_dir, PROMETHEUS_FILENAME)
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+                f.write(to_prometheus(report))
+            os.replace(f"{path}.tmp", path)
+        return report
+
+
+def _label_text(labels):
+    return ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+
+def to_prometheus(report, prefix='jjwxc_backup'):
+    """
+    把报告转换为Prometheus文本格式
+
+    说明：
+        直方图只输出上限为2的整数次幂的桶（每4个桶合并为一个），累计值不受影响
+    """
+    lines = [
+        f"# HELP {prefix}_stage_seconds 各阶段耗时",
+        f"# TYPE {prefix}_stage_seconds histogram",
+    ]
+    exported_bounds = BUCKET_BOUNDS[::4]
+    for stage, data in report['stages'].items():
+        # 报告中的桶上限保留6位有效数字，比较时留出舍入误差（相邻的桶相差约19%）
+        buckets = [(float(key), n) for key, n in data.get('buckets', {}).items() if key != '+Inf']
+        for bound in exported_bounds:
+            cumulative = sum(n for upper, n in buckets if upper <= bound * (1 + 1e-4))
+            lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{bound:.6g}"}} {cumulative}')
+        lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {data["count"]}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {data["total_seconds"]}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+    for name, help_text, key in (('stage_bytes_total', "各阶段处理的字节数", 'bytes'),
+                                 ('stage_errors_total', "各阶段出错次数", 'errors')):
+        lines.append(f"# HELP {prefix}_{name} {help_text}")
+        lines.append(f"# TYPE {prefix}_{name} counter")
+        for stage, data in report['stages'].items():
+            lines.append(f'{prefix}_{name}{{stage="{stage}"}} {data[key]}')
+    declared = set()
+    for counter in report['counters']:
+        metric = f"{prefix}_{counter['name']}_total"
+        if metric not in declared:
+            lines.append(f"# TYPE {metric} counter")
+            declared.add(metric)
+        labels = _label_text(counter['labels'])
+        lines.append(f"{metric}{{{labels}}} {counter['value']}" if labels else f"{metric} {counter['value']}")
+    return '\n'.join(lines) + '\n'
+
+
+def _pad(text, width):
+    """按显示宽度左对齐（中文字符占两个宽度）"""
+    return text + ' ' * max(0, width - sum(2 if ord(ch) > 127 else 1 for ch in text))
+
+
+def _ms(seconds):
+    return f"{seconds * 1000:.1f}" if seconds is not None else "-"
+
+
+def format_summary(report):
+    """
+    生成一屏摘要
+
+    返回：
+        str: 各阶段次数、总耗时、p50/p95/p99（毫秒）和字节数，以及主要计数器
+    """
+    lines = [
+        f"运行耗时: {report['elapsed_seconds']:.1f} 秒",
+        f"{_pad('阶段', 12)} {'次数':>7} {'出错':>5} {'总耗时(秒)':>10} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'数据(MB)':>9}",
+    ]
+    stages = report['stages']
+    ordered = [name for name in STAGE_NAMES if name in stages] + sorted(set(stages) - set(STAGE_NAMES))
+    for name in ordered:
+        data = stages[name]
+        lines.append(
+            f"{_pad(STAGE_NAMES.get(name, name), 12)} {data['count']:>7} {data['errors']:>5} {data['total_seconds']:>10.2f} "
+            f"{_ms(data['p50_seconds']):>9} {_ms(data['p95_seconds']):>9} {_ms(data['p99_seconds']):>9} "
+            f"{data['bytes'] / 1024 / 1024:>9.2f}"
+        )
+    counters = [
+        f"{c['name']}{'(' + _label_text(c['labels']).replace(chr(34), '') + ')' if c['labels'] else ''}={c['value']}"
+        for c in report['counters']
+    ]
+    if counters:
+        lines.append("计数: " + "  ".join(counters))
+    chapters = report.get('chapters')
+    if chapters:
+        rate = chapters['saved'] / report['elapsed_seconds'] if report['elapsed_seconds'] else 0
+        lines.append(f"章节: 保存 {chapters['saved']} / 失败 {chapters['failed']}，{rate:.1f} 章/秒")
+    concurrency = report.get('concurrency')
+    if concurrency:
+        lines.append(f"自适应并发: 最终上限 {concurrency['limit']}（{concurrency['min_limit']}~{concurrency['max_limit']}），"
+                     f"最多同时 {concurrency['peak_in_flight']} 个，增加 {concurrency['increases']} 次 / "
+                     f"减少 {concurrency['decreases']} 次")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("用法: python tools/metrics.py backup/<时间戳>/metrics.json")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        print(format_summary(json.load(f)))
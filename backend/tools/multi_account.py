@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多账号备份
+
+功能：一次运行同时备份多个作者账号，每个账号使用独立的Session、登录检查和输出子目录
+
+使用方法：
+python tools/multi_account.py cookies/                       # 目录中的每个 *.txt 为一个账号的Cookie
+python tools/multi_account.py a.txt b.txt --global-rps 4     # 所有账号合计每秒最多4个请求
+python tools/multi_account.py accounts.json                  # 账号配置文件（见load_accounts）
+
+说明：
+- 每个账号一个JJWXCBackupTool，输出到 output_root/<账号名>/YYYYMMDD_HHMMSS/，
+  响应缓存、对象存储、作品目录和全文索引也按账号分开
+- 限速分两级：每个账号自己的令牌桶 + 所有账号共享的全局令牌桶（ChainedRateLimiter）
+- 所有账号访问同一个后台，共享同一个熔断器：后台出错时所有账号一起暂停
+- 未登录（Cookie失效）的账号跳过，不影响其他账号
+- 合并报告：各账号的运行指标合并后写入 output_root/_runs/YYYYMMDD_HHMMSS/metrics.json，
+  其中accounts列出每个账号的状态、输出目录和章节数
+"""
+import os
+import sys
+import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from metrics import Metrics, format_summary
+from rate_limiter import (
+    HostRateLimiter, ChainedRateLimiter, DEFAULT_REQUESTS_PER_SECOND, DEFAULT_BURST, DEFAULT_JITTER
+)
+from retry_policy import CircuitBreaker
+from jjwxc_col import JJWXCBackupTool
+from novel_filter import build_novel_filter
+
+# 账号配置中可以覆盖的备份参数（其余参数所有账号相同）
+PROFILE_OPTIONS = (
+    'requests_per_second', 'burst', 'jitter', 'max_workers', 'novel_concurrency', 'adaptive_concurrency',
+    'export_formats', 'incremental', 'base_url'
+)
+
+
+def safe_account_name(name):
+    """把账号名转换为可用作目录名的字符串"""
+    cleaned = ''.join('_' if char in '<>:"/\\|?*' or ord(char) < 32 else char for char in str(name)).strip(' .')
+    return cleaned or 'account'
+
+
+def load_accounts(sources):
+    """
+    读取账号列表
+
+    参数：
+        sources (list): Cookie文件、包含Cookie文件（*.txt）的目录或账号配置文件（*.json）
+
+    返回：
+        list: [{'name', 'cookie_file', 'novels', 'options'}]
+
+    说明：
+        账号配置文件为列表或 {"accounts": [...]}，每项：
+            {"name": "作者A", "cookie_file": "cookies/a.txt", "novels": ["1234567"], "requests_per_second": 1}
+        cookie_file相对于配置文件所在目录；novels省略时备份该账号全部作品，空列表报错
+        （避免误以为不备份任何作品）；
+        其他键为PROFILE_OPTIONS中的备份参数
+    """
+    accounts = []
+    for source in sources:
+        if os.path.isdir(source):
+            for name in sorted(os.listdir(source)):
+                if name.endswith('.txt'):
+                    accounts.append(_cookie_account(os.path.join(source, name)))
+        elif source.endswith('.json'):
+            accounts.extend(_profile_accounts(source))
+        elif os.path.isfile(source):
+            accounts.append(_cookie_account(source))
+        else:
+            raise ValueError(f"账号来源不存在: {source}")
+
+    seen = set()
+    for account in accounts:
+        if account['name'] in seen:
+            raise ValueError(f"账号名重复: {account['name']}")
+        seen.add(account['name'])
+    return accounts
+
+
+def _cookie_account(path):
+    """Cookie文件对应的账号（账号名为文件名）"""
+    name = os.path.splitext(os.path.basename(path))[0]
+    return {'name': safe_account_name(name), 'cookie_file': path, 'novels': None, 'options': {}}
+
+
+def _profile_accounts(path):
+    """读取账号配置文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get('accounts', []) if isinstance(data, dict) else data
+    base_dir = os.path.dirname(os.path.abspath(path))
+    accounts = []
+    for entry in entries:
+        entry = dict(entry)
+        cookie_file = entry.pop('cookie_file', None)
+        if not cookie_file:
+            raise ValueError(f"账号配置缺少cookie_file: {entry}")
+        cookie_file = os.path.join(base_dir, cookie_file)
+        name = entry.pop('name', None) or os.path.splitext(os.path.basename(cookie_file))[0]
+        novels = entry.pop('novels', None)
+        if novels is not None and (not isinstance(novels, list) or not novels):
+            raise ValueError(f"账号 {name} 的novels应为非空的作品ID列表（省略novels为备份全部作品）")
+        unknown = set(entry) - set(PROFILE_OPTIONS)
+        if unknown:
+            raise ValueError(f"账号 {name} 的配置中有未知参数: {', '.join(sorted(unknown))}")
+        accounts.append({
+            'name': safe_account_name(name),
+            'cookie_file': cookie_file,
+            'novels': [str(novel_id) for novel_id in novels] if novels is not None else None,
+            'options': entry,
+        })
+    return accounts
+
+
+class MultiAccountBackup:
+    def __init__(self, accounts, output_root="backup", max_accounts=4, global_requests_per_second=4.0,
+                 global_burst=4, metrics_prometheus=False, **tool_options):
+        """
+        初始化多账号备份
+
+        参数：
+            accounts (list): load_accounts返回的账号列表
+            output_root (str): 备份根目录，每个账号一个子目录
+            max_accounts (int): 同时备份的账号数
+            global_requests_per_second (float): 所有账号合计的请求速率上限（请求/秒）
+            global_burst (int): 全局允许的突发请求数
+            metrics_prometheus (bool): 合并报告同时写入Prometheus文本格式
+            **tool_options: 传给每个JJWXCBackupTool的参数（账号配置中的同名参数优先）
+        """
+        if not accounts:
+            raise ValueError("没有要备份的账号")
+        self.accounts = accounts
+        self.output_root = output_root
+        self.max_accounts = max(1, int(max_accounts))
+        self.global_limiter = HostRateLimiter(global_requests_per_second, global_burst, jitter=0)
+        self.circuit_breaker = tool_options.pop('circuit_breaker', None) or CircuitBreaker()
+        self.metrics_prometheus = metrics_prometheus
+        self.tool_options = tool_options
+        self.tools = {}  # {账号名: JJWXCBackupTool}
+        self._lock = threading.Lock()
+
+    def run(self):
+        """
+        同时备份所有账号
+
+        返回：
+            dict: 合并报告（accounts为各账号结果，见_backup_account）
+        """
+        metrics = Metrics()
+        workers = min(self.max_accounts, len(self.accounts))
+        print(f"开始备份 {len(self.accounts)} 个账号（同时 {workers} 个）")
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="account") as executor:
+            results = list(executor.map(self._backup_account, self.accounts))
+
+        for account in self.accounts:
+            tool = self.tools.get(account['name'])
+            if tool is not None:
+                metrics.merge(tool.metrics)
+        report = self._write_report(metrics, results)
+
+        print(f"\n{'='*50}")
+        print(f"多账号备份完成: {len(results)} 个账号")
+        for result in results:
+            print(f"  - {self._format_account_result(result)}")
+        if report is not None:
+            print(f"{'-'*50}")
+            print(format_summary(report))
+        print(f"{'='*50}")
+        return report if report is not None else {'accounts': results}
+
+    def _backup_account(self, account):
+        """
+        备份单个账号（在账号线程中执行）
+
+        返回：
+            dict: {'name', 'status', 'output_dir', 'novels', 'chapters', 'error'}，
+                status为completed / partial（有失败章节）/ login_failed / failed
+        """
+        name = account['name']
+        result = {'name': name, 'status': 'failed', 'output_dir': None, 'novels': [],
+                  'chapters': {'total': 0, 'saved': 0, 'failed': 0}, 'error': None}
+        try:
+            options = dict(self.tool_options)
+            options.update(account['options'])
+            rate_limiter = ChainedRateLimiter(
+                HostRateLimiter(
+                    options.pop('requests_per_second', DEFAULT_REQUESTS_PER_SECOND),
+                    options.pop('burst', DEFAULT_BURST), options.pop('jitter', DEFAULT_JITTER)
+                ),
+                self.global_limiter
+            )
+            tool = JJWXCBackupTool(
+                cookie_file=account['cookie_file'],
+                output_root=os.path.join(self.output_root, name),
+                novel_filter=build_novel_filter(account['novels']),
+                rate_limiter=rate_limiter,
+                circuit_breaker=self.circuit_breaker,
+                **options
+            )
+            with self._lock:
+                self.tools[name] = tool
+            result['output_dir'] = tool.output_dir
+
+            if not tool.check_login():
+                result['status'] = 'login_failed'
+                result['error'] = "未登录，请检查Cookie是否有效"
+                print(f"❌ [{name}] 未登录，跳过该账号")
+                return result
+
+            novels = [novel for novel in (tool.backup_all_novels() or []) if novel is not None]
+            result['novels'] = novels
+            for key in ('total', 'saved', 'failed'):
+                result['chapters'][key] = sum(novel[key] for novel in novels)
+            partial = any(novel['failed'] or novel['error'] for novel in novels)
+            result['status'] = 'partial' if partial else 'completed'
+        except Exception as e:
+            result['error'] = str(e)
+            print(f"❌ [{name}] 备份出错: {e}")
+        return result
+
+    def _write_report(self, metrics, results):
+        """写入合并报告，失败只提示"""
+        report_dir = os.path.join(self.output_root, "_runs", datetime.now().strftime('%Y%m%d_%H%M%S'))
+        failed = [result for result in results if result['status'] in ('login_failed', 'failed')]
+        extra = {
+            'run_id': os.path.basename(report_dir),
+            'status': 'completed' if not failed else 'partial',
+            'accounts': results,
+            'chapters': {
+                key: sum(result['chapters'][key] for result in results) for key in ('total', 'saved', 'failed')
+            },
+        }
+        try:
+            os.makedirs(report_dir, exist_ok=True)
+            report = metrics.write_report(report_dir, prometheus=self.metrics_prometheus, extra=extra)
+            print(f"合并报告: {os.path.join(report_dir, 'metrics.json')}")
+            return report
+        except Exception as e:
+            print(f"⚠ 合并报告保存失败: {e}")
+            return None
+
+    def _format_account_result(self, result):
+        """格式化单个账号的备份结果"""
+        status = {'completed': "✓", 'partial': "⚠"}.get(result['status'], "❌")
+        if result['status'] in ('login_failed', 'failed'):
+            return f"{status} {result['name']}: {result['error']}"
+        chapters = result['chapters']
+        text = f"{status} {result['name']}: {len(result['novels'])} 部作品，{chapters['saved']}/{chapters['total']} 章"
+        if chapters['failed']:
+            text += f"，失败 {chapters['failed']} 章"
+        return text
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多账号同时备份")
+    parser.add_argument('sources', nargs='+', help="Cookie文件、Cookie文件目录或账号配置文件（.json）")
+    parser.add_argument('--output-root', default="backup", metavar='DIR', help="备份根目录（默认backup）")
+    parser.add_argument('--accounts', type=int, default=4, metavar='N', help="同时备份的账号数（默认4）")
+    parser.add_argument('--rps', type=float, default=DEFAULT_REQUESTS_PER_SECOND,
+                        help=f"每个账号的请求速率上限（请求/秒，默认{DEFAULT_REQUESTS_PER_SECOND}）")
+    parser.add_argument('--global-rps', type=float, default=4.0, help="所有账号合计的请求速率上限（默认4）")
+    parser.add_argument('--max-workers', type=int, default=4, metavar='N', help="每个账号同时获取的章节数")
+    parser.add_argument('--formats', default="docx", metavar='LIST', help="导出格式，逗号分隔（默认docx）")
+    parser.add_argument('--base-url', help="作者后台地址（默认https://my.jjwxc.net）")
+    parser.add_argument('--metrics-prom', action='store_true', help="合并报告同时写入Prometheus文本格式")
+    args = parser.parse_args()
+
+    options = dict(requests_per_second=args.rps, max_workers=args.max_workers, export_formats=args.formats)
+    if args.base_url:
+        options['base_url'] = args.base_url
+    try:
+        backup = MultiAccountBackup(
+            load_accounts(args.sources), output_root=args.output_root, max_accounts=args.accounts,
+            global_requests_per_second=args.global_rps, metrics_prometheus=args.metrics_prom, **options
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    report = backup.run()
+    statuses = {account['status'] for account in report['accounts']}
+    return 0 if statuses <= {'completed'} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
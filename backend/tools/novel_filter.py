@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+作品筛选
+
+功能：按作品ID、书名和状态从作品列表中选出要备份的作品，供命令行和多账号备份使用，不需要交互输入
+
+说明：
+- 同一类条件之间为"或"，不同类条件之间为"且"：
+  --title 甲 --title 乙 --status 连载 选出书名包含"甲"或"乙"、且状态包含"连载"的作品
+- 书名和状态按包含匹配（忽略条件前后的空格）
+- 作品ID也可以写成作品链接（含novelid=参数）
+- 指定的作品ID不在作品列表中时给出提示
+"""
+from jjwxc_parser import extract_novel_id
+
+
+def normalize_novel_id(value):
+    """把作品ID或作品链接转换为作品ID字符串"""
+    value = str(value).strip()
+    return extract_novel_id(value) or value
+
+
+def build_novel_filter(novel_ids=None, titles=None, statuses=None):
+    """
+    生成novel_filter
+
+    参数：
+        novel_ids (iterable): 作品ID或作品链接（None为不按ID筛选）
+        titles (iterable): 书名包含的文字
+        statuses (iterable): 状态包含的文字（如"连载"、"完结"）
+
+    返回：
+        callable: novel_filter(作品列表) -> 选中的作品列表（保持原顺序）；没有任何条件时选中全部作品
+    """
+    wanted_ids = {normalize_novel_id(novel_id) for novel_id in novel_ids} if novel_ids else None
+    titles = [title.strip() for title in titles or () if title.strip()]
+    statuses = [status.strip() for status in statuses or () if status.strip()]
+
+    def novel_filter(novels):
+        selected = [
+            novel for novel in novels
+            if (wanted_ids is None or str(novel['id']) in wanted_ids)
+            and (not titles or any(title in novel.get('title', '') for title in titles))
+            and (not statuses or any(status in novel.get('status', '') for status in statuses))
+        ]
+        if wanted_ids:
+            missing = wanted_ids - {str(novel['id']) for novel in novels}
+            if missing:
+                print(f"⚠ 作品列表中没有以下作品: {', '.join(sorted(missing))}")
+        print(f"选择备份 {len(selected)} 部作品:")
+        for novel in selected:
+            print(f"  - {novel['title']}")
+        return selected
+
+    return novel_filter
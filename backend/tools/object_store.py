@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+章节对象存储（内容寻址 + 压缩 + 跨快照去重）
+
+功能：章节正文和作者有话说按内容哈希压缩保存一次，每次备份只记录一个引用哈希的小清单
+
+说明：
+- 对象：objects/<哈希前2位>/<哈希其余部分>，内容为压缩后的原文（SHA-256按原文计算）
+- 压缩：默认zlib；安装zstandard后可选zstd（pip install zstandard），读取时按文件头自动识别
+- 快照：snapshots/<作品ID>/<备份目录名>.json，记录作品信息、简介和每章的对象哈希
+- 内容未变化的章节在多次快照中只占一份空间，磁盘占用随变化的内容增长，而不是随运行次数增长
+- 快照是保留下来的备份：快照保存成功后即删除该次备份的章节日志，续传时从快照还原日志；
+  较早的备份目录可用gc --prune-backups删除（或备份时指定--keep-backups自动删除），
+  其中的文档可随时用restore从快照重新生成
+- gc：按保留策略删除旧快照，再删除不被任何快照引用的对象（最近写入的对象有宽限期，
+  避免删除正在进行的备份刚写入、尚未被快照引用的对象）
+
+命令行：
+python tools/object_store.py list [作品ID]
+python tools/object_store.py gc --keep 7 [--days 30] [--prune-backups] [--dry-run]
+python tools/object_store.py restore <作品ID或快照文件> [--run 备份目录名] [--formats docx,txt] [--output 目录]
+"""
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import zlib
+from datetime import datetime
+
+try:
+    import zstandard
+except ImportError:  # zstandard为可选依赖，未安装时只能使用zlib
+    zstandard = None
+
+from chapter_journal import ChapterJournal
+
+AUTHOR_NOTE_MARKER = '【作者有话说】'
+CODECS = ('zlib', 'zstd')
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# 快照中未获取（备份中断，可续传）的章节的错误信息
+NOT_FETCHED = "未获取"
+# 备份目录名格式（backup/YYYYMMDD_HHMMSS）
+_RUN_DIR_PATTERN = re.compile(r'^\d{8}_\d{6}$')
+
+def split_content(content):
+    """
+    把章节内容拆成正文和作者有话说（不去除空白，可无损还原）
+
+    返回：
+        tuple: (正文, 作者有话说)，没有作者有话说时为None
+    """
+    if AUTHOR_NOTE_MARKER in content:
+        body, note = content.split(AUTHOR_NOTE_MARKER, 1)
+        return body, note
+    return content, None
+
+
+def join_content(body, note):
+    """split_content的逆操作"""
+    if note is None:
+        return body
+    return f"{body}{AUTHOR_NOTE_MARKER}{note}"
+
+
+class ObjectStore:
+    def __init__(self, root, codec='zlib', level=6):
+        """
+        打开（或创建）对象存储
+
+        参数：
+            root (str): 存储根目录（通常为backup/.store）
+            codec (str): 新对象的压缩方式，'zlib'或'zstd'
+            level (int): 压缩级别
+        """
+        if codec not in CODECS:
+            raise ValueError(f"未知的压缩方式: {codec}")
+        if codec == 'zstd' and zstandard is None:
+            raise RuntimeError("zstd压缩需要安装zstandard: pip install zstandard")
+        self.root = root
+        self.codec = codec
+        self.level = level
+        self.objects_dir = os.path.join(root, 'objects')
+        self.snapshots_dir = os.path.join(root, 'snapshots')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+
+    # ---------- 对象 ----------
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest[2:])
+
+    def _compress(self, data):
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level).compress(data)
+        return zlib.compress(data, self.level)
+
+    @staticmethod
+    def _decompress(blob):
+        if blob.startswith(_ZSTD_MAGIC):
+            if zstandard is None:
+                raise RuntimeError("该对象使用zstd压缩，需要安装zstandard: pip install zstandard")
+            return zstandard.ZstdDecompressor().decompress(blob)
+        return zlib.decompress(blob)
+
+    def has(self, digest):
+        return os.path.exists(self._object_path(digest))
+
+    def put(self, data):
+        """
+        保存对象（已存在时不重复写入）
+
+        返回：
+            str: 原文的SHA-256
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._compress(data))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return digest
+
+    def get(self, digest):
+        """读取对象原文"""
+        with open(self._object_path(digest), 'rb') as f:
+            return self._decompress(f.read())
+
+    def put_text(self, text):
+        return None if text is None else self.put(text.encode('utf-8'))
+
+    def get_text(self, digest):
+        return None if digest is None else self.get(digest).decode('utf-8')
+
+    def iter_objects(self):
+        """遍历所有对象，产出(哈希, 路径)"""
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                if not name.endswith('.tmp'):
+                    yield prefix + name, os.path.join(prefix_dir, name)
+
+    # ---------- 快照 ----------
+
+    def write_snapshot(self, run_id, novel, intro, chapters, journal_path, failures=None):
+        """
+        把一次备份的章节日志保存为快照
+
+        参数：
+            run_id (str): 备份目录名（如20250101_120000）
+            novel (dict): 作品信息
+            intro (str): 作品简介
+            chapters (list): 按章节编号排序的章节列表
+            journal_path (str): 本次备份的章节日志
+            failures (dict): {章节ID: 错误信息}
+
+        返回：
+            str: 快照文件路径
+        """
+        failures = failures or {}
+        _, offsets = ChapterJournal.index(journal_path)
+        entries = []
+        with open(journal_path, 'rb') as journal:
+            for chapter in chapters:
+                chapter_id = str(chapter['id'])
+                entry = {
+                    'id': chapter_id,
+                    'chapter_number': chapter.get('chapter_number'),
+                    'title': chapter['title'],
+                    'is_vip': chapter.get('is_vip', False),
+                    'row_hash': chapter.get('row_hash'),
+                }
+                offset = offsets.get(chapter_id)
+                if offset is not None:
+                    content = ChapterJournal.read_at(journal, offset)['content']
+                    body, note = split_content(content)
+                    entry.update({
+                        'body': self.put_text(body),
+                        'note': self.put_text(note),
+                        'size': len(content)
+                    })
+                else:
+                    entry['error'] = failures.get(chapter['id']) or failures.get(chapter_id) or NOT_FETCHED
+                entries.append(entry)
+
+        snapshot = {
+            'run': run_id,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'novel': novel,
+            'intro': self.put_text(intro or ""),
+            'chapters': entries
+        }
+        path = self.snapshot_path(novel['id'], run_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return path
+
+    def snapshot_path(self, novel_id, run_id):
+        """作品某次备份的快照文件路径（不检查是否存在）"""
+        return os.path.join(self.snapshots_dir, str(novel_id), f"{run_id}.json")
+
+    def snapshots(self, novel_id=None):
+        """
+        列出快照文件（按备份目录名即时间排序）
+
+        返回：
+            list: 快照文件路径
+        """
+        if novel_id is not None:
+            novel_dirs = [os.path.join(self.snapshots_dir, str(novel_id))]
+        else:
+            novel_dirs = [os.path.join(self.snapshots_dir, name) for name in os.listdir(self.snapshots_dir)]
+        paths = []
+        for novel_dir in novel_dirs:
+            if os.path.isdir(novel_dir):
+                paths.extend(
+                    os.path.join(novel_dir, name) for name in os.listdir(novel_dir) if name.endswith('.json')
+                )
+        return sorted(paths, key=lambda path: (os.path.basename(path), path))
+
+    @staticmethod
+    def load_snapshot(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def latest_snapshot(self, novel_id, exclude_run=None):
+        """作品最近一次快照（exclude_run为当前备份目录名时跳过），不存在时返回None"""
+        for path in reversed(self.snapshots(novel_id)):
+            snapshot = self.load_snapshot(path)
+            if snapshot.get('run') != exclude_run:
+                return snapshot
+        return None
+
+    def chapter_content(self, entry):
+        """读取快照中一个章节的完整内容（获取失败的章节返回None）"""
+        if entry.get('body') is None:
+            return None
+        return join_content(self.get_text(entry['body']), self.get_text(entry.get('note')))
+
+    def restore_journal(self, snapshot, journal_path):
+        """
+        把快照还原为章节日志，供exporters导出任意格式
+
+        返回：
+            tuple: (章节列表, 失败章节{章节ID: 错误信息})
+        """
+        chapters = []
+        failures = {}
+        with ChapterJournal(journal_path, fsync=False) as journal:
+            journal.write_novel(snapshot['novel'], self.get_text(snapshot.get('intro')) or "")
+            for entry in snapshot['chapters']:
+                chapter = {key: entry.get(key) for key in ('id', 'chapter_number', 'title', 'is_vip', 'row_hash')}
+                content = self.chapter_content(entry)
+                if content is None:
+                    failures[chapter['id']] = entry.get('error', NOT_FETCHED)
+                else:
+                    journal.write_chapter(chapter, content)
+                chapters.append(chapter)
+        return chapters, failures
+
+    # ---------- 回收 ----------
+
+    def gc(self, keep=7, days=None, dry_run=False, grace=3600):
+        """
+        按保留策略删除旧快照和不再被引用的对象
+
+        参数：
+            keep (int): 每部作品至少保留最近的快照数
+            days (float): 同时保留最近多少天内的快照（None为只按数量）
+            dry_run (bool): 只统计不删除
+            grace (float): 对象写入后的宽限期（秒），期内的未引用对象不删除
+
+        返回：
+            dict: {'snapshots_removed', 'objects_removed', 'bytes_freed', 'objects_kept'}
+        """
+        stats = {'snapshots_removed': 0, 'objects_removed': 0, 'bytes_freed': 0, 'objects_kept': 0}
+        cutoff = time.time() - days * 86400 if days is not None else None
+
+        referenced = set()
+        for novel_id in os.listdir(self.snapshots_dir):
+            paths = self.snapshots(novel_id)
+            for index, path in enumerate(paths):
+                recent = index >= len(paths) - max(0, keep)
+                if not recent and cutoff is not None and os.path.getmtime(path) >= cutoff:
+                    recent = True
+                if recent:
+                    snapshot = self.load_snapshot(path)
+                    referenced.add(snapshot.get('intro'))
+                    for entry in snapshot['chapters']:
+                        referenced.add(entry.get('body'))
+                        referenced.add(entry.get('note'))
+                    continue
+                stats['snapshots_removed'] += 1
+                if not dry_run:
+                    os.remove(path)
+
+        now = time.time()
+        for digest, path in list(self.iter_objects()):
+            if digest in referenced or now - os.path.getmtime(path) < grace:
+                stats['objects_kept'] += 1
+                continue
+            stats['objects_removed'] += 1
+            stats['bytes_freed'] += os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+        return stats
+
+    def snapshot_runs(self):
+        """所有快照对应的备份目录名"""
+        return {os.path.splitext(os.path.basename(path))[0] for path in self.snapshots()}
+
+    def disk_usage(self):
+        """对象总数和压缩后占用的字节数"""
+        count = size = 0
+        for _, path in self.iter_objects():
+            count += 1
+            size += os.path.getsize(path)
+        return count, size
+
+
+def prune_backup_dirs(backup_root, store, keep=7, dry_run=False, exclude=()):
+    """
+    删除已完整保存为快照的旧备份目录（backup/YYYYMMDD_HHMMSS）
+
+    参数：
+        backup_root (str): 备份根目录
+        store (ObjectStore): 对象存储
+        keep (int): 保留最近的备份目录数
+        dry_run (bool): 只列出不删除
+        exclude (iterable): 不删除的备份目录名（如正在续传的目录）
+
+    返回：
+        list: 删除（或将删除）的目录
+
+    说明：
+        目录必须有同名的快照，且剩下的每个章节日志（快照保存失败或旧版本的备份）都有快照，
+        否则保留，避免误删未入库的备份；有未获取章节的目录（中断的备份）也保留，以便续传
+    """
+    runs = sorted(name for name in os.listdir(backup_root)
+                  if _RUN_DIR_PATTERN.match(name) and os.path.isdir(os.path.join(backup_root, name)))
+    snapshot_keys = set()
+    interrupted = set()
+    for path in store.snapshots():
+        run = os.path.splitext(os.path.basename(path))[0]
+        snapshot_keys.add((os.path.basename(os.path.dirname(path)), run))
+        if any(entry.get('error') == NOT_FETCHED for entry in store.load_snapshot(path)['chapters']):
+            interrupted.add(run)
+
+    snapshot_runs = {run for _, run in snapshot_keys}
+    exclude = set(exclude)
+
+    removed = []
+    for run in runs[:max(0, len(runs) - keep)]:
+        if run in exclude or run not in snapshot_runs or run in interrupted:
+            continue
+        run_dir = os.path.join(backup_root, run)
+        journals = [name for name in os.listdir(run_dir) if name.endswith('.journal.jsonl')]
+        covered = True
+        for name in journals:
+            novel_record, _ = ChapterJournal.index(os.path.join(run_dir, name))
+            novel_id = str(novel_record['novel']['id']) if novel_record else None
+            if (novel_id, run) not in snapshot_keys:
+                covered = False
+                break
+        if not covered:
+            continue
+        removed.append(run_dir)
+        if not dry_run:
+            shutil.rmtree(run_dir)
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="章节对象存储管理")
+    parser.add_argument('--store', default=os.path.join('backup', '.store'), help="存储目录（默认backup/.store）")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = subparsers.add_parser('list', help="列出快照")
+    list_parser.add_argument('novel_id', nargs='?', help="只列出该作品的快照")
+
+    gc_parser = subparsers.add_parser('gc', help="删除旧快照和未引用的对象")
+    gc_parser.add_argument('--keep', type=int, default=7, help="每部作品保留的快照数（默认7）")
+    gc_parser.add_argument('--days', type=float, help="同时保留最近多少天内的快照")
+    gc_parser.add_argument('--prune-backups', action='store_true',
+                           help="同时删除已保存为快照的旧备份目录（保留最近--keep个）")
+    gc_parser.add_argument('--dry-run', action='store_true', help="只统计不删除")
+
+    restore_parser = subparsers.add_parser('restore', help="从快照重新生成文档")
+    restore_parser.add_argument('snapshot', help="作品ID（默认最近一次快照）或快照文件路径")
+    restore_parser.add_argument('--run', help="作品ID对应的备份目录名（如20250101_120000）")
+    restore_parser.add_argument('--formats', default='docx', help="导出格式，逗号分隔（默认docx）")
+    restore_parser.add_argument('--output', default='.', help="输出目录（默认当前目录）")
+
+    args = parser.parse_args()
+    store = ObjectStore(args.store)
+
+    if args.command == 'list':
+        for path in store.snapshots(args.novel_id):
+            snapshot = store.load_snapshot(path)
+            saved = sum(1 for entry in snapshot['chapters'] if entry.get('body'))
+            print(f"{snapshot['novel']['id']}\t{snapshot['run']}\t{snapshot['novel']['title']}\t"
+                  f"{saved}/{len(snapshot['chapters'])} 章\t{path}")
+        count, size = store.disk_usage()
+        print(f"对象: {count} 个，共 {size / 1024 / 1024:.1f} MB")
+
+    elif args.command == 'gc':
+        stats = store.gc(keep=args.keep, days=args.days, dry_run=args.dry_run)
+        prefix = "[演练] " if args.dry_run else ""
+        print(f"{prefix}删除快照 {stats['snapshots_removed']} 个，删除对象 {stats['objects_removed']} 个，"
+              f"释放 {stats['bytes_freed'] / 1024 / 1024:.1f} MB，保留对象 {stats['objects_kept']} 个")
+        if args.prune_backups:
+            backup_root = os.path.dirname(os.path.abspath(args.store))
+            for run_dir in prune_backup_dirs(backup_root, store, keep=args.keep, dry_run=args.dry_run):
+                print(f"{prefix}删除备份目录: {run_dir}")
+
+    elif args.command == 'restore':
+        from exporters import export_from_journal, parse_formats
+
+        if os.path.isfile(args.snapshot):
+            path = args.snapshot
+        elif args.run:
+            path = store.snapshot_path(args.snapshot, args.run)
+        else:
+            paths = store.snapshots(args.snapshot)
+            path = paths[-1] if paths else None
+        if path is None or not os.path.exists(path):
+            parser.error(f"没有找到快照: {args.snapshot} {args.run or ''}".rstrip())
+        snapshot = store.load_snapshot(path)
+        os.makedirs(args.output, exist_ok=True)
+        title = re.sub(r'[<>:"/\\|?*]', '_', snapshot['novel']['title']) or f"novel_{snapshot['novel']['id']}"
+        with tempfile.TemporaryDirectory() as temp_dir:
+            journal_path = os.path.join(temp_dir, 'restore.journal.jsonl')
+            chapters, failures = store.restore_journal(snapshot, journal_path)
+            written = export_from_journal(journal_path, chapters, failures,
+                                          os.path.join(args.output, title), parse_formats(args.formats))
+        for path in written:
+            print(f"✓ 已生成: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求速率限制器
+
+功能：按主机名使用令牌桶控制请求速率，取代每章节/每作品之后的固定sleep
+
+说明：
+- 令牌桶：平均速率为rate（请求/秒），允许最多burst个请求突发
+- 采用"预约"方式：调用方先预约发送时间再等待，等待可与其他请求的网络耗时重叠
+- 无论有多少工作线程或协程，同一主机的总请求速率都不会超过设定值
+- 可选抖动：每次请求额外随机等待0~jitter秒，避免请求间隔过于规律
+- ChainedRateLimiter依次经过多个限速器，用于多账号同时备份时的"每账号 + 全局"两级限速
+"""
+import asyncio
+import random
+import threading
+import time
+import urllib.parse
+
+# 默认速率与原来每章节之后sleep 1~2秒的节奏相当（约0.5~0.67请求/秒），不突发；
+# 需要更快时用 --rps / --burst 提高
+DEFAULT_REQUESTS_PER_SECOND = 0.6
+DEFAULT_BURST = 1
+DEFAULT_JITTER = 0.25
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=1, jitter=0.0):
+        """
+        初始化令牌桶
+
+        参数：
+            rate (float): 令牌补充速率（请求/秒）
+            burst (int): 桶容量，即允许的最大突发请求数
+            jitter (float): 每次请求额外随机等待的上限（秒）
+        """
+        if rate <= 0:
+            raise ValueError("rate必须大于0")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.jitter = max(0.0, float(jitter))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        预约一个令牌
+
+        返回：
+            float: 调用方在发送请求前需要等待的秒数
+
+        说明：
+            令牌不足时余额记为负数，后续调用方依次排到更晚的时间，
+            因此并发调用得到的发送时间严格按rate均匀分布
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if self.jitter:
+            wait += random.uniform(0, self.jitter)
+        return wait
+
+    def acquire(self):
+        """阻塞直到可以发送下一个请求"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """异步等待直到可以发送下一个请求"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HostRateLimiter:
+    def __init__(self, rate=DEFAULT_REQUESTS_PER_SECOND, burst=DEFAULT_BURST, jitter=DEFAULT_JITTER):
+        """
+        初始化按主机限速器
+
+        参数：
+            rate (float): 每个主机的请求速率（请求/秒）
+            burst (int): 每个主机允许的突发请求数
+            jitter (float): 每次请求额外随机等待的上限（秒）
+        """
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, url):
+        """获取URL所属主机的令牌桶（不存在时创建）"""
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst, self.jitter)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url):
+        """阻塞直到可以向该URL所属主机发送请求"""
+        self.bucket_for(url).acquire()
+
+    async def acquire_async(self, url):
+        """异步等待直到可以向该URL所属主机发送请求"""
+        await self.bucket_for(url).acquire_async()
+
+
+class ChainedRateLimiter:
+    def __init__(self, *limiters):
+        """
+        初始化多级限速器
+
+        参数：
+            *limiters (HostRateLimiter): 依次经过的限速器（如每账号一个、所有账号共享一个）
+
+        说明：
+            前一级等待结束后才向下一级预约，请求同时满足所有限速器的速率
+        """
+        self.limiters = [limiter for limiter in limiters if limiter is not None]
+
+    def acquire(self, url):
+        """阻塞直到所有限速器都允许发送请求"""
+        for limiter in self.limiters:
+            limiter.acquire(url)
+
+    async def acquire_async(self, url):
+        """异步等待直到所有限速器都允许发送请求"""
+        for limiter in self.limiters:
+            await limiter.acquire_async(url)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求重试策略和按主机熔断器
+
+功能：后台请求遇到连接错误、超时、截断响应或429/5xx时按指数退避重试；
+      同一主机连续失败时暂停所有请求，恢复后再继续
+
+说明：
+- 重试间隔：backoff × 2^(第几次重试-1)，不超过max_backoff，再随机缩短0~jitter比例，
+  避免多个工作线程同时重试
+- 429/503响应的Retry-After（秒数或HTTP日期）作为最短等待时间（不超过max_retry_after）
+- 每个请求有总期限deadline（秒）：单次请求的超时不超过剩余时间，剩余时间不够再等一次时不再重试
+- 熔断器：某主机连续failure_threshold次失败后进入"断开"状态，所有线程和协程的请求都暂停
+  recovery_timeout秒；之后只放行一个试探请求，成功则恢复，失败则暂停时间加倍（不超过max_recovery_timeout）
+- 熔断器只统计可重试的失败；404、登录失效等页面不算主机故障
+- RequestAttempts记录一个请求每次发送的结果（指标、熔断器、自适应并发上限）并决定是否重试，
+  同步（requests）和异步（aiohttp）方案共用，调用方只负责发送请求和等待
+"""
+import time
+import random
+import asyncio
+import threading
+import urllib.parse
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+from adaptive_limit import classify_status
+
+# 可重试的HTTP状态码
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """主机处于熔断状态，且在请求期限内不会恢复"""
+
+
+def parse_retry_after(value, now=None):
+    """
+    解析Retry-After响应头
+
+    参数：
+        value (str): 响应头的值（秒数或HTTP日期）
+        now (datetime): 当前时间（测试用）
+
+    返回：
+        float: 需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=4, backoff=0.5, max_backoff=30.0, jitter=0.5, deadline=120.0,
+                 retry_statuses=RETRY_STATUSES, max_retry_after=120.0):
+        """
+        初始化重试策略
+
+        参数：
+            max_attempts (int): 每个请求最多发送的次数（1为不重试）
+            backoff (float): 第一次重试前的等待时间（秒）
+            max_backoff (float): 重试等待时间上限（秒）
+            jitter (float): 等待时间随机缩短的最大比例（0~1）
+            deadline (float): 每个请求（含所有重试和熔断等待）的总期限（秒）
+            retry_statuses (tuple): 需要重试的HTTP状态码
+            max_retry_after (float): Retry-After等待时间上限（秒）
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff = max(0.0, float(backoff))
+        self.max_backoff = max(self.backoff, float(max_backoff))
+        self.jitter = min(1.0, max(0.0, float(jitter)))
+        self.deadline = float(deadline)
+        self.retry_statuses = frozenset(retry_statuses)
+        self.max_retry_after = float(max_retry_after)
+
+    def start(self):
+        """开始一个请求，返回其截止时间（time.monotonic()）"""
+        return time.monotonic() + self.deadline
+
+    def should_retry_status(self, status):
+        return status in self.retry_statuses
+
+    def attempt_timeout(self, timeout, deadline):
+        """单次请求的超时时间：不超过请求的剩余期限"""
+        remaining = max(0.01, deadline - time.monotonic())
+        return min(timeout, remaining) if timeout else remaining
+
+    def next_delay(self, attempt, deadline, retry_after=None):
+        """
+        计算下一次重试前的等待时间
+
+        参数：
+            attempt (int): 已发送的次数（从1开始）
+            deadline (float): 请求截止时间（time.monotonic()）
+            retry_after (float): 服务器要求的最短等待时间（秒）
+
+        返回：
+            float: 等待秒数，不再重试时返回None
+        """
+        if attempt >= self.max_attempts:
+            return None
+        delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+        delay *= 1 - self.jitter * random.random()
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_retry_after))
+        if time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+
+class RequestAttempts:
+    def __init__(self, policy, circuit_breaker, metrics, url, observe=None, cancelled=None):
+        """
+        一个请求的所有发送记录
+
+        参数：
+            policy (RetryPolicy): 重试策略
+            circuit_breaker (CircuitBreaker): 按主机熔断器
+            metrics (Metrics): 记录请求耗时、状态码、错误和重试次数
+            url (str): 请求地址
+            observe (callable): observe(耗时, 结果)，把每次发送的结果交给自适应并发上限（可选）
+            cancelled (callable): 返回备份是否已取消，已取消时不再重试（可选）
+
+        说明：
+            每次发送前先经过熔断器和限速器，再调用begin；连接错误调用failed，其他异常调用error，
+            收到响应调用response；返回等待秒数时等待后重发，返回None时结束（抛出错误或使用该响应）
+        """
+        self.policy = policy
+        self.circuit_breaker = circuit_breaker
+        self.metrics = metrics
+        self.url = url
+        self.observe = observe
+        self.cancelled = cancelled
+        self.deadline = policy.start()
+        self.attempt = 0
+        self._started = 0.0
+
+    def begin(self, timeout):
+        """
+        开始一次发送（熔断器放行和限速之后调用）
+
+        返回：
+            float: 本次发送的超时时间（不超过请求的剩余期限）
+        """
+        self.attempt += 1
+        self._started = time.perf_counter()
+        return self.policy.attempt_timeout(timeout, self.deadline)
+
+    def failed(self, error, timed_out=False):
+        """
+        发送失败（连接错误、超时或截断响应）
+
+        返回：
+            float: 重试前的等待秒数，不再重试时返回None（调用方抛出该错误）
+        """
+        elapsed = time.perf_counter() - self._started
+        self.metrics.observe('http_get', elapsed, error=True)
+        self.metrics.count('http_errors', type=type(error).__name__)
+        self._observe(elapsed, 'timeout' if timed_out else 'connection_error')
+        self.circuit_breaker.record_failure(self.url)
+        return self._retry_delay(type(error).__name__)
+
+    def error(self, error):
+        """发送时出现不可重试的异常（只记录指标）"""
+        self.metrics.observe('http_get', time.perf_counter() - self._started, error=True)
+        self.metrics.count('http_errors', type=type(error).__name__)
+
+    def response(self, status, size, retry_after=None):
+        """
+        收到响应
+
+        参数：
+            status (int): 状态码
+            size (int): 正文字节数
+            retry_after (str): Retry-After响应头
+
+        返回：
+            float: 重试前的等待秒数；不需要重试、重试用尽或已取消时返回None（调用方使用该响应）
+        """
+        elapsed = time.perf_counter() - self._started
+        self.metrics.observe('http_get', elapsed, size, error=status >= 500)
+        self.metrics.count('http_status', code=status)
+        self._observe(elapsed, classify_status(status))
+        if not self.policy.should_retry_status(status):
+            self.circuit_breaker.record_success(self.url)
+            return None
+        self.circuit_breaker.record_failure(self.url)
+        return self._retry_delay(f"HTTP {status}", parse_retry_after(retry_after))
+
+    def _observe(self, seconds, outcome):
+        if self.observe is not None:
+            self.observe(seconds, outcome)
+
+    def _retry_delay(self, reason, retry_after=None):
+        """下一次重试前的等待秒数（记录重试并提示），不再重试时返回None"""
+        delay = self.policy.next_delay(self.attempt, self.deadline, retry_after)
+        if delay is None or (self.cancelled is not None and self.cancelled()):
+            return None
+        self.metrics.count('http_retries', reason=reason)
+        print(f"  ⚠ 请求失败（{reason}），{delay:.1f} 秒后重试 [{self.attempt}/{self.policy.max_attempts}]")
+        return delay
+
+
+class _HostCircuit:
+    """单个主机的熔断状态"""
+    __slots__ = ('failures', 'state', 'open_until', 'recovery', 'probe_until')
+
+    def __init__(self, recovery):
+        self.failures = 0
+        self.state = 'closed'
+        self.open_until = 0.0
+        self.recovery = recovery
+        self.probe_until = 0.0
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, recovery_timeout=10.0, max_recovery_timeout=300.0):
+        """
+        初始化按主机熔断器
+
+        参数：
+            failure_threshold (int): 连续失败多少次后暂停该主机的请求
+            recovery_timeout (float): 第一次暂停的时间（秒）
+            max_recovery_timeout (float): 试探失败后暂停时间加倍的上限（秒）
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.recovery_timeout = float(recovery_timeout)
+        self.max_recovery_timeout = max(self.recovery_timeout, float(max_recovery_timeout))
+        self.opened = 0  # 进入断开状态的次数
+        self._hosts = {}
+        self._condition = threading.Condition()
+
+    def _circuit(self, url):
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        circuit = self._hosts.get(host)
+        if circuit is None:
+            circuit = self._hosts[host] = _HostCircuit(self.recovery_timeout)
+        return host, circuit
+
+    def state(self, url):
+        """主机当前状态：closed（正常）/ open（暂停）/ half_open（试探中）"""
+        with self._condition:
+            return self._circuit(url)[1].state
+
+    def _try_acquire(self, url):
+        """
+        尝试获得发送请求的许可（调用方持有锁）
+
+        返回：
+            float: 0表示可以发送，否则为建议的等待秒数
+        """
+        host, circuit = self._circuit(url)
+        now = time.monotonic()
+        if circuit.state == 'closed':
+            return 0.0
+        if circuit.state == 'open':
+            if now < circuit.open_until:
+                return circuit.open_until - now
+            circuit.state = 'half_open'
+        # 同一时间只放行一个试探请求；试探请求没有报告结果时，recovery秒后允许下一个
+        if now >= circuit.probe_until:
+            circuit.probe_until = now + circuit.recovery
+            print(f"  ↻ 试探后台是否恢复: {host}")
+            return 0.0
+        return min(circuit.probe_until - now, 1.0)
+
+    def before_request(self, url, deadline=None):
+        """
+        阻塞直到可以向该URL所属主机发送请求
+
+        参数：
+            deadline (float): 请求截止时间（time.monotonic()），等待会超过时抛出CircuitOpenError
+        """
+        with self._condition:
+            while True:
+                wait = self._try_acquire(url)
+                if not wait:
+                    return
+                if deadline is not None and time.monotonic() + wait >= deadline:
+                    raise CircuitOpenError(f"后台暂停中，请求期限内不会恢复: {url}")
+                self._condition.wait(wait)
+
+    async def before_request_async(self, url, deadline=None):
+        """异步等待直到可以向该URL所属主机发送请求（规则同before_request）"""
+        while True:
+            with self._condition:
+                wait = self._try_acquire(url)
+            if not wait:
+                return
+            if deadline is not None and time.monotonic() + wait >= deadline:
+                raise CircuitOpenError(f"后台暂停中，请求期限内不会恢复: {url}")
+            # 恢复时不会通知协程，分段等待以便及时继续
+            await asyncio.sleep(min(wait, 0.5))
+
+    def record_success(self, url):
+        """请求成功（主机有正常响应），恢复该主机的请求"""
+        with self._condition:
+            host, circuit = self._circuit(url)
+            if circuit.state != 'closed':
+                print(f"  ✓ 后台已恢复，继续请求: {host}")
+                self._condition.notify_all()
+            circuit.failures = 0
+            circuit.state = 'closed'
+            circuit.recovery = self.recovery_timeout
+            circuit.probe_until = 0.0
+
+    def record_failure(self, url):
+        """
+        请求失败（可重试的错误）
+
+        返回：
+            bool: 是否因此进入断开状态
+        """
+        with self._condition:
+            host, circuit = self._circuit(url)
+            circuit.failures += 1
+            if circuit.state == 'half_open':
+                # 试探失败，暂停时间加倍
+                circuit.recovery = min(circuit.recovery * 2, self.max_recovery_timeout)
+            elif circuit.state == 'open' or circuit.failures < self.failure_threshold:
+                return False
+            circuit.state = 'open'
+            circuit.open_until = time.monotonic() + circuit.recovery
+            circuit.probe_until = 0.0
+            self.opened += 1
+            print(f"  ⚠ 后台连续失败 {circuit.failures} 次，暂停所有请求 {circuit.recovery:.0f} 秒: {host}")
+            return True
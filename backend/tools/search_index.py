@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+章节全文检索（SQLite FTS5 + 中文二元分词）
+
+功能：为已备份章节的正文和作者有话说建立倒排索引，按关键词查找作品、章节和上下文片段
+
+说明：
+- 索引位于backup/search.sqlite3，所有备份目录共享
+- 分词：连续的中日韩文字按相邻两个字切分（"晋江文学" → 晋江 江文 文学），
+  英文和数字按整词（小写）切分，标点和空白只作分隔
+- 查询词按同样方式切分后作为FTS5短语查询，相邻的二元词必须连续出现，相当于子串匹配；
+  多个关键词用空格分隔，需同时出现在同一章节的正文（或作者有话说）中
+- 单个汉字按前缀查询，只能匹配以该字开头的二元词（出现在一段文字末尾时匹配不到）
+- FTS5表不保存原文（contentless），原文和章节信息保存在documents表，片段由原文截取
+- 章节保存时即更新索引；正文哈希未变化的章节跳过，重复备份不重复建立索引
+
+命令行：
+python tools/search_index.py search 关键词 [关键词...] [--novel 作品ID] [--limit 20]
+python tools/search_index.py index backup/20250101_120000 [...]   # 为已有备份目录建立索引
+（保存快照后章节日志已删除，index从backup/.store中该目录的快照读取章节）
+"""
+import os
+import re
+import glob
+import time
+import sqlite3
+import argparse
+import threading
+
+from chapter_journal import ChapterJournal, content_hash
+from object_store import ObjectStore, split_content
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    novel_id TEXT NOT NULL,
+    novel_title TEXT,
+    chapter_id TEXT NOT NULL,
+    chapter_number INTEGER,
+    chapter_title TEXT,
+    kind TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (novel_id, chapter_id, kind)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_novel ON documents (novel_id, chapter_number);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(tokens, content='', tokenize='unicode61');
+"""
+
+# 正文和作者有话说分别建立索引
+KINDS = ('body', 'note')
+KIND_NAMES = {'body': '正文', 'note': '作者有话说'}
+
+_WORD = re.compile(r'[^\W_]+')
+_CJK = re.compile(r'([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)')
+
+
+def tokenize(text):
+    """
+    把文本切分为索引词
+
+    返回：
+        list: 二元词（中日韩文字）和小写整词（英文、数字），按出现顺序
+    """
+    tokens = []
+    for word in _WORD.findall(text):
+        for segment in _CJK.split(word):
+            if not segment:
+                continue
+            if _CJK.fullmatch(segment):
+                if len(segment) == 1:
+                    tokens.append(segment)
+                else:
+                    tokens.extend(segment[i:i + 2] for i in range(len(segment) - 1))
+            else:
+                tokens.append(segment.lower())
+    return tokens
+
+
+def build_match_query(query):
+    """
+    把查询字符串转换为FTS5 MATCH表达式
+
+    返回：
+        str: MATCH表达式，查询中没有可检索的文字时返回None
+    """
+    phrases = []
+    for term in query.split():
+        tokens = tokenize(term)
+        if not tokens:
+            continue
+        if len(tokens) == 1 and _CJK.fullmatch(tokens[0]) and len(tokens[0]) == 1:
+            phrases.append(f'"{tokens[0]}"*')
+        else:
+            phrases.append('"' + ' '.join(tokens) + '"')
+    return ' AND '.join(phrases) or None
+
+
+def make_snippet(text, query, width=30, mark=('[', ']')):
+    """
+    截取第一个关键词附近的原文片段，关键词用mark标出
+
+    参数：
+        text (str): 原文
+        query (str): 查询字符串
+        width (int): 关键词前后保留的字数
+    """
+    lowered = text.lower()
+    position, length = -1, 0
+    for term in query.split():
+        position = lowered.find(term.lower())
+        if position >= 0:
+            length = len(term)
+            break
+    if position < 0:
+        # 关键词中间夹有标点等情况，只显示开头
+        snippet = text[:width * 2].replace('\n', ' ').strip()
+        return snippet + ('…' if len(text) > width * 2 else '')
+    start = max(0, position - width)
+    end = min(len(text), position + length + width)
+    snippet = (
+        text[start:position] + mark[0] + text[position:position + length] + mark[1]
+        + text[position + length:end]
+    ).replace('\n', ' ').strip()
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+
+class SearchIndex:
+    def __init__(self, path):
+        """
+        打开（或创建）全文索引
+
+        参数：
+            path (str): 数据库文件路径（':memory:'为内存数据库）
+        """
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            if path != ':memory:':
+                # WAL模式下synchronous=NORMAL不会损坏数据库，断电时最多丢失最近几次提交
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _replace_document(self, key, novel, chapter, kind, text):
+        """写入一条文档（调用方持有锁并处于事务中），内容未变化时返回False"""
+        digest = content_hash(text) if text is not None else None
+        row = self._conn.execute(
+            "SELECT id, content_hash, text FROM documents WHERE novel_id=? AND chapter_id=? AND kind=?",
+            key + (kind,)
+        ).fetchone()
+        if row is not None and row['content_hash'] == digest:
+            if text is not None:
+                # 正文未变化，只更新标题等章节信息
+                self._conn.execute(
+                    "UPDATE documents SET novel_title=?, chapter_number=?, chapter_title=? WHERE id=?",
+                    (novel.get('title'), chapter.get('chapter_number'), chapter.get('title'), row['id'])
+                )
+            return False
+        if row is not None:
+            # contentless表删除时需要提供原来的索引词
+            self._conn.execute(
+                "INSERT INTO documents_fts (documents_fts, rowid, tokens) VALUES ('delete', ?, ?)",
+                (row['id'], ' '.join(tokenize(row['text'])))
+            )
+            self._conn.execute("DELETE FROM documents WHERE id=?", (row['id'],))
+        if text is None:
+            return row is not None
+        cursor = self._conn.execute(
+            """
+            INSERT INTO documents (novel_id, chapter_id, novel_title, chapter_number, chapter_title,
+                                   kind, content_hash, text)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            key + (novel.get('title'), chapter.get('chapter_number'), chapter.get('title'), kind, digest, text)
+        )
+        self._conn.execute(
+            "INSERT INTO documents_fts (rowid, tokens) VALUES (?, ?)",
+            (cursor.lastrowid, ' '.join(tokenize(text)))
+        )
+        return True
+
+    def index_chapter(self, novel, chapter, content):
+        """
+        为一个章节建立（或更新）索引
+
+        参数：
+            novel (dict): 作品信息
+            chapter (dict): 章节信息
+            content (str): 章节内容（get_chapter_content的结果，含作者有话说）
+
+        返回：
+            bool: 是否有内容写入索引（正文哈希未变化时为False）
+        """
+        body, note = split_content(content)
+        key = (str(novel['id']), str(chapter['id']))
+        with self._lock, self._conn:
+            changed = self._replace_document(key, novel, chapter, 'body', body)
+            changed = self._replace_document(key, novel, chapter, 'note', note) or changed
+        return changed
+
+    def index_journal(self, journal_path):
+        """
+        为章节日志中的所有章节建立索引（已索引且未变化的章节跳过）
+
+        返回：
+            int: 写入索引的章节数
+        """
+        novel_record, offsets = ChapterJournal.index(journal_path)
+        if novel_record is None:
+            return 0
+        novel = novel_record['novel']
+        indexed = 0
+        with open(journal_path, 'rb') as journal:
+            for offset in offsets.values():
+                record = ChapterJournal.read_at(journal, offset)
+                if self.index_chapter(novel, record, record['content']):
+                    indexed += 1
+        return indexed
+
+    def index_snapshot(self, store, snapshot):
+        """
+        为快照中的所有章节建立索引（获取失败的章节和已索引且未变化的章节跳过）
+
+        参数：
+            store (ObjectStore): 快照所在的对象存储
+            snapshot (dict): ObjectStore.load_snapshot的结果
+
+        返回：
+            int: 写入索引的章节数
+        """
+        novel = snapshot['novel']
+        indexed = 0
+        for entry in snapshot['chapters']:
+            content = store.chapter_content(entry)
+            if content is not None and self.index_chapter(novel, entry, content):
+                indexed += 1
+        return indexed
+
+    def search(self, query, novel_id=None, limit=20, kinds=KINDS):
+        """
+        全文检索
+
+        参数：
+            query (str): 关键词，多个关键词用空格分隔
+            novel_id (str): 只在该作品中检索
+            limit (int): 最多返回的结果数
+            kinds (tuple): 检索范围（'body'正文 / 'note'作者有话说）
+
+        返回：
+            list: [{'novel_id', 'novel_title', 'chapter_id', 'chapter_number', 'chapter_title',
+                    'kind', 'snippet', 'score'}]，按相关度排序
+        """
+        match = build_match_query(query)
+        if match is None:
+            return []
+        sql = """
+            SELECT d.id, d.novel_id, d.novel_title, d.chapter_id, d.chapter_number, d.chapter_title,
+                   d.kind, d.text, f.rank AS score
+            FROM documents_fts f JOIN documents d ON d.id = f.rowid
+            WHERE documents_fts MATCH ?
+        """
+        params = [match]
+        if novel_id is not None:
+            sql += " AND d.novel_id = ?"
+            params.append(str(novel_id))
+        if tuple(kinds) != KINDS:
+            sql += f" AND d.kind IN ({','.join('?' * len(kinds))})"
+            params.extend(kinds)
+        sql += " ORDER BY f.rank LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        hits = []
+        for row in rows:
+            hit = {key: row[key] for key in ('novel_id', 'novel_title', 'chapter_id', 'chapter_number',
+                                              'chapter_title', 'kind', 'score')}
+            hit['snippet'] = make_snippet(row['text'], query)
+            hits.append(hit)
+        return hits
+
+    def stats(self):
+        """索引的文档数和原文总字数"""
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM documents").fetchone()
+        return {'documents': row[0], 'characters': row[1]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="已备份章节全文检索")
+    parser.add_argument('--db', default=os.path.join('backup', 'search.sqlite3'),
+                        help="索引路径（默认backup/search.sqlite3）")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    search_parser = subparsers.add_parser('search', help="检索关键词")
+    search_parser.add_argument('query', nargs='+', help="关键词（多个关键词需同时出现）")
+    search_parser.add_argument('--novel', help="只在该作品中检索")
+    search_parser.add_argument('--notes', action='store_true', help="只检索作者有话说")
+    search_parser.add_argument('--limit', type=int, default=20, help="最多显示的结果数（默认20）")
+
+    index_parser = subparsers.add_parser('index', help="为已有备份目录建立索引")
+    index_parser.add_argument('dirs', nargs='+', help="备份目录（如backup/20250101_120000）")
+    index_parser.add_argument('--store', help="快照所在的存储目录（默认备份目录旁的.store）")
+
+    args = parser.parse_args()
+    with SearchIndex(args.db) as index:
+        if args.command == 'search':
+            query = ' '.join(args.query)
+            started = time.perf_counter()
+            hits = index.search(query, novel_id=args.novel, limit=args.limit,
+                                kinds=('note',) if args.notes else KINDS)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            for hit in hits:
+                print(f"{hit['novel_title']}\t第{hit['chapter_number']}章 {hit['chapter_title']}\t"
+                      f"{KIND_NAMES[hit['kind']]}\n    {hit['snippet']}")
+            print(f"找到 {len(hits)} 条结果（{elapsed_ms:.1f} ms）")
+
+        elif args.command == 'index':
+            for backup_dir in args.dirs:
+                # 章节日志（快照保存失败或旧版本的备份）优先，其余作品从该目录的快照读取
+                journaled = set()
+                for journal_path in sorted(glob.glob(os.path.join(backup_dir, '*.journal.jsonl'))):
+                    novel_record, _ = ChapterJournal.index(journal_path)
+                    if novel_record is not None:
+                        journaled.add(str(novel_record['novel']['id']))
+                    print(f"✓ {journal_path}: 新建索引 {index.index_journal(journal_path)} 章")
+                store_dir = args.store or os.path.join(os.path.dirname(os.path.abspath(backup_dir)), '.store')
+                if not os.path.isdir(store_dir):
+                    continue
+                store = ObjectStore(store_dir)
+                run_id = os.path.basename(os.path.abspath(backup_dir))
+                for path in store.snapshots():
+                    snapshot = store.load_snapshot(path)
+                    if snapshot.get('run') != run_id or str(snapshot['novel']['id']) in journaled:
+                        continue
+                    print(f"✓ {path}: 新建索引 {index.index_snapshot(store, snapshot)} 章")
+            stats = index.stats()
+            print(f"索引共 {stats['documents']} 条，{stats['characters']} 字")
+
+
+if __name__ == "__main__":
+    main()